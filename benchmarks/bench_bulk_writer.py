@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+#
+# Benchmark for the sparrow-elastic NDJSON bulk path.
+#
+# Starts a local HTTP stub that answers _bulk like Elasticsearch (it counts
+# the actions in each body and returns a matching items list), then indexes
+# the same synthetic WiFi-sized documents through elasticsearch.helpers.bulk
+# (the previous path) and through ElasticsearchClient.bulk (NdjsonBulkWriter:
+# one serialization pass, gzip, byte-budget batches).  Reports docs/s and the
+# bytes that went over the wire.
+#
+# Usage: python3 benchmarks/bench_bulk_writer.py [--docs 20000] [--repeat 3] [--latency-ms 0]
+#
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import cast
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import elasticsearch.helpers
+
+from sparrow_elastic import bulk_writer
+from sparrow_elastic.elasticsearch_client import ElasticsearchClient
+
+class BulkStubServer(ThreadingHTTPServer):
+    def __init__(self, latency):
+        super().__init__(('127.0.0.1', 0), BulkStubHandler)
+        self.bytesReceived = 0
+        self.latency = latency
+
+class BulkStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('X-Elastic-Product', 'Elasticsearch')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.reply({'version': {'number': '8.17.0'}})
+
+    def do_POST(self):
+        server = cast(BulkStubServer, self.server)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server.bytesReceived += len(body)
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        numActions = body.count(b'\n') // 2
+        if server.latency:
+            time.sleep(server.latency)
+        self.reply({'took': 1, 'errors': False,
+                    'items': [{'index': {'status': 201}}] * numActions})
+
+    # helpers.bulk uses PUT /_bulk
+    do_PUT = do_POST
+
+def buildActions(numDocs):
+    actions = []
+    for i in range(numDocs):
+        mac = '02:%02x:%02x:%02x:%02x:%02x' % ((i >> 24) & 0xff, (i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff, (i * 7) & 0xff)
+        actions.append({
+            '_op_type': 'index',
+            '_index': 'sparrow-wifi',
+            '_id': '%032x' % i,
+            '_source': {
+                '@timestamp': '2026-05-01T14:00:00.000Z',
+                'event': {'kind': 'event', 'category': ['network'], 'dataset': 'sparrow.wifi'},
+                'observer': {'id': 'bench-sensor', 'hostname': 'bench-sensor', 'geo': {'location': {'lat': 38.8977, 'lon': -77.0365}}},
+                'source': {'mac': mac, 'address': mac},
+                'network': {'name': 'net-%d' % (i % 700), 'protocol': 'wifi'},
+                'wifi': {'channel': [1, 6, 36, 149][i % 4], 'frequency_mhz': [2412, 2437, 5180, 5745][i % 4],
+                         'bandwidth_mhz': 20 * (1 + i % 4), 'security': 'WPA2', 'cipher': 'CCMP',
+                         'signal_dbm': -40 - (i % 50), 'station_count': i % 12, 'vendor': 'Vendor %d' % (i % 40)},
+                'device': {'id': mac, 'class_guess': 'access_point', 'class_confidence': 0.8,
+                           'class_evidence': ['ssid_pattern', 'oui_vendor']},
+            },
+        })
+    return actions
+
+def timeRun(func, actions, server, repeat):
+    best = float('inf')
+    wireBytes = 0
+    for _ in range(repeat):
+        server.bytesReceived = 0
+        start = time.perf_counter()
+        success, errors = func(actions)
+        elapsed = time.perf_counter() - start
+        if success != len(actions) or errors:
+            print('ERROR: %d of %d indexed, %d errors' % (success, len(actions), len(errors)))
+            sys.exit(1)
+        if elapsed < best:
+            best = elapsed
+            wireBytes = server.bytesReceived
+    return best, wireBytes
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description='Benchmark helpers.bulk vs the NDJSON bulk writer against a local stub')
+    argparser.add_argument('--docs', help="Number of documents to index (default 20000)", default=20000, type=int)
+    argparser.add_argument('--repeat', help="Timing repetitions, best run is reported (default 3)", default=3, type=int)
+    argparser.add_argument('--latency-ms', help="Extra stub latency per _bulk request (default 0)", default=0.0, type=float)
+    args = argparser.parse_args()
+
+    server = BulkStubServer(args.latency_ms / 1000.0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:%d' % server.server_address[1]
+
+    actions = buildActions(args.docs)
+    client = ElasticsearchClient({'url': url})
+
+    def helpersBulk(batch):
+        return elasticsearch.helpers.bulk(client._client, batch, chunk_size=500,
+                                          raise_on_error=False, raise_on_exception=False)
+
+    helpersTime, helpersBytes = timeRun(helpersBulk, actions, server, args.repeat)
+    writerTime, writerBytes = timeRun(client.bulk, actions, server, args.repeat)
+
+    client.close()
+    server.shutdown()
+
+    print('Documents: %d, stub latency %.0f ms, json: %s' % (args.docs, args.latency_ms,
+                                                          'orjson' if bulk_writer._orjson is not None else 'stdlib'))
+    print('helpers.bulk:  %8.1f ms  (%9.0f docs/s)  %10d bytes sent' % (helpersTime * 1000.0, args.docs / helpersTime, helpersBytes))
+    print('ndjson writer: %8.1f ms  (%9.0f docs/s)  %10d bytes sent' % (writerTime * 1000.0, args.docs / writerTime, writerBytes))
+    print('speedup:       %8.2fx   bytes: %.1f%%' % (helpersTime / writerTime, 100.0 * writerBytes / helpersBytes))
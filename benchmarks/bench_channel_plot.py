@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+#
+# Benchmark for the 2.4 GHz channel plot.
+#
+# Plots the same synthetic networks two ways: one QLineSeries per network (the
+# way the main window drew them before ChannelPlotItem) and one ChannelPlotItem
+# for the whole band.  Each scan gives a share of the networks a new signal
+# level, then pending events (layout and repaint) are processed.  Both renderers get exactly the
+# same point lists; ChannelPlotItem's redraw rate cap is disabled so every
+# scan is painted.  Runs headless on the Qt "offscreen" platform.
+#
+# Usage: python3 benchmarks/bench_channel_plot.py [--networks 400] [--scans 20] [--changed 0.3]
+#
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtChart import QChart, QChartView, QLineSeries, QValueAxis
+from PyQt5.QtGui import QPen, QPainter
+from PyQt5.QtCore import Qt
+
+from sparrowchannelplot import ChannelTrace, ChannelPlotItem
+
+colors = [Qt.GlobalColor.black, Qt.GlobalColor.red, Qt.GlobalColor.darkRed, Qt.GlobalColor.green, Qt.GlobalColor.darkGreen, Qt.GlobalColor.blue, Qt.GlobalColor.darkBlue, Qt.GlobalColor.cyan, Qt.GlobalColor.darkCyan, Qt.GlobalColor.magenta, Qt.GlobalColor.darkMagenta, Qt.GlobalColor.darkGray]
+
+def tracePoints(channel, signal):
+    # Same shape mainWindow.plotSSID produces for a 20 MHz 2.4 GHz network
+    lowChannel = channel - 2
+    highChannel = channel + 2
+    points = []
+
+    if lowChannel <= 0:
+        points.append((0, signal))
+    else:
+        points.append((lowChannel, -100))
+        points.append((lowChannel, signal))
+
+    if highChannel >= 17:
+        points.append((17, signal))
+    else:
+        points.append((highChannel, signal))
+        points.append((highChannel, -100))
+
+    return points
+
+def createChart():
+    chart = QChart()
+    legend = chart.legend()
+    if legend is not None:
+        legend.hide()
+    xAxis = QValueAxis()
+    xAxis.setMin(0)
+    xAxis.setMax(16)
+    chart.addAxis(xAxis, Qt.AlignmentFlag.AlignBottom)
+    yAxis = QValueAxis()
+    yAxis.setMin(-100)
+    yAxis.setMax(-10)
+    chart.addAxis(yAxis, Qt.AlignmentFlag.AlignLeft)
+    view = QChartView(chart)
+    view.setRenderHint(QPainter.Antialiasing)
+    view.resize(900, 450)
+    view.show()
+    return chart, xAxis, yAxis, view
+
+def makeScans(numNetworks, numScans, changed, seed=1):
+    rng = random.Random(seed)
+    channels = [rng.choice([1, 6, 11, 3, 9]) for i in range(numNetworks)]
+    signals = [rng.randint(-95, -30) for i in range(numNetworks)]
+    scans = [list(signals)]
+
+    for scanNum in range(1, numScans):
+        for i in range(numNetworks):
+            if rng.random() < changed:
+                signals[i] = rng.randint(-95, -30)
+        scans.append(list(signals))
+
+    return channels, scans
+
+class SeriesPlot(object):
+    def __init__(self, channels, app):
+        self.chart, self.xAxis, self.yAxis, self.view = createChart()
+        self.series = []
+        for i, channel in enumerate(channels):
+            curSeries = QLineSeries()
+            pen = QPen(colors[i % len(colors)])
+            pen.setWidth(2)
+            curSeries.setPen(pen)
+            self.chart.addSeries(curSeries)
+            curSeries.attachAxis(self.xAxis)
+            curSeries.attachAxis(self.yAxis)
+            self.series.append(curSeries)
+
+    def update(self, channels, signals):
+        for curSeries, channel, signal in zip(self.series, channels, signals):
+            # The old plotSSID cleared and re-appended every series every scan
+            curSeries.clear()
+            for x, y in tracePoints(channel, signal):
+                curSeries.append(x, y)
+
+class TracePlot(object):
+    def __init__(self, channels, app):
+        self.chart, self.xAxis, self.yAxis, self.view = createChart()
+        app.processEvents()
+        self.plot = ChannelPlotItem(self.chart, self.xAxis, self.yAxis, maxRedrawRate=1000000.0)
+        self.traces = []
+        for i, channel in enumerate(channels):
+            trace = ChannelTrace(colors[i % len(colors)])
+            self.plot.addTrace(trace)
+            self.traces.append(trace)
+
+    def update(self, channels, signals):
+        for trace, channel, signal in zip(self.traces, channels, signals):
+            trace.setPoints(tracePoints(channel, signal))
+
+def runScans(plot, channels, scans, app):
+    scanTimes = []
+    for signals in scans:
+        start = time.perf_counter()
+        plot.update(channels, signals)
+        # Runs the chart's deferred layout and the resulting repaint
+        app.processEvents()
+        scanTimes.append(time.perf_counter() - start)
+    return scanTimes
+
+def main():
+    argParser = argparse.ArgumentParser(description='Channel plot rendering benchmark')
+    argParser.add_argument('--networks', help='Networks on the band (default 400)', default=400, type=int)
+    argParser.add_argument('--scans', help='Number of scans (default 20)', default=20, type=int)
+    argParser.add_argument('--changed', help='Share of networks whose signal changes per scan (default 0.3)', default=0.3, type=float)
+    args = argParser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    channels, scans = makeScans(args.networks, args.scans, args.changed)
+
+    seriesPlot = SeriesPlot(channels, app)
+    tracePlot = TracePlot(channels, app)
+
+    seriesTimes = runScans(seriesPlot, channels, scans, app)
+    traceTimes = runScans(tracePlot, channels, scans, app)
+
+    # Both renderers must end up with the same shapes
+    for curSeries, trace in zip(seriesPlot.series, tracePlot.traces):
+        seriesPoints = tuple((p.x(), p.y()) for p in curSeries.pointsVector())
+        if seriesPoints != tuple((float(x), float(y)) for x, y in trace.points):
+            print('ERROR: plotted points differ')
+            sys.exit(1)
+
+    seriesScan = sum(seriesTimes[1:]) / max(1, len(seriesTimes) - 1)
+    traceScan = sum(traceTimes[1:]) / max(1, len(traceTimes) - 1)
+
+    print('networks:      %8d' % args.networks)
+    print('scans:         %8d (%.0f%% of signals change per scan)' % (len(scans), args.changed * 100.0))
+    print('QLineSeries:   %8.1f ms per scan' % (seriesScan * 1000.0))
+    print('ChannelPlot:   %8.1f ms per scan' % (traceScan * 1000.0))
+    print('speedup:       %8.2fx' % (seriesScan / traceScan))
+
+if __name__ == '__main__':
+    main()
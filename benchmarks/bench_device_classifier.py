@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+#
+# Benchmark for sparrow_elastic.device_classifier.classify.
+#
+# Builds a synthetic batch of evidence dicts shaped like the ones the document
+# builder produces (WiFi: vendor + SSID; Bluetooth: vendor, name, appearance,
+# continuity type), checks that the compiled rule index returns exactly what
+# the linear rule scan returns, then times both.
+#
+# Usage: python3 benchmarks/bench_device_classifier.py [--docs 20000] [--repeat 5]
+#
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sparrow_elastic import device_classifier
+
+VENDORS = ['Apple, Inc.', 'Intel Corporate', 'Cisco Systems', 'Ubiquiti Inc', 'Espressif Inc.',
+           'SZ DJI Technology', 'Samsung Electronics', 'TP-LINK', 'Raspberry Pi', 'Sonos', None]
+SSIDS = ['home-wifi', 'HP-Print-3F-LaserJet', 'xfinitywifi', 'Canon_MG3600', 'NETGEAR42', 'DIRECT-roku-123',
+         'Starbucks WiFi', 'Ring Setup 12', '', 'Hue-bridge-01', 'linksys', 'ATT3kPq']
+BT_NAMES = ['AirPods Pro', 'JBL Flip 5', 'Galaxy Buds2', '', 'Apple Watch', 'Tile', 'MX Master 3',
+            'LE-Bose QC', 'fitbit', 'unknown', None]
+CONTINUITY = [None, None, 'airpods', 'nearby', 'handoff', 'iphone']
+
+def buildEvidence(numDocs):
+    docs = []
+    for i in range(numDocs):
+        if i % 3:
+            docs.append({
+                'oui_vendor': VENDORS[i % len(VENDORS)],
+                'bt_cod': None, 'bt_appearance': None, 'bt_name': None, 'bt_company': None,
+                'wifi_ssid': SSIDS[i % len(SSIDS)],
+                'wifi_vendor_ies': None, 'service_uuids': None, 'apple_continuity_type': None,
+            })
+        else:
+            docs.append({
+                'oui_vendor': VENDORS[(i // 3) % len(VENDORS)],
+                'bt_cod': None,
+                'bt_appearance': ((i % 70) << 6) if i % 4 else None,
+                'bt_name': BT_NAMES[i % len(BT_NAMES)],
+                'bt_company': 'Apple, Inc.' if i % 5 == 0 else '',
+                'wifi_ssid': None, 'wifi_vendor_ies': None, 'service_uuids': None,
+                'apple_continuity_type': CONTINUITY[i % len(CONTINUITY)],
+            })
+    return docs
+
+def timeClassifier(classifyFunc, docs, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for evidence in docs:
+            classifyFunc(evidence)
+        elapsed = time.perf_counter() - start
+        if elapsed < best:
+            best = elapsed
+    return best
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description='Benchmark the device classifier rule index')
+    argparser.add_argument('--docs', help="Number of evidence dicts to classify (default 20000)", default=20000, type=int)
+    argparser.add_argument('--repeat', help="Timing repetitions, best run is reported (default 5)", default=5, type=int)
+    args = argparser.parse_args()
+
+    ruleCount = device_classifier.reload_rules()
+    docs = buildEvidence(args.docs)
+
+    for evidence in docs:
+        if device_classifier.classify(evidence) != device_classifier._classify_linear(evidence):
+            print('ERROR: indexed classifier differs from the linear scan for %r' % evidence)
+            sys.exit(1)
+
+    linearTime = timeClassifier(device_classifier._classify_linear, docs, args.repeat)
+    indexedTime = timeClassifier(device_classifier.classify, docs, args.repeat)
+
+    print('Evidence dicts: %d, rules: %d' % (len(docs), ruleCount))
+    print('linear scan:   %8.1f ms  (%9.0f docs/s)' % (linearTime * 1000.0, len(docs) / linearTime))
+    print('rule index:    %8.1f ms  (%9.0f docs/s)' % (indexedTime * 1000.0, len(docs) / indexedTime))
+    print('speedup:       %8.2fx' % (linearTime / indexedTime))
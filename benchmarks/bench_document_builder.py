@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+#
+# Benchmark for the sparrow-elastic document builder's per-device cache.
+#
+# Builds a synthetic scan of distinct BSSIDs (mixed bands, widths, vendors and
+# fingerprint fields), then times build_wifi_document over several scan cycles
+# with and without a DocumentCache.  Between cycles only the volatile fields
+# change (signal, lastseen, station count), as they do on a live sensor.  The
+# cached documents are checked against the uncached ones before timing.
+#
+# Usage: python3 benchmarks/bench_document_builder.py [--bss 5000] [--cycles 5] [--repeat 3]
+#
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sparrow_elastic.document_builder import DocumentCache, build_wifi_document
+
+FREQUENCIES = [(2412, 1, 20), (2437, 6, 40), (5180, 36, 80), (5745, 149, 80), (5955, 1, 160), (2462, 11, 20)]
+VENDORS = ['Apple, Inc.', 'Cisco Systems', 'Ubiquiti Inc', 'Espressif Inc.', 'SZ DJI Technology', None]
+SECURITY = [('WPA2', 'CCMP', 'CCMP'), ('WPA3', 'CCMP', 'SAE'), ('Open', '', ''), ('WPA2', 'TKIP', 'PSK')]
+
+OBSERVER = {
+    'id': 'bench-sensor',
+    'hostname': 'bench-sensor',
+    'geo': {'lat': 38.8977, 'lon': -77.0365, 'alt': 20.0},
+    'gps_status': 'locked',
+}
+
+def buildScan(numBSS):
+    networks = []
+    for i in range(numBSS):
+        freq, channel, width = FREQUENCIES[i % len(FREQUENCIES)]
+        security, cipher, privacy = SECURITY[i % len(SECURITY)]
+        net = {
+            'macAddr': '02:%02x:%02x:%02x:%02x:%02x' % ((i >> 24) & 0xff, (i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff, (i * 7) & 0xff),
+            'ssid': 'net-%d' % (i % 700) if i % 9 else '',
+            'mode': 'Master',
+            'security': security,
+            'cipher': cipher,
+            'privacy': privacy,
+            'frequency': freq,
+            'channel': channel,
+            'secondaryChannel': channel + 4 if width >= 40 and freq < 3000 else 0,
+            'bandwidth': width,
+            'signal': -40 - (i % 50),
+            'stationcount': i % 12,
+            'utilization': (i % 100) / 100.0,
+            'firstseen': '2026-05-01 10:00:00',
+            'lastseen': '2026-05-01 10:00:00',
+            'strongestsignal': -35 - (i % 40),
+            'strongestlat': '38.8977',
+            'strongestlon': '-77.0365',
+            'strongestalt': '20.0',
+            'mac_vendor': VENDORS[i % len(VENDORS)],
+            'ht': True,
+            'vht': freq > 5000,
+            'he': i % 3 == 0,
+            'eht': False,
+        }
+        if i % 2:
+            net['vendor_ie_ouis'] = ['00:50:f2', '00:10:18', '50:6f:9a'][:1 + i % 3]
+            net['supported_rates'] = '1.0 2.0 5.5 11.0'
+            net['ht_capabilities'] = '0x%04x' % (i & 0xffff)
+        if i % 5 == 0:
+            net['wps_enabled'] = True
+            net['wps_uuid'] = '%032x' % i
+        networks.append(net)
+    return networks
+
+def advanceCycle(networks, cycle):
+    # Only the volatile fields move between scans
+    lastSeen = (datetime(2026, 5, 1, 10, 0, 0) + timedelta(seconds=15 * cycle)).strftime('%Y-%m-%d %H:%M:%S')
+    for i, net in enumerate(networks):
+        net['signal'] = -40 - ((i + cycle) % 50)
+        net['stationcount'] = (i + cycle) % 12
+        net['lastseen'] = lastSeen
+
+def runCycles(networks, cycles, cache):
+    docs = 0
+    start = time.perf_counter()
+    for cycle in range(cycles):
+        advanceCycle(networks, cycle)
+        now = datetime(2026, 5, 1, 14, 0, 0, tzinfo=timezone.utc) + timedelta(seconds=15 * cycle)
+        for net in networks:
+            build_wifi_document(net, OBSERVER, now, cache=cache)
+            docs += 1
+        if cache is not None:
+            cache.prune()
+    return docs, time.perf_counter() - start
+
+def bestRate(networks, cycles, repeat, useCache):
+    best = 0.0
+    for _ in range(repeat):
+        cache = DocumentCache() if useCache else None
+        docs, elapsed = runCycles(networks, cycles, cache)
+        rate = docs / elapsed
+        if rate > best:
+            best = rate
+    return best
+
+def checkParity(networks):
+    cache = DocumentCache()
+    now = datetime(2026, 5, 1, 14, 0, 0, tzinfo=timezone.utc)
+    for cycle in range(2):
+        advanceCycle(networks, cycle)
+        for net in networks:
+            if build_wifi_document(net, OBSERVER, now, cache=cache) != build_wifi_document(net, OBSERVER, now):
+                return False
+    return True
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description='Benchmark cached vs uncached ECS document building')
+    argparser.add_argument('--bss', help="Number of distinct BSSIDs in the synthetic scan (default 5000)", default=5000, type=int)
+    argparser.add_argument('--cycles', help="Scan cycles per timing run (default 5)", default=5, type=int)
+    argparser.add_argument('--repeat', help="Timing repetitions, best run is reported (default 3)", default=3, type=int)
+    args = argparser.parse_args()
+
+    networks = buildScan(args.bss)
+
+    if not checkParity(networks):
+        print('ERROR: cached documents differ from uncached documents')
+        sys.exit(1)
+
+    uncachedRate = bestRate(networks, args.cycles, args.repeat, False)
+    cachedRate = bestRate(networks, args.cycles, args.repeat, True)
+
+    print('Synthetic scan: %d BSSIDs x %d cycles' % (args.bss, args.cycles))
+    print('uncached:  %9.0f docs/s' % uncachedRate)
+    print('cached:    %9.0f docs/s  (first cycle builds the cache)' % cachedRate)
+    print('speedup:   %9.2fx' % (cachedRate / uncachedRate))
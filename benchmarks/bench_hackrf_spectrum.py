@@ -0,0 +1,164 @@
+#!/usr/bin/python3
+#
+# Benchmark for the HackRF spectrum store.
+#
+# Replays a hackrf_sweep capture through the original per-bin dict code
+# (frozen copy below) and through HackrfSpectrum, checks both report the same
+# channel powers, then times line parsing and channel aggregation.
+#
+# Record a capture with e.g.
+#   hackrf_sweep -f 2400:2500 -l 16 -g 24 -w 500000 > sweep24.txt
+# or leave out --file to replay a synthetic capture in the same format.
+#
+# Usage: python3 benchmarks/bench_hackrf_spectrum.py [--file sweep24.txt] [--band 24] [--sweeps 500] [--reads 2000]
+#
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from threading import Lock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sparrowhackrf import HackrfSpectrum, SparrowHackrf
+
+# band: (minFreq MHz, maxFreq MHz, binWidth Hz, aggregation range, inclusive, freq->channel, power offset)
+BANDS = {
+    '24': (2400, 2500, 500000, (2400000000, 3000000000), False, SparrowHackrf.fFreqTo24Channel, 25.0),
+    '5': (5170, 5840, 1600000, (5180000000, 5835000000), True, SparrowHackrf.fFreqTo5Channel, 30.0),
+}
+
+class LegacySpectrum(object):
+    # Frozen copy of the original HackrfSweepThread line handling and
+    # spectrum24ToChannels / spectrum5ToChannels, kept as the baseline.
+    def __init__(self, binWidth):
+        self.binWidth = binWidth
+        self.spectrum = {}
+        self.spectrumLock = Lock()
+
+    def addSweepLine(self, dataline):
+        dataline = dataline.replace('\n', '')
+        dataline = dataline.replace(' ', '')
+        data = dataline.split(',')
+
+        if len(data) > 6:
+            try:
+                startfreq = int(data[2])
+                numSamples = len(data) - 6
+                self.spectrumLock.acquire()
+
+                if numSamples > 0:
+                    for i in range(0, numSamples):
+                        self.spectrum[startfreq + i * self.binWidth] = float(data[i+6])
+
+                self.spectrumLock.release()
+            except:
+                pass
+
+    def toChannels(self, lowFreq, highFreq, inclusive, freqToChannel, powerOffset):
+        retVal = {}
+
+        self.spectrumLock.acquire()
+        try:
+            for curKey in self.spectrum.keys():
+                if curKey >= lowFreq and ((curKey <= highFreq) if inclusive else (curKey < highFreq)):
+                    curFreq = float(curKey)/1000000.0
+                    channel = freqToChannel(curFreq)
+                    power = self.spectrum[curKey] - powerOffset
+                    if power <= -100.0:
+                        power = -100.0
+                    retVal[channel] = power
+        except:
+            pass
+
+        self.spectrumLock.release()
+
+        return retVal
+
+def writeSyntheticCapture(fileName, minFreq, maxFreq, binWidth, numSweeps):
+    # Same layout as hackrf_sweep: one line per 5 MHz with the bins it covers
+    rng = random.Random(1)
+    binsPerLine = max(1, 5000000 // binWidth)
+
+    with open(fileName, 'w') as f:
+        for sweep in range(numSweeps):
+            freq = minFreq * 1000000
+            while freq < maxFreq * 1000000:
+                values = ', '.join('%.2f' % rng.uniform(-95.0, -40.0) for i in range(binsPerLine))
+                f.write('2026-01-01, 12:00:%02d.%06d, %d, %d, %.2f, %d, %s\n' % (sweep % 60, sweep, freq, freq + 5000000,
+                                                                                  binWidth, binsPerLine * 4, values))
+                freq += 5000000
+
+def timeIt(func, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    argParser = argparse.ArgumentParser(description='HackRF spectrum store benchmark')
+    argParser.add_argument('--file', help='Recorded hackrf_sweep output to replay (default: synthetic capture)', default=None)
+    argParser.add_argument('--band', help='Band the capture covers: 24 or 5 (default 24)', default='24', choices=sorted(BANDS.keys()))
+    argParser.add_argument('--sweeps', help='Sweeps in the synthetic capture (default 500)', default=500, type=int)
+    argParser.add_argument('--reads', help='Channel aggregation calls to time (default 2000)', default=2000, type=int)
+    args = argParser.parse_args()
+
+    minFreq, maxFreq, binWidth, (lowFreq, highFreq), inclusive, freqToChannel, powerOffset = BANDS[args.band]
+
+    fileName = args.file
+    tmpFile = None
+    if fileName is None:
+        tmpFile = tempfile.NamedTemporaryFile(suffix='.txt', delete=False)
+        tmpFile.close()
+        fileName = tmpFile.name
+        writeSyntheticCapture(fileName, minFreq, maxFreq, binWidth, args.sweeps)
+
+    try:
+        with open(fileName) as f:
+            lines = f.readlines()
+    finally:
+        if tmpFile is not None:
+            os.remove(tmpFile.name)
+
+    legacy = LegacySpectrum(binWidth)
+    store = HackrfSpectrum(minFreq, maxFreq, binWidth)
+
+    start = time.perf_counter()
+    for curLine in lines:
+        legacy.addSweepLine(curLine)
+    legacyParse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for curLine in lines:
+        store.addSweepLine(curLine)
+    store.publish()
+    storeParse = time.perf_counter() - start
+
+    legacyChannels = legacy.toChannels(lowFreq, highFreq, inclusive, freqToChannel, powerOffset)
+    storeChannels = store.toChannels(lowFreq, highFreq, freqToChannel, inclusive, powerOffset)
+
+    # Clamped 2.4 GHz edge channels are the strongest bin now, not the last one written
+    for channel, power in legacyChannels.items():
+        if channel in (-1.0, 16.0):
+            continue
+        if abs(storeChannels.get(channel, 1000.0) - power) > 1e-9:
+            print('ERROR: channel %s differs: %s vs %s' % (channel, power, storeChannels.get(channel)))
+            sys.exit(1)
+
+    legacyRead = timeIt(lambda: legacy.toChannels(lowFreq, highFreq, inclusive, freqToChannel, powerOffset), args.reads)
+    storeRead = timeIt(lambda: store.toChannels(lowFreq, highFreq, freqToChannel, inclusive, powerOffset), args.reads)
+
+    print('lines:         %8d (%s)' % (len(lines), args.file if args.file else 'synthetic, %d sweeps' % args.sweeps))
+    print('channels:      %8d' % len(storeChannels))
+    print('parse dict:    %8.0f lines/s' % (len(lines) / legacyParse))
+    print('parse numpy:   %8.0f lines/s' % (len(lines) / storeParse))
+    print('speedup:       %8.2fx' % (legacyParse / storeParse))
+    print('read dict:     %8.1f us per call' % (legacyRead * 1000000.0))
+    print('read numpy:    %8.1f us per call' % (storeRead * 1000000.0))
+    print('speedup:       %8.2fx' % (legacyRead / storeRead))
+
+if __name__ == '__main__':
+    main()
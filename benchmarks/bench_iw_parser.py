@@ -0,0 +1,280 @@
+#!/usr/bin/python3
+#
+# Benchmark for WirelessEngine.parseIWoutput.
+#
+# Builds a dense synthetic "iw dev <if> scan" dump out of the recorded scans in
+# tests/data/iw_scans (each BSS block is repeated with a rewritten BSSID), checks
+# that the single-pass parser produces the same networks as the original
+# regex-per-field parser, then times both.
+#
+# Usage: python3 benchmarks/bench_iw_parser.py [--bss 3000] [--repeat 5]
+#
+
+import argparse
+import datetime
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import wirelessengine
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'data', 'iw_scans')
+
+def legacyParseIWoutput(iwOutput):
+    # Frozen copy of the original regex-per-field WirelessEngine.parseIWoutput,
+    # kept here as the baseline for comparison.
+    p_bss = wirelessengine._P_BSS
+    p_ssid = wirelessengine._P_SSID
+    p_ess = wirelessengine._P_ESS
+    p_ess_privacy = wirelessengine._P_ESS_PRIVACY
+    p_ibss = wirelessengine._P_IBSS
+    p_ibss_privacy = wirelessengine._P_IBSS_PRIVACY
+    p_auth_suites = wirelessengine._P_AUTH_SUITES
+    p_pw_ciphers = wirelessengine._P_PW_CIPHERS
+    p_param_channel = wirelessengine._P_PARAM_CHANNEL
+    p_primary_channel = wirelessengine._P_PRIMARY_CHANNEL
+    p_freq = wirelessengine._P_FREQ
+    p_signal = wirelessengine._P_SIGNAL
+    p_ht = wirelessengine._P_HT
+    p_bw = wirelessengine._P_BW
+    p_secondary = wirelessengine._P_SECONDARY
+    p_thirdfreq = wirelessengine._P_THIRDFREQ
+    p_stationcount = wirelessengine._P_STATIONCOUNT
+    p_utilization = wirelessengine._P_UTILIZATION
+    retVal = {}
+    curNetwork = None
+    now=datetime.datetime.now()
+    
+    # This now supports direct from STDOUT via scanForNetworks,
+    # and input from a file as f.readlines() which returns a list
+    if type(iwOutput) == str:
+        inputLines = iwOutput.splitlines()
+    else:
+        inputLines = iwOutput
+        
+    for curLine in inputLines:
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_bss, curLine)
+            
+        if (len(fieldValue) > 0):
+            # New object
+            if curNetwork is not None:
+                # Store first
+                if curNetwork.channel > 0:
+                    # I did see incomplete output from iw where not all the data was there
+                    retVal[curNetwork.getKey()] = curNetwork
+
+            # Create a new network.  BSSID will be the header for each network
+            curNetwork = wirelessengine.WirelessNetwork()
+            curNetwork.lastSeen = now
+            curNetwork.firstSeen = now
+            curNetwork.macAddr = fieldValue
+            continue
+        
+        if curNetwork is None:
+            # If we don't have a network object yet, then we haven't
+            # seen a BSSID so just keep going through the lines.
+            continue
+
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_ssid, curLine)
+            
+        if (len(fieldValue) > 0):
+            curNetwork.ssid = wirelessengine.WirelessEngine.convertUnknownToString(fieldValue)
+            
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_ess, curLine)
+            
+        if (len(fieldValue) > 0):
+            curNetwork.mode = "AP"
+            # Had issue with WEP not showing up.
+            # If capability has "ESS Privacy" there's something there.
+            # If it's PSK, etc. there will be other RSN fields, etc.
+            # So for now start by assuming WEP
+            
+            # See: https://wiki.archlinux.org/index.php/Wireless_network_configuration
+            fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_ess_privacy, curLine)
+                
+            if (len(fieldValue) > 0):
+                curNetwork.security = "WEP"
+                curNetwork.privacy = "WEP"
+                
+            continue #Found the item
+            
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_ibss, curLine)
+            
+        if (len(fieldValue) > 0):
+            curNetwork.mode = "Ad Hoc"
+            curNetwork.security = "[Ad-Hoc] Open"
+
+            fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_ibss_privacy, curLine)
+                
+            if (len(fieldValue) > 0):
+                curNetwork.security = "[Ad-Hoc] WEP"
+                curNetwork.privacy = "WEP"
+                
+            continue #Found the item
+
+        # Station count
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_stationcount, curLine)
+        if (len(fieldValue) > 0):
+            curNetwork.stationcount = int(fieldValue)
+            continue #Found the item
+            
+        # Utilization
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_utilization, curLine)
+        if (len(fieldValue) > 0):
+            utilization = round(float(fieldValue)  / 255.0 * 100.0 * 100.0) / 100.0
+            curNetwork.utilization = utilization
+            continue #Found the item
+            
+        # Auth suites
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_auth_suites, curLine)
+            
+        if (len(fieldValue) > 0):
+            curNetwork.security = fieldValue
+            continue #Found the item
+            
+        # p = re.compile('.*?Group cipher: *(.*)')
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_pw_ciphers, curLine)
+        fieldValue = fieldValue.replace(' ', '/')
+            
+        if (len(fieldValue) > 0):
+            curNetwork.privacy = fieldValue
+            curNetwork.cipher = fieldValue
+            continue #Found the item
+            
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_param_channel, curLine)
+            
+        if (len(fieldValue) > 0):
+            curNetwork.channel = int(fieldValue)
+            continue #Found the item
+            
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_primary_channel, curLine)
+            
+        if (len(fieldValue) > 0):
+            curNetwork.channel = int(fieldValue)
+            continue #Found the item
+            
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_freq, curLine)
+            
+        if (len(fieldValue) > 0):
+            curNetwork.frequency = int(fieldValue)
+            continue #Found the item
+            
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_signal, curLine)
+            
+        # This test is different.  dBm is negative so can't test > 0.  10dBm is really high so lets use that
+        if (len(fieldValue) > 0):
+            curNetwork.signal = int(fieldValue)
+            curNetwork.strongestsignal = curNetwork.signal
+            continue #Found the item
+            
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_ht, curLine)
+            
+        if (len(fieldValue) > 0):
+            if (curNetwork.bandwidth == 20):
+                curNetwork.bandwidth = 40
+            continue #Found the item
+            
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_bw, curLine)
+            
+        if (len(fieldValue) > 0):
+            curNetwork.bandwidth = int(fieldValue)
+            continue #Found the item
+            
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_secondary, curLine)
+            
+        if (len(fieldValue) > 0):
+            curNetwork.secondaryChannelLocation = fieldValue
+            if (fieldValue == 'above'):
+                curNetwork.secondaryChannel = curNetwork.channel + 4
+            elif (fieldValue == 'below'):
+                curNetwork.secondaryChannel = curNetwork.channel - 4
+            # else it'll say 'no secondary'
+                
+            continue #Found the item
+            
+        fieldValue = wirelessengine.WirelessEngine.getFieldValue(p_thirdfreq, curLine)
+            
+        if (len(fieldValue) > 0):
+            curNetwork.thirdChannel = int(fieldValue)
+                
+            continue #Found the item
+            
+    # #### End loop ######
+    
+    # Add the last network
+    if curNetwork is not None:
+        if curNetwork.channel > 0:
+            # I did see incomplete output from iw where not all the data was there
+            retVal[curNetwork.getKey()] = curNetwork
+    
+    return retVal
+
+def loadCorpusBlocks():
+    blocks = []
+    for curFile in sorted(glob.glob(os.path.join(CORPUS_DIR, '*.txt'))):
+        with open(curFile, 'r') as f:
+            curBlock = None
+            for curLine in f.read().splitlines():
+                if curLine.startswith('BSS '):
+                    curBlock = [curLine]
+                    blocks.append(curBlock)
+                elif curBlock is not None:
+                    curBlock.append(curLine)
+    return blocks
+
+def buildDenseScan(numBSS):
+    blocks = loadCorpusBlocks()
+    lines = []
+    for i in range(numBSS):
+        block = blocks[i % len(blocks)]
+        # Rewrite the BSSID so every block is a distinct network
+        mac = '02:%02x:%02x:%02x:%02x:%02x' % ((i >> 24) & 0xff, (i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff, len(block) & 0xff)
+        lines.append('BSS ' + mac + block[0][21:])
+        lines.extend(block[1:])
+    return '\n'.join(lines) + '\n'
+
+def networksAsComparable(networks):
+    retVal = {}
+    for curKey, curNet in networks.items():
+        curDict = curNet.toJsondict()
+        del curDict['firstseen']
+        del curDict['lastseen']
+        retVal[curKey] = curDict
+    return retVal
+
+def timeParser(parseFunc, scanText, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parseFunc(scanText)
+        elapsed = time.perf_counter() - start
+        if elapsed < best:
+            best = elapsed
+    return best
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description='Benchmark the iw scan output parser')
+    argparser.add_argument('--bss', help="Number of BSS entries in the synthetic scan (default 3000)", default=3000, type=int)
+    argparser.add_argument('--repeat', help="Timing repetitions, best run is reported (default 5)", default=5, type=int)
+    args = argparser.parse_args()
+
+    scanText = buildDenseScan(args.bss)
+    numLines = scanText.count('\n')
+
+    legacyResult = networksAsComparable(legacyParseIWoutput(scanText))
+    newResult = networksAsComparable(wirelessengine.WirelessEngine.parseIWoutput(scanText))
+
+    if legacyResult != newResult:
+        print('ERROR: parser output differs from the legacy parser')
+        sys.exit(1)
+
+    legacyTime = timeParser(legacyParseIWoutput, scanText, args.repeat)
+    newTime = timeParser(wirelessengine.WirelessEngine.parseIWoutput, scanText, args.repeat)
+
+    print('Synthetic scan: %d BSS, %d lines, %d networks parsed' % (args.bss, numLines, len(newResult)))
+    print('legacy parser:      %8.1f ms  (%9.0f lines/s)' % (legacyTime * 1000.0, numLines / legacyTime))
+    print('single-pass parser: %8.1f ms  (%9.0f lines/s)' % (newTime * 1000.0, numLines / newTime))
+    print('speedup:            %8.2fx' % (legacyTime / newTime))
@@ -0,0 +1,298 @@
+#!/usr/bin/python3
+#
+# Benchmark for the main window's network table.
+#
+# Feeds the same synthetic scans (signal jitter, new networks appearing, old
+# ones going quiet and aging out) to a frozen copy of the old QTableWidget
+# update path and to NetworkTableModel behind a sorted NetworkSortFilterProxyModel
+# and QTableView, checks both end up showing the same rows, then times a full
+# scan cycle for each including the repaint.  Runs headless on the Qt
+# "offscreen" platform.
+#
+# Usage: python3 benchmarks/bench_network_table.py [--networks 2000] [--scans 20]
+#
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem, QTableView, QAbstractItemView
+from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtCore import Qt
+
+from wirelessengine import WirelessNetwork
+from sparrowtablewidgets import IntTableWidgetItem, DateTableWidgetItem, FloatTableWidgetItem
+from sparrownetworkmodel import NetworkTableModel, NetworkSortFilterProxyModel, NETWORK_TABLE_HEADERS, COL_SIGNAL
+
+SORT_COLUMN = COL_SIGNAL
+
+def makeNetwork(i, now, rng):
+    curNet = WirelessNetwork()
+    curNet.macAddr = '02:%02X:%02X:%02X:%02X:%02X' % ((i >> 32) & 0xff, (i >> 24) & 0xff, (i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff)
+    curNet.ssid = 'net-%05d' % i if i % 9 else ''
+    curNet.security = 'WPA2'
+    curNet.privacy = 'CCMP'
+    curNet.channel = rng.choice([1, 6, 11, 36, 44, 149])
+    curNet.frequency = 2412 if curNet.channel < 15 else 5180
+    curNet.signal = rng.randint(-95, -30)
+    curNet.strongestsignal = curNet.signal
+    curNet.stationcount = rng.randint(0, 20)
+    curNet.utilization = round(rng.random(), 2)
+    curNet.firstSeen = now
+    curNet.lastSeen = now
+    return curNet
+
+def makeScans(numNetworks, numScans, seed=1):
+    # Every scan sees ~90% of the known networks with a new signal and
+    # lastSeen, plus 1% brand new ones.  Networks that stop showing up age out.
+    rng = random.Random(seed)
+    now = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    known = numNetworks
+    scans = []
+
+    for scanNum in range(numScans):
+        scanTime = now + datetime.timedelta(seconds=10 * scanNum)
+        scan = {}
+        for i in range(known):
+            if scanNum > 0 and rng.random() < 0.1:
+                continue
+            curNet = makeNetwork(i, scanTime, random.Random(i))
+            curNet.signal = rng.randint(-95, -30)
+            scan[curNet.getKey()] = curNet
+        for i in range(known, known + (numNetworks // 100 if scanNum > 0 else 0)):
+            curNet = makeNetwork(i, scanTime, random.Random(i))
+            scan[curNet.getKey()] = curNet
+        known += numNetworks // 100 if scanNum > 0 else 0
+        scans.append((scanTime, scan))
+
+    return scans
+
+def cloneScan(scan):
+    # Both paths mutate the network objects (foundInList, firstSeen, ...)
+    clone = {}
+    for curKey, curNet in scan.items():
+        newNet = WirelessNetwork()
+        newNet.__dict__.update(curNet.__dict__)
+        clone[curKey] = newNet
+    return clone
+
+# ---------------- Legacy QTableWidget path (frozen copy) ----------------
+class LegacyTable(object):
+    def __init__(self):
+        self.networkTable = QTableWidget()
+        self.networkTable.setColumnCount(14)
+        self.networkTable.setHorizontalHeaderLabels(NETWORK_TABLE_HEADERS)
+        self.networkTable.setRowCount(0)
+        self.networkTable.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.vendorCache = {}
+
+    def cell(self, row, col):
+        # Every cell is filled in when its row is added
+        item = self.networkTable.item(row, col)
+        assert item is not None
+        return item
+
+    def vendor(self, macAddr):
+        if macAddr not in self.vendorCache:
+            self.vendorCache[macAddr] = 'Vendor ' + macAddr[:8]
+        return self.vendorCache[macAddr]
+
+    def populateUpdateExisting(self, wirelessNetworks):
+        numRows = self.networkTable.rowCount()
+
+        if numRows > 0:
+            networkLookup = {net.getKey(): net for net in wirelessNetworks.values()}
+
+            for curRow in range(0, numRows):
+                try:
+                    curData = self.cell(curRow, 2).data(Qt.ItemDataRole.UserRole+1)
+                except:
+                    curData = None
+
+                if (curData):
+                    curNet = networkLookup.get(curData.getKey())
+                    if curNet:
+                        self.cell(curRow, 1).setText(self.vendor(curNet.macAddr))
+                        self.cell(curRow, 3).setText(curNet.security)
+                        self.cell(curRow, 4).setText(curNet.privacy)
+                        self.cell(curRow, 5).setText(str(curNet.getChannelString()))
+                        self.cell(curRow, 6).setText(str(curNet.frequency))
+                        self.cell(curRow, 7).setText(str(curNet.signal))
+                        self.cell(curRow, 8).setText(str(curNet.bandwidth))
+                        self.cell(curRow, 9).setText(str(curNet.utilization))
+                        self.cell(curRow, 10).setText(str(curNet.stationcount))
+                        self.cell(curRow, 11).setText(curNet.lastSeen.strftime("%m/%d/%Y %H:%M:%S"))
+                        curNet.firstSeen = curData.firstSeen
+                        self.cell(curRow, 12).setText(curNet.firstSeen.strftime("%m/%d/%Y %H:%M:%S"))
+                        if curNet.gps.isValid:
+                            self.cell(curRow, 13).setText('Yes')
+                        else:
+                            self.cell(curRow, 13).setText('No')
+                        curNet.foundInList = True
+                        self.cell(curRow, 2).setData(Qt.ItemDataRole.UserRole+1, curNet)
+
+    def populateTable(self, wirelessNetworks, maxTime):
+        self.populateUpdateExisting(wirelessNetworks)
+
+        for curNet in wirelessNetworks.values():
+            if (curNet.foundInList):
+                continue
+
+            rowPosition = self.networkTable.rowCount()
+            rowPosition -= 1
+            addedFirstRow = False
+            if rowPosition < 0:
+                addedFirstRow = True
+                rowPosition = 0
+
+            self.networkTable.insertRow(rowPosition)
+
+            if (addedFirstRow):
+                self.networkTable.setRowCount(1)
+
+            self.networkTable.setItem(rowPosition, 0, QTableWidgetItem(curNet.macAddr))
+            tmpssid = curNet.ssid
+            if (len(tmpssid) == 0):
+                tmpssid = '<Unknown>'
+            newSSID = QTableWidgetItem(tmpssid)
+            newSSID.setForeground(QBrush(QColor(Qt.GlobalColor.green)))
+            newSSID.setData(Qt.ItemDataRole.UserRole, None)
+            newSSID.setData(Qt.ItemDataRole.UserRole+1, curNet)
+            newSSID.setData(Qt.ItemDataRole.UserRole+2, None)
+
+            self.networkTable.setItem(rowPosition, 1, QTableWidgetItem(self.vendor(curNet.macAddr)))
+            self.networkTable.setItem(rowPosition, 2, newSSID)
+            self.networkTable.setItem(rowPosition, 3, QTableWidgetItem(curNet.security))
+            self.networkTable.setItem(rowPosition, 4, QTableWidgetItem(curNet.privacy))
+            self.networkTable.setItem(rowPosition, 5, IntTableWidgetItem(str(curNet.getChannelString())))
+            self.networkTable.setItem(rowPosition, 6, IntTableWidgetItem(str(curNet.frequency)))
+            self.networkTable.setItem(rowPosition, 7,  IntTableWidgetItem(str(curNet.signal)))
+            self.networkTable.setItem(rowPosition, 8, IntTableWidgetItem(str(curNet.bandwidth)))
+            self.networkTable.setItem(rowPosition, 9, FloatTableWidgetItem(str(curNet.utilization)))
+            self.networkTable.setItem(rowPosition, 10, IntTableWidgetItem(str(curNet.stationcount)))
+            self.networkTable.setItem(rowPosition, 11, DateTableWidgetItem(curNet.lastSeen.strftime("%m/%d/%Y %H:%M:%S")))
+            self.networkTable.setItem(rowPosition, 12, DateTableWidgetItem(curNet.firstSeen.strftime("%m/%d/%Y %H:%M:%S")))
+            if curNet.gps.isValid:
+                self.networkTable.setItem(rowPosition, 13, QTableWidgetItem('Yes'))
+            else:
+                self.networkTable.setItem(rowPosition, 13, QTableWidgetItem('No'))
+
+        # ageOut
+        for i in range(self.networkTable.rowCount() - 1, -1, -1):
+            curData = self.cell(i, 2).data(Qt.ItemDataRole.UserRole+1)
+            if curData.lastSeen < maxTime:
+                self.networkTable.removeRow(i)
+
+        self.networkTable.sortItems(SORT_COLUMN, Qt.SortOrder.DescendingOrder)
+
+    def rows(self):
+        return [tuple(self.cell(r, c).text() for c in range(14)) for r in range(self.networkTable.rowCount())]
+
+    def widget(self):
+        return self.networkTable
+
+# ---------------- Model / view path ----------------
+class ModelTable(object):
+    def __init__(self):
+        self.vendorCache = {}
+        self.networkModel = NetworkTableModel(self.vendor)
+        self.networkProxy = NetworkSortFilterProxyModel()
+        self.networkProxy.setSourceModel(self.networkModel)
+        self.networkTable = QTableView()
+        self.networkTable.setModel(self.networkProxy)
+        self.networkTable.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.networkProxy.sort(SORT_COLUMN, Qt.SortOrder.DescendingOrder)
+
+    def vendor(self, macAddr):
+        if macAddr not in self.vendorCache:
+            self.vendorCache[macAddr] = 'Vendor ' + macAddr[:8]
+        return self.vendorCache[macAddr]
+
+    def populateTable(self, wirelessNetworks, maxTime):
+        # Same steps as mainWindow.populateUpdateExisting / populateTable / ageOut
+        updatedRows = []
+        for curNet in wirelessNetworks.values():
+            curRow = self.networkModel.rowForKey(curNet.getKey())
+            if curRow < 0:
+                continue
+            curNet.firstSeen = self.networkModel.network(curRow).firstSeen
+            curNet.foundInList = True
+            self.networkModel.replaceNetwork(curRow, curNet)
+            updatedRows.append(curRow)
+        self.networkModel.rowsUpdated(updatedRows)
+
+        newRows = [(curNet, None, QColor(Qt.GlobalColor.green)) for curNet in wirelessNetworks.values() if not curNet.foundInList]
+        self.networkModel.addNetworks(newRows)
+
+        agedRows = [i for i, curNet in enumerate(self.networkModel.networks()) if curNet.lastSeen < maxTime]
+        self.networkModel.removeNetworkRows(agedRows)
+
+    def rows(self):
+        return [tuple(self.networkProxy.index(r, c).data() for c in range(14)) for r in range(self.networkProxy.rowCount())]
+
+    def widget(self):
+        return self.networkTable
+
+def runScans(table, scans, app):
+    scanTimes = []
+    for scanTime, scan in scans:
+        scan = cloneScan(scan)
+        maxTime = scanTime - datetime.timedelta(seconds=25)
+        start = time.perf_counter()
+        table.populateTable(scan, maxTime)
+        # Let the view lay out and repaint the visible rows
+        table.widget().viewport().repaint()
+        app.processEvents()
+        scanTimes.append(time.perf_counter() - start)
+    return scanTimes
+
+def signalColumnSorted(rows):
+    signals = [int(row[SORT_COLUMN]) for row in rows]
+    return all(signals[i] >= signals[i+1] for i in range(len(signals) - 1))
+
+def main():
+    argParser = argparse.ArgumentParser(description='Network table update benchmark')
+    argParser.add_argument('--networks', help='Networks in the first scan (default 2000)', default=2000, type=int)
+    argParser.add_argument('--scans', help='Number of scans to feed (default 20)', default=20, type=int)
+    args = argParser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    scans = makeScans(args.networks, args.scans)
+
+    legacy = LegacyTable()
+    model = ModelTable()
+    for table in (legacy, model):
+        table.widget().resize(1400, 500)
+        table.widget().show()
+
+    legacyTimes = runScans(legacy, scans, app)
+    modelTimes = runScans(model, scans, app)
+
+    legacyRows = legacy.rows()
+    modelRows = model.rows()
+    if sorted(legacyRows) != sorted(modelRows):
+        print('ERROR: table contents differ (%d legacy rows, %d model rows)' % (len(legacyRows), len(modelRows)))
+        sys.exit(1)
+    if not signalColumnSorted(legacyRows) or not signalColumnSorted(modelRows):
+        print('ERROR: table is not sorted on signal')
+        sys.exit(1)
+
+    # The first scan is the initial load; the rest are steady-state updates
+    legacyUpdate = sum(legacyTimes[1:]) / max(1, len(legacyTimes) - 1)
+    modelUpdate = sum(modelTimes[1:]) / max(1, len(modelTimes) - 1)
+
+    print('rows:          %8d' % len(modelRows))
+    print('scans:         %8d' % len(scans))
+    print('QTableWidget:  %8.1f ms initial load, %8.1f ms per update scan' % (legacyTimes[0] * 1000.0, legacyUpdate * 1000.0))
+    print('model/view:    %8.1f ms initial load, %8.1f ms per update scan' % (modelTimes[0] * 1000.0, modelUpdate * 1000.0))
+    print('speedup:       %8.2fx' % (legacyUpdate / modelUpdate))
+
+if __name__ == '__main__':
+    main()
@@ -66,12 +66,21 @@ class AgentClient:
         payload = self._get('/wireless/interfaces')
         return self._normalize_interfaces(payload)
 
-    def wifi_scan(self, interface: str, channels: Optional[List[int]] = None, progress_cb=None) -> Dict[str, Any]:
+    def wifi_scan(
+        self,
+        interface: str,
+        channels: Optional[List[int]] = None,
+        progress_cb=None,
+        hunt_interfaces: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
         if progress_cb:
             progress_cb({'stage': 'running', 'message': f'Scanning Wi-Fi on {interface}'})
         chan_str = ''
         if channels:
             chan_str = '?Frequencies=' + ','.join(str(ch) for ch in channels)
+            if hunt_interfaces:
+                # The agent splits the channel list across these radios and scans them in parallel
+                chan_str += '&HuntInterfaces=' + ','.join(hunt_interfaces)
         path = f"/wireless/networks/{interface}{chan_str}"
         result = self._get(path)
         if progress_cb:
@@ -227,7 +236,8 @@ def execute_scan(
     if scan_type == ScanType.WIFI:
         if not interface:
             raise ValueError('Wi-Fi scans require an interface name')
-        return client.wifi_scan(interface, channels, progress_cb=progress_cb)
+        hunt_interfaces = extras.get('hunt_interfaces') if extras else None
+        return client.wifi_scan(interface, channels, progress_cb=progress_cb, hunt_interfaces=hunt_interfaces)
     if scan_type == ScanType.FALCON:
         if not interface:
             raise ValueError('Falcon scans require an interface name')
@@ -1,29 +1,260 @@
 from __future__ import annotations
 
-import asyncio
-from collections import defaultdict
-from typing import Any, Callable, Dict, List
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
 
 EventHandler = Callable[[Dict[str, Any]], None]
+NamedEventHandler = Callable[[str, Dict[str, Any]], None]
+CoalesceKey = Callable[[Dict[str, Any]], Hashable]
+
+# What a subscription does with a new event when its queue is full
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+
+class Subscription:
+    """One handler with its own bounded queue and worker thread.
+
+    Handlers run off the publisher's thread, so a slow exporter or notifier only
+    backs up its own queue.  Events for one subscription are handled in publish
+    order.  With a coalesce key for an event type, a queued event is replaced by
+    a newer one with the same key instead of queueing both (e.g. progress
+    updates for one scan).
+    """
+
+    def __init__(
+        self,
+        event_names: Iterable[str],
+        handler: NamedEventHandler,
+        name: str,
+        max_queue: int,
+        policy: str,
+        coalesce_keys: Optional[Dict[str, CoalesceKey]],
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.event_names = tuple(event_names)
+        self.handler = handler
+        self.name = name
+        self.max_queue = max(1, max_queue)
+        self.policy = policy
+        self.coalesce_keys = dict(coalesce_keys or {})
+
+        self._queue: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._busy = False
+        self._closed = False
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.handler_seconds_total = 0.0
+        self.handler_seconds_max = 0.0
+        self.queue_wait_seconds_max = 0.0
+
+    def put(self, event_name: str, payload: Dict[str, Any]) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self.published += 1
+            now = time.monotonic()
+
+            key: Hashable = ("seq", next(self._sequence))
+            coalesce_key = self.coalesce_keys.get(event_name)
+            if coalesce_key is not None:
+                try:
+                    key = ("coalesce", event_name, coalesce_key(payload))
+                except Exception:  # pylint: disable=broad-except
+                    pass
+                if key in self._queue:
+                    # Keep the original queue position and wait time
+                    self._queue[key] = (event_name, payload, self._queue[key][2])
+                    self.coalesced += 1
+                    return
+
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return
+                self._queue.popitem(last=False)
+
+            self._queue[key] = (event_name, payload, now)
+            self._ensure_worker()
+            self._condition.notify()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name=f"event-{self.name}", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                _, (event_name, payload, enqueued) = self._queue.popitem(last=False)
+                self._busy = True
+
+            started = time.monotonic()
+            try:
+                self.handler(event_name, payload)
+            except Exception as exc:  # pylint: disable=broad-except
+                self.errors += 1
+                print(f"Event handler error for {event_name} ({self.name}): {exc}")
+            finished = time.monotonic()
+
+            with self._condition:
+                self._busy = False
+                self.delivered += 1
+                elapsed = finished - started
+                self.handler_seconds_total += elapsed
+                self.handler_seconds_max = max(self.handler_seconds_max, elapsed)
+                self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, started - enqueued)
+                self._condition.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        # Lets the worker finish what is queued, then stop
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "events": list(self.event_names),
+                "name": self.name,
+                "policy": self.policy,
+                "coalescing": sorted(self.coalesce_keys.keys()),
+                "queue_depth": len(self._queue),
+                "max_queue": self.max_queue,
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "handler_seconds_avg": (self.handler_seconds_total / self.delivered) if self.delivered else 0.0,
+                "handler_seconds_max": self.handler_seconds_max,
+                "queue_wait_seconds_max": self.queue_wait_seconds_max,
+            }
 
 
 class EventBus:
+    DEFAULT_MAX_QUEUE = 1000
+
     def __init__(self) -> None:
-        self._subscribers: Dict[str, List[EventHandler]] = defaultdict(list)
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        event_name: str,
+        handler: EventHandler,
+        *,
+        name: Optional[str] = None,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        policy: str = DROP_OLDEST,
+        coalesce_key: Optional[CoalesceKey] = None,
+    ) -> Subscription:
+        if name is None:
+            qualname: Optional[str] = getattr(handler, "__qualname__", None)
+            name = qualname or repr(handler)
+        return self.subscribe_events(
+            [event_name],
+            lambda _event_name, payload: handler(payload),
+            name=name,
+            max_queue=max_queue,
+            policy=policy,
+            coalesce_keys={event_name: coalesce_key} if coalesce_key else None,
+        )
+
+    def subscribe_events(
+        self,
+        event_names: Iterable[str],
+        handler: NamedEventHandler,
+        *,
+        name: Optional[str] = None,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        policy: str = DROP_OLDEST,
+        coalesce_keys: Optional[Dict[str, CoalesceKey]] = None,
+    ) -> Subscription:
+        # One queue for several events, so the handler sees them in publish order.
+        # The handler is called as handler(event_name, payload).
+        if name is None:
+            qualname: Optional[str] = getattr(handler, "__qualname__", None)
+            name = qualname or repr(handler)
+        subscription = Subscription(event_names, handler, name, max_queue, policy, coalesce_keys)
+        with self._lock:
+            for event_name in subscription.event_names:
+                self._subscribers.setdefault(event_name, []).append(subscription)
+        return subscription
 
-    def subscribe(self, event_name: str, handler: EventHandler) -> None:
-        self._subscribers[event_name].append(handler)
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for event_name in subscription.event_names:
+                subscriptions = self._subscribers.get(event_name, [])
+                if subscription in subscriptions:
+                    subscriptions.remove(subscription)
+        subscription.close(timeout=0)
 
     def publish(self, event_name: str, payload: Dict[str, Any]) -> None:
-        for handler in list(self._subscribers.get(event_name, [])):
-            try:
-                handler(payload)
-            except Exception as exc:  # pylint: disable=broad-except
-                try:
-                    loop = asyncio.get_running_loop()
-                    loop.call_soon(handler, payload)
-                except RuntimeError:
-                    print(f"Event handler error for {event_name}: {exc}")
+        # Never blocks on handlers: each subscription queues the event for its worker
+        with self._lock:
+            subscriptions = list(self._subscribers.get(event_name, []))
+        for subscription in subscriptions:
+            subscription.put(event_name, payload)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for subscription in self._all():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not subscription.wait_idle(remaining):
+                return False
+        return True
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        return [subscription.metrics() for subscription in self._all()]
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        subscriptions = self._all()
+        with self._lock:
+            self._subscribers.clear()
+        deadline = time.monotonic() + timeout
+        for subscription in subscriptions:
+            subscription.close(max(0.0, deadline - time.monotonic()))
+
+    def _all(self) -> List[Subscription]:
+        # Each subscription once, even if it covers several events
+        with self._lock:
+            unique: Dict[int, Subscription] = {}
+            for subs in self._subscribers.values():
+                for subscription in subs:
+                    unique.setdefault(id(subscription), subscription)
+            return list(unique.values())
 
 
 event_bus = EventBus()
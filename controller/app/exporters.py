@@ -140,4 +140,5 @@ def setup_exporters() -> None:
             settings.elastic_index_bluetooth,
             settings.elastic_timeout_seconds,
         )
-        event_bus.subscribe('scan.completed', exporter.handle_scan_completed)
+        # Bulk indexing blocks on Elasticsearch; give it a modest queue of its own
+        event_bus.subscribe('scan.completed', exporter.handle_scan_completed, name='elastic', max_queue=100)
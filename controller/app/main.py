@@ -11,8 +11,10 @@ from fastapi.staticfiles import StaticFiles
 from .config import get_settings
 from .continuous import continuous_manager
 from .database import Base, engine, ensure_schema
+from .events import event_bus
 from .exporters import setup_exporters
 from .notifications import set_notification_loop, setup_notifications
+from .notifier import notifier
 from .routers import agents, falcon, scans, spectrum, stream, cellular
 from .routers import ingest
 
@@ -54,6 +56,13 @@ async def on_startup():
 @app.on_event("shutdown")
 async def on_shutdown():
     await continuous_manager.shutdown()
+    event_bus.shutdown()
+
+
+@app.get("/api/events/metrics")
+def event_metrics():
+    # Queue depth, drops and handler latency per event subscriber
+    return {"subscribers": event_bus.metrics(), "websocket": notifier.stats()}
 
 
 @app.get("/")
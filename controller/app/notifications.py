@@ -20,24 +20,28 @@ SUBSCRIBED_EVENTS = (
     'scan.completed',
     'scan.failed',
     'ingest.received',
+    'ingest.batch',
 )
 
 
+# Only the latest queued update per scan is worth sending to browsers
+COALESCE_KEYS = {
+    'scan.progress': lambda payload: payload.get('scan_id'),
+}
+
+
 def setup_notifications() -> None:
-    for event_name in SUBSCRIBED_EVENTS:
-        event_bus.subscribe(event_name, _make_handler(event_name))
-
-
-def _make_handler(event_name: str):
-    def handler(payload: Dict):
-        message = format_event(event_name, payload)
-        try:
-            loop = asyncio.get_running_loop()
-            loop.create_task(notifier.broadcast(message))
-        except RuntimeError:
-            if _event_loop:
-                asyncio.run_coroutine_threadsafe(notifier.broadcast(message), _event_loop)
-            else:
-                print(f"Event handler error for {event_name}: no event loop available")
-
-    return handler
+    # One queue for all of them so browsers never see a scan's progress after its completion
+    event_bus.subscribe_events(SUBSCRIBED_EVENTS, _handle_event, name='websocket', coalesce_keys=COALESCE_KEYS)
+
+
+def _handle_event(event_name: str, payload: Dict) -> None:
+    message = format_event(event_name, payload)
+    try:
+        loop = asyncio.get_running_loop()
+        loop.create_task(notifier.broadcast(message))
+    except RuntimeError:
+        if _event_loop:
+            asyncio.run_coroutine_threadsafe(notifier.broadcast(message), _event_loop)
+        else:
+            print(f"Event handler error for {event_name}: no event loop available")
@@ -1,41 +1,117 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Set
+import json
+from typing import Any, Dict, Optional, Set
 
 from fastapi import WebSocket
 
+# scan.completed messages bigger than this go out as a summary plus a link to the full scan
+SUMMARY_THRESHOLD_BYTES = 64 * 1024
+MAX_CLIENT_QUEUE = 100
+
+
+class ClientFilter:
+    """Which events and agents a WebSocket client asked for (None means all)."""
+
+    def __init__(self, events: Optional[Set[str]] = None, agents: Optional[Set[str]] = None) -> None:
+        self.events = events or None
+        self.agents = agents or None
+
+    @classmethod
+    def from_query(cls, events: Optional[str], agents: Optional[str]) -> "ClientFilter":
+        def split(value: Optional[str]) -> Optional[Set[str]]:
+            if not value:
+                return None
+            return {item.strip() for item in value.split(",") if item.strip()}
+
+        return cls(split(events), split(agents))
+
+    def matches(self, message: Dict[str, Any]) -> bool:
+        if self.events is not None and message.get("event") not in self.events:
+            return False
+        if self.agents is None:
+            return True
+
+        # Agents may be given by id or name; batch events carry a list of agents
+        candidates = [message]
+        candidates.extend(message.get("agents") or [])
+        for candidate in candidates:
+            if str(candidate.get("agent_id")) in self.agents or candidate.get("agent_name") in self.agents:
+                return True
+        return False
+
+
+class ClientConnection:
+    def __init__(self, websocket: WebSocket, client_filter: ClientFilter, max_queue: int) -> None:
+        self.websocket = websocket
+        self.filter = client_filter
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, text: str) -> None:
+        # Never waits on the socket: a full queue loses its oldest message
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(text)
+
 
 class ScanNotifier:
-    def __init__(self) -> None:
-        self.connections: Set[WebSocket] = set()
+    def __init__(self, max_client_queue: int = MAX_CLIENT_QUEUE) -> None:
+        self.connections: Dict[WebSocket, ClientConnection] = {}
+        self.max_client_queue = max_client_queue
         self._lock = asyncio.Lock()
 
-    async def connect(self, websocket: WebSocket) -> None:
+    async def connect(self, websocket: WebSocket, client_filter: Optional[ClientFilter] = None) -> None:
         await websocket.accept()
+        client = ClientConnection(websocket, client_filter or ClientFilter(), self.max_client_queue)
         async with self._lock:
-            self.connections.add(websocket)
+            self.connections[websocket] = client
+        client.task = asyncio.create_task(self._sender(client))
 
     async def disconnect(self, websocket: WebSocket) -> None:
         async with self._lock:
-            if websocket in self.connections:
-                self.connections.remove(websocket)
+            client = self.connections.pop(websocket, None)
+        if client and client.task and client.task is not asyncio.current_task():
+            client.task.cancel()
         try:
             await websocket.close()
         except Exception:
             pass
 
+    async def _sender(self, client: ClientConnection) -> None:
+        # One per client, so a slow browser only backs up its own queue
+        try:
+            while True:
+                text = await client.queue.get()
+                await client.websocket.send_text(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await self.disconnect(client.websocket)
+
     async def broadcast(self, message: dict) -> None:
         async with self._lock:
-            targets = list(self.connections)
-        dead = []
-        for connection in targets:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                dead.append(connection)
-        for connection in dead:
-            await self.disconnect(connection)
+            targets = [client for client in self.connections.values() if client.filter.matches(message)]
+        if not targets:
+            return
+
+        # Serialized once for every client
+        text = serialize_event(message)
+        for client in targets:
+            client.offer(text)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self.connections),
+            "queued": sum(client.queue.qsize() for client in self.connections.values()),
+            "dropped": sum(client.dropped for client in self.connections.values()),
+        }
 
 
 def format_event(event_name: str, payload: dict) -> dict:
@@ -44,4 +120,27 @@ def format_event(event_name: str, payload: dict) -> dict:
     return data
 
 
+def serialize_event(message: dict) -> str:
+    text = json.dumps(message, default=str)
+    if message.get("event") != "scan.completed" or len(text) <= SUMMARY_THRESHOLD_BYTES:
+        return text
+
+    summary = {key: value for key, value in message.items() if key != "response"}
+    summary["response_summary"] = summarize_response(message.get("response"))
+    summary["fetch_url"] = f"/api/scans/{message.get('scan_id')}"
+    return json.dumps(summary, default=str)
+
+
+def summarize_response(response: Any) -> Dict[str, Any]:
+    if not isinstance(response, dict):
+        return {}
+    summary: Dict[str, Any] = {}
+    for key, value in response.items():
+        if isinstance(value, list):
+            summary[key] = len(value)
+        elif isinstance(value, (str, int, float, bool)) or value is None:
+            summary[key] = value
+    return summary
+
+
 notifier = ScanNotifier()
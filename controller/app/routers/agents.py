@@ -8,7 +8,7 @@ from ..agent_client import AgentClient, AgentHTTPError
 from ..dependencies import get_db
 from ..models import Agent, ScanJob
 from ..schemas import AgentCreate, AgentRead
-from ..services import create_agent, refresh_agent_metadata
+from ..services import create_agent, invalidate_agent_cache_on_commit, refresh_agent_metadata
 
 router = APIRouter(prefix="/api/agents", tags=["agents"])
 
@@ -51,6 +51,7 @@ def delete_agent(agent_id: int, db: Session = Depends(get_db)):
     db.query(ScanJob).filter(ScanJob.agent_id == agent.id).delete()
     db.delete(agent)
     db.flush()
+    invalidate_agent_cache_on_commit(db)
 
 
 @router.get("/{agent_id}/interfaces")
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import json
+import zlib
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy import select
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
+from ..database import get_session
 from ..dependencies import get_db
 from ..events import event_bus
 from ..models import Agent, PushPayload
-from ..schemas import PushIngestRequest, PushRead
+from ..schemas import PushBatchRejection, PushBatchResult, PushIngestRequest, PushRead
+from ..services import resolve_push_agent
 
 router = APIRouter(prefix="/api/ingest", tags=["ingest"])
 
@@ -58,3 +65,152 @@ def ingest_payload(payload: PushIngestRequest, request: Request, db: Session = D
     )
 
     return push_row
+
+
+MAX_BATCH_ITEMS = 5000
+MAX_BATCH_BYTES = 64 * 1024 * 1024  # after decompression
+
+
+def _decode_batch(body: bytes, content_type: str, content_encoding: str) -> List[Any]:
+    if "gzip" in content_encoding:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, MAX_BATCH_BYTES + 1)
+        except zlib.error as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid gzip body: {exc}") from exc
+    if len(body) > MAX_BATCH_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Batch too large")
+
+    text = body.decode("utf-8", errors="replace")
+    if "ndjson" in content_type:
+        # Bad lines are rejected individually below rather than failing the batch
+        items: List[Any] = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as exc:
+                items.append(exc)
+    else:
+        try:
+            decoded = json.loads(text)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON body: {exc}") from exc
+        if isinstance(decoded, dict):
+            decoded = decoded.get("payloads")
+        if not isinstance(decoded, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expected a JSON array, {\"payloads\": [...]} or NDJSON",
+            )
+        items = decoded
+
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Too many payloads in batch")
+    return items
+
+
+def _store_batch(items: List[Any], api_key: Optional[str]) -> Tuple[PushBatchResult, bool]:
+    # Returns the result and whether every rejection was an auth failure
+    rejected: List[PushBatchRejection] = []
+    rows: List[Dict[str, Any]] = []
+    agents: Dict[int, str] = {}
+    auth_failures = 0
+    now = datetime.utcnow()
+
+    with get_session() as db:
+        for index, item in enumerate(items):
+            if isinstance(item, Exception):
+                rejected.append(PushBatchRejection(index=index, error=f"Invalid JSON: {item}"))
+                continue
+            try:
+                payload = PushIngestRequest.model_validate(item)
+            except ValidationError as exc:
+                rejected.append(PushBatchRejection(index=index, error=str(exc.errors()[0].get("msg", "Invalid payload"))))
+                continue
+
+            if not payload.agent_id and not payload.agent_name:
+                rejected.append(PushBatchRejection(index=index, error="agent_id or agent_name is required"))
+                continue
+
+            agent = resolve_push_agent(db, payload.agent_id, payload.agent_name)
+            if not agent:
+                rejected.append(PushBatchRejection(index=index, error="Agent not found"))
+                continue
+
+            agent_id, agent_name, agent_api_key = agent
+            if agent_api_key and api_key != agent_api_key:
+                auth_failures += 1
+                rejected.append(PushBatchRejection(index=index, error="Invalid API key"))
+                continue
+
+            agents[agent_id] = agent_name
+            rows.append(
+                {
+                    "agent_id": agent_id,
+                    "scan_type": payload.scan_type,
+                    "interface": payload.interface,
+                    "payload": payload.payload,
+                    "source": "push",
+                    "received_at": payload.received_at or now,
+                }
+            )
+
+        push_ids: List[int] = []
+        if rows:
+            # One multi-row INSERT for the whole batch
+            result = db.execute(
+                insert(PushPayload).returning(PushPayload.id, sort_by_parameter_order=True),
+                rows,
+            )
+            push_ids = list(result.scalars().all())
+
+    if rows:
+        summary: Dict[int, Dict[str, Any]] = {}
+        for push_id, row in zip(push_ids, rows):
+            entry = summary.setdefault(
+                row["agent_id"],
+                {"agent_id": row["agent_id"], "agent_name": agents[row["agent_id"]], "count": 0, "scan_types": {}, "push_ids": []},
+            )
+            entry["count"] += 1
+            scan_type = row["scan_type"].value
+            entry["scan_types"][scan_type] = entry["scan_types"].get(scan_type, 0) + 1
+            entry["push_ids"].append(push_id)
+
+        event_bus.publish(
+            "ingest.batch",
+            {
+                "count": len(rows),
+                "rejected": len(rejected),
+                "received_at": now.isoformat(),
+                "agents": list(summary.values()),
+            },
+        )
+
+    result = PushBatchResult(accepted=len(rows), push_ids=push_ids, rejected=rejected)
+    return result, bool(rejected) and auth_failures == len(rejected)
+
+
+def _decode_and_store_batch(
+    body: bytes, content_type: str, content_encoding: str, api_key: Optional[str]
+) -> Tuple[PushBatchResult, bool]:
+    # Decompressing and parsing a batch of up to MAX_BATCH_BYTES is as blocking as the insert
+    return _store_batch(_decode_batch(body, content_type, content_encoding), api_key)
+
+
+@router.post("/batch", response_model=PushBatchResult, status_code=status.HTTP_202_ACCEPTED)
+async def ingest_batch(request: Request):
+    # Body: JSON array, {"payloads": [...]} or NDJSON (application/x-ndjson), optionally
+    # gzip'd.  Each payload is shaped like POST /api/ingest; bad ones come back in
+    # "rejected" by index and the rest are stored.
+    result, auth_only = await run_in_threadpool(
+        _decode_and_store_batch,
+        await request.body(),
+        request.headers.get("content-type", ""),
+        request.headers.get("content-encoding", ""),
+        request.headers.get("X-API-Key"),
+    )
+    if result.accepted == 0 and auth_only:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+    return result
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+from typing import Optional
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-from ..notifier import notifier
+from ..notifier import ClientFilter, notifier
 
 router = APIRouter()
 
 
 @router.websocket("/ws/scans")
-async def scans_stream(websocket: WebSocket):
-    await notifier.connect(websocket)
+async def scans_stream(websocket: WebSocket, events: Optional[str] = None, agents: Optional[str] = None):
+    # ?events=scan.completed,scan.failed&agents=1,sensor-2 narrows what this client is sent
+    await notifier.connect(websocket, ClientFilter.from_query(events, agents))
     try:
         while True:
             await websocket.receive_text()
@@ -81,6 +81,17 @@ class PushRead(BaseModel):
         from_attributes = True
 
 
+class PushBatchRejection(BaseModel):
+    index: int
+    error: str
+
+
+class PushBatchResult(BaseModel):
+    accepted: int
+    push_ids: List[int]
+    rejected: List[PushBatchRejection] = []
+
+
 class FalconMonitorRequest(BaseModel):
     interface: str
 
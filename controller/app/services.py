@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional, Tuple, cast
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.orm import Session
 
 from .agent_client import AgentClient, execute_scan
@@ -28,11 +30,60 @@ def create_agent(session: Session, agent_in: AgentCreate) -> Agent:
     agent.capabilities = agent_in.capabilities
     session.add(agent)
     session.flush()
+    invalidate_agent_cache_on_commit(session)
 
     refresh_agent_metadata(session, agent)
     return agent
 
 
+# (agent id, name, api key) for push ingest, keyed by the (agent_id, agent_name)
+# pair the agent sends.  Misses are cached too so an unregistered agent pushing
+# every few seconds doesn't cost a query each time.
+AGENT_CACHE_TTL_SECONDS = 60.0
+PushAgent = Tuple[int, str, Optional[str]]
+_agent_cache: Dict[Tuple[Optional[int], Optional[str]], Tuple[float, Optional[PushAgent]]] = {}
+_agent_cache_lock = threading.Lock()
+# Bumped on every invalidation so a lookup that read the old rows can't store them afterwards
+_agent_cache_generation = 0
+
+
+def resolve_push_agent(
+    session: Session, agent_id: Optional[int], agent_name: Optional[str]
+) -> Optional[PushAgent]:
+    key = (agent_id, agent_name)
+    now = time.monotonic()
+    with _agent_cache_lock:
+        cached = _agent_cache.get(key)
+        generation = _agent_cache_generation
+    if cached and cached[0] > now:
+        return cached[1]
+
+    agent = None
+    if agent_id:
+        agent = session.get(Agent, agent_id)
+    if not agent and agent_name:
+        agent = session.execute(select(Agent).where(Agent.name == agent_name)).scalar_one_or_none()
+
+    resolved = cast(PushAgent, (agent.id, agent.name, agent.api_key)) if agent else None
+    with _agent_cache_lock:
+        if generation == _agent_cache_generation:
+            _agent_cache[key] = (now + AGENT_CACHE_TTL_SECONDS, resolved)
+    return resolved
+
+
+def invalidate_agent_cache() -> None:
+    global _agent_cache_generation
+    with _agent_cache_lock:
+        _agent_cache.clear()
+        _agent_cache_generation += 1
+
+
+def invalidate_agent_cache_on_commit(session: Session) -> None:
+    # Clearing before the commit would let a concurrent ingest re-cache the old
+    # rows for AGENT_CACHE_TTL_SECONDS
+    event.listen(session, "after_commit", lambda committed: invalidate_agent_cache(), once=True)
+
+
 def enqueue_scan(session: Session, scan_req: ScanRequest) -> ScanJob:
     agent = session.get(Agent, scan_req.agent_id)
     if not agent:
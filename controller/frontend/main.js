@@ -1957,7 +1957,8 @@ function updateLayerVisibility() {
 
 function initWebSocket() {
     const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
-    const wsUrl = `${protocol}://${window.location.host}/ws/scans`;
+    // The UI only uses scan lifecycle events; skip ingest traffic
+    const wsUrl = `${protocol}://${window.location.host}/ws/scans?events=scan.started,scan.progress,scan.completed,scan.failed`;
     state.ws = new WebSocket(wsUrl);
     state.ws.onmessage = (event) => {
         try {
@@ -1974,13 +1975,28 @@ function handleScanEvent(event) {
     if (event.event === 'scan.progress' && event.update?.snapshot) {
         ingestScanPayload(event.agent_id, event.scan_type, event.update.snapshot, event.scan_id);
     } else if (event.event === 'scan.completed') {
-        ingestScanPayload(event.agent_id, event.scan_type, event.response, event.scan_id);
+        if (event.fetch_url) {
+            // Large results arrive as a summary; pull the full scan
+            fetchCompletedScan(event).catch(err => console.error(err));
+        } else {
+            ingestScanPayload(event.agent_id, event.scan_type, event.response, event.scan_id);
+        }
         loadScans().catch(err => console.error(err));
     } else if (event.event === 'scan.started' || event.event === 'scan.failed') {
         loadScans().catch(err => console.error(err));
     }
 }
 
+async function fetchCompletedScan(event, attempts = 3) {
+    const scan = await fetchJSON(event.fetch_url);
+    if (!scan.response_payload && attempts > 1) {
+        // The event can beat the database commit by a moment
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        return fetchCompletedScan(event, attempts - 1);
+    }
+    ingestScanPayload(event.agent_id, event.scan_type, scan.response_payload, event.scan_id);
+}
+
 function logFalcon(message) {
     const timestamp = new Date().toLocaleTimeString();
     elements.falconStatusLog.textContent = `[${timestamp}] ${message}\n` + elements.falconStatusLog.textContent;
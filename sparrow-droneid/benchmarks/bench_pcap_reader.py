@@ -0,0 +1,211 @@
+#!/usr/bin/python3
+#
+# Benchmark for the WiFi capture parse path (DroneIDEngine._parse_loop).
+#
+# Replays a radiotap pcap through the original read / parse code (frozen copy
+# below) and through the current _parse_loop with PcapStreamReader, checks both
+# decode the same Remote ID frames, and reports frames/sec for each.
+#
+# Record a capture with e.g.
+#   sudo tcpdump -i wlan0mon -w capture.pcap 'wlan[0] == 0xd0 or wlan[0] == 0x80 or wlan[0] == 0x50'
+# or leave out --file to replay a synthetic capture: mostly ordinary beacons
+# with --odid-ratio of them ASTM beacon / NAN action Remote ID frames.
+#
+# Usage: python3 benchmarks/bench_pcap_reader.py [--file capture.pcap] [--frames 200000] [--odid-ratio 0.01]
+#
+
+import argparse
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sparrow_droneid'))
+
+from backend.droneid_engine import (DroneIDEngine, FrameExtractor, SUBTYPE_ACTION,
+                                    SUBTYPE_BEACON, SUBTYPE_PROBE_RESP)
+
+class LegacyParser(object):
+    # Frozen copy of the original _parse_loop / _read_exact /
+    # _process_pcap_frame / _process_frame, kept as the baseline.
+    def __init__(self, engine):
+        self.engine = engine
+        self.frameCount = 0
+
+    @staticmethod
+    def _read_exact(f, n):
+        data = b''
+        while len(data) < n:
+            chunk = f.read(n - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def run(self, f):
+        global_hdr = self._read_exact(f, 24)
+        magic = struct.unpack_from('<I', global_hdr, 0)[0]
+        endian = '<' if magic == 0xa1b2c3d4 else '>'
+
+        while True:
+            rec_hdr = self._read_exact(f, 16)
+            if rec_hdr is None or len(rec_hdr) < 16:
+                break
+            incl_len = struct.unpack_from(f'{endian}I', rec_hdr, 8)[0]
+            pkt_data = self._read_exact(f, incl_len)
+            if pkt_data is None or len(pkt_data) < incl_len:
+                break
+            self.frameCount += 1
+            self._process_pcap_frame(pkt_data)
+
+    def _process_pcap_frame(self, pkt_data):
+        if len(pkt_data) < 8:
+            return
+        rt_len = struct.unpack_from('<H', pkt_data, 2)[0]
+        if rt_len > len(pkt_data):
+            return
+        rssi = self.engine._extract_radiotap_rssi(pkt_data[:rt_len])
+        frame = pkt_data[rt_len:]
+        if len(frame) < 24:
+            return
+        sa_bytes = frame[10:16]
+        mac = ':'.join(f'{b:02x}' for b in sa_bytes)
+        header_info = {'rssi': rssi, 'mac': mac}
+        self._process_frame(frame, header_info)
+
+    def _process_frame(self, frame_bytes, header_info):
+        if len(frame_bytes) < 2:
+            return
+        fc = struct.unpack_from('<H', frame_bytes, 0)[0]
+        frame_type = (fc >> 2) & 0x03
+        subtype = (fc >> 4) & 0x0F
+        if frame_type != 0:
+            return
+        device = None
+        if subtype == SUBTYPE_ACTION:
+            device = FrameExtractor.extract_from_action(frame_bytes)
+        elif subtype in (SUBTYPE_BEACON, SUBTYPE_PROBE_RESP):
+            device = FrameExtractor.extract_from_beacon_or_probe(frame_bytes)
+        if device is None or not device.get_key():
+            return
+        device.rssi = header_info.get('rssi', 0)
+        device.mac_address = header_info.get('mac', '')
+        self.engine._track_device(device)
+
+class ReplayProc(object):
+    # Stands in for the tcpdump Popen: unbuffered stdout, like bufsize=0
+    def __init__(self, fileName):
+        self.stdout = open(fileName, 'rb', buffering=0)
+
+    def poll(self):
+        return 0
+
+def radiotap(rssi):
+    # TSFT, flags, rate, channel, dBm antenna signal -- what most drivers send
+    return struct.pack('<BBHIQBBHHb', 0, 0, 23, 0x2f, 0, 0x10, 2, 2437, 0x00a0, rssi)
+
+def ie(tag, body):
+    return bytes([tag, len(body)]) + body
+
+def mgmtHeader(subtype, sa):
+    return bytes([subtype << 4, 0]) + b'\x00\x00' + b'\xff' * 6 + sa + sa + b'\x10\x00'
+
+def odidPack(serial):
+    basicId = bytes([0x02, 0x12]) + serial.encode().ljust(20, b'\x00') + b'\x00' * 3
+    return bytes([0x00, 0xF2, 25, 1]) + basicId
+
+def plainBeacon(rng):
+    sa = bytes(rng.randrange(256) for i in range(6))
+    ies = (ie(0, ('net-%04d' % rng.randrange(10000)).encode()) +
+           ie(1, b'\x82\x84\x8b\x96\x0c\x12\x18\x24') +
+           ie(3, b'\x06') +
+           ie(5, b'\x00\x01\x00\x00') +
+           ie(7, b'US \x01\x0b\x1e') +
+           ie(45, b'\xad\x01\x1b\xff\xff' + b'\x00' * 21) +
+           ie(61, b'\x06' + b'\x00' * 21) +
+           ie(127, b'\x04\x00\x00\x00\x00\x00\x00\x40') +
+           ie(48, b'\x01\x00\x00\x0f\xac\x04\x01\x00\x00\x0f\xac\x04\x01\x00\x00\x0f\xac\x02\x0c\x00') +
+           ie(221, b'\x00\x50\xf2\x02\x01\x01\x80\x00\x03\xa4\x00\x00\x27\xa4\x00\x00\x42\x43\x5e\x00\x62\x32\x2f\x00') +
+           ie(221, b'\x00\x50\xf2\x04\x10\x4a\x00\x01\x10\x10\x44\x00\x01\x02'))
+    return mgmtHeader(SUBTYPE_BEACON, sa) + b'\x00' * 12 + ies
+
+def odidFrame(rng, i):
+    serial = 'SN-BENCH-%04d' % (i % 20)
+    sa = b'\x60\x60\x1f\x00\x00' + bytes([i % 20])
+    if i % 2:
+        ssi = odidPack(serial)
+        sda = b'\x00' * 6 + b'\x01\x00\x10' + bytes([len(ssi)]) + ssi
+        attr = bytes([0x03]) + struct.pack('<H', len(sda)) + sda
+        return mgmtHeader(SUBTYPE_ACTION, sa) + b'\x04\x09\x50\x6f\x9a\x13' + attr
+    return (mgmtHeader(SUBTYPE_BEACON, sa) + b'\x00' * 12 + ie(0, b'') +
+            ie(221, b'\xfa\x0b\xbc\x0d' + odidPack(serial)))
+
+def writeSyntheticCapture(fileName, numFrames, odidRatio):
+    rng = random.Random(1)
+    odidEvery = int(1 / odidRatio) if odidRatio > 0 else 0
+
+    with open(fileName, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 127))
+        for i in range(numFrames):
+            if odidEvery and i % odidEvery == 0:
+                frame = odidFrame(rng, i // odidEvery)
+            else:
+                frame = plainBeacon(rng)
+            pkt = radiotap(-40 - rng.randrange(50)) + frame
+            f.write(struct.pack('<IIII', i // 1000, i % 1000, len(pkt), len(pkt)) + pkt)
+
+def newEngine(devices):
+    engine = DroneIDEngine(None, None)
+    engine._track_device = lambda device: devices.append((device.get_key(), device.rssi, device.mac_address))
+    return engine
+
+def main():
+    argParser = argparse.ArgumentParser(description='WiFi pcap parse path benchmark')
+    argParser.add_argument('--file', help='Radiotap pcap to replay (default: synthetic capture)', default=None)
+    argParser.add_argument('--frames', help='Frames in the synthetic capture (default 200000)', default=200000, type=int)
+    argParser.add_argument('--odid-ratio', help='Share of Remote ID frames in the synthetic capture (default 0.01)', default=0.01, type=float)
+    args = argParser.parse_args()
+
+    fileName = args.file
+    tmpFile = None
+    if fileName is None:
+        tmpFile = tempfile.NamedTemporaryFile(suffix='.pcap', delete=False)
+        tmpFile.close()
+        fileName = tmpFile.name
+        writeSyntheticCapture(fileName, args.frames, args.odid_ratio)
+
+    try:
+        legacyDevices = []
+        legacy = LegacyParser(newEngine(legacyDevices))
+        with open(fileName, 'rb', buffering=0) as f:
+            start = time.perf_counter()
+            legacy.run(f)
+            legacyTime = time.perf_counter() - start
+
+        devices = []
+        engine = newEngine(devices)
+        engine._monitoring = True
+        engine._capture_proc = ReplayProc(fileName)
+        start = time.perf_counter()
+        engine._parse_loop()
+        newTime = time.perf_counter() - start
+        engine._capture_proc.stdout.close()
+    finally:
+        if tmpFile is not None:
+            os.remove(tmpFile.name)
+
+    if devices != legacyDevices or engine._frame_count != legacy.frameCount:
+        print('ERROR: decoded frames differ: %d vs %d detections, %d vs %d frames' % (
+            len(legacyDevices), len(devices), legacy.frameCount, engine._frame_count))
+        sys.exit(1)
+
+    print('frames:        %8d (%s)' % (engine._frame_count, args.file if args.file else 'synthetic, %.1f%% Remote ID' % (args.odid_ratio * 100)))
+    print('detections:    %8d' % len(devices))
+    print('legacy:        %8.0f frames/s' % (legacy.frameCount / legacyTime))
+    print('buffered:      %8.0f frames/s' % (engine._frame_count / newTime))
+    print('speedup:       %8.2fx' % (legacyTime / newTime))
+
+if __name__ == '__main__':
+    main()
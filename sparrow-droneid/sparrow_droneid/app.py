@@ -31,6 +31,7 @@ from backend.elasticsearch_engine import ElasticsearchEngine, _parse_iso_utc
 from backend.cert_manager import CertManager
 from backend.wifi_ssid_scanner import WifiSsidScanner
 from backend.supervisor import Supervisor
+from backend.live_feed import LiveFeed
 from backend.api_handler import (
     MultithreadHTTPServer, RequestHandler, set_engines,
 )
@@ -63,6 +64,7 @@ class SparrowDroneID:
         self.es_engine = None
         self.cert_manager = None
         self.wifi_ssid_scanner = None
+        self.live_feed = None
         self.supervisor: Supervisor = None  # type: ignore[assignment]
 
     def _check_prerequisites(self):
@@ -225,9 +227,13 @@ class SparrowDroneID:
                 flush_interval=int(db.get_setting('es_flush_interval', '5')),
             )
 
+        # Live feed for the web UI (sources wired in by set_engines)
+        self.live_feed = LiveFeed()
+
         # Wire detection callback: alert engine + CoT engine + Elasticsearch engine
         def on_detection(device):
             self.alert_engine.evaluate(device)
+            self.live_feed.notify_detection(device)
             if self.cot_engine.enabled:
                 self.cot_engine.send_event(device)
             if self.es_engine and self.es_engine._enabled:
@@ -253,8 +259,9 @@ class SparrowDroneID:
 
         self.droneid_engine.on_detection = on_detection
 
-        # Wire alert callback for Elasticsearch alert indexing
+        # Wire alert callback for the live feed and Elasticsearch alert indexing
         def on_alert(alert_event, device):
+            self.live_feed.publish_alert(alert_event, device)
             if self.es_engine and self.es_engine._enabled:
                 rx_lat, rx_lon, rx_alt = self.gps_engine.get_receiver_position()
                 self.es_engine.add_alert(
@@ -445,6 +452,7 @@ class SparrowDroneID:
             wifi_ssid_scanner=self.wifi_ssid_scanner,
             es_engine=self.es_engine,
             supervisor=self.supervisor,
+            live_feed=self.live_feed,
         )
 
         # Bind address
@@ -507,6 +515,7 @@ class SparrowDroneID:
         # restart a capture that is intentionally being torn down.
         if self.supervisor:
             self.supervisor.stop()
+        self.live_feed.stop()
 
         if self.droneid_engine.monitoring:
             print("Stopping monitor capture...")
@@ -518,6 +527,8 @@ class SparrowDroneID:
             self.es_engine.stop()
         if self.wifi_ssid_scanner:
             self.wifi_ssid_scanner.stop()
+        # Commit detections still queued (e.g. from the SSID scanner)
+        self.droneid_engine.flush_detections()
         self._httpd.server_close()
 
         ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -558,6 +569,7 @@ Examples:
   sudo %(prog)s --port 8080                  # Custom port
   sudo %(prog)s --interface wlan1            # Auto-start monitoring
   sudo %(prog)s --data /var/lib/droneid      # Custom data directory
+  %(prog)s --rebuild-drone-summary           # Recompute per-drone summary, then exit
         """
     )
 
@@ -578,8 +590,19 @@ Examples:
         help='WiFi interface to auto-start monitoring on (e.g., wlan0)',
     )
 
+    parser.add_argument(
+        '--rebuild-drone-summary', action='store_true',
+        help='Recompute the per-drone summary table from stored detections and exit',
+    )
+
     args = parser.parse_args()
 
+    if args.rebuild_drone_summary:
+        db_path = os.path.join(args.data or 'data', 'sparrow_droneid.db')
+        serials = get_db(db_path).rebuild_drone_summary()
+        print(f"Rebuilt drone summary for {serials} drone(s) in {db_path}")
+        return
+
     app = SparrowDroneID(
         port=args.port,
         html_dir=args.html_dir,
@@ -6,9 +6,11 @@ Provides a multithreaded HTTP server with:
 - IP/subnet allowlist and Bearer token authentication (API paths only)
 - Static file serving for the frontend SPA
 - Tile proxy with optional disk cache
+- Server-sent live feed via /api/v1/events
 - OpenAPI 3.0 compliance via /api/v1/openapi.json
 - Legacy /api/ → /api/v1/ redirect with Deprecation headers
 """
+import hashlib
 import ipaddress
 import json
 import mimetypes
@@ -32,6 +34,8 @@ from .alert_engine import AlertEngine, maps_pushpin_url
 from .cot_engine import CotEngine
 from .elasticsearch_engine import ElasticsearchEngine
 from .database import Database
+from .live_feed import LiveFeed
+from .models import simplify_track, bucket_track
 from .export import generate_kml
 from .cert_manager import CertManager
 from .wifi_ssid_scanner import WifiSsidScanner
@@ -60,6 +64,7 @@ _html_dir: Optional[str] = None
 _cert_manager: Optional[CertManager] = None
 _wifi_ssid_scanner: Optional[WifiSsidScanner] = None
 _supervisor: Optional[Supervisor] = None
+_live_feed: Optional[LiveFeed] = None
 
 # Startup timestamp for uptime calculation
 _start_time: datetime = datetime.now(timezone.utc)
@@ -90,10 +95,12 @@ def set_engines(droneid: DroneIDEngine, gps: GPSEngine, alert: AlertEngine,
                 cert_manager: Optional[CertManager] = None,
                 wifi_ssid_scanner: Optional[WifiSsidScanner] = None,
                 es_engine: Optional[ElasticsearchEngine] = None,
-                supervisor: Optional[Supervisor] = None) -> None:
+                supervisor: Optional[Supervisor] = None,
+                live_feed: Optional[LiveFeed] = None) -> None:
     """Called by app.py at startup to wire engine references into this module."""
     global _droneid_engine, _gps_engine, _alert_engine, _cot_engine, _es_engine
     global _db, _data_dir, _html_dir, _cert_manager, _wifi_ssid_scanner, _supervisor
+    global _live_feed
     _droneid_engine = droneid
     _gps_engine = gps
     _alert_engine = alert
@@ -105,6 +112,11 @@ def set_engines(droneid: DroneIDEngine, gps: GPSEngine, alert: AlertEngine,
     _cert_manager = cert_manager
     _wifi_ssid_scanner = wifi_ssid_scanner
     _supervisor = supervisor
+    _live_feed = live_feed
+    if live_feed is not None:
+        live_feed.get_drones = _drones_payload
+        live_feed.get_status = _status_payload
+        live_feed.resolve_vendor = alert.resolve_vendor if alert else None
 
 
 # ---------------------------------------------------------------------------
@@ -353,6 +365,28 @@ class RequestHandler(BaseHTTPRequestHandler):
         """Send success response — domain data directly, no wrapper."""
         self._send_json(data, status=status)
 
+    def _send_ok_etag(self, data: dict) -> None:
+        """Send success response with an ETag; 304 with no body if If-None-Match matches.
+
+        Browsers revalidate no-cache responses with If-None-Match on their
+        own, so fetch() callers get the cached body back on a 304.
+        """
+        body = json.dumps(data, default=str).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        client_tags = [t.strip().replace('W/', '', 1)
+                       for t in self.headers.get('If-None-Match', '').split(',')]
+        if etag in client_tags:
+            try:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache, must-revalidate')
+                self._send_cors_headers()
+                self.end_headers()
+            except BrokenPipeError:
+                pass
+            return
+        self._send_raw(body, 'application/json; charset=utf-8', extra_headers={'ETag': etag})
+
     # LEGACY — remove after burn-in period
     def _send_error_json(self, http_status: int, errcode: int, errmsg: str) -> None:
         self._send_json({'errcode': errcode, 'errmsg': errmsg}, status=http_status)
@@ -646,6 +680,11 @@ def _coerce_settings(raw: Dict[str, str]) -> Dict[str, Any]:
     'responses': {'200': response_ref('StatusResponse', 'Server status summary')},
 })
 def api_status(req: RequestHandler):
+    req._send_ok(_status_payload())
+
+
+def _status_payload() -> dict:
+    """/status body; also pushed to live feed clients."""
     engine_status = _droneid_engine.get_status() if _droneid_engine else {}
     gps_dict = _gps_engine.to_dict() if _gps_engine else {}
     db_stats = _require_db().get_stats() if _db else {}
@@ -657,7 +696,7 @@ def api_status(req: RequestHandler):
     # Build supervisor state for health fields (None when supervisor not started)
     sup_status = _supervisor.get_status() if _supervisor is not None else {}
 
-    req._send_ok({
+    return {
         'version': '1.0.0',
         'monitoring': engine_status.get('monitoring', False),
         'monitor_interface': engine_status.get('interface', ''),
@@ -694,7 +733,7 @@ def api_status(req: RequestHandler):
         'uptime_seconds': uptime,
         'db_size_bytes': db_stats.get('db_size_bytes', 0),
         'retention_days': retention,
-    })
+    }
 
 
 @router.route('GET', '/api/v1/openapi.json', spec={
@@ -928,10 +967,15 @@ def api_drones(req: RequestHandler):
         return
 
     max_age = req._qparam_int('max_age', 180)
-    drones = _droneid_engine.get_active_drones(max_age=max_age)
+    req._send_ok(_drones_payload(max_age, vendor=True))
+
+
+def _drones_payload(max_age: int = 180, vendor: bool = False) -> dict:
+    """/drones body.  The live feed resolves vendors itself (vendor=False)."""
+    drones = _droneid_engine.get_active_drones(max_age=max_age) if _droneid_engine else []
 
     # Enrich with vendor/manufacturer if available
-    if _alert_engine:
+    if vendor and _alert_engine:
         for d in drones:
             d['vendor'] = _alert_engine.resolve_vendor(
                 serial=d.get('serial_number', ''),
@@ -967,7 +1011,7 @@ def api_drones(req: RequestHandler):
         else:
             stale_count += 1
 
-    req._send_ok({
+    return {
         'receiver': receiver,
         'drones': drones,
         'counts': {
@@ -976,7 +1020,7 @@ def api_drones(req: RequestHandler):
             'stale': stale_count,
         },
         'timestamp': _utcnow_iso_z(),
-    })
+    }
 
 
 @router.route('GET', '/api/v1/drone-database', spec={
@@ -1082,6 +1126,112 @@ def api_drone_detail(req: RequestHandler, serial: str):
     req._send_ok({'drone': drone_dict, 'track': track})
 
 
+@router.route('GET', '/api/v1/tracks', spec={
+    'summary': 'Recent tracks for all active drones',
+    'tags': ['Detections'],
+    'parameters': [
+        qparam('minutes', 'integer', 'Minutes of track history per drone (default 10)', default=10),
+        qparam('max_age', 'integer', 'Include drones seen within this many seconds (default 180)', default=180),
+        qparam('since', 'integer', 'cursor from a previous response; drones with no newer detection are listed in unchanged without points'),
+        qparam('tolerance_m', 'number', 'Douglas-Peucker tolerance in metres (default 0 = off)', default=0),
+        qparam('bucket_s', 'integer', 'Keep one point per this many seconds (default 0 = off)', default=0),
+    ],
+    'responses': {
+        '200': response_ref('TracksResponse', 'Tracks keyed by serial number'),
+        '304': {'description': 'Not modified (If-None-Match matched the ETag)'},
+        '503': {'description': 'Database not available', 'content': {'application/json': {'schema': {'$ref': '#/components/schemas/ErrorResponse'}}}},
+    },
+})
+def api_tracks(req: RequestHandler):
+    if _db is None:
+        req._send_error(503, ErrorCode.SERVICE_UNAVAILABLE, 'Database not available')
+        return
+
+    minutes = max(1, req._qparam_int('minutes', 10))
+    max_age = max(1, req._qparam_int('max_age', 180))
+    since = req._qparam_int('since', -1)
+    bucket_s = max(0, req._qparam_int('bucket_s', 0))
+    try:
+        tolerance_m = max(0.0, float(req._qparam('tolerance_m', '0') or 0))
+    except (TypeError, ValueError):
+        req._send_error(400, ErrorCode.VALIDATION_ERROR, 'tolerance_m must be a number')
+        return
+
+    tracks, unchanged, cursor = _require_db().get_tracks(
+        minutes=minutes, max_age_seconds=max_age,
+        since_id=since if since >= 0 else None)
+
+    for serial, points in tracks.items():
+        if bucket_s:
+            points = bucket_track(points, bucket_s)
+        if tolerance_m:
+            points = simplify_track(points, tolerance_m)
+        tracks[serial] = points
+
+    req._send_ok_etag({
+        'tracks': tracks,
+        'unchanged': unchanged,
+        'cursor': cursor,
+        'minutes': minutes,
+    })
+
+
+# ---------------------------------------------------------------------------
+# Live feed
+# ---------------------------------------------------------------------------
+
+_EVENTS_RETRY_MS = 3000   # EventSource reconnect delay
+
+
+@router.route('GET', '/api/v1/events', spec={
+    'summary': 'Live drone, status and alert updates (server-sent events)',
+    'description': (
+        'text/event-stream.  A snapshot event (drones, receiver, counts, status) '
+        'is sent first, then drones events with upserts/removed keys, status '
+        'events and alerts events as things change.  Clients that fall behind '
+        'are disconnected and get a new snapshot when EventSource reconnects.  '
+        'Browsers that cannot keep the stream open should poll /drones, /status '
+        'and /alerts/log instead.'
+    ),
+    'tags': ['Detections'],
+    'responses': {
+        '200': {'description': 'Event stream', 'content': {'text/event-stream': {'schema': {'type': 'string'}}}},
+        '503': {'description': 'Live feed not available or at its client limit', 'content': {'application/json': {'schema': {'$ref': '#/components/schemas/ErrorResponse'}}}},
+    },
+})
+def api_events(req: RequestHandler):
+    if _live_feed is None:
+        req._send_error(503, ErrorCode.SERVICE_UNAVAILABLE, 'Live feed not available')
+        return
+
+    client = _live_feed.subscribe()
+    if client is None:
+        req._send_error(503, ErrorCode.SERVICE_UNAVAILABLE, 'Too many live feed clients')
+        return
+
+    try:
+        req.send_response(200)
+        req.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        req.send_header('Cache-Control', 'no-cache')
+        req.send_header('X-Accel-Buffering', 'no')   # don't let a reverse proxy buffer the stream
+        req._send_cors_headers()
+        req.end_headers()
+        req.wfile.write(f'retry: {_EVENTS_RETRY_MS}\n\n'.encode('ascii'))
+        req.wfile.flush()
+
+        while True:
+            message = client.next()
+            if message is None:
+                break
+            req.wfile.write(message or b': keepalive\n\n')
+            req.wfile.flush()
+    except OSError:
+        pass   # client went away (BrokenPipe / ConnectionReset)
+    finally:
+        _live_feed.unsubscribe(client)
+        req.close_connection = True
+
+
 # ---------------------------------------------------------------------------
 # Disposition
 # ---------------------------------------------------------------------------
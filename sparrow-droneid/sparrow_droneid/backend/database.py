@@ -2,7 +2,7 @@
 SQLite Database Access Layer for Sparrow DroneID.
 
 Thread-safe singleton with connection pooling.
-Tables: detections, alerts, settings.
+Tables: detections, drone_summary, alerts, settings.
 """
 import sqlite3
 import threading
@@ -19,6 +19,41 @@ from .models import DroneIDDevice, AlertEvent, AlertRule, DEFAULT_ALERT_RULES
 import json
 
 
+_INSERT_DETECTION_SQL = """
+    INSERT INTO detections (
+        serial_number, registration_id, id_type, ua_type,
+        drone_lat, drone_lon, drone_alt_geo, drone_alt_baro, drone_height_agl,
+        speed, direction, vertical_speed,
+        operator_lat, operator_lon, operator_alt,
+        operator_id, self_id_text,
+        takeoff_lat, takeoff_lon,
+        mac_address, rssi, protocol,
+        receiver_lat, receiver_lon, receiver_alt,
+        timestamp
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def detection_row(device: DroneIDDevice, receiver_lat: float = 0.0,
+                  receiver_lon: float = 0.0, receiver_alt: float = 0.0) -> tuple:
+    """Parameters for one detections INSERT.
+
+    serial_number is always first and timestamp always last.
+    """
+    return (
+        device.serial_number, device.registration_id, device.id_type, device.ua_type,
+        device.drone_lat, device.drone_lon, device.drone_alt_geo,
+        device.drone_alt_baro, device.drone_height_agl,
+        device.speed, device.direction, device.vertical_speed,
+        device.operator_lat, device.operator_lon, device.operator_alt,
+        device.operator_id, device.self_id_text,
+        device.takeoff_lat, device.takeoff_lon,
+        device.mac_address, device.rssi, device.protocol,
+        receiver_lat, receiver_lon, receiver_alt,
+        device.last_seen or _utcnow_iso_z(),
+    )
+
+
 class Database:
     """Thread-safe SQLite database with WAL mode for concurrent read/write."""
 
@@ -91,6 +126,58 @@ class Database:
                 )
             """)
 
+            # Drone summary — one row per serial, kept current by a trigger on
+            # detections so per-drone queries don't aggregate the whole table.
+            # operator_* is the latest non-zero operator position (NULL if none).
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'drone_summary'")
+            summary_is_new = cursor.fetchone() is None
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS drone_summary (
+                    serial_number TEXT PRIMARY KEY,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    detection_count INTEGER NOT NULL DEFAULT 0,
+                    latest_id INTEGER NOT NULL,
+                    operator_lat REAL,
+                    operator_lon REAL,
+                    operator_alt REAL,
+                    operator_seen TEXT
+                )
+            """)
+            # Ties on last_seen / operator_seen go to the newer row, matching
+            # "latest inserted wins" for frames stamped in the same microsecond.
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_detections_summary
+                AFTER INSERT ON detections
+                BEGIN
+                    INSERT INTO drone_summary (
+                        serial_number, first_seen, last_seen, detection_count, latest_id,
+                        operator_lat, operator_lon, operator_alt, operator_seen
+                    ) VALUES (
+                        NEW.serial_number, NEW.timestamp, NEW.timestamp, 1, NEW.id,
+                        CASE WHEN NEW.operator_lat <> 0 OR NEW.operator_lon <> 0 THEN NEW.operator_lat END,
+                        CASE WHEN NEW.operator_lat <> 0 OR NEW.operator_lon <> 0 THEN NEW.operator_lon END,
+                        CASE WHEN NEW.operator_lat <> 0 OR NEW.operator_lon <> 0 THEN NEW.operator_alt END,
+                        CASE WHEN NEW.operator_lat <> 0 OR NEW.operator_lon <> 0 THEN NEW.timestamp END
+                    )
+                    ON CONFLICT(serial_number) DO UPDATE SET
+                        first_seen = MIN(first_seen, excluded.first_seen),
+                        detection_count = detection_count + 1,
+                        latest_id = CASE WHEN excluded.last_seen >= last_seen
+                                         THEN excluded.latest_id ELSE latest_id END,
+                        last_seen = MAX(last_seen, excluded.last_seen),
+                        operator_lat = CASE WHEN excluded.operator_seen >= IFNULL(operator_seen, '')
+                                            THEN excluded.operator_lat ELSE operator_lat END,
+                        operator_lon = CASE WHEN excluded.operator_seen >= IFNULL(operator_seen, '')
+                                            THEN excluded.operator_lon ELSE operator_lon END,
+                        operator_alt = CASE WHEN excluded.operator_seen >= IFNULL(operator_seen, '')
+                                            THEN excluded.operator_alt ELSE operator_alt END,
+                        operator_seen = CASE WHEN excluded.operator_seen >= IFNULL(operator_seen, '')
+                                             THEN excluded.operator_seen ELSE operator_seen END;
+                END
+            """)
+
             # Alert log table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS alerts (
@@ -187,6 +274,7 @@ class Database:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_detections_serial ON detections(serial_number)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_detections_timestamp ON detections(timestamp)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_detections_serial_ts ON detections(serial_number, timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_drone_summary_last_seen ON drone_summary(last_seen)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_state ON alerts(state)")
             cursor.execute("""
@@ -200,6 +288,11 @@ class Database:
 
             self._init_defaults(cursor)
 
+            # Databases from before drone_summary existed: build it once from
+            # the detections already stored.
+            if summary_is_new:
+                self._rebuild_drone_summary(cursor)
+
         # Backfill geo for historic alerts that predate iteration 2.
         # Runs after the with-cursor block commits so the backfill sees the
         # new columns.  Guarded internally so re-runs are no-ops.
@@ -262,32 +355,21 @@ class Database:
                          receiver_alt: float = 0.0) -> int:
         """Insert a detection record. Returns the row id."""
         with self.get_cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO detections (
-                    serial_number, registration_id, id_type, ua_type,
-                    drone_lat, drone_lon, drone_alt_geo, drone_alt_baro, drone_height_agl,
-                    speed, direction, vertical_speed,
-                    operator_lat, operator_lon, operator_alt,
-                    operator_id, self_id_text,
-                    takeoff_lat, takeoff_lon,
-                    mac_address, rssi, protocol,
-                    receiver_lat, receiver_lon, receiver_alt,
-                    timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                device.serial_number, device.registration_id, device.id_type, device.ua_type,
-                device.drone_lat, device.drone_lon, device.drone_alt_geo,
-                device.drone_alt_baro, device.drone_height_agl,
-                device.speed, device.direction, device.vertical_speed,
-                device.operator_lat, device.operator_lon, device.operator_alt,
-                device.operator_id, device.self_id_text,
-                device.takeoff_lat, device.takeoff_lon,
-                device.mac_address, device.rssi, device.protocol,
-                receiver_lat, receiver_lon, receiver_alt,
-                device.last_seen or _utcnow_iso_z(),
-            ))
+            cursor.execute(_INSERT_DETECTION_SQL,
+                           detection_row(device, receiver_lat, receiver_lon, receiver_alt))
             return cursor.lastrowid or 0
 
+    def insert_detections(self, rows: List[tuple]) -> int:
+        """Insert pre-built detection rows (see detection_row) in one transaction.
+
+        Returns the number of rows inserted.
+        """
+        if not rows:
+            return 0
+        with self.get_cursor() as cursor:
+            cursor.executemany(_INSERT_DETECTION_SQL, rows)
+        return len(rows)
+
     def get_active_drones(self, max_age_seconds: int = 180) -> List[Dict]:
         """Get the latest detection for each drone seen within max_age_seconds.
 
@@ -296,19 +378,10 @@ class Database:
         cutoff = (datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)).isoformat().replace('+00:00', 'Z')
         with self.get_cursor() as cursor:
             cursor.execute("""
-                SELECT d.*, fs.first_seen FROM detections d
-                INNER JOIN (
-                    SELECT serial_number, MAX(timestamp) as max_ts
-                    FROM detections
-                    WHERE timestamp > ?
-                    GROUP BY serial_number
-                ) latest ON d.serial_number = latest.serial_number AND d.timestamp = latest.max_ts
-                INNER JOIN (
-                    SELECT serial_number, MIN(timestamp) as first_seen
-                    FROM detections
-                    GROUP BY serial_number
-                ) fs ON d.serial_number = fs.serial_number
-                ORDER BY d.timestamp DESC
+                SELECT d.*, s.first_seen FROM drone_summary s
+                INNER JOIN detections d ON d.id = s.latest_id
+                WHERE s.last_seen > ?
+                ORDER BY s.last_seen DESC
             """, (cutoff,))
             rows = [dict(row) for row in cursor.fetchall()]
             for row in rows:
@@ -319,20 +392,14 @@ class Database:
         """Get the latest detection for a specific drone."""
         with self.get_cursor() as cursor:
             cursor.execute("""
-                SELECT * FROM detections
-                WHERE serial_number = ?
-                ORDER BY timestamp DESC LIMIT 1
+                SELECT d.*, s.first_seen FROM drone_summary s
+                INNER JOIN detections d ON d.id = s.latest_id
+                WHERE s.serial_number = ?
             """, (serial,))
             row = cursor.fetchone()
             if not row:
                 return None
             result = dict(row)
-            cursor.execute(
-                "SELECT MIN(timestamp) as first_seen FROM detections WHERE serial_number = ?",
-                (serial,)
-            )
-            fs = cursor.fetchone()
-            result['first_seen'] = fs['first_seen'] if fs else result['timestamp']
             result['last_seen'] = result['timestamp']
             return result
 
@@ -349,6 +416,60 @@ class Database:
             """, (serial, cutoff))
             return [dict(row) for row in cursor.fetchall()]
 
+    def get_tracks(self, minutes: int = 10, max_age_seconds: int = 180,
+                   since_id: Optional[int] = None) -> Tuple[Dict[str, List[Dict]], List[str], int]:
+        """Track points (oldest first) for every drone seen in the last max_age_seconds.
+
+        Returns (tracks, unchanged, cursor).  cursor is the newest detection id
+        when the query ran.  When since_id is a cursor from an earlier call,
+        drones with no newer detection are only listed in unchanged, without
+        points.  Points without a position are left out.
+        """
+        now = datetime.now(timezone.utc)
+        active_cutoff = (now - timedelta(seconds=max_age_seconds)).isoformat().replace('+00:00', 'Z')
+        track_cutoff = (now - timedelta(minutes=minutes)).isoformat().replace('+00:00', 'Z')
+
+        with self.get_cursor() as cursor:
+            # Taken first: rows committed while the points are read are sent
+            # again next time rather than missed.
+            cursor.execute("SELECT IFNULL(MAX(id), 0) AS max_id FROM detections")
+            max_id = cursor.fetchone()['max_id']
+
+            # latest_id is the newest-timestamp row; a late, older-timestamped
+            # detection gets a higher id without moving it, so compare against
+            # the highest id per drone (a lookup on idx_detections_serial).
+            cursor.execute("""
+                SELECT s.serial_number,
+                       (SELECT MAX(d.id) FROM detections d
+                        WHERE d.serial_number = s.serial_number) AS max_id
+                FROM drone_summary s
+                WHERE s.last_seen > ? AND s.serial_number != ''
+            """, (active_cutoff,))
+            changed = []
+            unchanged = []
+            for row in cursor.fetchall():
+                if since_id is not None and row['max_id'] <= since_id:
+                    unchanged.append(row['serial_number'])
+                else:
+                    changed.append(row['serial_number'])
+
+            tracks: Dict[str, List[Dict]] = {serial: [] for serial in changed}
+            if changed:
+                cursor.execute(f"""
+                    SELECT serial_number, drone_lat, drone_lon, drone_alt_geo,
+                           drone_height_agl, speed, direction, rssi, timestamp
+                    FROM detections
+                    WHERE serial_number IN ({','.join('?' * len(changed))})
+                      AND timestamp > ?
+                      AND (drone_lat <> 0 OR drone_lon <> 0)
+                    ORDER BY serial_number, timestamp ASC
+                """, changed + [track_cutoff])
+                for row in cursor.fetchall():
+                    point = dict(row)
+                    tracks[point.pop('serial_number')].append(point)
+
+        return tracks, sorted(unchanged), max_id
+
     # ==================== History / Replay Operations ====================
 
     def get_history(self, from_ts: str, to_ts: str, serial: Optional[str] = None,
@@ -662,10 +783,33 @@ class Database:
     # ==================== Data Maintenance ====================
 
     def purge_detections(self, before_ts: str) -> int:
-        """Delete detection records older than the given timestamp."""
+        """Delete detection records older than the given timestamp.
+
+        Only the drone_summary rows of serials that had detections before the
+        cutoff are recomputed, in the same transaction.
+        """
         with self.get_cursor() as cursor:
             cursor.execute("DELETE FROM detections WHERE timestamp < ?", (before_ts,))
-            return cursor.rowcount
+            deleted = cursor.rowcount
+
+            # Every detection of these serials is gone
+            cursor.execute("DELETE FROM drone_summary WHERE last_seen < ?", (before_ts,))
+            cursor.execute("""
+                UPDATE drone_summary SET
+                    first_seen = (SELECT MIN(timestamp) FROM detections d
+                                  WHERE d.serial_number = drone_summary.serial_number),
+                    detection_count = (SELECT COUNT(*) FROM detections d
+                                       WHERE d.serial_number = drone_summary.serial_number)
+                WHERE first_seen < ?
+            """, (before_ts,))
+            # The latest operator position was purged, so every older one was too
+            cursor.execute("""
+                UPDATE drone_summary SET
+                    operator_lat = NULL, operator_lon = NULL,
+                    operator_alt = NULL, operator_seen = NULL
+                WHERE operator_seen < ?
+            """, (before_ts,))
+            return deleted
 
     def purge_alerts(self, before_ts: str) -> int:
         """Delete alert records older than the given timestamp."""
@@ -682,26 +826,67 @@ class Database:
         a = self.purge_alerts(cutoff)
         return d, a
 
+    def rebuild_drone_summary(self) -> int:
+        """Recompute drone_summary from the detections table.
+
+        Returns the number of serials.  Only needed for databases written by
+        versions that didn't maintain the table.
+        """
+        with self.get_cursor() as cursor:
+            return self._rebuild_drone_summary(cursor)
+
+    def _rebuild_drone_summary(self, cursor) -> int:
+        cursor.execute("DELETE FROM drone_summary")
+        # Latest row = newest timestamp, highest id on ties (what the trigger keeps)
+        cursor.execute("""
+            INSERT INTO drone_summary (serial_number, first_seen, last_seen,
+                                       detection_count, latest_id)
+            SELECT agg.serial_number, agg.first_seen, agg.last_seen, agg.detection_count,
+                   (SELECT MAX(d.id) FROM detections d
+                    WHERE d.serial_number = agg.serial_number
+                      AND d.timestamp = agg.last_seen)
+            FROM (
+                SELECT serial_number,
+                       MIN(timestamp) AS first_seen,
+                       MAX(timestamp) AS last_seen,
+                       COUNT(*)       AS detection_count
+                FROM detections
+                GROUP BY serial_number
+            ) agg
+        """)
+        count = cursor.rowcount
+        cursor.execute("""
+            UPDATE drone_summary SET
+                (operator_lat, operator_lon, operator_alt, operator_seen) = (
+                    SELECT od.operator_lat, od.operator_lon, od.operator_alt, od.timestamp
+                    FROM detections od
+                    WHERE od.serial_number = drone_summary.serial_number
+                      AND (od.operator_lat <> 0 OR od.operator_lon <> 0)
+                    ORDER BY od.timestamp DESC, od.id DESC
+                    LIMIT 1
+                )
+        """)
+        return count
+
     def get_stats(self) -> Dict:
         """Get database statistics."""
         with self.get_cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) as cnt FROM detections")
-            detection_count = cursor.fetchone()['cnt']
+            cursor.execute("""
+                SELECT COUNT(*) AS serials,
+                       IFNULL(SUM(detection_count), 0) AS detections,
+                       MIN(first_seen) AS oldest,
+                       MAX(last_seen) AS newest
+                FROM drone_summary
+            """)
+            row = cursor.fetchone()
+            detection_count = row['detections']
+            unique_serials = row['serials']
+            oldest = row['oldest']
+            newest = row['newest']
 
             cursor.execute("SELECT COUNT(*) as cnt FROM alerts")
             alert_count = cursor.fetchone()['cnt']
 
-            cursor.execute("SELECT COUNT(DISTINCT serial_number) as cnt FROM detections")
-            unique_serials = cursor.fetchone()['cnt']
-
-            cursor.execute("SELECT MIN(timestamp) as oldest FROM detections")
-            row = cursor.fetchone()
-            oldest = row['oldest'] if row else None
-
-            cursor.execute("SELECT MAX(timestamp) as newest FROM detections")
-            row = cursor.fetchone()
-            newest = row['newest'] if row else None
-
         # DB file size
         try:
             db_size = os.path.getsize(self.db_path)
@@ -732,7 +917,7 @@ class Database:
     def get_unique_serial_count(self) -> int:
         """Get count of unique drone serial numbers."""
         with self.get_cursor() as cursor:
-            cursor.execute("SELECT COUNT(DISTINCT serial_number) as cnt FROM detections")
+            cursor.execute("SELECT COUNT(*) as cnt FROM drone_summary")
             return cursor.fetchone()['cnt']
 
     def get_drone_database(self) -> List[Dict]:
@@ -741,7 +926,7 @@ class Database:
 
         Each row includes:
           - All columns from the latest detection frame for that serial.
-          - first_seen / last_seen / detection_count from the aggregation sub-query.
+          - first_seen / last_seen / detection_count from drone_summary.
           - controller position (operator_lat/lon/alt) from the most-recent frame
             that had a non-zero operator coordinate, or None when none exists.
           - ua_type_name  — human-readable UA type string.
@@ -751,40 +936,16 @@ class Database:
             cursor.execute("""
                 SELECT
                     d.*,
-                    agg.first_seen,
-                    agg.last_seen,
-                    agg.detection_count,
-                    op.operator_lat  AS ctrl_lat,
-                    op.operator_lon  AS ctrl_lon,
-                    op.operator_alt  AS ctrl_alt,
-                    op.timestamp     AS ctrl_last_seen
-                FROM detections d
-                INNER JOIN (
-                    SELECT serial_number,
-                           MIN(timestamp) AS first_seen,
-                           MAX(timestamp) AS last_seen,
-                           COUNT(*)       AS detection_count
-                    FROM detections
-                    GROUP BY serial_number
-                ) agg
-                  ON d.serial_number = agg.serial_number
-                 AND d.timestamp     = agg.last_seen
-                LEFT JOIN (
-                    SELECT od.serial_number,
-                           od.operator_lat, od.operator_lon, od.operator_alt,
-                           od.timestamp
-                    FROM detections od
-                    INNER JOIN (
-                        SELECT serial_number, MAX(timestamp) AS op_ts
-                        FROM detections
-                        WHERE operator_lat <> 0 OR operator_lon <> 0
-                        GROUP BY serial_number
-                    ) opm
-                      ON od.serial_number = opm.serial_number
-                     AND od.timestamp     = opm.op_ts
-                ) op
-                  ON op.serial_number = d.serial_number
-                ORDER BY agg.last_seen DESC
+                    s.first_seen,
+                    s.last_seen,
+                    s.detection_count,
+                    s.operator_lat   AS ctrl_lat,
+                    s.operator_lon   AS ctrl_lon,
+                    s.operator_alt   AS ctrl_alt,
+                    s.operator_seen  AS ctrl_last_seen
+                FROM drone_summary s
+                INNER JOIN detections d ON d.id = s.latest_id
+                ORDER BY s.last_seen DESC
             """)
             raw = [dict(row) for row in cursor.fetchall()]
 
@@ -0,0 +1,212 @@
+"""
+Write-behind queue for detection rows.
+
+DroneIDEngine used to INSERT and commit every decoded Remote ID frame on the
+capture / BLE thread, so every frame waited for an fsync.  The engine now hands
+frames to :class:`DetectionWriter`, which queues the rows and commits them from
+its own thread with one ``executemany`` transaction every ``flush_interval``
+seconds, or as soon as ``batch_size`` rows are waiting.
+
+When the database can't keep up and the queue fills, the queued rows are
+thinned to the latest frame per serial per second.  If that doesn't free a
+quarter of the queue, the oldest rows are dropped.
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .database import detection_row
+from .supervisor import RateLimitedLogger
+
+log = logging.getLogger(__name__)
+rate_log = RateLimitedLogger(log)
+
+# --------------- Constants ---------------------------------------------------
+
+_FLUSH_INTERVAL_S = 0.25
+_BATCH_SIZE = 256
+_QUEUE_MAX = 10_000
+
+# Weight of the newest commit in the average commit latency
+_COMMIT_AVG_WEIGHT = 0.1
+
+
+class DetectionWriter:
+    """Batches detection rows into group commits on a background thread.
+
+    :meth:`submit` is called from the capture threads and only appends a row
+    tuple under a lock.  The writer thread is started by the first submit
+    (or :meth:`start`) and :meth:`stop` commits whatever is still queued.
+    """
+
+    def __init__(self, db, flush_interval: float = _FLUSH_INTERVAL_S,
+                 batch_size: int = _BATCH_SIZE, max_queue: int = _QUEUE_MAX):
+        self._db = db
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._max_queue = max_queue
+
+        self._cond = threading.Condition()
+        self._rows: List[tuple] = []
+        self._flush_lock = threading.Lock()   # one batch in the database at a time
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # Counters (guarded by _cond)
+        self._rows_written = 0
+        self._batches_written = 0
+        self._rows_shed = 0        # thinned to the latest frame per serial per second
+        self._rows_dropped = 0     # oldest rows dropped, or lost to a failed commit
+        self._write_errors = 0
+        self._max_depth = 0
+        self._last_commit_ms = 0.0
+        self._avg_commit_ms = 0.0
+        self._max_commit_ms = 0.0
+
+    # ----- Lifecycle ------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the writer thread if it isn't running."""
+        with self._cond:
+            self._start_locked()
+
+    def _start_locked(self) -> None:
+        if self._thread is not None:
+            return
+        # Each thread gets its own stop event so a stop/start pair can't leave
+        # the old thread running.
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,),
+                                        daemon=True, name='detection-writer')
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the writer thread and commit whatever is still queued."""
+        with self._cond:
+            thread = self._thread
+            self._thread = None
+            self._stop_event.set()
+            self._cond.notify_all()
+
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+        self.flush()
+
+    # ----- Producer side --------------------------------------------------
+
+    def submit(self, device, receiver_lat: float = 0.0, receiver_lon: float = 0.0,
+               receiver_alt: float = 0.0) -> None:
+        """Queue one detection.  Never touches the database."""
+        # Build the row now: the device object keeps changing after this call
+        row = detection_row(device, receiver_lat, receiver_lon, receiver_alt)
+
+        with self._cond:
+            if len(self._rows) >= self._max_queue:
+                self._shed_load()
+
+            self._rows.append(row)
+            depth = len(self._rows)
+            if depth > self._max_depth:
+                self._max_depth = depth
+
+            if self._thread is None:
+                self._start_locked()
+            elif depth >= self._batch_size:
+                self._cond.notify()
+
+    def _shed_load(self) -> None:
+        """Make room in a full queue.  Called with _cond held."""
+        # Latest frame per (serial, second).  Timestamps are ISO 8601, so the
+        # first 19 characters are the whole second.
+        latest: Dict[tuple, int] = {}
+        for i, row in enumerate(self._rows):
+            latest[(row[0], row[-1][:19])] = i
+
+        if len(latest) < len(self._rows):
+            kept = sorted(latest.values())
+            self._rows_shed += len(self._rows) - len(kept)
+            self._rows = [self._rows[i] for i in kept]
+
+        # Leave headroom so the next frames don't thin the queue again at once
+        excess = len(self._rows) - (self._max_queue * 3) // 4
+        if excess > 0:
+            del self._rows[:excess]
+            self._rows_dropped += excess
+
+        rate_log.warning('detection_queue_full',
+                         "DroneID: detection queue full (%d rows), shed %d, dropped %d so far",
+                         self._max_queue, self._rows_shed, self._rows_dropped)
+
+    # ----- Writer side ----------------------------------------------------
+
+    def _run(self, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            with self._cond:
+                deadline = time.monotonic() + self._flush_interval
+                while not stop_event.is_set() and len(self._rows) < self._batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            if stop_event.is_set():
+                return   # stop() commits the rest
+
+            self.flush()
+
+    def flush(self) -> int:
+        """Commit everything queued right now.  Returns the number of rows written."""
+        with self._flush_lock:
+            with self._cond:
+                rows = self._rows
+                self._rows = []
+
+            if not rows:
+                return 0
+
+            started = time.monotonic()
+            try:
+                self._db.insert_detections(rows)
+            except Exception as exc:
+                with self._cond:
+                    self._write_errors += 1
+                    self._rows_dropped += len(rows)
+                rate_log.warning('detection_commit',
+                                 "DroneID: committing %d detections failed: %s", len(rows), exc)
+                return 0
+
+            elapsed_ms = (time.monotonic() - started) * 1000.0
+
+        with self._cond:
+            self._rows_written += len(rows)
+            self._batches_written += 1
+            self._last_commit_ms = elapsed_ms
+            if self._batches_written == 1:
+                self._avg_commit_ms = elapsed_ms
+            else:
+                self._avg_commit_ms += _COMMIT_AVG_WEIGHT * (elapsed_ms - self._avg_commit_ms)
+            if elapsed_ms > self._max_commit_ms:
+                self._max_commit_ms = elapsed_ms
+
+        return len(rows)
+
+    # ----- Status -----------------------------------------------------------
+
+    def get_status(self) -> Dict:
+        """Queue depth and commit latency, merged into DroneIDEngine.get_status()."""
+        with self._cond:
+            return {
+                'detection_queue_depth': len(self._rows),
+                'detection_queue_max_depth': self._max_depth,
+                'detection_queue_limit': self._max_queue,
+                'detections_written': self._rows_written,
+                'detection_batches_written': self._batches_written,
+                'detections_shed': self._rows_shed,
+                'detections_dropped': self._rows_dropped,
+                'detection_write_errors': self._write_errors,
+                'detection_commit_ms': round(self._last_commit_ms, 2),
+                'detection_commit_avg_ms': round(self._avg_commit_ms, 2),
+                'detection_commit_max_ms': round(self._max_commit_ms, 2),
+            }
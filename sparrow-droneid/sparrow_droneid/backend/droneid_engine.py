@@ -29,6 +29,8 @@ from .models import (
     DroneIDDevice, WifiInterface, Protocol, UAType,
     rssi_trend as calc_rssi_trend,
 )
+from .detection_writer import DetectionWriter
+from .pcap_reader import PcapStreamReader
 
 # --------------- Constants ------------------------------------------------
 
@@ -85,6 +87,14 @@ SUBTYPE_BEACON = 0x08
 SUBTYPE_PROBE_RESP = 0x05
 SUBTYPE_ACTION = 0x0D
 
+# Vendor IEs that can carry Remote ID, as 24-bit OUI -> required OUI type
+# (None = any type).  Used by FrameExtractor.may_carry_odid().
+_ODID_VENDOR_IES = {
+    int.from_bytes(OUI_ASTM_BEACON, 'big'): ASTM_BEACON_OUI_TYPE,
+    int.from_bytes(OUI_FRENCH, 'big'): FRENCH_OUI_TYPE,
+}
+_ODID_VENDOR_IES.update((int.from_bytes(oui, 'big'), None) for oui in _DJI_OUIS)
+
 # Radiotap field definitions: (bit_position, size_bytes, alignment)
 _RT_FIELD_INFO = [
     (0, 8, 8),   # TSFT
@@ -541,6 +551,54 @@ class FrameExtractor:
                 yield oui, oui_type, payload
             offset += 2 + length
 
+    @staticmethod
+    def may_carry_odid(pkt, offset: int = 0) -> bool:
+        """Cheap check for the 802.11 frame at pkt[offset:] before extraction.
+
+        False when neither extract_from_action() nor
+        extract_from_beacon_or_probe() could find anything: not a management
+        frame, an action frame that isn't a Wi-Fi Alliance NAN frame, or a
+        beacon / probe response without an ASTM, DJI or French vendor IE.
+        Only reads single bytes, so pkt can be a memoryview into the pcap
+        reader's buffer and the ordinary beacons that make up most of the
+        capture are dropped without copying anything.
+        """
+        end = len(pkt)
+        if end - offset < 24:
+            return False
+
+        fc = pkt[offset]
+        if fc & 0x0C:  # type bits: not a management frame
+            return False
+        subtype = fc >> 4
+
+        if subtype == SUBTYPE_ACTION:
+            body = offset + 24
+            return (end >= body + 6
+                    and pkt[body] == 0x04 and pkt[body + 1] == 0x09
+                    and pkt[body + 2] == OUI_WIFI_ALLIANCE[0]
+                    and pkt[body + 3] == OUI_WIFI_ALLIANCE[1]
+                    and pkt[body + 4] == OUI_WIFI_ALLIANCE[2]
+                    and pkt[body + 5] == NAN_OUI_TYPE)
+
+        if subtype != SUBTYPE_BEACON and subtype != SUBTYPE_PROBE_RESP:
+            return False
+
+        # Same IE walk as _scan_vendor_ies, after the 12 bytes of fixed params
+        i = offset + 24 + 12
+        while i + 2 <= end:
+            length = pkt[i + 1]
+            if i + 2 + length > end:
+                break
+            if pkt[i] == 221 and length >= 4:
+                oui = (pkt[i + 2] << 16) | (pkt[i + 3] << 8) | pkt[i + 4]
+                if oui in _ODID_VENDOR_IES:
+                    oui_type = _ODID_VENDOR_IES[oui]
+                    if oui_type is None or oui_type == pkt[i + 5]:
+                        return True
+            i += 2 + length
+        return False
+
     @staticmethod
     def extract_from_action(frame: bytes):
         """Try to extract ODID data from an action frame.
@@ -969,6 +1027,9 @@ class DroneIDEngine:
         self._db = db
         self._gps = gps_engine
 
+        # Detection rows are group-committed off the capture threads
+        self._detection_writer = DetectionWriter(db)
+
         # Active drone tracking (in-memory)
         self._active_drones = {}   # key -> DroneIDDevice
         self._rssi_history = {}    # key -> list of RSSI values
@@ -1102,6 +1163,17 @@ class DroneIDEngine:
                 pass
             self._interface = ""
 
+        # Capture threads are gone; commit what they queued
+        self.flush_detections()
+
+    def flush_detections(self):
+        """Stop the detection writer, committing any queued rows.
+
+        The writer restarts on the next detection (the WiFi SSID scanner can
+        report drones while monitoring is stopped).
+        """
+        self._detection_writer.stop()
+
     # ----- WiFi capture lifecycle (extracted helpers) -------------------------
 
     def _start_wifi_capture(self):
@@ -1244,11 +1316,11 @@ class DroneIDEngine:
             self._wifi_eof_reason = "no capture proc"
             return
 
-        f = proc.stdout
+        reader = PcapStreamReader(proc.stdout)
 
         # Read pcap global header (24 bytes)
-        global_hdr = self._read_exact(f, 24)
-        if global_hdr is None or len(global_hdr) < 24:
+        global_hdr = reader.read_exact(24)
+        if global_hdr is None:
             rc = proc.poll()
             self._wifi_capture_eof = True
             self._wifi_eof_reason = (
@@ -1271,7 +1343,8 @@ class DroneIDEngine:
             self._wifi_eof_reason = f"bad pcap magic 0x{magic:08x}"
             return  # Not a pcap stream
 
-        link_type = struct.unpack_from(f'{endian}I', global_hdr, 20)[0]
+        u32 = struct.Struct(f'{endian}I')
+        link_type = u32.unpack_from(global_hdr, 20)[0]
         if link_type != 127:  # IEEE802_11_RADIO (radiotap + 802.11)
             self._wifi_capture_eof = True
             self._wifi_eof_reason = f"unexpected link type {link_type} (expected 127 IEEE802_11_RADIO)"
@@ -1279,8 +1352,8 @@ class DroneIDEngine:
 
         # Read packets
         while self._monitoring:
-            rec_hdr = self._read_exact(f, 16)
-            if rec_hdr is None or len(rec_hdr) < 16:
+            rec_hdr = reader.read_exact(16)
+            if rec_hdr is None:
                 rc = proc.poll()
                 self._wifi_capture_eof = True
                 self._wifi_eof_reason = (
@@ -1293,7 +1366,7 @@ class DroneIDEngine:
                                  self._wifi_eof_reason)
                 break
 
-            incl_len = struct.unpack_from(f'{endian}I', rec_hdr, 8)[0]
+            incl_len = u32.unpack_from(rec_hdr, 8)[0]
 
             if incl_len == 0 or incl_len > 65536:
                 rc = proc.poll()
@@ -1307,8 +1380,9 @@ class DroneIDEngine:
                                  self._wifi_eof_reason)
                 break
 
-            pkt_data = self._read_exact(f, incl_len)
-            if pkt_data is None or len(pkt_data) < incl_len:
+            # View into the reader's buffer, valid until the next read
+            pkt_data = reader.read_exact(incl_len)
+            if pkt_data is None:
                 rc = proc.poll()
                 self._wifi_capture_eof = True
                 self._wifi_eof_reason = (
@@ -1333,34 +1407,28 @@ class DroneIDEngine:
                                  "DroneID WiFi: frame processing error (capture_errors=%d)",
                                  self._capture_errors)
 
-    @staticmethod
-    def _read_exact(f, n):
-        """Read exactly *n* bytes from binary stream *f*."""
-        data = b''
-        while len(data) < n:
-            chunk = f.read(n - len(data))
-            if not chunk:
-                return None
-            data += chunk
-        return data
-
     def _process_pcap_frame(self, pkt_data):
-        """Parse radiotap + 802.11 frame from raw pcap packet data."""
+        """Parse radiotap + 802.11 frame from raw pcap packet data.
+
+        pkt_data may be a memoryview into the pcap reader's buffer.  Frames
+        that can't carry Remote ID are dropped before anything is copied.
+        """
         if len(pkt_data) < 8:
             return
 
         # Radiotap header: version(1), pad(1), length(2LE)
-        rt_len = struct.unpack_from('<H', pkt_data, 2)[0]
+        rt_len = pkt_data[2] | (pkt_data[3] << 8)
         if rt_len > len(pkt_data):
             return
 
-        rssi = self._extract_radiotap_rssi(pkt_data[:rt_len])
-
         # 802.11 frame starts after radiotap header
-        frame = pkt_data[rt_len:]
-        if len(frame) < 24:
+        if not FrameExtractor.may_carry_odid(pkt_data, rt_len):
             return
 
+        pkt_view = memoryview(pkt_data)
+        rssi = self._extract_radiotap_rssi(pkt_view[:rt_len])
+        frame = pkt_view[rt_len:].tobytes()
+
         # For management frames addr2 (bytes 10-15) = SA
         sa_bytes = frame[10:16]
         mac = ':'.join(f'{b:02x}' for b in sa_bytes)
@@ -1526,15 +1594,15 @@ class DroneIDEngine:
                     'flags recovery %s→%s failed; in-memory state already updated',
                     flag_migration[0], flag_migration[1])
 
-        # Persist to database
+        # Queue for the database (committed in batches by the detection writer)
         rx_lat, rx_lon, rx_alt = self._gps.get_receiver_position()
         try:
-            self._db.insert_detection(device, rx_lat, rx_lon, rx_alt)
+            self._detection_writer.submit(device, rx_lat, rx_lon, rx_alt)
         except Exception as exc:
             self._capture_errors += 1
             from .supervisor import rate_log
             rate_log.warning('insert_detection',
-                             "DroneID: insert_detection failed (capture_errors=%d): %s",
+                             "DroneID: queueing detection failed (capture_errors=%d): %s",
                              self._capture_errors, exc)
 
         # Fire callback (alert engine, CoT engine)
@@ -1665,15 +1733,15 @@ class DroneIDEngine:
             return  # silently merged — skip DB/alerts until interval elapses
         self._ble_last_emit[key] = now_ts
 
-        # Persist to database
+        # Queue for the database (committed in batches by the detection writer)
         rx_lat, rx_lon, rx_alt = self._gps.get_receiver_position()
         try:
-            self._db.insert_detection(device, rx_lat, rx_lon, rx_alt)
+            self._detection_writer.submit(device, rx_lat, rx_lon, rx_alt)
         except Exception as exc:
             self._capture_errors += 1
             from .supervisor import rate_log
             rate_log.warning('ble_insert_detection',
-                             "DroneID BLE: insert_detection failed (capture_errors=%d): %s",
+                             "DroneID BLE: queueing detection failed (capture_errors=%d): %s",
                              self._capture_errors, exc)
 
         # Fire callback (alert engine, CoT engine)
@@ -2076,7 +2144,7 @@ class DroneIDEngine:
             1,
         )
 
-        return {
+        status = {
             'monitoring': self._monitoring,
             'interface': self._interface,
             'channel': self._channel,
@@ -2107,6 +2175,9 @@ class DroneIDEngine:
             'ble_last_adv_age_s': last_adv_age,
             'ble_scanner_alive': ble_scanner_alive,
         }
+        # Detection write-behind queue: depth, shed/dropped rows, commit latency
+        status.update(self._detection_writer.get_status())
+        return status
 
     def cleanup_stale(self, max_age=300):
         """Remove drones from active tracking that haven't been seen recently.
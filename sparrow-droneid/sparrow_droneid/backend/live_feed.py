@@ -0,0 +1,347 @@
+"""
+Server-sent live feed for the web UI.
+
+Every open browser used to poll /drones every 2 s and /status and
+/alerts/log every 5 s, and each of those requests rebuilt the active drone
+list (to_dict + resolve_vendor per drone) on its own.  :class:`LiveFeed`
+builds the drone list once per update for all clients and pushes it over
+``GET /api/v1/events`` as a ``text/event-stream``:
+
+  snapshot  on connect: every active drone, receiver, counts and status
+  drones    drones added or changed since the last update, keys removed,
+            plus receiver / counts
+  status    the /status payload, every ``refresh_interval`` seconds
+  alerts    alerts fired since the last update, newest first
+
+Updates are driven by detections (``notify_detection``) and alerts
+(``publish_alert``) and sent at most every ``min_interval`` seconds; without
+detections the drone list is still refreshed every ``refresh_interval``
+seconds so drones age out.  Each update is serialized once and the same
+bytes are queued to every client.  A client that falls ``client_queue``
+messages behind is disconnected; EventSource reconnects and starts over
+from a new snapshot.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .models import UAType
+
+log = logging.getLogger(__name__)
+
+# --------------- Constants ---------------------------------------------------
+
+_MIN_INTERVAL_S = 1.0        # at most one drones update per second
+_REFRESH_INTERVAL_S = 5.0    # status, and drone ageing without detections
+_KEEPALIVE_S = 15.0          # comment line so proxies don't drop idle streams
+_MAX_CLIENTS = 32
+_CLIENT_QUEUE = 32
+_MAX_PENDING_ALERTS = 100
+
+
+def encode_event(event: str, data: dict) -> bytes:
+    """One server-sent event: ``event: <name>`` and a single-line JSON ``data:``."""
+    body = json.dumps(data, separators=(',', ':'), default=str)
+    return f"event: {event}\ndata: {body}\n\n".encode('utf-8')
+
+
+class LiveFeedClient:
+    """One connected stream.  The request thread drains it with :meth:`next`."""
+
+    def __init__(self, max_queue: int = _CLIENT_QUEUE):
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_queue)
+        self.closed = False
+
+    def put(self, message: Optional[bytes]) -> bool:
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass   # the reader sees .closed after draining
+
+    def next(self, timeout: float = _KEEPALIVE_S) -> Optional[bytes]:
+        """Next message, b'' on timeout, None once the client is closed."""
+        if self.closed and self._queue.empty():
+            return None
+        try:
+            message = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None if self.closed else b''
+        if message is None:
+            self.closed = True
+        return message
+
+
+class LiveFeed:
+    """Coalesces detections and alerts into server-sent events for all clients.
+
+    The data sources are plain callables, assigned by api_handler.set_engines()
+    (same as ElasticsearchEngine.get_heartbeat_data):
+
+      get_drones()          /drones payload without vendor
+      get_status()          /status payload
+      resolve_vendor(...)   AlertEngine.resolve_vendor
+
+    The publisher thread only runs while at least one client is connected.
+    """
+
+    def __init__(self, min_interval: float = _MIN_INTERVAL_S,
+                 refresh_interval: float = _REFRESH_INTERVAL_S,
+                 max_clients: int = _MAX_CLIENTS, client_queue: int = _CLIENT_QUEUE):
+        self.get_drones: Optional[Callable[[], dict]] = None
+        self.get_status: Optional[Callable[[], dict]] = None
+        self.resolve_vendor: Optional[Callable[..., str]] = None
+
+        self._min_interval = min_interval
+        self._refresh_interval = refresh_interval
+        self._max_clients = max_clients
+        self._client_queue = client_queue
+
+        self._cond = threading.Condition()
+        self._clients: List[LiveFeedClient] = []
+        self._dirty = False
+        self._pending_alerts: List[dict] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # Last published state (guarded by _publish_lock)
+        self._publish_lock = threading.Lock()
+        self._drones: Dict[str, dict] = {}
+        self._receiver: dict = {}
+        self._counts: dict = {}
+        self._timestamp = ''
+        self._status: Optional[dict] = None
+        self._vendors: Dict[tuple, str] = {}
+
+        # Counters (guarded by _cond)
+        self._messages_sent = 0
+        self._clients_dropped = 0
+
+    # ----- Producer side --------------------------------------------------
+
+    def notify_detection(self, device=None) -> None:
+        """A drone was updated.  Cheap: only flags the next update as due."""
+        with self._cond:
+            if not self._clients:
+                return
+            self._dirty = True
+            self._cond.notify()
+
+    def publish_alert(self, event, device) -> None:
+        """Queue a fired alert, shaped like an /alerts/log row."""
+        with self._cond:
+            if not self._clients:
+                return
+
+        alert = event.to_dict()
+        alert['state'] = 'ACTIVE'
+        alert['acknowledged_by'] = ''
+        alert['acknowledged_at'] = ''
+        alert['resolved_at'] = ''
+        alert['vendor'] = self._vendor(device.serial_number or '', device.mac_address or '',
+                                       device.protocol or '')
+        ua = device.ua_type
+        alert['ua_type_name'] = UAType(ua).display_name if 0 <= ua <= 15 else ''
+
+        with self._cond:
+            self._pending_alerts.append(alert)
+            del self._pending_alerts[:-_MAX_PENDING_ALERTS]
+            self._cond.notify()
+
+    # ----- Clients ----------------------------------------------------------
+
+    def subscribe(self) -> Optional[LiveFeedClient]:
+        """Register a client with a snapshot queued.  None when the feed is full."""
+        client = LiveFeedClient(self._client_queue)
+        with self._publish_lock:
+            with self._cond:
+                if len(self._clients) >= self._max_clients:
+                    return None
+                first = not self._clients
+            if first:
+                # Nobody is watching the state while the feed is idle
+                self._refresh_drones()
+                if self.get_status:
+                    self._status = self.get_status()
+            client.put(encode_event('snapshot', {
+                'drones': list(self._drones.values()),
+                'receiver': self._receiver,
+                'counts': self._counts,
+                'status': self._status,
+                'timestamp': self._timestamp,
+            }))
+            with self._cond:
+                self._clients.append(client)
+                self._dirty = True   # catch the snapshot up soon
+                self._start_locked()
+                self._cond.notify()
+        return client
+
+    def unsubscribe(self, client: LiveFeedClient) -> None:
+        with self._cond:
+            if client in self._clients:
+                self._clients.remove(client)
+            self._cond.notify()
+
+    def stop(self) -> None:
+        """Close every stream and stop the publisher thread."""
+        with self._cond:
+            clients = self._clients
+            self._clients = []
+            self._stop_event.set()
+            self._thread = None
+            self._cond.notify_all()
+        for client in clients:
+            client.close()
+
+    # ----- Publisher ------------------------------------------------------
+
+    def _start_locked(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,),
+                                        daemon=True, name='live-feed')
+        self._thread.start()
+
+    def _run(self, stop_event: threading.Event) -> None:
+        last_publish = 0.0
+        next_refresh = time.monotonic() + self._refresh_interval
+        while True:
+            with self._cond:
+                while not stop_event.is_set() and self._clients:
+                    now = time.monotonic()
+                    due = next_refresh
+                    if self._dirty or self._pending_alerts:
+                        due = min(due, last_publish + self._min_interval)
+                    if now >= due:
+                        break
+                    self._cond.wait(due - now)
+
+                if stop_event.is_set():
+                    return
+                if not self._clients:
+                    self._thread = None
+                    return
+
+                alerts = self._pending_alerts
+                self._pending_alerts = []
+                self._dirty = False
+
+            refresh = now >= next_refresh
+            try:
+                self.publish(alerts, refresh=refresh)
+            except Exception as exc:
+                log.warning("live feed: update failed: %s", exc)
+            last_publish = time.monotonic()
+            if refresh:
+                next_refresh = last_publish + self._refresh_interval
+
+    def publish(self, alerts: Optional[List[dict]] = None, refresh: bool = False) -> int:
+        """Build one update and queue it to every client.  Returns messages queued per client."""
+        messages = []
+        with self._publish_lock:
+            if refresh:
+                # Vendor codes can be edited in settings; re-resolve now and then
+                self._vendors.clear()
+
+            upserts, removed, header_changed = self._refresh_drones()
+            if upserts or removed or header_changed:
+                messages.append(encode_event('drones', {
+                    'upserts': upserts,
+                    'removed': removed,
+                    'receiver': self._receiver,
+                    'counts': self._counts,
+                    'timestamp': self._timestamp,
+                }))
+
+            if refresh and self.get_status:
+                status = self.get_status()
+                if status != self._status:
+                    self._status = status
+                    messages.append(encode_event('status', status))
+
+            if alerts:
+                messages.append(encode_event('alerts', {'alerts': list(reversed(alerts))}))
+
+            if messages:
+                self._fan_out(messages)
+        return len(messages)
+
+    def _refresh_drones(self):
+        """Rebuild the drone list; returns (upserts, removed keys, receiver/counts changed).
+
+        Called with _publish_lock held.
+        """
+        payload = self.get_drones() if self.get_drones else {}
+        previous = self._drones
+        current: Dict[str, dict] = {}
+        upserts = []
+        for d in payload.get('drones', []):
+            key = d.get('drone_key') or d.get('serial_number', '')
+            d['vendor'] = self._vendor(d.get('serial_number', ''), d.get('mac_address', ''),
+                                       d.get('protocol', ''))
+            current[key] = d
+            if previous.get(key) != d:
+                upserts.append(d)
+        removed = [key for key in previous if key not in current]
+
+        receiver = payload.get('receiver', {})
+        counts = payload.get('counts', {})
+        header_changed = receiver != self._receiver or counts != self._counts
+
+        self._drones = current
+        self._receiver = receiver
+        self._counts = counts
+        self._timestamp = payload.get('timestamp', '')
+        return upserts, removed, header_changed
+
+    def _vendor(self, serial: str, mac: str, protocol: str) -> str:
+        if not self.resolve_vendor:
+            return ''
+        key = (serial, mac, protocol)
+        vendor = self._vendors.get(key)
+        if vendor is None:
+            vendor = self.resolve_vendor(serial=serial, mac=mac, protocol=protocol)
+            self._vendors[key] = vendor
+        return vendor
+
+    def _fan_out(self, messages: List[bytes]) -> None:
+        with self._cond:
+            clients = list(self._clients)
+        dropped = []
+        for client in clients:
+            for message in messages:
+                if not client.put(message):
+                    dropped.append(client)
+                    break
+        with self._cond:
+            self._messages_sent += len(messages)
+            for client in dropped:
+                if client in self._clients:
+                    self._clients.remove(client)
+                    self._clients_dropped += 1
+        for client in dropped:
+            log.info("live feed: dropping a client that fell %d messages behind",
+                     self._client_queue)
+            client.close()
+
+    # ----- Status -----------------------------------------------------------
+
+    def get_feed_status(self) -> Dict:
+        with self._cond:
+            return {
+                'live_feed_clients': len(self._clients),
+                'live_feed_messages': self._messages_sent,
+                'live_feed_clients_dropped': self._clients_dropped,
+            }
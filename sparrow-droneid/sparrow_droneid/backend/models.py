@@ -208,6 +208,80 @@ def rssi_trend(history: List[int], window: int = 5) -> str:
     return "stable"
 
 
+def simplify_track(points: List[Dict], tolerance_m: float) -> List[Dict]:
+    """Douglas-Peucker simplification of track points (dicts with drone_lat/drone_lon).
+
+    Keeps the first and last point and every point that is more than
+    tolerance_m from the line between the points kept either side of it.
+    Distances use a flat projection around the first point, which is close
+    enough over the few kilometres a track covers.
+    """
+    n = len(points)
+    if tolerance_m <= 0 or n < 3:
+        return list(points)
+
+    lat0 = points[0]['drone_lat']
+    lon0 = points[0]['drone_lon']
+    m_per_deg_lat = _EARTH_RADIUS_M * radians(1.0)
+    m_per_deg_lon = m_per_deg_lat * cos(radians(lat0))
+    xs = [(p['drone_lon'] - lon0) * m_per_deg_lon for p in points]
+    ys = [(p['drone_lat'] - lat0) * m_per_deg_lat for p in points]
+
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tolerance_sq = tolerance_m * tolerance_m
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        dx = xs[last] - xs[first]
+        dy = ys[last] - ys[first]
+        seg_sq = dx * dx + dy * dy
+        max_sq = -1.0
+        index = -1
+        for i in range(first + 1, last):
+            px = xs[i] - xs[first]
+            py = ys[i] - ys[first]
+            if seg_sq == 0.0:
+                # Hovering: both ends in the same spot
+                dist_sq = px * px + py * py
+            else:
+                cross = px * dy - py * dx
+                dist_sq = cross * cross / seg_sq
+            if dist_sq > max_sq:
+                max_sq = dist_sq
+                index = i
+        if max_sq > tolerance_sq:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [p for p, k in zip(points, keep) if k]
+
+
+def bucket_track(points: List[Dict], bucket_seconds: int) -> List[Dict]:
+    """Keep the first point and the last point of every bucket_seconds interval.
+
+    points must be in time order with ISO 8601 'timestamp' values.
+    """
+    if bucket_seconds <= 0 or len(points) < 3:
+        return list(points)
+
+    result = [points[0]]
+    last_bucket = None
+    for p in points[1:]:
+        try:
+            ts = datetime.fromisoformat(p['timestamp'].replace('Z', '+00:00'))
+            bucket = int(ts.timestamp() // bucket_seconds)
+        except (ValueError, AttributeError, KeyError):
+            continue
+        if bucket == last_bucket:
+            result[-1] = p
+        else:
+            result.append(p)
+            last_bucket = bucket
+    return result
+
+
 # --------------- Data Models ----------------------------------------------
 
 @dataclass
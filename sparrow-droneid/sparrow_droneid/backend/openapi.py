@@ -257,6 +257,18 @@ _schema('DroneDetailResponse', _obj({
     'track':   _arr(_ref('TrackPoint')),
 }, required=['errcode', 'errmsg', 'drone', 'track']))
 
+# ---------------------------------------------------------------------------
+# TracksResponse  — GET /api/v1/tracks
+# ---------------------------------------------------------------------------
+
+_schema('TracksResponse', _obj({
+    'tracks':    _obj({}, additionalProperties=_arr(_ref('TrackPoint')),
+                      description='Track points (oldest first) keyed by serial number'),
+    'unchanged': _arr(_str(), description='Serials with no detection newer than since; keep their previous track'),
+    'cursor':    _int(description='Pass back as since to only receive tracks that changed'),
+    'minutes':   _int(description='Minutes of history in each track'),
+}, required=['tracks', 'unchanged', 'cursor', 'minutes']))
+
 # ---------------------------------------------------------------------------
 # HistoryRecord  — one row from GET /api/history
 # (subset of detection columns actually selected by database.get_history)
@@ -404,6 +416,17 @@ _schema('MonitorStatus', _obj({
     'monitor_warning':      _str(description='Non-empty when a monitor mode warning is active'),
     'ble_enabled':          _bool(description='True when BLE capture is running alongside WiFi'),
     'ble_frame_count':      _int(description='BLE Remote ID frames received'),
+    'detection_queue_depth':     _int(description='Detections queued for the database'),
+    'detection_queue_max_depth': _int(description='Deepest the detection queue has been'),
+    'detection_queue_limit':     _int(description='Queue size at which detections are thinned'),
+    'detections_written':        _int(description='Detections committed to the database'),
+    'detection_batches_written': _int(description='Database transactions committed'),
+    'detections_shed':           _int(description='Detections thinned to the latest per serial per second'),
+    'detections_dropped':        _int(description='Detections dropped (queue overflow or failed commit)'),
+    'detection_write_errors':    _int(description='Failed detection commits'),
+    'detection_commit_ms':       _num(description='Duration of the last detection commit (ms)'),
+    'detection_commit_avg_ms':   _num(description='Moving average detection commit duration (ms)'),
+    'detection_commit_max_ms':   _num(description='Slowest detection commit (ms)'),
 }, required=['monitoring']))
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,67 @@
+"""
+Buffered reader for tcpdump's raw pcap stream.
+
+The WiFi parse loop used to read each record header and packet straight from
+the pipe with small ``f.read()`` calls, growing every one with ``data +=
+chunk``.  :class:`PcapStreamReader` fills one reusable ``bytearray`` with large
+``readinto()`` calls and hands out ``memoryview`` slices of it, so a frame is
+only copied once the engine decides it is worth keeping.
+
+Records are kept contiguous: when the next record would run past the end of
+the buffer, the unread bytes (at most one partial record) are moved to the
+front first.
+"""
+from typing import Optional
+
+# --------------- Constants ---------------------------------------------------
+
+_BUFFER_SIZE = 1 << 20
+# Largest record the parse loop accepts: 16-byte header + 64 KiB snaplen
+_MAX_RECORD = 16 + 65536
+
+
+class PcapStreamReader:
+    """Reads fixed-size pieces of a binary stream as views into one buffer.
+
+    *f* needs ``readinto()`` (tcpdump's stdout opened with ``bufsize=0`` is a
+    raw FileIO).  A view returned by :meth:`read_exact` is only valid until the
+    next call; copy it (``bytes(view)``) to keep it.
+    """
+
+    def __init__(self, f, buffer_size: int = _BUFFER_SIZE):
+        self._f = f
+        self._buf = bytearray(max(buffer_size, _MAX_RECORD))
+        self._view = memoryview(self._buf)
+        self._start = 0     # first unread byte
+        self._end = 0       # end of the bytes read from f
+        self.bytes_read = 0
+        self.reads = 0
+
+    def read_exact(self, n: int) -> Optional[memoryview]:
+        """Next *n* bytes, or None if the stream ends first."""
+        if self._end - self._start < n and not self._fill(n):
+            return None
+        start = self._start
+        self._start = start + n
+        return self._view[start:start + n]
+
+    def _fill(self, n: int) -> bool:
+        if n > len(self._buf):
+            raise ValueError(f"read of {n} bytes exceeds the {len(self._buf)} byte buffer")
+
+        pending = self._end - self._start
+        if pending == 0:
+            self._start = self._end = 0
+        elif self._start + n > len(self._buf):
+            self._view[:pending] = self._view[self._start:self._end]
+            self._start = 0
+            self._end = pending
+
+        while self._end - self._start < n:
+            got = self._f.readinto(self._view[self._end:])
+            if not got:
+                return False
+            self._end += got
+            self.bytes_read += got
+            self.reads += 1
+        return True
@@ -521,6 +521,13 @@ const AlertsManager = (() => {
     _renderAlertList();
   }
 
+  // Alerts pushed over the live feed, newest first
+  function push(pushed) {
+    if (!pushed || !pushed.length) return;
+    const known = new Set(_alerts.map(a => a.id));
+    update([...pushed.filter(a => !known.has(a.id)), ..._alerts]);
+  }
+
   function clearAlerts() {
     // Switch to 'active' filter which hides acknowledged/resolved alerts.
     // Don't clear _seenIds — acknowledged alerts must not re-trigger toasts.
@@ -804,6 +811,7 @@ const AlertsManager = (() => {
   return {
     init,
     update,
+    push,
     clearAlerts,
     openConfigModal,
     saveAlertConfig,
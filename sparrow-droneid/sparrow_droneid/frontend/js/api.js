@@ -100,6 +100,16 @@ const Api = (() => {
     return get('/drones', { max_age: maxAge });
   }
 
+  // Live feed (server-sent events); null when the browser has no EventSource.
+  // EventSource can't set headers, so the token goes in the query string.
+  function openEventStream() {
+    if (typeof EventSource === 'undefined') return null;
+    const token = getToken();
+    let url = `${BASE}/events`;
+    if (token) url += `?_token=${encodeURIComponent(token)}`;
+    return new EventSource(url);
+  }
+
   function getDroneDetail(serial, trackMinutes = 5) {
     return get(`/drones/${encodeURIComponent(serial)}`, { track_minutes: trackMinutes });
   }
@@ -108,6 +118,12 @@ const Api = (() => {
     return get('/drone-database');
   }
 
+  // All active tracks in one call.  Pass the previous response's cursor as
+  // since to only get the drones that changed (the rest come back in unchanged).
+  function getTracks({ minutes = 10, since = null, toleranceM = 0, bucketS = 0 } = {}) {
+    return get('/tracks', { minutes, since, tolerance_m: toleranceM, bucket_s: bucketS });
+  }
+
   // ---- Disposition ----
 
   function putDisposition(serial, disposition, changedBy = '') {
@@ -349,6 +365,8 @@ const Api = (() => {
     getDrones,
     getDroneDetail,
     getDroneDatabase,
+    getTracks,
+    openEventStream,
     putDisposition,
     getDispositions,
     getDispositionHistory,
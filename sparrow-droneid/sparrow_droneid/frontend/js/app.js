@@ -12,15 +12,24 @@ const App = (() => {
   let _pollTimer = null;
   let _alertPollTimer = null;
   let _statusPollTimer = null;
+  let _liveFeed = null;             // EventSource while the live feed is open
+  let _liveFeedRetryTimer = null;
+  let _liveDrones = new Map();      // drone_key -> drone, kept from live feed deltas
   let _selectedSerial = null;
   let _selectedTrack = null;
 
   const POLL_INTERVAL_MS  = 2000;
   const ALERT_POLL_MS     = 5000;
   const STATUS_POLL_MS    = 5000;
+  const ALERT_RESYNC_MS   = 60000;  // alert log refresh while on the live feed (acks from other browsers)
+  const LIVE_RETRY_MS     = 60000;  // retry the live feed after the server refused it
   const TRACK_POLL_MS     = 10000;  // all-tracks refresh interval
+  const TRACK_MINUTES     = 10;
+  const TRACK_TOLERANCE_M = 2;      // server-side simplification of all-tracks lines
   let _trackPollTimer = null;
   let _allTracksEnabled = false;
+  let _allTracks = {};              // serial -> track points shown in all-tracks mode
+  let _allTracksCursor = null;      // /tracks cursor; null = ask for every track
 
   // ---- Init ----
   async function init() {
@@ -44,6 +53,8 @@ const App = (() => {
     // Wire all-tracks toggle callback
     MapManager.onAllTracksToggle = (visible) => {
       _allTracksEnabled = visible;
+      _allTracks = {};
+      _allTracksCursor = null;
       if (visible) {
         _pollAllTracks();
         _trackPollTimer = setInterval(_pollAllTracks, TRACK_POLL_MS);
@@ -340,27 +351,30 @@ const App = (() => {
   // ---- Status polling ----
   async function _pollStatus() {
     try {
-      const status = await Api.getStatus();
-      _monitoring = status.monitoring;
-      // Pass wifi_health so the dot reflects real liveness, not just intent flag
-      _updateMonitorUi(status.wifi_health);
-      // GPS UI is updated exclusively from the drones poll (has receiver.source)
-
-      // Show monitor health warning if the adapter isn't delivering frames
-      if (status.monitor_warning) {
-        _showMonitorWarning(status.monitor_warning);
-      } else {
-        _clearMonitorWarning();
-      }
-
-      // Bluetooth Remote ID scanner indicator (driven by server ble_health enum)
-      _updateBluetoothUi(status);
+      _applyStatus(await Api.getStatus());
     } catch (e) { /* ignore */ }
 
     // WiFi SSID scanner indicator
     _updateWifiSsidUi();
   }
 
+  function _applyStatus(status) {
+    _monitoring = status.monitoring;
+    // Pass wifi_health so the dot reflects real liveness, not just intent flag
+    _updateMonitorUi(status.wifi_health);
+    // GPS UI is updated exclusively from the drones poll (has receiver.source)
+
+    // Show monitor health warning if the adapter isn't delivering frames
+    if (status.monitor_warning) {
+      _showMonitorWarning(status.monitor_warning);
+    } else {
+      _clearMonitorWarning();
+    }
+
+    // Bluetooth Remote ID scanner indicator (driven by server ble_health enum)
+    _updateBluetoothUi(status);
+  }
+
   async function _updateWifiSsidUi() {
     const badge = document.getElementById('statusWifiSsid');
     const label = document.getElementById('wifiSsidLabel');
@@ -431,55 +445,60 @@ const App = (() => {
     if (_inReplay) return;
     try {
       const resp = await Api.getDrones();
-      const drones = resp.drones || [];
-      const receiver = resp.receiver;
+      _applyDrones(resp.drones || [], resp.receiver);
+    } catch (e) { /* polling — ignore transient errors */ }
+  }
 
-      MapManager.updateDrones(drones, receiver);
-      TableManager.update(drones);
+  function _applyDrones(drones, receiver) {
+    MapManager.updateDrones(drones, receiver);
+    TableManager.update(drones);
 
-      // Fix #15: update GPS UI with mode from receiver.source (e.g. 'gpsd', 'static', 'none')
-      if (receiver) _updateGpsUi(receiver.gps_fix, receiver.source);
+    // Fix #15: update GPS UI with mode from receiver.source (e.g. 'gpsd', 'static', 'none')
+    if (receiver) _updateGpsUi(receiver.gps_fix, receiver.source);
 
-      // Load geozones when receiver position is known
-      if (receiver && receiver.lat && receiver.lon && typeof GeozoneManager !== 'undefined') {
-        GeozoneManager.loadData(receiver.lat, receiver.lon);
-      }
+    // Load geozones when receiver position is known
+    if (receiver && receiver.lat && receiver.lon && typeof GeozoneManager !== 'undefined') {
+      GeozoneManager.loadData(receiver.lat, receiver.lon);
+    }
 
-      // Re-fetch track for selected drone if still visible
-      if (_selectedSerial) {
-        const still = drones.find(d => d.serial_number === _selectedSerial);
-        if (still) {
-          if (!_selectedTrack) {
-            _fetchTrackAndShowDetail(_selectedSerial);
-          } else {
-            // Keep the detail sidebar fresh as new BLE/WiFi packets update the
-            // drone state (e.g., GPS lock populating lat/lon after first detection).
-            TableManager.showDetailSidebar(still, _selectedTrack);
-          }
+    // Re-fetch track for selected drone if still visible
+    if (_selectedSerial) {
+      const still = drones.find(d => d.serial_number === _selectedSerial);
+      if (still) {
+        if (!_selectedTrack) {
+          _fetchTrackAndShowDetail(_selectedSerial);
+        } else {
+          // Keep the detail sidebar fresh as new BLE/WiFi packets update the
+          // drone state (e.g., GPS lock populating lat/lon after first detection).
+          TableManager.showDetailSidebar(still, _selectedTrack);
         }
       }
-    } catch (e) { /* polling — ignore transient errors */ }
+    }
   }
 
   async function _pollAllTracks() {
     if (_inReplay || !_allTracksEnabled) return;
     try {
-      const resp = await Api.getDrones();
-      const drones = resp.drones || [];
-      const serials = drones
-        .filter(d => d.drone_lat && d.drone_lon)
-        .map(d => d.serial_number);
-      if (serials.length === 0) { MapManager.clearAllTracks(); return; }
+      const resp = await Api.getTracks({
+        minutes: TRACK_MINUTES,
+        since: _allTracksCursor,
+        toleranceM: TRACK_TOLERANCE_M,
+      });
 
+      // Unchanged drones keep their previous track, minus points that have
+      // aged out of the window; drones missing from the response are gone.
+      const cutoff = new Date(Date.now() - TRACK_MINUTES * 60000).toISOString();
       const tracksBySerial = {};
-      const results = await Promise.all(
-        serials.map(s => Api.getDroneDetail(s, 10).catch(() => null))
-      );
-      results.forEach((r, i) => {
-        if (r && r.track && r.track.length > 1) {
-          tracksBySerial[serials[i]] = r.track;
-        }
+      (resp.unchanged || []).forEach(serial => {
+        const kept = (_allTracks[serial] || []).filter(p => p.timestamp > cutoff);
+        if (kept.length > 1) tracksBySerial[serial] = kept;
+      });
+      Object.entries(resp.tracks || {}).forEach(([serial, track]) => {
+        if (track.length > 1) tracksBySerial[serial] = track;
       });
+
+      _allTracks = tracksBySerial;
+      _allTracksCursor = resp.cursor;
       MapManager.showAllTracks(tracksBySerial);
     } catch (e) { /* ignore */ }
   }
@@ -492,8 +511,23 @@ const App = (() => {
     } catch (e) { /* ignore */ }
   }
 
+  // Live updates come from the server-sent live feed when the browser and
+  // server support it; the poll timers run until the stream delivers its
+  // first snapshot and whenever it drops.
   function _startPolling() {
     _stopPolling();
+    _openLiveFeed();
+    _startPollTimers();
+  }
+
+  function _stopPolling() {
+    _closeLiveFeed();
+    _stopPollTimers();
+    if (_trackPollTimer)  { clearInterval(_trackPollTimer);  _trackPollTimer = null; }
+  }
+
+  function _startPollTimers() {
+    _stopPollTimers();
     _pollDrones();
     _pollAlerts();
     _pollStatus();
@@ -503,11 +537,67 @@ const App = (() => {
     _statusPollTimer = setInterval(_pollStatus,  STATUS_POLL_MS);
   }
 
-  function _stopPolling() {
+  function _stopPollTimers() {
     if (_pollTimer)       { clearInterval(_pollTimer);       _pollTimer = null; }
     if (_alertPollTimer)  { clearInterval(_alertPollTimer);  _alertPollTimer = null; }
     if (_statusPollTimer) { clearInterval(_statusPollTimer); _statusPollTimer = null; }
-    if (_trackPollTimer)  { clearInterval(_trackPollTimer);  _trackPollTimer = null; }
+  }
+
+  // ---- Live feed ----
+  function _openLiveFeed() {
+    const es = Api.openEventStream();
+    if (!es) return;
+    _liveFeed = es;
+
+    es.addEventListener('snapshot', ev => {
+      const msg = JSON.parse(ev.data);
+      // Stream is up: the feed replaces the drone/status polls; the alert
+      // log is only re-read now and then to pick up acks from elsewhere.
+      _stopPollTimers();
+      _pollAlerts();
+      _alertPollTimer = setInterval(_pollAlerts, ALERT_RESYNC_MS);
+
+      _liveDrones = new Map((msg.drones || []).map(d => [d.drone_key, d]));
+      if (!_inReplay) _applyDrones([..._liveDrones.values()], msg.receiver);
+      if (msg.status) _applyStatus(msg.status);
+      _updateWifiSsidUi();
+    });
+
+    es.addEventListener('drones', ev => {
+      const msg = JSON.parse(ev.data);
+      (msg.removed || []).forEach(key => _liveDrones.delete(key));
+      (msg.upserts || []).forEach(d => _liveDrones.set(d.drone_key, d));
+      if (!_inReplay) _applyDrones([..._liveDrones.values()], msg.receiver);
+    });
+
+    es.addEventListener('status', ev => {
+      _applyStatus(JSON.parse(ev.data));
+      _updateWifiSsidUi();
+    });
+
+    es.addEventListener('alerts', ev => {
+      if (!_inReplay) AlertsManager.push(JSON.parse(ev.data).alerts || []);
+    });
+
+    es.onerror = () => {
+      if (_liveFeed !== es) return;
+      // Poll while EventSource reconnects; the next snapshot stops the timers.
+      if (!_pollTimer) _startPollTimers();
+      if (es.readyState === EventSource.CLOSED) {
+        // Refused (older server, client limit): stay on polling for a while
+        _liveFeed = null;
+        _liveFeedRetryTimer = setTimeout(() => {
+          _liveFeedRetryTimer = null;
+          if (!_inReplay && !_liveFeed) _openLiveFeed();
+        }, LIVE_RETRY_MS);
+      }
+    };
+  }
+
+  function _closeLiveFeed() {
+    if (_liveFeedRetryTimer) { clearTimeout(_liveFeedRetryTimer); _liveFeedRetryTimer = null; }
+    if (_liveFeed) { _liveFeed.close(); _liveFeed = null; }
+    _liveDrones = new Map();
   }
 
   // ---- Map drone click callback ----
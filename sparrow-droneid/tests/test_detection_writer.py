@@ -0,0 +1,217 @@
+"""
+Tests for the detection write-behind queue (detection_writer.py).
+
+Covers:
+  - Rows are committed in batches (one insert_detections call per batch),
+    on the flush interval and as soon as batch_size rows are queued.
+  - stop() commits what is still queued; the writer restarts on submit.
+  - A full queue is thinned to the latest frame per serial per second,
+    then the oldest rows are dropped.
+  - A failed commit is counted and doesn't kill the writer thread.
+  - DroneIDEngine._track_device queues instead of inserting, and its
+    get_status() reports the queue.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sparrow_droneid'))
+
+from backend.database import Database  # noqa: E402
+from backend.detection_writer import DetectionWriter  # noqa: E402
+from backend.droneid_engine import DroneIDEngine  # noqa: E402
+from backend.models import DroneIDDevice  # noqa: E402
+
+
+def _device(serial='SN-1', ts='2026-01-01T00:00:00.000000Z', lat=1.0):
+    dev = DroneIDDevice(serial_number=serial, drone_lat=lat, drone_lon=2.0)
+    dev.last_seen = ts
+    return dev
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+class _RecordingDB:
+    """Stands in for Database: records each insert_detections batch."""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+        self.block = None
+
+    def insert_detections(self, rows):
+        if self.block is not None:
+            self.block.wait(5)
+        if self.fail:
+            raise RuntimeError('database is locked')
+        self.batches.append(list(rows))
+        return len(rows)
+
+
+class TestBatching(unittest.TestCase):
+
+    def setUp(self):
+        self.db = _RecordingDB()
+
+    def test_rows_committed_together_on_interval(self):
+        writer = DetectionWriter(self.db, flush_interval=0.1, batch_size=1000)
+        for i in range(5):
+            writer.submit(_device(lat=float(i)))
+        self.assertTrue(_wait_for(lambda: self.db.batches))
+        writer.stop()
+
+        self.assertEqual(len(self.db.batches), 1)
+        self.assertEqual([row[4] for row in self.db.batches[0]], [0.0, 1.0, 2.0, 3.0, 4.0])
+        status = writer.get_status()
+        self.assertEqual(status['detections_written'], 5)
+        self.assertEqual(status['detection_batches_written'], 1)
+        self.assertEqual(status['detection_queue_depth'], 0)
+
+    def test_full_batch_does_not_wait_for_interval(self):
+        writer = DetectionWriter(self.db, flush_interval=30.0, batch_size=10)
+        for i in range(10):
+            writer.submit(_device())
+        self.assertTrue(_wait_for(lambda: self.db.batches))
+        self.assertEqual(len(self.db.batches[0]), 10)
+        writer.stop()
+
+    def test_row_is_captured_at_submit(self):
+        writer = DetectionWriter(self.db, flush_interval=30.0)
+        dev = _device(lat=5.0)
+        writer.submit(dev)
+        dev.drone_lat = 9.0
+        writer.stop()
+        self.assertEqual(self.db.batches[0][0][4], 5.0)
+
+    def test_stop_commits_queue_and_submit_restarts(self):
+        writer = DetectionWriter(self.db, flush_interval=30.0)
+        writer.submit(_device())
+        writer.stop()
+        self.assertEqual(sum(len(b) for b in self.db.batches), 1)
+
+        writer.submit(_device())
+        writer.stop()
+        self.assertEqual(sum(len(b) for b in self.db.batches), 2)
+
+    def test_failed_commit_is_counted(self):
+        writer = DetectionWriter(self.db, flush_interval=0.05)
+        self.db.fail = True
+        writer.submit(_device())
+        self.assertTrue(_wait_for(lambda: writer.get_status()['detection_write_errors'] == 1))
+
+        self.db.fail = False
+        writer.submit(_device('SN-2'))
+        self.assertTrue(_wait_for(lambda: self.db.batches))
+        writer.stop()
+
+        status = writer.get_status()
+        self.assertEqual(status['detections_dropped'], 1)
+        self.assertEqual(status['detections_written'], 1)
+        self.assertEqual(self.db.batches[0][0][0], 'SN-2')
+
+
+class TestLoadShedding(unittest.TestCase):
+
+    def setUp(self):
+        self.db = _RecordingDB()
+        # Hold the writer inside its first commit so the queue fills up
+        self.db.block = threading.Event()
+        self.writer = DetectionWriter(self.db, flush_interval=0.01, max_queue=8)
+        self.writer.submit(_device('SN-0'))
+        self.assertTrue(_wait_for(lambda: self.writer.get_status()['detection_queue_depth'] == 0))
+
+    def tearDown(self):
+        self.db.block.set()
+        self.writer.stop()
+
+    def _queued(self):
+        self.db.block.set()
+        self.writer.stop()
+        return [(row[0], row[-1], row[4]) for batch in self.db.batches[1:] for row in batch]
+
+    def test_thinned_to_latest_per_serial_per_second(self):
+        # 10 Hz from two drones: A gets frames in seconds :00 and :01
+        for i in range(4):
+            self.writer.submit(_device('A', '2026-01-01T00:00:00.%d00000Z' % i, lat=float(i)))
+        for i in range(4):
+            self.writer.submit(_device('B', '2026-01-01T00:00:00.%d00000Z' % i, lat=float(10 + i)))
+        self.writer.submit(_device('A', '2026-01-01T00:00:01.000000Z', lat=20.0))
+
+        self.assertEqual(self._queued(), [
+            ('A', '2026-01-01T00:00:00.300000Z', 3.0),
+            ('B', '2026-01-01T00:00:00.300000Z', 13.0),
+            ('A', '2026-01-01T00:00:01.000000Z', 20.0),
+        ])
+        self.assertEqual(self.writer.get_status()['detections_shed'], 6)
+
+    def test_oldest_dropped_when_thinning_is_not_enough(self):
+        for i in range(9):
+            self.writer.submit(_device('SN-%d' % i, lat=float(i)))
+
+        # 8 distinct rows can't be thinned; the oldest two go to leave 6 (3/4)
+        self.assertEqual([lat for _, _, lat in self._queued()], [2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0])
+        status = self.writer.get_status()
+        self.assertEqual(status['detections_dropped'], 2)
+        self.assertEqual(status['detection_queue_max_depth'], 8)
+
+
+class TestDatabaseBatchInsert(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        # A file, not :memory: -- the writer thread opens its own connection
+        self.db = Database(db_path=os.path.join(self.tmpdir.name, 'test.db'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_writer_rows_match_insert_detection(self):
+        self.db.insert_detection(_device('SN-A', '2026-01-01T00:00:00Z'), 1.5, 2.5, 3.5)
+        writer = DetectionWriter(self.db, flush_interval=0.05)
+        writer.submit(_device('SN-B', '2026-01-01T00:00:01Z'), 1.5, 2.5, 3.5)
+        writer.stop()
+
+        rows, total = self.db.get_history('2026-01-01T00:00:00Z', '2026-01-01T00:00:02Z')
+        self.assertEqual(total, 2)
+        for row in rows:
+            row.pop('serial_number')
+            row.pop('timestamp')
+        self.assertEqual(rows[0], rows[1])
+
+
+class TestEngineQueuesDetections(unittest.TestCase):
+
+    def test_track_device_queues_and_reports_status(self):
+        db = MagicMock()
+        db.get_current_dispositions.return_value = {}
+        db.get_current_flags.return_value = {}
+        gps = MagicMock()
+        gps.get_receiver_position.return_value = (1.0, 2.0, 3.0)
+
+        engine = DroneIDEngine(db, gps)
+        engine._track_device(_device('SN-ENG'))
+        engine.flush_detections()
+
+        db.insert_detection.assert_not_called()
+        rows = [row for call in db.insert_detections.call_args_list for row in call.args[0]]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][0], 'SN-ENG')
+        self.assertEqual(rows[0][-4:-1], (1.0, 2.0, 3.0))
+
+        status = engine.get_status()
+        self.assertEqual(status['detection_queue_depth'], 0)
+        self.assertEqual(status['detections_written'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
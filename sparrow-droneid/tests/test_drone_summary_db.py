@@ -0,0 +1,181 @@
+"""
+Tests for the drone_summary table (database.py).
+
+Verifies:
+  - The insert trigger keeps first_seen / last_seen / detection_count /
+    latest row / last non-zero operator position, including frames that
+    arrive out of order and batched inserts.
+  - get_active_drones / get_drone_by_serial / get_stats read it.
+  - purge_detections fixes up or removes the affected serials.
+  - rebuild_drone_summary() reproduces the trigger-maintained table, and a
+    database from before the table existed is built on open.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sparrow_droneid'))
+
+from backend.database import Database, detection_row  # noqa: E402
+from backend.models import DroneIDDevice  # noqa: E402
+
+
+def _ts(offset_seconds: float = 0) -> str:
+    base = datetime.now(timezone.utc) - timedelta(hours=1)
+    return (base + timedelta(seconds=offset_seconds)).isoformat().replace('+00:00', 'Z')
+
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _fixed(offset_seconds: float) -> str:
+    return (BASE + timedelta(seconds=offset_seconds)).isoformat().replace('+00:00', 'Z')
+
+
+def _device(serial, ts, drone_lat=1.0, operator_lat=0.0, operator_lon=0.0):
+    dev = DroneIDDevice(serial_number=serial, drone_lat=drone_lat, drone_lon=2.0,
+                        operator_lat=operator_lat, operator_lon=operator_lon,
+                        operator_alt=5.0 if operator_lat else 0.0)
+    dev.last_seen = ts
+    return dev
+
+
+def _summary(db):
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT * FROM drone_summary ORDER BY serial_number")
+        return [dict(row) for row in cursor.fetchall()]
+
+
+class _FileDB(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'test.db')
+        self.db = Database(db_path=self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+
+class TestSummaryTrigger(_FileDB):
+
+    def test_first_last_count_and_latest_row(self):
+        self.db.insert_detection(_device('SN-A', _fixed(10), drone_lat=10.0))
+        self.db.insert_detection(_device('SN-A', _fixed(20), drone_lat=20.0))
+        # Late frame: counts, moves first_seen, but isn't the latest row
+        self.db.insert_detection(_device('SN-A', _fixed(5), drone_lat=5.0))
+
+        row = _summary(self.db)[0]
+        self.assertEqual((row['first_seen'], row['last_seen'], row['detection_count']),
+                         (_fixed(5), _fixed(20), 3))
+        self.assertEqual(self.db.get_drone_by_serial('SN-A')['drone_lat'], 20.0)
+
+    def test_operator_is_latest_non_zero(self):
+        self.db.insert_detection(_device('SN-B', _fixed(0), operator_lat=30.0, operator_lon=40.0))
+        self.db.insert_detection(_device('SN-B', _fixed(10)))
+        row = _summary(self.db)[0]
+        self.assertEqual((row['operator_lat'], row['operator_lon'], row['operator_alt'], row['operator_seen']),
+                         (30.0, 40.0, 5.0, _fixed(0)))
+
+        self.db.insert_detection(_device('SN-B', _fixed(20), operator_lat=31.0, operator_lon=41.0))
+        self.assertEqual(_summary(self.db)[0]['operator_lat'], 31.0)
+
+    def test_no_operator_is_null(self):
+        self.db.insert_detection(_device('SN-C', _fixed(0)))
+        self.assertIsNone(_summary(self.db)[0]['operator_lat'])
+
+    def test_batched_insert_is_summarized(self):
+        rows = [detection_row(_device('SN-%d' % (i % 3), _fixed(i))) for i in range(9)]
+        self.db.insert_detections(rows)
+        self.assertEqual([(r['serial_number'], r['detection_count'], r['last_seen']) for r in _summary(self.db)],
+                         [('SN-0', 3, _fixed(6)), ('SN-1', 3, _fixed(7)), ('SN-2', 3, _fixed(8))])
+
+
+class TestSummaryQueries(_FileDB):
+
+    def test_active_drones_cutoff_and_order(self):
+        early, latest = _ts(-30), _ts(0)
+        self.db.insert_detection(_device('OLD', _fixed(0)))
+        self.db.insert_detection(_device('NEW-1', latest, drone_lat=7.0))
+        self.db.insert_detection(_device('NEW-2', _ts(10)))
+        self.db.insert_detection(_device('NEW-1', early))
+
+        active = self.db.get_active_drones(max_age_seconds=7200)
+        self.assertEqual([d['serial_number'] for d in active], ['NEW-2', 'NEW-1'])
+        self.assertEqual(active[1]['drone_lat'], 7.0)
+        self.assertEqual((active[1]['first_seen'], active[1]['last_seen']), (early, latest))
+
+    def test_unknown_serial(self):
+        self.assertIsNone(self.db.get_drone_by_serial('NOPE'))
+
+    def test_stats(self):
+        for i in range(4):
+            self.db.insert_detection(_device('SN-%d' % (i % 2), _fixed(i)))
+        stats = self.db.get_stats()
+        self.assertEqual((stats['detection_count'], stats['unique_serials']), (4, 2))
+        self.assertEqual((stats['oldest_record'], stats['newest_record']), (_fixed(0), _fixed(3)))
+        self.assertEqual(self.db.get_unique_serial_count(), 2)
+
+    def test_empty_stats(self):
+        stats = self.db.get_stats()
+        self.assertEqual((stats['detection_count'], stats['unique_serials'], stats['oldest_record']),
+                         (0, 0, None))
+
+
+class TestSummaryPurge(_FileDB):
+
+    def test_purge_updates_affected_serials(self):
+        self.db.insert_detection(_device('GONE', _fixed(0)))
+        self.db.insert_detection(_device('SPLIT', _fixed(1), operator_lat=3.0, operator_lon=4.0))
+        self.db.insert_detection(_device('SPLIT', _fixed(100)))
+        self.db.insert_detection(_device('SPLIT', _fixed(200)))
+        self.db.insert_detection(_device('KEEP', _fixed(150), operator_lat=5.0, operator_lon=6.0))
+
+        self.assertEqual(self.db.purge_detections(_fixed(50)), 2)
+
+        rows = {r['serial_number']: r for r in _summary(self.db)}
+        self.assertEqual(sorted(rows), ['KEEP', 'SPLIT'])
+        self.assertEqual((rows['SPLIT']['first_seen'], rows['SPLIT']['detection_count']), (_fixed(100), 2))
+        self.assertIsNone(rows['SPLIT']['operator_lat'])
+        self.assertEqual(rows['KEEP']['operator_lat'], 5.0)
+
+
+class TestSummaryRebuild(_FileDB):
+
+    def _populate(self):
+        self.db.insert_detection(_device('SN-A', _fixed(10), operator_lat=1.0, operator_lon=1.0))
+        self.db.insert_detection(_device('SN-A', _fixed(20)))
+        self.db.insert_detection(_device('SN-A', _fixed(5)))
+        self.db.insert_detection(_device('SN-B', _fixed(30), drone_lat=3.0))
+        # Identical timestamps: the later row is the latest
+        self.db.insert_detection(_device('SN-B', _fixed(30), drone_lat=4.0))
+
+    def test_rebuild_matches_trigger(self):
+        self._populate()
+        maintained = _summary(self.db)
+        self.assertEqual(self.db.rebuild_drone_summary(), 2)
+        self.assertEqual(_summary(self.db), maintained)
+        self.assertEqual(self.db.get_drone_by_serial('SN-B')['drone_lat'], 4.0)
+
+    def test_old_database_is_summarized_on_open(self):
+        self._populate()
+        maintained = _summary(self.db)
+
+        # Strip the table the way a database from before it existed looks
+        conn = sqlite3.connect(self.path)
+        conn.execute("DROP TRIGGER trg_detections_summary")
+        conn.execute("DROP TABLE drone_summary")
+        conn.commit()
+        conn.close()
+
+        reopened = Database(db_path=self.path)
+        self.assertEqual(_summary(reopened), maintained)
+        self.assertEqual([d['serial_number'] for d in reopened.get_drone_database()], ['SN-B', 'SN-A'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,308 @@
+"""
+Tests for the server-sent live feed (live_feed.py, GET /api/v1/events).
+
+Covers:
+  - A new client gets a snapshot of every drone, receiver, counts and status.
+  - Detections are coalesced into one drones update per min_interval with
+    only the changed drones (upserts) and the keys that went away (removed).
+  - Each update is encoded once: every client is queued the same bytes.
+  - Vendors are resolved once per drone, not on every update.
+  - Alerts are pushed as /alerts/log-shaped rows.
+  - A client that falls behind is dropped; the client limit refuses more.
+  - The publisher thread stops when the last client leaves.
+  - api_events streams the queued messages and answers 503 without a feed.
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sparrow_droneid'))
+
+import backend.api_handler as api_handler  # noqa: E402
+from backend.live_feed import LiveFeed, LiveFeedClient  # noqa: E402
+from backend.models import AlertEvent, DroneIDDevice  # noqa: E402
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def _decode(message):
+    lines = message.decode('utf-8').rstrip('\n').split('\n')
+    assert lines[0].startswith('event: ') and lines[1].startswith('data: ')
+    return lines[0][len('event: '):], json.loads(lines[1][len('data: '):])
+
+
+def _drain(client):
+    messages = []
+    while True:
+        message = client.next(timeout=0.01)
+        if not message:
+            return messages
+        messages.append(_decode(message))
+
+
+class _Source:
+    """Stands in for the /drones and /status payload builders."""
+
+    def __init__(self):
+        self.drones = {}
+        self.calls = 0
+        self.status = {'monitoring': True}
+
+    def set(self, key, **fields):
+        self.drones[key] = dict({'drone_key': key, 'serial_number': key,
+                                 'mac_address': '', 'protocol': 'astm'}, **fields)
+
+    def get_drones(self):
+        self.calls += 1
+        return {
+            'drones': [dict(d) for d in self.drones.values()],
+            'receiver': {'lat': 1.0, 'lon': 2.0},
+            'counts': {'active': len(self.drones), 'aging': 0, 'stale': 0},
+            'timestamp': '2026-01-01T00:00:00Z',
+        }
+
+
+def _feed(source, **kwargs):
+    kwargs.setdefault('min_interval', 0.05)
+    kwargs.setdefault('refresh_interval', 30.0)
+    feed = LiveFeed(**kwargs)
+    feed.get_drones = source.get_drones
+    feed.get_status = lambda: dict(source.status)
+    feed.resolve_vendor = MagicMock(return_value='DJI')
+    return feed
+
+
+class TestSnapshotAndDeltas(unittest.TestCase):
+
+    def setUp(self):
+        self.source = _Source()
+        self.source.set('SN-A', drone_lat=1.0)
+        self.source.set('SN-B', drone_lat=2.0)
+        self.feed = _feed(self.source)
+
+    def tearDown(self):
+        self.feed.stop()
+
+    def test_snapshot_on_subscribe(self):
+        client = self.feed.subscribe()
+        event, data = _decode(client.next(timeout=1))
+        self.assertEqual(event, 'snapshot')
+        self.assertEqual([d['drone_key'] for d in data['drones']], ['SN-A', 'SN-B'])
+        self.assertEqual(data['drones'][0]['vendor'], 'DJI')
+        self.assertEqual(data['counts']['active'], 2)
+        self.assertEqual(data['status'], {'monitoring': True})
+
+    def test_detections_are_coalesced_into_deltas(self):
+        client = self.feed.subscribe()
+        client.next(timeout=1)
+        # The catch-up update right after subscribing has nothing new
+        self.assertTrue(_wait_for(lambda: not self.feed._dirty))
+        time.sleep(0.1)
+        calls = self.source.calls
+
+        self.source.set('SN-A', drone_lat=1.5)
+        self.source.set('SN-C', drone_lat=3.0)
+        del self.source.drones['SN-B']
+        with self.feed._cond:   # a burst faster than the publisher can wake
+            for _ in range(50):
+                self.feed.notify_detection()
+
+        self.assertTrue(_wait_for(lambda: self.source.calls > calls))
+        time.sleep(0.2)
+        self.assertEqual(self.source.calls, calls + 1)
+
+        messages = _drain(client)
+        self.assertEqual([m[0] for m in messages], ['drones'])
+        data = messages[0][1]
+        self.assertEqual(sorted(d['drone_key'] for d in data['upserts']), ['SN-A', 'SN-C'])
+        self.assertEqual(data['removed'], ['SN-B'])
+        self.assertEqual(data['counts']['active'], 2)
+
+    def test_unchanged_update_sends_nothing(self):
+        client = self.feed.subscribe()
+        client.next(timeout=1)
+        self.assertEqual(self.feed.publish(), 0)
+        self.assertEqual(_drain(client), [])
+
+    def test_same_bytes_to_every_client(self):
+        first = self.feed.subscribe()
+        second = self.feed.subscribe()
+        first.next(timeout=1)
+        second.next(timeout=1)
+        _drain(first)
+        _drain(second)
+
+        self.source.set('SN-A', drone_lat=9.0)
+        self.feed.publish()
+        a = first.next(timeout=1)
+        b = second.next(timeout=1)
+        self.assertIs(a, b)
+
+    def test_vendor_resolved_once_per_drone(self):
+        self.feed.subscribe()
+        for lat in (5.0, 6.0, 7.0):
+            self.source.set('SN-A', drone_lat=lat)
+            self.feed.publish()
+        self.assertEqual(self.feed.resolve_vendor.call_count, 2)
+
+        # A refresh re-resolves (vendor codes can change in settings)
+        self.feed.publish(refresh=True)
+        self.assertEqual(self.feed.resolve_vendor.call_count, 4)
+
+    def test_status_on_refresh_when_changed(self):
+        client = self.feed.subscribe()
+        client.next(timeout=1)
+        self.feed.publish(refresh=True)
+        self.assertEqual(_drain(client), [])
+
+        self.source.status = {'monitoring': False}
+        self.feed.publish(refresh=True)
+        self.assertEqual(_drain(client), [('status', {'monitoring': False})])
+
+
+class TestAlerts(unittest.TestCase):
+
+    def test_alert_row(self):
+        source = _Source()
+        feed = _feed(source)
+        client = feed.subscribe()
+        client.next(timeout=1)
+
+        device = DroneIDDevice(serial_number='SN-A', ua_type=2, protocol='astm')
+        event = AlertEvent(id=7, alert_type='new_drone', serial_number='SN-A', detail='New drone')
+        feed.publish_alert(event, device)
+
+        self.assertTrue(_wait_for(lambda: not feed._pending_alerts))
+        messages = []
+        self.assertTrue(_wait_for(lambda: messages.extend(_drain(client)) or messages))
+        feed.stop()
+
+        event_name, data = messages[0]
+        self.assertEqual(event_name, 'alerts')
+        alert = data['alerts'][0]
+        self.assertEqual((alert['id'], alert['state'], alert['vendor']), (7, 'ACTIVE', 'DJI'))
+        self.assertTrue(alert['ua_type_name'])
+
+    def test_no_clients_no_work(self):
+        feed = _feed(_Source())
+        feed.publish_alert(AlertEvent(id=1), DroneIDDevice())
+        feed.notify_detection()
+        self.assertEqual((feed._pending_alerts, feed._dirty), ([], False))
+
+
+class TestClients(unittest.TestCase):
+
+    def test_slow_client_is_dropped(self):
+        source = _Source()
+        feed = _feed(source, client_queue=3)
+        slow = feed.subscribe()
+        for lat in range(5):
+            source.set('SN-A', drone_lat=float(lat))
+            feed.publish()
+
+        self.assertTrue(slow.closed)
+        self.assertEqual(feed.get_feed_status()['live_feed_clients'], 0)
+        self.assertEqual(feed.get_feed_status()['live_feed_clients_dropped'], 1)
+        # Queued messages are still readable, then the stream ends
+        while slow.next(timeout=0.01):
+            pass
+        self.assertIsNone(slow.next(timeout=0.01))
+
+    def test_client_limit(self):
+        feed = _feed(_Source(), max_clients=2)
+        self.assertIsNotNone(feed.subscribe())
+        self.assertIsNotNone(feed.subscribe())
+        self.assertIsNone(feed.subscribe())
+        feed.stop()
+
+    def test_thread_stops_with_last_client(self):
+        feed = _feed(_Source())
+        client = feed.subscribe()
+        thread = feed._thread
+        self.assertTrue(thread.is_alive())
+        feed.unsubscribe(client)
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(feed._thread)
+
+        # The next subscriber starts it again
+        feed.subscribe()
+        self.assertIsNotNone(feed._thread)
+        feed.stop()
+
+    def test_keepalive_on_timeout(self):
+        client = LiveFeedClient()
+        self.assertEqual(client.next(timeout=0.01), b'')
+        client.close()
+        self.assertIsNone(client.next(timeout=0.01))
+
+
+class _StreamRequest:
+    """Minimal stand-in for RequestHandler that records the streamed bytes."""
+
+    def __init__(self):
+        self.wfile = io.BytesIO()
+        self.status = None
+        self.headers_sent = {}
+        self.close_connection = False
+        self._error = None
+
+    def send_response(self, status):
+        self.status = status
+
+    def send_header(self, key, value):
+        self.headers_sent[key] = value
+
+    def _send_cors_headers(self):
+        pass
+
+    def end_headers(self):
+        pass
+
+    def _send_error(self, status, code, msg):
+        self._error = (status, code)
+
+
+class TestEventsHandler(unittest.TestCase):
+
+    def test_503_without_feed(self):
+        req = _StreamRequest()
+        with patch.object(api_handler, '_live_feed', None):
+            api_handler.api_events(req)
+        self.assertEqual(req._error[0], 503)
+
+    def test_streams_until_feed_stops(self):
+        source = _Source()
+        source.set('SN-A')
+        feed = _feed(source)
+        req = _StreamRequest()
+
+        with patch.object(api_handler, '_live_feed', feed):
+            worker = threading.Thread(target=api_handler.api_events, args=(req,))
+            worker.start()
+            self.assertTrue(_wait_for(lambda: feed.get_feed_status()['live_feed_clients'] == 1))
+            feed.stop()
+            worker.join(5)
+
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(req.status, 200)
+        self.assertTrue(req.headers_sent['Content-Type'].startswith('text/event-stream'))
+        body = req.wfile.getvalue().decode('utf-8')
+        self.assertTrue(body.startswith('retry: '))
+        self.assertIn('event: snapshot\n', body)
+        self.assertTrue(req.close_connection)
+
+
+if __name__ == '__main__':
+    unittest.main()
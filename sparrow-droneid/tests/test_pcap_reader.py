@@ -0,0 +1,199 @@
+"""
+Tests for the buffered pcap reader (pcap_reader.py) and the WiFi parse path
+in droneid_engine.py that uses it.
+
+Covers:
+  - read_exact returns the right bytes however the pipe splits its reads,
+    across buffer compaction, and None when the stream ends mid-record.
+  - FrameExtractor.may_carry_odid accepts ASTM beacon / DJI / French vendor
+    IEs and NAN action frames, rejects everything else, and never rejects a
+    frame the extractors would decode.
+  - _parse_loop decodes Remote ID frames from a pcap stream (RSSI, MAC),
+    counts every frame, and reports EOF.
+"""
+
+import io
+import os
+import struct
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sparrow_droneid'))
+
+from backend.droneid_engine import DroneIDEngine, FrameExtractor  # noqa: E402
+from backend.pcap_reader import PcapStreamReader  # noqa: E402
+
+
+class _TrickleStream(io.RawIOBase):
+    """Binary stream whose readinto returns at most *chunk* bytes."""
+
+    def __init__(self, data, chunk):
+        self._data = data
+        self._pos = 0
+        self._chunk = chunk
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), self._chunk, len(self._data) - self._pos)
+        b[:n] = self._data[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+# ---- Frame builders ----
+
+def _radiotap(rssi=-60):
+    # version, pad, length 9, present = dBm antenna signal (bit 5), signal
+    return struct.pack('<BBHIb', 0, 0, 9, 1 << 5, rssi)
+
+
+def _mgmt_header(subtype, sa=b'\x60\x60\x1f\x01\x02\x03'):
+    return bytes([subtype << 4, 0]) + b'\x00\x00' + b'\xff' * 6 + sa + sa + b'\x00\x00'
+
+
+def _vendor_ie(oui, oui_type, payload=b''):
+    body = oui + bytes([oui_type]) + payload
+    return bytes([221, len(body)]) + body
+
+
+def _odid_pack(serial):
+    basic_id = bytes([0x02, 0x12]) + serial.encode().ljust(20, b'\x00') + b'\x00' * 3
+    return bytes([0x00, 0xF2, 25, 1]) + basic_id   # counter + message pack
+
+
+def _beacon(*ies, subtype=0x08):
+    ssid = bytes([0, 4]) + b'test'
+    rates = bytes([1, 4, 0x82, 0x84, 0x8b, 0x96])
+    return _mgmt_header(subtype) + b'\x00' * 12 + ssid + rates + b''.join(ies)
+
+
+def _nan_action(serial):
+    ssi = _odid_pack(serial)
+    sda = b'\x00' * 6 + b'\x01\x00\x10' + bytes([len(ssi)]) + ssi
+    attr = bytes([0x03]) + struct.pack('<H', len(sda)) + sda
+    return _mgmt_header(0x0D) + b'\x04\x09\x50\x6f\x9a\x13' + attr
+
+
+_WMM = _vendor_ie(b'\x00\x50\xf2', 0x02, b'\x01\x01\x00')
+_ASTM = b'\xfa\x0b\xbc'
+
+
+def _pcap(frames):
+    out = [struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 127)]
+    for frame in frames:
+        pkt = _radiotap() + frame
+        out.append(struct.pack('<IIII', 0, 0, len(pkt), len(pkt)) + pkt)
+    return b''.join(out)
+
+
+class TestPcapStreamReader(unittest.TestCase):
+
+    def test_reads_across_split_reads_and_compaction(self):
+        records = [bytes([i % 251]) * (100 + i % 50) for i in range(3000)]
+        stream = _TrickleStream(b''.join(records), chunk=4093)
+        reader = PcapStreamReader(stream, buffer_size=1)   # smallest allowed buffer
+
+        for record in records:
+            self.assertEqual(bytes(reader.read_exact(len(record))), record)
+        self.assertIsNone(reader.read_exact(1))
+        self.assertEqual(reader.bytes_read, sum(len(r) for r in records))
+
+    def test_short_stream(self):
+        reader = PcapStreamReader(io.BytesIO(b'abc'))
+        self.assertIsNone(reader.read_exact(4))
+
+    def test_large_reads(self):
+        stream = _TrickleStream(b'x' * 500_000, chunk=1 << 30)
+        reader = PcapStreamReader(stream)
+        for _ in range(5000):
+            reader.read_exact(100)
+        self.assertEqual(reader.reads, 1)
+
+    def test_oversized_read(self):
+        with self.assertRaises(ValueError):
+            PcapStreamReader(io.BytesIO(b''), buffer_size=1).read_exact(1 << 20)
+
+
+class TestMayCarryOdid(unittest.TestCase):
+
+    FRAMES = {
+        'plain beacon': (_beacon(_WMM), False),
+        'astm beacon': (_beacon(_WMM, _vendor_ie(_ASTM, 0x0D, _odid_pack('SN-ASTM-0001'))), True),
+        'astm oui, wrong type': (_beacon(_vendor_ie(_ASTM, 0x0E, _odid_pack('SN-ASTM-0001'))), False),
+        'astm probe response': (_beacon(_vendor_ie(_ASTM, 0x0D, _odid_pack('SN-PROBE-001')), subtype=0x05), True),
+        'dji beacon': (_beacon(_vendor_ie(b'\x26\x37\x12', 0x58, b'\x00' * 60)), True),
+        'french beacon': (_beacon(_vendor_ie(b'\x6a\x5c\x35', 0x01, b'\x01\x01\x01')), True),
+        'nan action': (_nan_action('SN-NAN-00001'), True),
+        'other action': (_mgmt_header(0x0D) + b'\x04\x09\x00\x50\xf2\x13' + b'\x00' * 8, False),
+        'data frame': (b'\x08\x00' + b'\x00' * 30, False),
+        'probe request': (_beacon(_vendor_ie(_ASTM, 0x0D, _odid_pack('SN-ASTM-0001')), subtype=0x04), False),
+        'truncated ie': (_beacon(_vendor_ie(_ASTM, 0x0D, _odid_pack('SN-ASTM-0001')))[:-10], False),
+        'short': (b'\x80\x00' + b'\x00' * 10, False),
+    }
+
+    def test_frames(self):
+        for name, (frame, expected) in self.FRAMES.items():
+            with self.subTest(name):
+                self.assertEqual(FrameExtractor.may_carry_odid(memoryview(frame)), expected)
+
+    def test_offset(self):
+        frame, _ = self.FRAMES['astm beacon']
+        self.assertTrue(FrameExtractor.may_carry_odid(_radiotap() + frame, 9))
+
+    def test_never_rejects_what_the_extractors_decode(self):
+        # Same dispatch as DroneIDEngine._process_frame
+        extractors = {0xD0: FrameExtractor.extract_from_action,
+                      0x80: FrameExtractor.extract_from_beacon_or_probe,
+                      0x50: FrameExtractor.extract_from_beacon_or_probe}
+        for name, (frame, expected) in self.FRAMES.items():
+            with self.subTest(name):
+                extract = extractors.get(frame[0])
+                decoded = extract(frame) if extract else None
+                if decoded is not None and decoded.get_key():
+                    self.assertTrue(FrameExtractor.may_carry_odid(frame))
+
+
+class TestParseLoop(unittest.TestCase):
+
+    def _run(self, data):
+        engine = DroneIDEngine(MagicMock(), MagicMock())
+        tracked = []
+        engine._track_device = tracked.append
+        engine._monitoring = True
+        proc = MagicMock()
+        proc.stdout = _TrickleStream(data, chunk=1000)
+        proc.poll.return_value = 0
+        engine._capture_proc = proc
+        engine._parse_loop()
+        return engine, tracked
+
+    def test_decodes_odid_frames(self):
+        frames = [_beacon(_WMM)] * 50 + [
+            _beacon(_WMM, _vendor_ie(_ASTM, 0x0D, _odid_pack('SN-ASTM-0001'))),
+            _nan_action('SN-NAN-00001'),
+        ] + [_beacon(_WMM)] * 50
+        engine, tracked = self._run(_pcap(frames))
+
+        self.assertEqual([d.serial_number for d in tracked], ['SN-ASTM-0001', 'SN-NAN-00001'])
+        self.assertEqual(tracked[0].rssi, -60)
+        self.assertEqual(tracked[0].mac_address, '60:60:1f:01:02:03')
+        self.assertEqual(engine._frame_count, 102)
+        self.assertEqual(engine._droneid_frame_count, 2)
+        self.assertEqual(engine._wifi_eof_reason, 'record header short read (tcpdump rc=0)')
+
+    def test_truncated_packet(self):
+        data = _pcap([_beacon(_WMM)] * 3)
+        engine, _ = self._run(data[:-5])
+        self.assertEqual(engine._frame_count, 2)
+        self.assertEqual(engine._wifi_eof_reason, 'packet data short read (tcpdump rc=0)')
+
+    def test_bad_magic(self):
+        engine, _ = self._run(b'\x00' * 24)
+        self.assertEqual(engine._wifi_eof_reason, 'bad pcap magic 0x00000000')
+
+
+if __name__ == '__main__':
+    unittest.main()
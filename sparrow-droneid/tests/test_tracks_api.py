@@ -0,0 +1,220 @@
+"""
+Tests for GET /api/v1/tracks (api_handler.py, database.py, models.py).
+
+Uses the FakeRequest + patch pattern from test_flags_api.py.
+Covers:
+  - get_tracks returns every active drone's points oldest first, leaves out
+    0,0 positions, serial-less drones and drones past max_age.
+  - A since cursor lists drones with no newer detection in unchanged only,
+    counting late detections with older timestamps as newer.
+  - simplify_track / bucket_track keep the end points and drop the rest
+    within tolerance / within a bucket.
+  - The handler applies bucket_s / tolerance_m, rejects a bad tolerance_m
+    and answers 503 without a database.
+  - _send_ok_etag answers 304 when If-None-Match matches.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sparrow_droneid'))
+
+import backend.api_handler as api_handler  # noqa: E402
+from backend.database import Database  # noqa: E402
+from backend.models import DroneIDDevice, simplify_track, bucket_track  # noqa: E402
+
+
+def _ts(offset_seconds: float = 0) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=offset_seconds)).isoformat().replace('+00:00', 'Z')
+
+
+def _device(serial, ts, lat=45.0, lon=-75.0):
+    dev = DroneIDDevice(serial_number=serial, drone_lat=lat, drone_lon=lon)
+    dev.last_seen = ts
+    return dev
+
+
+def _point(lat, lon, ts='2026-01-01T00:00:00Z'):
+    return {'drone_lat': lat, 'drone_lon': lon, 'timestamp': ts}
+
+
+class FakeRequest:
+    """Minimal stand-in for RequestHandler, matching test_flags_api.py pattern."""
+
+    def __init__(self, query_params=None):
+        self._query_params = query_params or {}
+        self._response = None
+        self._status = None
+
+    def _send_ok_etag(self, payload):
+        self._status = 200
+        self._response = payload
+
+    def _send_error(self, status, code, msg):
+        self._status = status
+        self._response = {'error': {'code': code, 'message': msg}}
+
+    def _qparam(self, name, default=None):
+        return self._query_params.get(name, default)
+
+    def _qparam_int(self, name, default=0):
+        v = self._query_params.get(name)
+        try:
+            return int(v) if v is not None else default
+        except (TypeError, ValueError):
+            return default
+
+
+class TestGetTracks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = Database(db_path=os.path.join(self.tmpdir.name, 'test.db'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_points_for_active_drones(self):
+        self.db.insert_detection(_device('SN-A', _ts(-20), lat=45.1))
+        self.db.insert_detection(_device('SN-A', _ts(-30), lat=45.0))
+        self.db.insert_detection(_device('SN-A', _ts(-10), lat=0.0, lon=0.0))
+        self.db.insert_detection(_device('SN-A', _ts(-900), lat=44.0))   # before the window
+        self.db.insert_detection(_device('SN-B', _ts(-5), lat=46.0))
+        self.db.insert_detection(_device('', _ts(-5)))
+        self.db.insert_detection(_device('GONE', _ts(-600)))
+
+        tracks, unchanged, cursor = self.db.get_tracks(minutes=10, max_age_seconds=180)
+
+        self.assertEqual(sorted(tracks), ['SN-A', 'SN-B'])
+        self.assertEqual([p['drone_lat'] for p in tracks['SN-A']], [45.0, 45.1])
+        self.assertEqual(unchanged, [])
+        self.assertEqual(cursor, 7)
+
+    def test_since_cursor(self):
+        self.db.insert_detection(_device('SN-A', _ts(-20)))
+        self.db.insert_detection(_device('SN-B', _ts(-20)))
+        _, _, cursor = self.db.get_tracks()
+
+        self.db.insert_detection(_device('SN-B', _ts(-10), lat=45.5))
+        tracks, unchanged, new_cursor = self.db.get_tracks(since_id=cursor)
+
+        self.assertEqual(unchanged, ['SN-A'])
+        self.assertEqual([p['drone_lat'] for p in tracks['SN-B']], [45.0, 45.5])
+        self.assertEqual(new_cursor, cursor + 1)
+
+        tracks, unchanged, _ = self.db.get_tracks(since_id=new_cursor)
+        self.assertEqual((tracks, unchanged), ({}, ['SN-A', 'SN-B']))
+
+    def test_since_cursor_sees_late_older_detection(self):
+        self.db.insert_detection(_device('SN-A', _ts(-10), lat=45.0))
+        _, _, cursor = self.db.get_tracks()
+
+        # Arrives after the cursor but with an older timestamp, so it does
+        # not become the drone's latest detection.
+        self.db.insert_detection(_device('SN-A', _ts(-20), lat=44.5))
+        tracks, unchanged, _ = self.db.get_tracks(since_id=cursor)
+
+        self.assertEqual(unchanged, [])
+        self.assertEqual([p['drone_lat'] for p in tracks['SN-A']], [44.5, 45.0])
+
+    def test_empty_database(self):
+        self.assertEqual(self.db.get_tracks(), ({}, [], 0))
+
+
+class TestTrackDownsampling(unittest.TestCase):
+
+    def test_simplify_drops_points_on_a_straight_line(self):
+        line = [_point(45.0 + i * 0.0001, -75.0) for i in range(50)]
+        self.assertEqual(simplify_track(line, 1.0), [line[0], line[-1]])
+
+    def test_simplify_keeps_corners(self):
+        # East ~80 m, then north ~110 m
+        points = ([_point(45.0, -75.0 + i * 0.0001) for i in range(11)] +
+                  [_point(45.0 + i * 0.0001, -74.999) for i in range(1, 11)])
+        self.assertEqual(simplify_track(points, 2.0), [points[0], points[10], points[-1]])
+
+    def test_simplify_hover_and_off(self):
+        hover = [_point(45.0, -75.0)] * 5
+        self.assertEqual(simplify_track(hover, 1.0), [hover[0], hover[-1]])
+        self.assertEqual(simplify_track(hover, 0), hover)
+
+    def test_bucket_keeps_first_and_last_per_bucket(self):
+        points = [_point(45.0, -75.0, '2026-01-01T00:00:%02dZ' % s) for s in (0, 1, 4, 6, 9, 12)]
+        kept = bucket_track(points, 5)
+        self.assertEqual([p['timestamp'][-3:-1] for p in kept], ['00', '04', '09', '12'])
+
+
+class TestTracksHandler(unittest.TestCase):
+
+    def _db(self, tracks):
+        db = MagicMock()
+        db.get_tracks.return_value = (tracks, ['SN-OLD'], 42)
+        return db
+
+    def test_503_when_db_absent(self):
+        req = FakeRequest()
+        with patch.object(api_handler, '_db', None):
+            api_handler.api_tracks(req)
+        self.assertEqual(req._status, 503)
+
+    def test_response_and_cursor(self):
+        db = self._db({'SN-A': [_point(45.0, -75.0), _point(45.001, -75.0)]})
+        req = FakeRequest({'since': '7', 'minutes': '5'})
+        with patch.object(api_handler, '_db', db):
+            api_handler.api_tracks(req)
+
+        db.get_tracks.assert_called_once_with(minutes=5, max_age_seconds=180, since_id=7)
+        self.assertEqual(req._status, 200)
+        self.assertEqual(req._response['unchanged'], ['SN-OLD'])
+        self.assertEqual(req._response['cursor'], 42)
+        self.assertEqual(len(req._response['tracks']['SN-A']), 2)
+
+    def test_no_since_asks_for_everything(self):
+        db = self._db({})
+        with patch.object(api_handler, '_db', db):
+            api_handler.api_tracks(FakeRequest())
+        self.assertIsNone(db.get_tracks.call_args.kwargs['since_id'])
+
+    def test_tolerance_simplifies(self):
+        line = [_point(45.0 + i * 0.0001, -75.0) for i in range(20)]
+        req = FakeRequest({'tolerance_m': '1.5'})
+        with patch.object(api_handler, '_db', self._db({'SN-A': line})):
+            api_handler.api_tracks(req)
+        self.assertEqual(req._response['tracks']['SN-A'], [line[0], line[-1]])
+
+    def test_bad_tolerance(self):
+        req = FakeRequest({'tolerance_m': 'far'})
+        with patch.object(api_handler, '_db', self._db({})):
+            api_handler.api_tracks(req)
+        self.assertEqual(req._status, 400)
+
+
+class TestSendOkEtag(unittest.TestCase):
+
+    def _handler(self, if_none_match=''):
+        handler = MagicMock()
+        handler.headers = {'If-None-Match': if_none_match} if if_none_match else {}
+        return handler
+
+    def test_etag_then_304(self):
+        first = self._handler()
+        api_handler.RequestHandler._send_ok_etag(first, {'cursor': 1})
+        etag = first._send_raw.call_args.kwargs['extra_headers']['ETag']
+
+        again = self._handler('W/' + etag)
+        api_handler.RequestHandler._send_ok_etag(again, {'cursor': 1})
+        again.send_response.assert_called_once_with(304)
+        again._send_raw.assert_not_called()
+
+        changed = self._handler(etag)
+        api_handler.RequestHandler._send_ok_etag(changed, {'cursor': 2})
+        changed.send_response.assert_not_called()
+        self.assertNotEqual(changed._send_raw.call_args.kwargs['extra_headers']['ETag'], etag)
+
+
+if __name__ == '__main__':
+    unittest.main()
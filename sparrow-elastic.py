@@ -27,6 +27,7 @@ import logging
 import os
 import socket
 import sys
+import threading
 import time
 import urllib.error
 import urllib.request
@@ -44,6 +45,7 @@ from sparrow_elastic.client_factory import build_client
 from sparrow_elastic.data_refresh import refresh_all, start_background_refresh
 from sparrow_elastic.device_classifier import combine_matches
 from sparrow_elastic.document_builder import (
+    DocumentCache,
     build_bt_document,
     build_wifi_document,
     compute_doc_id,
@@ -53,8 +55,16 @@ from sparrow_elastic.fingerbank_client import (
     enrich_classification,
     lookup as fb_lookup,
 )
+from sparrow_elastic.pipeline import (
+    DropOldestQueue,
+    FlushWorker,
+    StageMetrics,
+    StageWorkers,
+)
 from sparrow_elastic.settings import fingerbank_enabled
+from sparrow_elastic.spill_log import SpillLog
 from sparrow_elastic.templates import load_component, resolve_template
+from sparrowscandiff import NetworkDiffMirror
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -193,6 +203,65 @@ def _build_parser() -> argparse.ArgumentParser:
         help="Number of buffered documents that triggers an early flush.",
     )
 
+    p.add_argument(
+        "--no-bulk-compress",
+        action="store_true",
+        default=False,
+        help="Send bulk request bodies uncompressed (default is gzip).",
+    )
+
+    # Overflow spill
+    p.add_argument(
+        "--spill-dir",
+        default="",
+        metavar="PATH",
+        help=(
+            "Directory for bulk actions that overflow the in-memory buffers "
+            "during a cluster outage; replayed in order on recovery. "
+            "Empty (default) drops the oldest actions instead."
+        ),
+    )
+    p.add_argument(
+        "--spill-max-mb",
+        type=float,
+        default=512.0,
+        metavar="MB",
+        help="Disk budget per index for spilled actions; oldest segments are dropped beyond it.",
+    )
+    p.add_argument(
+        "--spill-max-age",
+        type=float,
+        default=24.0,
+        metavar="HOURS",
+        help="Spilled actions older than this are discarded instead of replayed (0 keeps them).",
+    )
+
+    # Pipeline
+    p.add_argument(
+        "--build-workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Threads building documents from fetched scan batches.",
+    )
+    p.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        metavar="N",
+        help=(
+            "Scan batches held between the fetch and build stages. When full, "
+            "the oldest batch is dropped so the scan cadence never stalls."
+        ),
+    )
+    p.add_argument(
+        "--stats-interval",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="Seconds between pipeline stage latency/throughput log lines (0 disables).",
+    )
+
     # Fingerbank
     p.add_argument(
         "--fingerbank-api-key",
@@ -324,6 +393,7 @@ def requestRemoteInterfaces(
 def requestRemoteNetworks(
     remote_ip: str, remote_port: int, interface: str,
     channel_list: Optional[List[int]] = None,
+    mirror: Optional[NetworkDiffMirror] = None,
 ) -> Tuple[int, str, Optional[List[dict]]]:
     """Scan and fetch WiFi networks via the remote agent.
 
@@ -332,21 +402,34 @@ def requestRemoteNetworks(
         remote_port:  Agent HTTP port.
         interface:    Wireless interface name to scan.
         channel_list: Optional list of channel frequencies (MHz) to restrict scan.
+        mirror:       Optional NetworkDiffMirror kept across calls.  The agent
+                      then only sends networks that changed since the previous
+                      call and the mirror rebuilds the full list.
 
     Returns:
         (errcode, errmsg, list_of_network_dicts)
         Network dicts follow the WirelessNetwork.toJsondict() shape.
     """
     url = f"http://{remote_ip}:{remote_port}/wireless/networks/{interface}"
+    params = []
     if channel_list:
-        url += "?frequencies=" + ",".join(str(c) for c in channel_list)
+        params.append("frequencies=" + ",".join(str(c) for c in channel_list))
+    if mirror is not None and mirror.getQueryString():
+        params.append(mirror.getQueryString())
+    if params:
+        url += "?" + "&".join(params)
     # Scan can take several seconds; use a generous timeout.
     status, body = _http_get(url, timeout=20.0)
     if status == 200:
         try:
             j = json.loads(body)
+            if mirror is not None:
+                errcode, errmsg, networks, _ = mirror.apply(j)
+                return errcode, errmsg, list(networks.values())
             return j.get("errCode", 0), j.get("errString", ""), j.get("networks", [])
         except Exception as exc:
+            if mirror is not None:
+                mirror.reset()
             return -2, f"Error parsing networks response: {exc}", None
     return -1, f"HTTP {status} from agent networks endpoint", None
 
@@ -754,56 +837,107 @@ class FlushState:
         self._last_flush = time.monotonic()
 
 
+# Spilled segments replayed per flush call, so a long backlog can't starve
+# the live buffer.
+_MAX_REPLAY_SEGMENTS = 10
+
+
+def _index_not_found(errors: list) -> bool:
+    """Return True if any bulk item error says the target index is missing."""
+    for err in errors:
+        err_type = ""
+        try:
+            err_type = (
+                err.get("index", {})
+                   .get("error", {})
+                   .get("type", "")
+            )
+        except Exception:
+            pass
+        if "index_not_found" in err_type or "no such index" in err_type.lower():
+            return True
+    return False
+
+
 def flush_buffer(
     client,
     buf: BulkBuffer,
     state: FlushState,
     alias: str,
     bootstrap_needed_flag: list,  # mutable single-element list used as pointer
-) -> None:
+) -> bool:
     """Flush the buffer to Elasticsearch if flush criteria are met.
 
+    Actions spilled to disk during an outage are replayed first, oldest
+    segment first; the in-memory buffer is only flushed once the backlog
+    replays cleanly.
+
     Args:
         client:               SearchClient instance.
         buf:                  BulkBuffer to flush.
         state:                FlushState tracking timing and batch-size thresholds.
         alias:                Index alias name (used for logging only).
         bootstrap_needed_flag: ``[True/False]`` — if flush fails with an
-                              index-not-found error, set to True so the main
-                              loop knows to re-bootstrap on the next cycle.
+                              index-not-found error, set to True so the
+                              flusher knows to re-bootstrap before retrying.
+
+    Returns:
+        True if a bulk request was sent (successful or not), False if the
+        flush was not due or there was nothing to send.
     """
     if not state.is_due(buf.depth()):
-        return
+        return False
+
+    sent = False
+    for _ in range(_MAX_REPLAY_SEGMENTS):
+        pending = buf.replay_batch()
+        if pending is None:
+            break
+        token, spilled = pending
+        sent = True
+        try:
+            success, errors = client.bulk(spilled)
+        except Exception as exc:
+            # Leave the segment on disk; it is retried on the next flush,
+            # a full flush interval from now rather than on the next tick.
+            logger.warning(
+                "flush[%s]: replay of %d spilled actions failed (%s)",
+                alias, len(spilled), exc,
+            )
+            state.mark_flushed()
+            return True
+        if errors and _index_not_found(errors):
+            logger.warning(
+                "flush[%s]: index-not-found error — will re-bootstrap", alias
+            )
+            bootstrap_needed_flag[0] = True
+            state.mark_flushed()
+            return True
+        buf.commit_replay(token)
+        logger.info(
+            "flush[%s]: replayed %d spilled actions (%d errors, %d still on disk)",
+            alias, len(spilled), len(errors or []), buf.spill_pending(),
+        )
 
     actions = buf.swap()
     if not actions:
         state.mark_flushed()
-        return
+        return sent
 
     try:
         success, errors = client.bulk(actions)
         state.mark_flushed()
         if errors:
             # Check for index-not-found errors which indicate bootstrap is needed.
-            for err in errors:
-                err_type = ""
-                try:
-                    err_type = (
-                        err.get("index", {})
-                           .get("error", {})
-                           .get("type", "")
-                    )
-                except Exception:
-                    pass
-                if "index_not_found" in err_type or "no such index" in err_type.lower():
-                    logger.warning(
-                        "flush[%s]: index-not-found error — will re-bootstrap", alias
-                    )
-                    bootstrap_needed_flag[0] = True
-                    # Put the actions back into the buffer so they aren't lost.
-                    for a in actions:
-                        buf.append(a)
-                    return
+            if _index_not_found(errors):
+                logger.warning(
+                    "flush[%s]: index-not-found error — will re-bootstrap", alias
+                )
+                bootstrap_needed_flag[0] = True
+                # Put the actions back into the buffer so they aren't lost.
+                for a in actions:
+                    buf.append(a)
+                return True
             logger.warning(
                 "flush[%s]: bulk partial failure — %d errors out of %d actions",
                 alias, len(errors), len(actions),
@@ -818,6 +952,7 @@ def flush_buffer(
         # Return actions to the buffer so they are retried next cycle.
         for a in actions:
             buf.append(a)
+    return True
 
 
 # ---------------------------------------------------------------------------
@@ -839,6 +974,84 @@ def update_observer_gps(obs: dict, agent_ip: str, agent_port: int) -> None:
         obs["gps_status"] = "unlocked"
 
 
+# ---------------------------------------------------------------------------
+# Pipeline stages
+# ---------------------------------------------------------------------------
+# The fetch stage (main thread) polls the agent on a fixed cadence and hands
+# ScanBatch objects to the build workers through a bounded queue; the build
+# workers turn them into bulk actions in the BulkBuffers; one FlushWorker per
+# buffer writes them out.  A slow or degraded cluster therefore only delays
+# its flusher, never the next scan.
+
+class ScanBatch:
+    """One agent poll result queued for the build stage.
+
+    ``obs`` is a snapshot of the observer context at fetch time so later GPS
+    updates don't leak into documents for an earlier scan.
+    """
+
+    __slots__ = ("kind", "items", "obs", "now_utc")
+
+    def __init__(self, kind: str, items: List[dict], obs: dict, now_utc: datetime) -> None:
+        self.kind = kind
+        self.items = items
+        self.obs = obs
+        self.now_utc = now_utc
+
+
+def index_batch(
+    batch: ScanBatch,
+    buf: BulkBuffer,
+    alias: str,
+    settings: dict,
+    cache: Optional[DocumentCache] = None,
+) -> int:
+    """Build, enrich and buffer the documents for one scan batch.
+
+    Args:
+        batch:    ScanBatch from the fetch stage.
+        buf:      BulkBuffer receiving the bulk actions.
+        alias:    Target index alias.
+        settings: Bridge settings dict (Fingerbank configuration).
+        cache:    Optional DocumentCache owned by the calling thread.
+
+    Returns:
+        Number of documents appended to *buf*.
+    """
+    build = build_wifi_document if batch.kind == "wifi" else build_bt_document
+    added = 0
+    for item in batch.items:
+        try:
+            doc = build(item, batch.obs, batch.now_utc, cache=cache)
+            apply_fingerbank(doc, settings)
+            buf.append({
+                "_op_type": "index",
+                "_index": alias,
+                "_id": compute_doc_id(doc),
+                "_source": doc,
+            })
+            added += 1
+        except Exception as exc:
+            logger.debug("%s doc build error: %s", "WiFi" if batch.kind == "wifi" else "BT", exc)
+    return added
+
+
+def log_pipeline_stats(metrics: List[StageMetrics], build_queue: DropOldestQueue,
+                       buffers: Dict[str, BulkBuffer]) -> None:
+    """Log one line per stage plus queue and buffer pressure."""
+    for m in metrics:
+        logger.info("pipeline[%s]: %s", m.name, m.snapshot())
+    logger.info(
+        "pipeline: build_queue=%d dropped_batches=%d %s",
+        build_queue.qsize(), build_queue.dropped,
+        " ".join(
+            f"{name}_{key}={value}"
+            for name, buf in buffers.items()
+            for key, value in buf.stats().items()
+        ),
+    )
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -885,6 +1098,7 @@ def main(argv: Optional[List[str]] = None) -> int:  # noqa: C901
         "password": args.password,
         "api_key": args.api_key,
         "verify_certs": args.verify_tls,
+        "bulk_compress": not args.no_bulk_compress,
         "fingerbank_api_key": args.fingerbank_api_key,
         "fingerbank_offline_db": "",
     }
@@ -1007,142 +1221,202 @@ def main(argv: Optional[List[str]] = None) -> int:  # noqa: C901
     # ------------------------------------------------------------------
     # Bulk buffers + flush state.
     # ------------------------------------------------------------------
-    wifi_buf = BulkBuffer(max_size=10_000)
-    bt_buf = BulkBuffer(max_size=10_000)
+    # With --spill-dir, overflow during a cluster outage goes to disk and is
+    # replayed by the flushers instead of being dropped.
+    wifi_spill = bt_spill = None
+    if args.spill_dir:
+        spill_bytes = int(args.spill_max_mb * 1024 * 1024)
+        spill_age = args.spill_max_age * 3600.0
+        wifi_spill = SpillLog(os.path.join(args.spill_dir, "wifi"), spill_bytes, spill_age)
+        bt_spill = SpillLog(os.path.join(args.spill_dir, "bt"), spill_bytes, spill_age)
+        logger.info("Bulk overflow spills to %s (max %.0f MB, %.0f h)",
+                    args.spill_dir, args.spill_max_mb, args.spill_max_age)
+    wifi_buf = BulkBuffer(max_size=10_000, spill=wifi_spill)
+    bt_buf = BulkBuffer(max_size=10_000, spill=bt_spill)
     wifi_flush = FlushState(args.flush_interval, args.batch_size)
     bt_flush = FlushState(args.flush_interval, args.batch_size)
+    # Agent-side diffs: after the first cycle only changed networks are sent.
+    wifi_mirror = NetworkDiffMirror()
+
+    # ------------------------------------------------------------------
+    # Pipeline: fetch (this thread) -> build workers -> flusher threads.
+    # ------------------------------------------------------------------
+    fetch_metrics = StageMetrics("fetch")
+    build_metrics = StageMetrics("build")
+    wifi_flush_metrics = StageMetrics("flush-wifi")
+    bt_flush_metrics = StageMetrics("flush-bt")
+    build_queue = DropOldestQueue(args.queue_size)
+
+    def make_flush_once(kind, alias, buf, state, bootstrap_needed):
+        def flush_once() -> bool:
+            # Re-bootstrap if a previous flush detected a missing index.
+            if bootstrap_needed[0] and not args.dont_create_indices:
+                logger.info("Re-bootstrapping %s index after index-not-found error",
+                            "WiFi" if kind == "wifi" else "BT")
+                if bootstrap(client, alias, kind, args.engine, args.ilm_policy):
+                    bootstrap_needed[0] = False
+            return flush_buffer(client, buf, state, alias, bootstrap_needed)
+        return flush_once
+
+    wifi_flusher = FlushWorker(
+        "flush-wifi",
+        make_flush_once("wifi", args.wifi_alias, wifi_buf, wifi_flush, wifi_bootstrap_needed),
+        args.flush_interval, wifi_flush_metrics,
+    )
+    bt_flusher = FlushWorker(
+        "flush-bt",
+        make_flush_once("bt", args.bt_alias, bt_buf, bt_flush, bt_bootstrap_needed),
+        args.flush_interval, bt_flush_metrics,
+    )
+
+    # Static/derived document fields per BSSID / BT MAC, reused across cycles.
+    # DocumentCache is not thread-safe, so each build worker keeps its own.
+    build_local = threading.local()
+
+    def build_stage(batch: ScanBatch) -> int:
+        cache = getattr(build_local, "cache", None)
+        if cache is None:
+            cache = build_local.cache = DocumentCache()
+        if batch.kind == "wifi":
+            buf, alias, flusher = wifi_buf, args.wifi_alias, wifi_flusher
+        else:
+            buf, alias, flusher = bt_buf, args.bt_alias, bt_flusher
+        added = index_batch(batch, buf, alias, settings, cache)
+        logger.debug("%s batch: %d documents buffered", batch.kind, added)
+        # Forget devices that have not been seen for a while.
+        pruned = cache.prune()
+        if pruned:
+            logger.debug("Document cache: pruned %d idle devices (%s)",
+                         pruned, cache.stats())
+        if buf.depth() >= args.batch_size:
+            flusher.wake()
+        return added
+
+    builders = StageWorkers("build", build_queue, build_stage,
+                            args.build_workers, build_metrics)
+
+    def enqueue(kind: str, items: List[dict], now_utc: datetime) -> None:
+        if build_queue.offer(ScanBatch(kind, items, dict(obs), now_utc)):
+            logger.warning(
+                "Build stage behind — dropped oldest queued scan batch "
+                "(%d dropped so far)", build_queue.dropped,
+            )
 
     logger.info(
         "Bridge running: interface=%s wifi_alias=%s bt_alias=%s "
-        "scan_delay=%.0fs flush_interval=%.0fs batch_size=%d",
+        "scan_delay=%.0fs flush_interval=%.0fs batch_size=%d build_workers=%d",
         wifi_interface, args.wifi_alias, args.bt_alias or "(disabled)",
-        args.scandelay, args.flush_interval, args.batch_size,
+        args.scandelay, args.flush_interval, args.batch_size, args.build_workers,
     )
 
+    builders.start()
+    wifi_flusher.start()
+    if bt_enabled:
+        bt_flusher.start()
+
     # ------------------------------------------------------------------
-    # Main scan/flush loop.
+    # Fetch loop: fixed cadence, independent of build and flush latency.
     # ------------------------------------------------------------------
+    next_scan = time.monotonic()
+    last_stats = time.monotonic()
     try:
         while True:
-            # Per-cycle reference time for bootstrap/flush housekeeping only.
-            # Doc-build now_utc is recaptured AFTER each scan returns so it
-            # is always >= the agent's observation timestamps (avoids
-            # negative age_seconds due to scan-call latency).
-            now_utc = datetime.now(tz=timezone.utc)
+            with fetch_metrics.time():
+                # Update observer GPS from the agent.
+                update_observer_gps(obs, agent_ip, agent_port)
 
-            # Re-bootstrap if a previous flush detected a missing index.
-            if wifi_bootstrap_needed[0] and not args.dont_create_indices:
-                logger.info("Re-bootstrapping WiFi index after index-not-found error")
-                if bootstrap(client, args.wifi_alias, "wifi", args.engine, args.ilm_policy):
-                    wifi_bootstrap_needed[0] = False
-
-            if bt_enabled and bt_bootstrap_needed[0] and not args.dont_create_indices:
-                logger.info("Re-bootstrapping BT index after index-not-found error")
-                if bootstrap(client, args.bt_alias, "bt", args.engine, args.ilm_policy):
-                    bt_bootstrap_needed[0] = False
-
-            # Update observer GPS from the agent.
-            update_observer_gps(obs, agent_ip, agent_port)
-
-            # ---- WiFi scan --------------------------------------------------
-            errcode, errmsg, networks = requestRemoteNetworks(
-                agent_ip, agent_port, wifi_interface
-            )
-            if errcode == 0 and networks is not None:
-                # Recapture after HTTP returns so now_utc >= any lastseen the
-                # agent reports for this batch.
-                now_utc = datetime.now(tz=timezone.utc)
-                logger.debug("WiFi scan: %d networks received", len(networks))
-                for net in networks:
-                    try:
-                        doc = build_wifi_document(net, obs, now_utc)
-                        apply_fingerbank(doc, settings)
-                        action = {
-                            "_op_type": "index",
-                            "_index": args.wifi_alias,
-                            "_id": compute_doc_id(doc),
-                            "_source": doc,
-                        }
-                        wifi_buf.append(action)
-                    except Exception as exc:
-                        logger.debug("WiFi doc build error: %s", exc)
-            else:
-                logger.warning("WiFi scan failed (errcode=%d): %s", errcode, errmsg)
-
-            # ---- Bluetooth scan ---------------------------------------------
-            if bt_enabled:
-                errcode, errmsg, _hbt, _hub, _spec, disc_running = (
-                    getRemoteBluetoothRunningServices(agent_ip, agent_port)
+                # ---- WiFi scan ----------------------------------------------
+                errcode, errmsg, networks = requestRemoteNetworks(
+                    agent_ip, agent_port, wifi_interface, mirror=wifi_mirror
                 )
-
-                if disc_running:
-                    errcode, errmsg, devices = getRemoteBluetoothDiscoveryStatus(
-                        agent_ip, agent_port
-                    )
-                    if errcode == 0 and devices:
-                        # Clear the remote list after fetching so we don't
-                        # re-index stale entries on the next cycle.
-                        clearRemoteBluetoothDeviceList(agent_ip, agent_port)
-                        # Recapture after HTTP returns (see WiFi branch).
-                        now_utc = datetime.now(tz=timezone.utc)
-                        logger.debug("BT scan: %d devices received", len(devices))
-                        for dev in devices:
-                            try:
-                                doc = build_bt_document(dev, obs, now_utc)
-                                apply_fingerbank(doc, settings)
-                                action = {
-                                    "_op_type": "index",
-                                    "_index": args.bt_alias,
-                                    "_id": compute_doc_id(doc),
-                                    "_source": doc,
-                                }
-                                bt_buf.append(action)
-                            except Exception as exc:
-                                logger.debug("BT doc build error: %s", exc)
-                    elif errcode != 0:
-                        logger.warning("BT discovery status error: %s", errmsg)
+                if errcode == 0 and networks is not None:
+                    # Captured after HTTP returns so now_utc >= any lastseen
+                    # the agent reports for this batch (avoids negative
+                    # age_seconds due to scan-call latency).
+                    now_utc = datetime.now(tz=timezone.utc)
+                    logger.debug("WiFi scan: %d networks received", len(networks))
+                    # The mirror updates its dicts in place on the next poll,
+                    # so hand the build stage copies.
+                    enqueue("wifi", [dict(net) for net in networks], now_utc)
                 else:
-                    # Discovery scan stopped; clear stale list and restart.
-                    logger.warning(
-                        "BT discovery scan not running — clearing and restarting"
+                    logger.warning("WiFi scan failed (errcode=%d): %s", errcode, errmsg)
+
+                # ---- Bluetooth scan -----------------------------------------
+                if bt_enabled:
+                    errcode, errmsg, _hbt, _hub, _spec, disc_running = (
+                        getRemoteBluetoothRunningServices(agent_ip, agent_port)
                     )
-                    clearRemoteBluetoothDeviceList(agent_ip, agent_port)
-                    rc, msg = startRemoteBluetoothDiscoveryScan(agent_ip, agent_port)
-                    if rc != 0:
-                        logger.warning("BT restart failed: %s", msg)
-
-            # ---- Flush buffers ----------------------------------------------
-            flush_buffer(
-                client, wifi_buf, wifi_flush,
-                args.wifi_alias, wifi_bootstrap_needed,
-            )
-            if bt_enabled:
-                flush_buffer(
-                    client, bt_buf, bt_flush,
-                    args.bt_alias, bt_bootstrap_needed,
-                )
 
-            time.sleep(args.scandelay)
+                    if disc_running:
+                        errcode, errmsg, devices = getRemoteBluetoothDiscoveryStatus(
+                            agent_ip, agent_port
+                        )
+                        if errcode == 0 and devices:
+                            # Clear the remote list after fetching so we don't
+                            # re-index stale entries on the next cycle.
+                            clearRemoteBluetoothDeviceList(agent_ip, agent_port)
+                            # Recapture after HTTP returns (see WiFi branch).
+                            now_utc = datetime.now(tz=timezone.utc)
+                            logger.debug("BT scan: %d devices received", len(devices))
+                            enqueue("bt", devices, now_utc)
+                        elif errcode != 0:
+                            logger.warning("BT discovery status error: %s", errmsg)
+                    else:
+                        # Discovery scan stopped; clear stale list and restart.
+                        logger.warning(
+                            "BT discovery scan not running — clearing and restarting"
+                        )
+                        clearRemoteBluetoothDeviceList(agent_ip, agent_port)
+                        rc, msg = startRemoteBluetoothDiscoveryScan(agent_ip, agent_port)
+                        if rc != 0:
+                            logger.warning("BT restart failed: %s", msg)
+
+            now = time.monotonic()
+            if args.stats_interval > 0 and now - last_stats >= args.stats_interval:
+                last_stats = now
+                stage_metrics = [fetch_metrics, build_metrics, wifi_flush_metrics]
+                stage_buffers = {"wifi": wifi_buf}
+                if bt_enabled:
+                    stage_metrics.append(bt_flush_metrics)
+                    stage_buffers["bt"] = bt_buf
+                log_pipeline_stats(stage_metrics, build_queue, stage_buffers)
+
+            # Scans start every --scandelay seconds; an overrun starts the
+            # next one immediately instead of trying to catch up.
+            next_scan += args.scandelay
+            if next_scan > now:
+                time.sleep(next_scan - now)
+            else:
+                next_scan = now
 
     except KeyboardInterrupt:
         logger.info("Interrupted — stopping BT discovery and exiting")
         if bt_enabled:
             stopRemoteBluetoothDiscoveryScan(agent_ip, agent_port)
     finally:
-        # Final flush of any remaining buffered documents.
+        # Let queued batches reach the buffers, then stop the flushers so
+        # the final flush below is the only writer.
+        builders.stop(drain=True)
+        wifi_flusher.stop()
+        bt_flusher.stop()
+
+        # Final flush of any remaining buffered documents.  Whatever can't
+        # be indexed now is spilled (with --spill-dir) for the next run.
         logger.info("Final flush before exit...")
-        try:
-            remaining_wifi = wifi_buf.swap()
-            if remaining_wifi:
-                client.bulk(remaining_wifi)
-                logger.info("Flushed %d remaining WiFi documents", len(remaining_wifi))
-            if bt_enabled:
-                remaining_bt = bt_buf.swap()
-                if remaining_bt:
-                    client.bulk(remaining_bt)
-                    logger.info("Flushed %d remaining BT documents", len(remaining_bt))
-        except Exception as exc:
-            logger.warning("Final flush error: %s", exc)
+        final = [("WiFi", wifi_buf)]
+        if bt_enabled:
+            final.append(("BT", bt_buf))
+        for label, buf in final:
+            remaining = buf.swap()
+            if not remaining:
+                continue
+            try:
+                client.bulk(remaining)
+                logger.info("Flushed %d remaining %s documents", len(remaining), label)
+            except Exception as exc:
+                saved = buf.spill(remaining)
+                logger.warning("Final flush error (%s): %s — %d of %d documents spilled",
+                               label, exc, saved, len(remaining))
         client.close()
 
     return 0
@@ -26,13 +26,12 @@ import re
 import json
 import datetime
 from dateutil import parser
-import requests
 from time import sleep
-from threading import Thread, Lock
+from threading import Lock
 
 from PyQt5.QtWidgets import QApplication, QMainWindow,  QDesktopWidget, QGraphicsSimpleTextItem, QFrame, QGraphicsView
 from PyQt5.QtWidgets import QMessageBox, QFileDialog, QInputDialog, QLineEdit, QAbstractItemView #, QSplitter
-from PyQt5.QtWidgets import QMenu, QAction, QComboBox, QLabel, QPushButton, QCheckBox, QTableWidget,QTableWidgetItem, QHeaderView
+from PyQt5.QtWidgets import QMenu, QAction, QComboBox, QLabel, QPushButton, QCheckBox, QTableView, QHeaderView
 #from PyQt5.QtWidgets import QTabWidget, QWidget, QVBoxLayout
 from PyQt5.QtChart import QChart, QChartView, QLineSeries, QValueAxis
 from PyQt5.QtGui import QPen, QFont, QBrush, QColor, QPainter
@@ -42,11 +41,14 @@ from PyQt5.QtGui import QIcon, QRegion
 from PyQt5 import QtCore
 
 # from PyQt5.QtCore import QCoreApplication # programmatic quit
-from wirelessengine import WirelessEngine, WirelessNetwork
+from wirelessengine import WirelessEngine, WirelessNetwork, WirelessNetworkMirror
+from sparrowagentstream import AgentStreamReader, AgentStreamUnsupported
+from sparrowagentclient import AgentClient, agentGet, REQUEST_CANCELLED
 from sparrowcommon import BaseThreadClass, portOpen, stringtobool
 from sparrowgps import GPSEngine, GPSStatus, SparrowGPS
 from telemetry import TelemetryDialog
-from sparrowtablewidgets import IntTableWidgetItem, DateTableWidgetItem, FloatTableWidgetItem
+from sparrownetworkmodel import NetworkTableModel, NetworkSortFilterProxyModel
+from sparrowchannelplot import ChannelTrace, ChannelPlotItem
 from sparrowmap import MapMarker, MapEngineOSM
 from sparrowdialogs import MapSettingsDialog, TelemetryMapSettingsDialog, AgentListenerDialog, GPSCoordDialog
 from sparrowdialogs import AgentConfigDialog, RemoteFilesDialog, BluetoothDialog
@@ -109,20 +111,9 @@ def getOUIDB():
     return ouidb
     
 # ------------------  Global functions for agent HTTP requests ------------------------------
-_httpSession = requests.Session()
-
 def makeGetRequest(url, waitTimeout=6):
-    try:
-        # Not using a timeout can cause the request to hang indefinitely
-        response = _httpSession.get(url, timeout=waitTimeout)
-    except:
-        return -1, ""
-        
-    if response.status_code != 200:
-        return response.status_code, ""
-        
-    htmlResponse=response.text
-    return response.status_code, htmlResponse
+    # All agent calls share sparrowagentclient's keep-alive session
+    return agentGet(url, waitTimeout)
 
 # ------------------  GPS requests ------------------------------
 def requestRemoteGPS(remoteIP, remotePort):
@@ -151,8 +142,22 @@ def requestRemoteGPS(remoteIP, remotePort):
     else:
         return -1, "Error connecting to remote agent", None
 
+def requestRemoteGPSAndAgentState(remoteIP, remotePort):
+    # requestRemoteGPS plus, when that fails, whether the agent's port still
+    # answers.  Runs on an AgentClient worker so the port check doesn't block the GUI.
+    errCode, errMsg, gpsStatus = requestRemoteGPS(remoteIP, remotePort)
+    
+    if errCode == 0:
+        agentUp = True
+    else:
+        agentUp = portOpen(remoteIP, remotePort)
+        
+    return errCode, errMsg, gpsStatus, agentUp
+
 # ------------------  WiFi scan requests ------------------------------
-def requestRemoteNetworks(remoteIP, remotePort, remoteInterface, channelList=None):
+def requestRemoteNetworks(remoteIP, remotePort, remoteInterface, channelList=None, networkMirror=None):
+    # With a WirelessNetworkMirror the agent only sends what changed since the
+    # mirror's last response and the mirror rebuilds the full list
     url = "http://" + remoteIP + ":" + str(remotePort) + "/wireless/networks/" + remoteInterface
     
     if (channelList is not None) and (len(channelList) > 0):
@@ -163,12 +168,24 @@ def requestRemoteNetworks(remoteIP, remotePort, remoteInterface, channelList=Non
     if url.endswith(','):
         url = url[:-1]
         
+    if networkMirror is not None:
+        sinceQuery = networkMirror.getQueryString()
+        if len(sinceQuery) > 0:
+            if '?' in url:
+                url += '&' + sinceQuery
+            else:
+                url += '?' + sinceQuery
+        
     # Pass a higher timeout since the scan may take a bit
     statusCode, responsestr = makeGetRequest(url, 20)
     
     if statusCode == 200:
         try:
             networkjson = json.loads(responsestr)
+            
+            if networkMirror is not None:
+                return networkMirror.applyResponse(networkjson)
+                
             wirelessNetworks = {}
             
             for curNetDict in networkjson['networks']:
@@ -177,6 +194,9 @@ def requestRemoteNetworks(remoteIP, remotePort, remoteInterface, channelList=Non
                 
             return networkjson['errCode'], networkjson['errString'], wirelessNetworks
         except:
+            if networkMirror is not None:
+                # Start over with a full list next time
+                networkMirror.reset()
             return -2, "Error parsing remote agent response", None
     else:
         return -1, "Error connecting to remote agent", None
@@ -552,29 +572,6 @@ class ScanThread(BaseThreadClass):
                     
         self.threadRunning = False
 
-# ------------------  Remote single-shot scan thread  ------------------------------
-class remoteSingleShotThread(Thread):
-    def __init__(self, interface, mainWin, remoteAgentIP, remoteAgentPort, channelList=None):
-        super().__init__()
-        self.interface = interface
-        self.mainWin = mainWin
-        self.huntChannelList = channelList
-        self.remoteAgentIP = remoteAgentIP
-        self.remoteAgentPort = remoteAgentPort
-        
-    def run(self):
-        self.threadRunning = True
-        
-        # Run one shot and emit results
-        if (not self.huntChannelList) or (len(self.huntChannelList) == 0):
-            retCode, errString, wirelessNetworks = requestRemoteNetworks(self.remoteAgentIP, self.remoteAgentPort, self.interface)
-        else:
-            retCode, errString, wirelessNetworks = requestRemoteNetworks(self.remoteAgentIP, self.remoteAgentPort, self.interface, self.huntChannelList)
-        
-        mainWin.singleshotscanresults.emit(wirelessNetworks, retCode, errString)
-        
-        self.threadRunning = False
-
 # ------------------  Remote agent network scan thread  ------------------------------
 class RemoteScanThread(BaseThreadClass):
     def __init__(self, interface, mainWin, channelList=None):
@@ -585,12 +582,58 @@ class RemoteScanThread(BaseThreadClass):
         self.remoteAgentIP = "127.0.0.1"
         self.remoteAgentPort = 8020
         self.channelList = channelList
+        # Keeps the agent's list between polls so each poll only transfers changes
+        self.networkMirror = WirelessNetworkMirror()
+        self.streamReader = None
+        
+    # The main window stops the thread by setting signalStop, which also has to
+    # break a stream read that is blocked waiting for the next scan
+    @property
+    def signalStop(self):
+        return self._signalStop
+        
+    @signalStop.setter
+    def signalStop(self, value):
+        self._signalStop = value
+        if value and self.streamReader:
+            self.streamReader.stop()
+        
+    def runStream(self):
+        # Results pushed by the agent's '/events' stream as each scan completes.
+        # Returns False if the agent doesn't support it.
+        self.streamReader = AgentStreamReader(self.remoteAgentIP, self.remoteAgentPort, [self.interface], ['wifi'])
+        
+        try:
+            for curEvent in self.streamReader.events():
+                if self.signalStop:
+                    break
+                    
+                if curEvent['type'] == 'reset':
+                    self.networkMirror.reset()
+                    continue
+                    
+                if curEvent.get('interface') != self.interface:
+                    continue
+                    
+                retCode, errString, wirelessNetworks = self.networkMirror.applyResponse(curEvent['data'])
+                if (retCode == 0) and wirelessNetworks and (len(wirelessNetworks) > 0) and (not self.signalStop):
+                    if not self.mainWin._tableUpdateInProgress:
+                        self.mainWin.scanresults.emit(wirelessNetworks)
+        except AgentStreamUnsupported:
+            return False
+            
+        return True
         
     def run(self):
         self.threadRunning = True
         
+        # The stream always scans the full band, so hunt lists keep polling
+        if (not self.channelList) and self.runStream():
+            self.threadRunning = False
+            return
+            
         while (not self.signalStop):
-            retCode, errString, wirelessNetworks = requestRemoteNetworks(self.remoteAgentIP, self.remoteAgentPort, self.interface, self.channelList)
+            retCode, errString, wirelessNetworks = requestRemoteNetworks(self.remoteAgentIP, self.remoteAgentPort, self.interface, self.channelList, self.networkMirror)
             if (retCode == 0):
                 # self.statusBar().showMessage('Scan complete.  Found ' + str(len(wirelessNetworks)) + ' networks')
                 if wirelessNetworks and (len(wirelessNetworks) > 0) and (not self.signalStop):
@@ -633,7 +676,6 @@ class mainWindow(QMainWindow):
     # Notify signals
     resized = QtCore.pyqtSignal()
     scanresults = QtCore.pyqtSignal(dict)
-    singleshotscanresults = QtCore.pyqtSignal(dict, int, str)
     scanresultsfromadvanced = QtCore.pyqtSignal(dict)
     errmsg = QtCore.pyqtSignal(int, str)
     gpsSynchronizedsignal = QtCore.pyqtSignal()
@@ -739,7 +781,6 @@ class mainWindow(QMainWindow):
         self.scanThread = None
         self.scanDelay = 0.5
         self.scanresults.connect(self.scanResults)
-        self.singleshotscanresults.connect(self.onSingleShotScanResults)
         self.scanresultsfromadvanced.connect(self.scanResultsFromAdvanced)
         self.errmsg.connect(self.onErrMsg)
         
@@ -750,7 +791,9 @@ class mainWindow(QMainWindow):
         self.remoteScanRunning = False
         self.remoteScanIsBlocking = False
         self.remoteScanThread = None
-        self.remoteSingleShotThread = None
+        # Shared connection pool and worker threads for GPS, spectrum and single-shot agent requests
+        self.agentClient = AgentClient()
+        self.agentClient.requestFailed.connect(self.onAgentRequestFailed)
         self.remoteScanDelay = 0.5
         self.lastRemoteState = False
         self.remoteAgentUp = False
@@ -777,6 +820,13 @@ class mainWindow(QMainWindow):
         else:
             self.runningAsRoot = True
     
+    def vendorLookup(self, macAddr):
+        # Cached ouiLookup.  The network table calls this when it draws a vendor cell.
+        if macAddr not in self._vendorCache:
+            self._vendorCache[macAddr] = self.ouiLookup(macAddr) or ''
+            
+        return self._vendorCache[macAddr]
+        
     def ouiLookup(self, macAddr):
         clientVendor = ""
         
@@ -923,22 +973,33 @@ class mainWindow(QMainWindow):
         self.lblAgeOut = QLabel("Remove networks not seen in the past 3 minutes", self)
         self.lblAgeOut.setGeometry(30, 70, 300, 30)
         
+        # Network table filter
+        self.lblNetFilter = QLabel("Filter:", self)
+        self.lblNetFilter.setGeometry(340, 70, 45, 30)
+        self.netFilter = QLineEdit(self)
+        self.netFilter.setStatusTip('Only show networks whose MAC address, vendor, or SSID contains this text.')
+        self.netFilter.setGeometry(385, 70, 200, 30)
+        self.netFilter.textChanged.connect(self.onNetFilterChanged)
+        
         # Network Table
-        self.networkTable = QTableWidget(self)
-        self.networkTable.setColumnCount(14)
+        # The networks live in networkModel.  The view sits on a sort/filter
+        # proxy, so view rows have to be mapped to model rows (see currentNetworkRow).
+        self.networkModel = NetworkTableModel(self.vendorLookup, self)
+        self.networkProxy = NetworkSortFilterProxyModel(self)
+        self.networkProxy.setSourceModel(self.networkModel)
+        
+        self.networkTable = QTableView(self)
+        self.networkTable.setModel(self.networkProxy)
         # self.networkTable.setGeometry(10, 100, self.mainWidth-60, self.mainHeight/2-105)
         self.networkTable.setShowGrid(True)
-        # self.networkTable.setHorizontalHeaderLabels(['macAddr', 'vendor','SSID', 'Security', 'Privacy', 'Channel', 'Frequency', 'Signal Strength', 'Bandwidth', 'Last Seen', 'First Seen', 'GPS'])
-        self.networkTable.setHorizontalHeaderLabels(['macAddr', 'vendor','SSID', 'Security', 'Privacy', 'Channel', 'Frequency', 'Signal Strength', 'Bandwidth', '% Utilization','Stations','Last Seen', 'First Seen', 'GPS'])
         self.networkTable.resizeColumnsToContents()
-        self.networkTable.setRowCount(0)
         self.networkTable.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
 
         self.networkTable.horizontalHeader().sectionClicked.connect(self.onTableHeadingClicked)
-        self.networkTable.cellClicked.connect(self.onTableClicked)
+        self.networkTable.clicked.connect(self.onTableClicked)
         
         self.networkTable.setSelectionMode( QAbstractItemView.SingleSelection )
-        self.networkTable.itemSelectionChanged.connect(self.onNetworkTableSelectionChanged)
+        self.networkTable.selectionModel().selectionChanged.connect(self.onNetworkTableSelectionChanged)
         self.networkTableSortOrder = Qt.DescendingOrder
         self.networkTableSortIndex = -1
         
@@ -1281,6 +1342,9 @@ class mainWindow(QMainWindow):
         self.Plot24 = QChartView(self.chart24, self)
         self.Plot24.setBackgroundBrush(chartBorder)
         self.Plot24.setRenderHint(QPainter.Antialiasing)
+        
+        # Networks are drawn by one ChannelPlotItem per chart rather than a QLineSeries each
+        self.channelPlot24 = ChannelPlotItem(self.chart24, self.chart24axisx, self.chart24yAxis)
 
         self.chart5 = QChart()
         self.chart5.setAcceptHoverEvents(True)
@@ -1298,18 +1362,20 @@ class mainWindow(QMainWindow):
         self.chart5axisx .setTitleText("Channel")
         self.chart5.addAxis(self.chart5axisx , Qt.AlignBottom)
         
-        newAxis = QValueAxis()
-        newAxis.setMin(-100)
-        newAxis.setMax(-10)
-        newAxis.setTickCount(9)
-        newAxis.setLabelFormat("%d")
-        newAxis.setTitleText("dBm")
-        self.chart5.addAxis(newAxis, Qt.AlignLeft)
+        self.chart5yAxis = QValueAxis()
+        self.chart5yAxis.setMin(-100)
+        self.chart5yAxis.setMax(-10)
+        self.chart5yAxis.setTickCount(9)
+        self.chart5yAxis.setLabelFormat("%d")
+        self.chart5yAxis.setTitleText("dBm")
+        self.chart5.addAxis(self.chart5yAxis, Qt.AlignLeft)
         
         self.Plot5 = QChartView(self.chart5, self)
         self.Plot5.setBackgroundBrush(chartBorder)
         self.Plot5.setRenderHint(QPainter.Antialiasing)
         self.Plot5.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+        
+        self.channelPlot5 = ChannelPlotItem(self.chart5, self.chart5axisx, self.chart5yAxis)
     
     def onBtSpectrumOverrideGain(self):
         text, okPressed = QInputDialog.getText(self, "Spectrum Analyzer Gain","Enter a gain to apply to the spectrum:", 
@@ -1325,11 +1391,15 @@ class mainWindow(QMainWindow):
                 QMessageBox.question(self, 'Error',"Could not convert " + text + " to a number.", QMessageBox.Ok)
 
     def createSpectrumLine(self):
+        spectrumPen = QPen(Qt.white)
+        spectrumPen.setWidth(2)
+        
         if not self.spectrum24Line:
             # add it
             
             # 2.4 GHz
-            self.spectrum24Line = self.createNewSeries(Qt.white, self.chart24)
+            self.spectrum24Line = QHoverLineSeries(self.chart24)
+            self.spectrum24Line.setPen(spectrumPen)
             self.spectrum24Line.setName('Spectrum')
             
             self.chart24.addSeries(self.spectrum24Line)
@@ -1338,7 +1408,8 @@ class mainWindow(QMainWindow):
 
         if not self.spectrum5Line:
             # 5 GHz
-            self.spectrum5Line = self.createNewSeries(Qt.white, self.chart5)
+            self.spectrum5Line = QHoverLineSeries(self.chart5)
+            self.spectrum5Line.setPen(spectrumPen)
             self.spectrum5Line.setName('Spectrum')
             
             self.chart5.addSeries(self.spectrum5Line)
@@ -1709,15 +1780,14 @@ class mainWindow(QMainWindow):
         self.advancedScan = None
      
     def onAdvScanUpdateSSIDs(self, wirelessNetworks):
-        rowPosition = self.networkTable.rowCount()
+        rowPosition = self.networkModel.rowCount()
         
         if rowPosition > 0:
+            updatedRows = []
+            
             # Range goes to last # - 1
             for curRow in range(0, rowPosition):
-                try:
-                    curData = self.networkTable.item(curRow, 2).data(Qt.UserRole+1)
-                except:
-                    curData = None
+                curData = self.networkModel.network(curRow)
                     
                 if (curData):
                     # We already have the network.  just update it
@@ -1727,9 +1797,11 @@ class mainWindow(QMainWindow):
                             # See if we had an unknown SSID
                             if curData.ssid.startswith('<Unknown') and (not curNet.ssid.startswith('<Unknown')):
                                 curData.ssid = curNet.ssid
-                                self.networkTable.item(curRow, 2).setText(curData.ssid)
-                                curSeries = self.networkTable.item(curRow, 2).data(Qt.UserRole)
+                                updatedRows.append(curRow)
+                                curSeries = self.networkModel.series(curRow)
                                 curSeries.setName(curData.ssid)
+                                
+            self.networkModel.rowsUpdated(updatedRows)
         
     def onAdvancedScan(self):
         if not hasFalcon:
@@ -1861,17 +1933,17 @@ class mainWindow(QMainWindow):
     def onCopyNet(self):
         self.updateLock.acquire()
         
-        curRow = self.networkTable.currentRow()
-        curCol = self.networkTable.currentColumn()
+        curRow = self.currentNetworkRow()
+        curCol = self.networkTable.currentIndex().column()
         
         if curRow == -1 or curCol == -1:
             self.updateLock.release()
             return
         
         if curCol != 11:
-            curText = self.networkTable.item(curRow, curCol).text()
+            curText = self.networkModel.cellText(curRow, curCol)
         else:
-            curNet = self.networkTable.item(curRow, 2).data(Qt.UserRole+1)
+            curNet = self.networkModel.network(curRow)
             curText = 'Last Recorded GPS Coordinates:\n' + str(curNet.gps)
             curText += 'Strongest Signal Coordinates:\n'
             curText += 'Strongest Signal: ' + str(curNet.strongestsignal) + '\n'
@@ -1885,35 +1957,38 @@ class mainWindow(QMainWindow):
     def onDeleteNet(self):
         self.updateLock.acquire()
         
-        curRow = self.networkTable.currentRow()
+        curRow = self.currentNetworkRow()
         
         if curRow == -1:
             self.updateLock.release()
             return
         
-        curNet = self.networkTable.item(curRow, 2).data(Qt.UserRole+1)
-        curSeries = self.networkTable.item(curRow, 2).data(Qt.UserRole)
+        curNet = self.networkModel.network(curRow)
+        curSeries = self.networkModel.series(curRow)
 
         if curNet and curSeries:
+            if curSeries is self.lastSeries:
+                self.lastSeries = None
+                
             if (curNet.channel < 15):
-                self.chart24.removeSeries(curSeries)
+                self.channelPlot24.removeTrace(curSeries)
             else:
-                self.chart5.removeSeries(curSeries)
+                self.channelPlot5.removeTrace(curSeries)
             
-        self.networkTable.removeRow(curRow)
+        self.networkModel.removeNetworkRows([curRow])
         
         self.updateLock.release()
             
     def onShowTelemetry(self):
         self.updateLock.acquire()
         
-        curRow = self.networkTable.currentRow()
+        curRow = self.currentNetworkRow()
         
         if curRow == -1:
             self.updateLock.release()
             return
         
-        curNet = self.networkTable.item(curRow, 2).data(Qt.UserRole+1)
+        curNet = self.networkModel.network(curRow)
         
         if curNet == None:
             self.updateLock.release()
@@ -1936,8 +2011,12 @@ class mainWindow(QMainWindow):
         # User could have selected a different network.
         telemetryWindow.updateNetworkData(curNet)            
         
+    def currentNetworkRow(self):
+        # Model row of the network selected in the table view, or -1
+        return self.networkProxy.sourceRow(self.networkTable.currentIndex().row())
+        
     def showNTContextMenu(self, pos):
-        curRow = self.networkTable.currentRow()
+        curRow = self.currentNetworkRow()
         
         if curRow == -1:
             return
@@ -1951,50 +2030,66 @@ class mainWindow(QMainWindow):
         if self.btShowSpectrum: #  and self.bluetooth:
             if (not self.remoteAgentUp):
                 # Get Local data
-                channelData = self.bluetooth.spectrumToChannels()
-                errcode = 0
+                self.plotBtSpectrum(self.bluetooth.spectrumToChannels())
+                self.btSpectrumTimer.start(self.btSpectrumTimeoutLocal)
             else:
-                # Get remote data
-                errcode, errmsg, channelData = getRemoteBluetoothScanSpectrum(self.remoteAgentIP, self.remoteAgentPort)
-                if errcode != 0:
-                    self.statusBar().showMessage(errmsg)
-                    channelData = {}
+                # Get remote data.  The timer is restarted when the agent answers
+                # so a slow agent can't have more than one request outstanding.
+                self.agentClient.submit('btspectrum', getRemoteBluetoothScanSpectrum, (self.remoteAgentIP, self.remoteAgentPort), self.onRemoteBtSpectrum,
+                                       lambda errCode, errString: (errCode, errString, {}))
                 
-            # Plot it
-            self.createSpectrumLine()
+    def onRemoteBtSpectrum(self, result):
+        errcode, errmsg, channelData = result
+        
+        if errcode == REQUEST_CANCELLED:
+            # Agent switched or dropped.  Keep the timer going if the spectrum is still up.
+            if self.btShowSpectrum:
+                self.btSpectrumTimer.start(self.btSpectrumTimeoutLocal)
+            return
+            
+        if (not self.btShowSpectrum) or (not self.remoteAgentUp):
+            # Turned off while the request was out
+            return
+            
+        if errcode != 0:
+            self.statusBar().showMessage(errmsg)
+            channelData = {}
+            
+        self.plotBtSpectrum(channelData)
+        
+        # Slow it down just a bit for remote agents
+        self.btSpectrumTimer.start(self.btSpectrumTimeoutRemote)
+        
+    def plotBtSpectrum(self, channelData):
+        # Plot it
+        self.createSpectrumLine()
 
-            self.spectrum24Line.clear()
+        self.spectrum24Line.clear()
 
-            if len(channelData) > 0:
-                sortedKeys = sorted(channelData.keys())
-                
-                # For testing the waterfall
-                # newArray=[]
-                
-                for curKey in sortedKeys:
-                    fCurKey = float(curKey)
-                    if self.btSpectrumGain != 1.0:
-                        # Have to do this + / - to apply the gain on the scale since the values are all negative
-                        # -90 * 1.1 is -99 (goes the wrong way)
-                        dBm = float((channelData[curKey] + 110.0)*self.btSpectrumGain - 110.0)
-                    else:
-                        dBm = float(channelData[curKey])
-                        
-                    self.spectrum24Line.append(fCurKey, dBm)
-                    # For testing the waterfall
-                    # newArray.append(dBm)
-                
+        if len(channelData) > 0:
+            sortedKeys = sorted(channelData.keys())
+            
+            # For testing the waterfall
+            # newArray=[]
+            
+            for curKey in sortedKeys:
+                fCurKey = float(curKey)
+                if self.btSpectrumGain != 1.0:
+                    # Have to do this + / - to apply the gain on the scale since the values are all negative
+                    # -90 * 1.1 is -99 (goes the wrong way)
+                    dBm = float((channelData[curKey] + 110.0)*self.btSpectrumGain - 110.0)
+                else:
+                    dBm = float(channelData[curKey])
+                    
+                self.spectrum24Line.append(fCurKey, dBm)
                 # For testing the waterfall
-                #if not self.waterfall24:
-                #    self.waterfall24 = WaterfallPlotWindow(self, None)
-                
-                #self.waterfall24.update
+                # newArray.append(dBm)
             
-            if not self.remoteAgentUp:
-                self.btSpectrumTimer.start(self.btSpectrumTimeoutLocal)
-            else:
-                # Slow it down just a bit for remote agents
-                self.btSpectrumTimer.start(self.btSpectrumTimeoutRemote)
+            # For testing the waterfall
+            #if not self.waterfall24:
+            #    self.waterfall24 = WaterfallPlotWindow(self, None)
+            
+            #self.waterfall24.update
         
     def onHackrfSpectrumTimer(self):
         if self.hackrfShowSpectrum24 or self.hackrfShowSpectrum5: #  and self.bluetooth:
@@ -2005,73 +2100,88 @@ class mainWindow(QMainWindow):
                 else:
                     channelData = self.hackrf.spectrum24ToChannels()
                     
-                errcode = 0
+                self.plotHackrfSpectrum(channelData)
+                self.hackrfSpectrumTimer.start(self.hackrfSpectrumTimeoutLocal)
             else:
-                # Get remote data
-                errcode, errmsg, channelData = getRemoteSpectrumScan(self.remoteAgentIP, self.remoteAgentPort)
-
-                if errcode != 0:
-                    self.statusBar().showMessage(errmsg)
-                    channelData = {}
-                        
-            # Plot it
-            self.createSpectrumLine()
-
-            # Only clear the oen we're working with, just in case btSpectrum is active
-            if self.hackrfShowSpectrum24:
-                self.spectrum24Line.clear()
-            elif self.hackrfShowSpectrum5:
-                self.spectrum5Line.clear()
-
-            if len(channelData) > 0 and self.hackrfShowSpectrum24:
-                self.Plot24.setViewportUpdateMode(QGraphicsView.NoViewportUpdate)
-                sortedKeys = sorted(channelData.keys())
-                for curKey in sortedKeys:
-                    fCurKey = float(curKey)
-                    if self.btSpectrumGain != 1.0:
-                        # Have to do this + / - to apply the gain on the scale since the values are all negative
-                        # -90 * 1.1 is -99 (goes the wrong way)
-                        dBm = float((channelData[curKey] + 110.0)*self.btSpectrumGain - 110.0)
-                    else:
-                        dBm = float(channelData[curKey])
-                    self.spectrum24Line.append(fCurKey, dBm)
-                # Re-enable updates and force an update
-                self.Plot24.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
-                # Not needed
-                # self.Plot24.update()
+                # Get remote data.  The timer is restarted when the agent answers.
+                self.agentClient.submit('hackrfspectrum', getRemoteSpectrumScan, (self.remoteAgentIP, self.remoteAgentPort), self.onRemoteHackrfSpectrum,
+                                       lambda errCode, errString: (errCode, errString, {}))
                 
-            if len(channelData) > 0 and self.hackrfShowSpectrum5:
-                # Disable chart update
-                self.Plot5.setViewportUpdateMode(QGraphicsView.NoViewportUpdate)
-
-                sortedKeys = sorted(channelData.keys())
-                for curKey in sortedKeys:
-                    fCurKey = float(curKey)
-                    if self.btSpectrumGain != 1.0:
-                        # Have to do this + / - to apply the gain on the scale since the values are all negative
-                        # -90 * 1.1 is -99 (goes the wrong way)
-                        dBm = float((channelData[curKey] + 110.0)*self.btSpectrumGain - 110.0)
-                    else:
-                        dBm = float(channelData[curKey])
-                    self.spectrum5Line.append(fCurKey, dBm)
-
-                # Re-enable updates and force an update
-                self.Plot5.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
-                # Not needed
-                # self.Plot5.update()
-                
-            if not self.remoteAgentUp:
+    def onRemoteHackrfSpectrum(self, result):
+        errcode, errmsg, channelData = result
+        
+        if errcode == REQUEST_CANCELLED:
+            # Agent switched or dropped.  Keep the timer going if the spectrum is still up.
+            if self.hackrfShowSpectrum24 or self.hackrfShowSpectrum5:
                 self.hackrfSpectrumTimer.start(self.hackrfSpectrumTimeoutLocal)
-            else:
-                # Slow it down just a bit for remote agents
-                self.hackrfSpectrumTimer.start(self.hackrfSpectrumTimeoutRemote)
+            return
+            
+        if (not (self.hackrfShowSpectrum24 or self.hackrfShowSpectrum5)) or (not self.remoteAgentUp):
+            # Turned off while the request was out
+            return
+            
+        if errcode != 0:
+            self.statusBar().showMessage(errmsg)
+            channelData = {}
+            
+        self.plotHackrfSpectrum(channelData)
+        
+        # Slow it down just a bit for remote agents
+        self.hackrfSpectrumTimer.start(self.hackrfSpectrumTimeoutRemote)
         
+    def plotHackrfSpectrum(self, channelData):
+        # Plot it
+        self.createSpectrumLine()
+
+        # Only clear the oen we're working with, just in case btSpectrum is active
+        if self.hackrfShowSpectrum24:
+            self.spectrum24Line.clear()
+        elif self.hackrfShowSpectrum5:
+            self.spectrum5Line.clear()
+
+        if len(channelData) > 0 and self.hackrfShowSpectrum24:
+            self.Plot24.setViewportUpdateMode(QGraphicsView.NoViewportUpdate)
+            sortedKeys = sorted(channelData.keys())
+            for curKey in sortedKeys:
+                fCurKey = float(curKey)
+                if self.btSpectrumGain != 1.0:
+                    # Have to do this + / - to apply the gain on the scale since the values are all negative
+                    # -90 * 1.1 is -99 (goes the wrong way)
+                    dBm = float((channelData[curKey] + 110.0)*self.btSpectrumGain - 110.0)
+                else:
+                    dBm = float(channelData[curKey])
+                self.spectrum24Line.append(fCurKey, dBm)
+            # Re-enable updates and force an update
+            self.Plot24.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+            # Not needed
+            # self.Plot24.update()
+            
+        if len(channelData) > 0 and self.hackrfShowSpectrum5:
+            # Disable chart update
+            self.Plot5.setViewportUpdateMode(QGraphicsView.NoViewportUpdate)
+
+            sortedKeys = sorted(channelData.keys())
+            for curKey in sortedKeys:
+                fCurKey = float(curKey)
+                if self.btSpectrumGain != 1.0:
+                    # Have to do this + / - to apply the gain on the scale since the values are all negative
+                    # -90 * 1.1 is -99 (goes the wrong way)
+                    dBm = float((channelData[curKey] + 110.0)*self.btSpectrumGain - 110.0)
+                else:
+                    dBm = float(channelData[curKey])
+                self.spectrum5Line.append(fCurKey, dBm)
+
+            # Re-enable updates and force an update
+            self.Plot5.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+            # Not needed
+            # self.Plot5.update()
+    
     def onGPSTimer(self):
         self.onGPSStatus(False)
         self.gpsTimer.start(self.gpsTimerTimeout)
         
     def onGoogleMap(self):
-        rowPosition = self.networkTable.rowCount()
+        rowPosition = self.networkModel.rowCount()
 
         if rowPosition <= 0:
             QMessageBox.question(self, 'Error',"There's no access points in the table.  Please run a scan first or open a saved scan.", QMessageBox.Ok)
@@ -2091,10 +2201,7 @@ class mainWindow(QMainWindow):
         
         # Range goes to last # - 1
         for curRow in range(0, rowPosition):
-            try:
-                curData = self.networkTable.item(curRow, 2).data(Qt.UserRole+1)
-            except:
-                curData = None
+            curData = self.networkModel.network(curRow)
             
             if (curData):
                 newMarker = MapMarker()
@@ -2259,40 +2366,47 @@ class mainWindow(QMainWindow):
                     self.statusBar().showMessage('No local gpsd running.')
                 self.btnGPSStatus.setStyleSheet("background-color: red; border: 1px;")
         else:
-            # Checking remote
-            errCode, errMsg, gpsStatus = requestRemoteGPS(self.remoteAgentIP, self.remoteAgentPort)
+            # Checking remote.  onRemoteGPSStatus gets the answer; if the last
+            # check is still waiting on the agent this one is merged into it.
+            self.agentClient.submit('gps', requestRemoteGPSAndAgentState, (self.remoteAgentIP, self.remoteAgentPort), self.onRemoteGPSStatus,
+                                   lambda errCode, errString: (errCode, errString, None, True))
+
+    def onRemoteGPSStatus(self, result):
+        errCode, errMsg, gpsStatus, agentUp = result
+        
+        if (errCode == REQUEST_CANCELLED) or (not self.remoteAgentUp):
+            return
             
-            if errCode == 0:
-                self.missedAgentCycles = 0
-                if (gpsStatus.isValid):
-                    self.gpsSynchronized = True
-                    self.btnGPSStatus.setStyleSheet("background-color: green; border: 1px;")
-                    self.statusBar().showMessage("Remote GPS is running and synchronized.")
-                elif (gpsStatus.gpsRunning):
-                    self.gpsSynchronized = False
-                    self.btnGPSStatus.setStyleSheet("background-color: yellow; border: 1px;")
-                    self.statusBar().showMessage("Remote GPS is running but it has not synchronized with the satellites yet.")
-                else:
-                    self.gpsSynchronized = False
-                    self.statusBar().showMessage("Remote GPS service is not running.")
-                    self.btnGPSStatus.setStyleSheet("background-color: red; border: 1px;")
+        if errCode == 0:
+            self.missedAgentCycles = 0
+            if (gpsStatus.isValid):
+                self.gpsSynchronized = True
+                self.btnGPSStatus.setStyleSheet("background-color: green; border: 1px;")
+                self.statusBar().showMessage("Remote GPS is running and synchronized.")
+            elif (gpsStatus.gpsRunning):
+                self.gpsSynchronized = False
+                self.btnGPSStatus.setStyleSheet("background-color: yellow; border: 1px;")
+                self.statusBar().showMessage("Remote GPS is running but it has not synchronized with the satellites yet.")
             else:
-                agentUp = portOpen(self.remoteAgentIP, self.remoteAgentPort)
-                # Agent may be up but just taking a while to respond.
-                if (not agentUp) or errCode == -1:
-                    self.missedAgentCycles += 1
+                self.gpsSynchronized = False
+                self.statusBar().showMessage("Remote GPS service is not running.")
+                self.btnGPSStatus.setStyleSheet("background-color: red; border: 1px;")
+        else:
+            # Agent may be up but just taking a while to respond.
+            if (not agentUp) or errCode == -1:
+                self.missedAgentCycles += 1
+                
+                if (not agentUp) or (self.missedAgentCycles > self.allowedMissedAgentCycles):
+                    # We may let it miss a cycle or two just as a good practice
                     
-                    if (not agentUp) or (self.missedAgentCycles > self.allowedMissedAgentCycles):
-                        # We may let it miss a cycle or two just as a good practice
-                        
-                        # Agent disconnected.
-                        # Stop any active scan and transition local
-                        self.agentDisconnected()
-                        self.statusBar().showMessage("Error connecting to remote agent.  Agent disconnected.")
-                        QMessageBox.question(self, 'Error',"Error connecting to remote agent.  Agent disconnected.", QMessageBox.Ok)
-                else:
-                    self.statusBar().showMessage("Remote GPS Error: " + errMsg)
-                    self.btnGPSStatus.setStyleSheet("background-color: red; border: 1px;")
+                    # Agent disconnected.
+                    # Stop any active scan and transition local
+                    self.agentDisconnected()
+                    self.statusBar().showMessage("Error connecting to remote agent.  Agent disconnected.")
+                    QMessageBox.question(self, 'Error',"Error connecting to remote agent.  Agent disconnected.", QMessageBox.Ok)
+            else:
+                self.statusBar().showMessage("Remote GPS Error: " + errMsg)
+                self.btnGPSStatus.setStyleSheet("background-color: red; border: 1px;")
             
 
     def onGPSSyncChanged(self):
@@ -2313,36 +2427,32 @@ class mainWindow(QMainWindow):
 
         self.networkTableSortOrder = order
         self.networkTableSortIndex = logical_index
-        self.networkTable.sortItems(logical_index, order )
+        # The proxy keeps the view sorted from here on as rows are added and updated
+        self.networkProxy.sort(logical_index, order )
         
-    def onNetworkTableSelectionChanged(self):
-        row = self.networkTable.currentRow()
+    def onNetFilterChanged(self, filterText):
+        self.networkProxy.setFilterText(filterText)
+        
+    def onNetworkTableSelectionChanged(self, selected=None, deselected=None):
+        row = self.currentNetworkRow()
         if row < 0:
             return
             
         if (self.lastSeries is not None):
             # Change the old one back
-            if (self.lastSeries):
-                pen = self.lastSeries.pen()
-                pen.setWidth(2)
-                self.lastSeries.setPen(pen)
-                self.lastSeries.setVisible(False)
-                self.lastSeries.setVisible(True)
+            self.lastSeries.setSelected(False)
             
-        selectedSeries = self.networkTable.item(row, 2).data(Qt.UserRole)
+        selectedSeries = self.networkModel.series(row)
         
         if (selectedSeries):
-            pen = selectedSeries.pen()
-            pen.setWidth(6)
-            selectedSeries.setPen(pen)
-            selectedSeries.setVisible(False)
-            selectedSeries.setVisible(True)
+            # Drawn with a wide line
+            selectedSeries.setSelected(True)
             
             self.lastSeries = selectedSeries
         else:
             selectedSeries = None
 
-    def onTableClicked(self, row, col):
+    def onTableClicked(self, index):
         pass
         
     def onGPSStatusIndicatorClicked(self):
@@ -2399,15 +2509,28 @@ class mainWindow(QMainWindow):
         # Make the call to get the data
 
         if self.scanMode == "Normal" or (len(self.huntChannelList) == 0):
-            # retCode, errString, wirelessNetworks = requestRemoteNetworks(self.remoteAgentIP, self.remoteAgentPort, curInterface)
-            self.remoteSingleShotThread = remoteSingleShotThread(curInterface, self, self.remoteAgentIP, self.remoteAgentPort)
+            requestArgs = (self.remoteAgentIP, self.remoteAgentPort, curInterface)
         else:
-            # retCode, errString, wirelessNetworks = requestRemoteNetworks(self.remoteAgentIP, self.remoteAgentPort, curInterface, self.huntChannelList)
-            self.remoteSingleShotThread = remoteSingleShotThread(curInterface, self, self.remoteAgentIP, self.remoteAgentPort, self.huntChannelList)
+            requestArgs = (self.remoteAgentIP, self.remoteAgentPort, curInterface, self.huntChannelList)
+        
+        self.agentClient.submit('singleshot', requestRemoteNetworks, requestArgs, self.onRemoteSingleShotResult,
+                                lambda errCode, errString: (errCode, errString, []))
         
-        self.remoteSingleShotThread.start()
+        # Change the GUI controls back happens when the result comes in
+
+    def onRemoteSingleShotResult(self, result):
+        retCode, errString, wirelessNetworks = result
         
-        # Change the GUI controls back happens when the emit happens
+        if retCode == REQUEST_CANCELLED:
+            # Agent switched or disconnected mid-scan.  Just give the controls back.
+            self.onSingleShotScanResults([], 0, '')
+            self.statusBar().showMessage('Scan cancelled')
+            return
+            
+        self.onSingleShotScanResults(wirelessNetworks, retCode, errString)
+
+    def onAgentRequestFailed(self, key, errString):
+        self.statusBar().showMessage(errString)
 
     def agentDisconnected(self):
         # Don't try to pull any more GPS status
@@ -2640,39 +2763,42 @@ class mainWindow(QMainWindow):
             chartChannelLow = 30
             chartChannelHigh = 171
             
-        curSeries.clear()
+        # The trace skips the redraw if the points come out the same as last scan
+        points = []
         
         if lowChannel <=chartChannelLow:
             # First point on the graph needs to be at dBm rather than -100
             if curNet.signal >= -100:
-                curSeries.append( chartChannelLow, curNet.signal)
+                points.append((chartChannelLow, curNet.signal))
             else:
-                curSeries.append(chartChannelLow, -100)
+                points.append((chartChannelLow, -100))
         else:
             # Add the zero then our plot
-            # curSeries.append(chartChannelLow, -100)
+            # points.append((chartChannelLow, -100))
             
             if curNet.signal >= -100:
-                curSeries.append( lowChannel, -100)
-                curSeries.append( lowChannel, curNet.signal)
+                points.append((lowChannel, -100))
+                points.append((lowChannel, curNet.signal))
             else:
-                curSeries.append(lowChannel, -100)
+                points.append((lowChannel, -100))
             
         if highChannel >= chartChannelHigh:
             # First point on the graph needs to be at dBm rather than -100
             if curNet.signal >= -100:
-                curSeries.append( chartChannelHigh, curNet.signal)
+                points.append((chartChannelHigh, curNet.signal))
             else:
-                curSeries.append(chartChannelHigh, -100)
+                points.append((chartChannelHigh, -100))
         else:
             if curNet.signal >= -100:
-                curSeries.append( highChannel, curNet.signal)
-                curSeries.append( highChannel, -100)
+                points.append((highChannel, curNet.signal))
+                points.append((highChannel, -100))
             else:
-                curSeries.append(highChannel, -100)
+                points.append((highChannel, -100))
             
             # Add the zero then our plot
-            # curSeries.append(chartChannelHigh, -100)
+            # points.append((chartChannelHigh, -100))
+            
+        curSeries.setPoints(points)
             
     def updateNet(self, curSeries, curNet, channelPlotStart, channelPlotEnd):
         self.plotSSID(curSeries, curNet)
@@ -2724,13 +2850,9 @@ class mainWindow(QMainWindow):
         self.plotSSID(newSeries, curNet)
 
         if adding5GHz:
-            self.chart5.addSeries(newSeries)
-            newSeries.attachAxis(self.chart5axisx )
-            newSeries.attachAxis(self.chart5.axisY())
+            self.channelPlot5.addTrace(newSeries)
         else:
-            self.chart24.addSeries(newSeries)
-            newSeries.attachAxis(self.chart24axisx)
-            newSeries.attachAxis(self.chart24.axisY())
+            self.channelPlot24.addTrace(newSeries)
 
     def addNetOld(self, newSeries, curNet, channelPlotStart, channelPlotEnd, adding5GHz):
         for i in range(channelPlotStart, channelPlotEnd):
@@ -2789,93 +2911,68 @@ class mainWindow(QMainWindow):
         self.addNet(newSeries, curNet, 0, 17, False)
         
     def populateUpdateExisting(self, wirelessNetworks, FromAdvanced=False):
-        numRows = self.networkTable.rowCount()
-        
-        if numRows > 0:
-            # Loop through each network in the network table, and compare it against the new networks.
-            # If we find one, then we already know the network.  Just update it.
+        if self.networkModel.rowCount() == 0:
+            return
             
-            # Build O(1) lookup dict once rather than O(N) inner loop per row
-            networkLookup = {net.getKey(): net for net in wirelessNetworks.values()}
-
-            # Range goes to last # - 1
-            for curRow in range(0, numRows):
-                try:
-                    curData = self.networkTable.item(curRow, 2).data(Qt.UserRole+1)
-                except:
-                    curData = None
-                    
-                if (curData):
-                    # O(1) lookup using the pre-built dict (was O(N) inner loop)
-                    curNet = networkLookup.get(curData.getKey())
-                    if curNet:
-                        # Match.  Item was already in the table.  Let's update it
-                        if curNet.macAddr not in self._vendorCache:
-                            self._vendorCache[curNet.macAddr] = self.ouiLookup(curNet.macAddr) or ''
-                        clientVendor = self._vendorCache[curNet.macAddr]
-                        self.networkTable.item(curRow, 1).setText(clientVendor)
-
-                        self.networkTable.item(curRow, 3).setText(curNet.security)
-                        self.networkTable.item(curRow, 4).setText(curNet.privacy)
-                        self.networkTable.item(curRow, 5).setText(str(curNet.getChannelString()))
-                        self.networkTable.item(curRow, 6).setText(str(curNet.frequency))
-                        self.networkTable.item(curRow, 7).setText(str(curNet.signal))
-
-                        if FromAdvanced:
-                            # There are some fields that are not passed forward from advanced.  So let's update our curNet
-                            # attributes in the net object that comes from advanced.
-                            curNet.bandwidth = curData.bandwidth
-                            curNet.secondaryChannel = curData.secondaryChannel
-                            curNet.thirdChannel = curData.thirdChannel
-                            curNet.secondaryChannelLocation = curData.secondaryChannelLocation
-
-                        self.networkTable.item(curRow, 8).setText(str(curNet.bandwidth))
-                        self.networkTable.item(curRow, 9).setText(str(curNet.utilization))
-                        self.networkTable.item(curRow, 10).setText(str(curNet.stationcount))
-                        self.networkTable.item(curRow, 11).setText(curNet.lastSeen.strftime("%m/%d/%Y %H:%M:%S"))
-
-                        # Carry forward firstSeen
-                        curNet.firstSeen = curData.firstSeen # This is one field to carry forward
-
-                        # Check strongest signal
-                        # If we have a stronger signal, or we have an equal signal but we now have GPS
-                        # Note the 0.9.  Can be close to store strongest with GPS
-                        if curData.strongestsignal > curNet.signal or (curData.strongestsignal > (curNet.signal*0.9) and curData.gps.isValid and (not curNet.strongestgps.isValid)):
-                            curNet.strongestsignal = curData.signal
-                            curNet.strongestgps.latitude = curData.gps.latitude
-                            curNet.strongestgps.longitude = curData.gps.longitude
-                            curNet.strongestgps.altitude = curData.gps.altitude
-                            curNet.strongestgps.speed = curData.gps.speed
-                            curNet.strongestgps.isValid = curData.gps.isValid
-
-                        self.networkTable.item(curRow, 12).setText(curNet.firstSeen.strftime("%m/%d/%Y %H:%M:%S"))
-                        if curNet.gps.isValid:
-                            self.networkTable.item(curRow, 13).setText('Yes')
-                        else:
-                            self.networkTable.item(curRow, 13).setText('No')
-
-                        curNet.foundInList = True
-                        self.networkTable.item(curRow, 2).setData(Qt.UserRole+1, curNet)
-
-                        # Update series
-                        curSeries = self.networkTable.item(curRow, 2).data(Qt.UserRole)
-
-                        # Check if we have a telemetry window
-                        if curNet.getKey() in self.telemetryWindows.keys():
-                            telemetryWindow = self.telemetryWindows[curNet.getKey()]
-                            telemetryWindow.updateNetworkData(curNet)
-
-                        # 3 scenarios:
-                        # 20 MHz, 1 channel
-                        # 40 MHz, 2nd channel above/below or non-contiguous for 5 GHz
-                        # 80/160 MHz, Specified differently.  It's allocated as a contiguous block
-                        if curNet.channel < 15:  # Max 2.4 GHz CENTER channel is 14
-                            # 2.4 GHz
-                            # range function goes to max-1
-                            self.update24Net(curSeries, curNet)
-                        else:
-                            # 5 GHz
-                            self.update5Net(curSeries, curNet)
+        # Look each new network up in the model by key.  If we find one, then we already know
+        # the network.  Just update it.  The view is told once about all updated rows at the end.
+        updatedRows = []
+        
+        for curNet in wirelessNetworks.values():
+            curRow = self.networkModel.rowForKey(curNet.getKey())
+            if curRow < 0:
+                continue
+                
+            # Match.  Item was already in the table.  Let's update it
+            curData = self.networkModel.network(curRow)
+
+            if FromAdvanced:
+                # There are some fields that are not passed forward from advanced.  So let's update our curNet
+                # attributes in the net object that comes from advanced.
+                curNet.bandwidth = curData.bandwidth
+                curNet.secondaryChannel = curData.secondaryChannel
+                curNet.thirdChannel = curData.thirdChannel
+                curNet.secondaryChannelLocation = curData.secondaryChannelLocation
+
+            # Carry forward firstSeen
+            curNet.firstSeen = curData.firstSeen # This is one field to carry forward
+
+            # Check strongest signal
+            # If we have a stronger signal, or we have an equal signal but we now have GPS
+            # Note the 0.9.  Can be close to store strongest with GPS
+            if curData.strongestsignal > curNet.signal or (curData.strongestsignal > (curNet.signal*0.9) and curData.gps.isValid and (not curNet.strongestgps.isValid)):
+                curNet.strongestsignal = curData.signal
+                curNet.strongestgps.latitude = curData.gps.latitude
+                curNet.strongestgps.longitude = curData.gps.longitude
+                curNet.strongestgps.altitude = curData.gps.altitude
+                curNet.strongestgps.speed = curData.gps.speed
+                curNet.strongestgps.isValid = curData.gps.isValid
+
+            curNet.foundInList = True
+            self.networkModel.replaceNetwork(curRow, curNet)
+            updatedRows.append(curRow)
+
+            # Update series
+            curSeries = self.networkModel.series(curRow)
+
+            # Check if we have a telemetry window
+            if curNet.getKey() in self.telemetryWindows.keys():
+                telemetryWindow = self.telemetryWindows[curNet.getKey()]
+                telemetryWindow.updateNetworkData(curNet)
+
+            # 3 scenarios:
+            # 20 MHz, 1 channel
+            # 40 MHz, 2nd channel above/below or non-contiguous for 5 GHz
+            # 80/160 MHz, Specified differently.  It's allocated as a contiguous block
+            if curNet.channel < 15:  # Max 2.4 GHz CENTER channel is 14
+                # 2.4 GHz
+                # range function goes to max-1
+                self.update24Net(curSeries, curNet)
+            else:
+                # 5 GHz
+                self.update5Net(curSeries, curNet)
+                
+        self.networkModel.rowsUpdated(updatedRows)
 
     def getNextColor(self):
         nextColor = colors[self.nextColor]
@@ -2886,14 +2983,6 @@ class mainWindow(QMainWindow):
             
         return nextColor
 
-    def createNewSeries(self, nextColor, parentChart):
-        newSeries = QHoverLineSeries(parentChart) # QLineSeries()
-        pen = QPen(nextColor)
-        pen.setWidth(2)
-        newSeries.setPen(pen)
-        
-        return newSeries
-
     def populateTable(self, wirelessNetworks, FromAdvanced=False):
         self._tableUpdateInProgress = True
         self.updateLock.acquire()
@@ -2901,7 +2990,7 @@ class mainWindow(QMainWindow):
         # Update existing if we have it (this will mark the networ's foundInList flag if we did
         self.populateUpdateExisting(wirelessNetworks, FromAdvanced)
 
-        addedNetworks = 0
+        newRows = []
         firstTableLoad = False
         
         for curKey in wirelessNetworks.keys():
@@ -2909,8 +2998,6 @@ class mainWindow(QMainWindow):
             curNet = wirelessNetworks[curKey]
             if (curNet.foundInList):
                 continue
-
-            addedNetworks += 1
             
             # ----------- Update the plots -------------------
             nextColor = self.getNextColor()
@@ -2919,78 +3006,34 @@ class mainWindow(QMainWindow):
             # 20 MHz, 1 channel
             # 40 MHz, 2nd channel above/below or non-contiguous for 5 GHz
             # 80/160 MHz, Specified differently.  It's allocated as a contiguous block
+            newSeries = ChannelTrace(nextColor)
             if curNet.channel < 15:
                 # 2.4 GHz
-                newSeries = self.createNewSeries(nextColor, self.chart24)
                 self.add24Net(newSeries, curNet)
             else:
                 # 5 GHz
-                newSeries = self.createNewSeries(nextColor, self.chart5)
                 self.add5Net(newSeries, curNet)
                 
             # ----------- Update the Table -------------------
             # Do the table second so we can attach the series to it.
-            
-            rowPosition = self.networkTable.rowCount()
-            rowPosition -= 1
-            addedFirstRow = False
-            if rowPosition < 0:
-                addedFirstRow = True
-                rowPosition = 0
-                firstTableLoad = True
-                
-            self.networkTable.insertRow(rowPosition)
-            
-            # Just make sure we don't get an extra blank row
-            if (addedFirstRow):
-                self.networkTable.setRowCount(1)
-
-            self.networkTable.setItem(rowPosition, 0, QTableWidgetItem(curNet.macAddr))
+            # New rows are collected and inserted into the model in one go below.
             tmpssid = curNet.ssid
             if (len(tmpssid) == 0):
                 tmpssid = '<Unknown>'
                 
             newSeries.setName(tmpssid)
 
-            newSSID = QTableWidgetItem(tmpssid)
-            ssidBrush = QBrush(nextColor)
-            newSSID.setForeground(ssidBrush)
-            # You can bind more than one data.  See this: 
-            # https://stackoverflow.com/questions/2579579/qt-how-to-associate-data-with-qtablewidgetitem
-            newSSID.setData(Qt.UserRole, newSeries)
-            newSSID.setData(Qt.UserRole+1, curNet)
-            newSSID.setData(Qt.UserRole+2, None)
-            
-            if curNet.macAddr not in self._vendorCache:
-                self._vendorCache[curNet.macAddr] = self.ouiLookup(curNet.macAddr) or ''
-            clientVendor = self._vendorCache[curNet.macAddr]
-            self.networkTable.setItem(rowPosition, 1, QTableWidgetItem(clientVendor))
-            self.networkTable.setItem(rowPosition, 2, newSSID)
-            self.networkTable.setItem(rowPosition, 3, QTableWidgetItem(curNet.security))
-            self.networkTable.setItem(rowPosition, 4, QTableWidgetItem(curNet.privacy))
-            self.networkTable.setItem(rowPosition, 5, IntTableWidgetItem(str(curNet.getChannelString())))
-            self.networkTable.setItem(rowPosition, 6, IntTableWidgetItem(str(curNet.frequency)))
-            self.networkTable.setItem(rowPosition, 7,  IntTableWidgetItem(str(curNet.signal)))
-            self.networkTable.setItem(rowPosition, 8, IntTableWidgetItem(str(curNet.bandwidth)))
-            self.networkTable.setItem(rowPosition, 9, FloatTableWidgetItem(str(curNet.utilization)))
-            self.networkTable.setItem(rowPosition, 10, IntTableWidgetItem(str(curNet.stationcount)))
-            
-            self.networkTable.setItem(rowPosition, 11, DateTableWidgetItem(curNet.lastSeen.strftime("%m/%d/%Y %H:%M:%S")))
-            self.networkTable.setItem(rowPosition, 12, DateTableWidgetItem(curNet.firstSeen.strftime("%m/%d/%Y %H:%M:%S")))
-            if curNet.gps.isValid:
-                self.networkTable.setItem(rowPosition, 13, QTableWidgetItem('Yes'))
-            else:
-                self.networkTable.setItem(rowPosition, 13, QTableWidgetItem('No'))
+            newRows.append((curNet, newSeries, nextColor))
+
+        if len(newRows) > 0:
+            firstTableLoad = (self.networkModel.rowCount() == 0)
+            self.networkModel.addNetworks(newRows)
 
         self.ageOut()
 
         if firstTableLoad:
             self.networkTable.resizeColumnsToContents()
             
-        if addedNetworks > 0:
-            if self.networkTableSortIndex >=0:
-                self.networkTable.sortItems(self.networkTableSortIndex, self.networkTableSortOrder )
-                
         self.checkTelemetryWindows()
         
         # Last formatting tweaks on network table
@@ -3003,13 +3046,12 @@ class mainWindow(QMainWindow):
     def checkTelemetryWindows(self):
         # See if we have any telemetry windows that are no longer in the network table and not visible
         # Update numRows in case we removed any above
-        numRows = self.networkTable.rowCount()
+        numRows = self.networkModel.rowCount()
         
         if (numRows > 0) and (len(self.telemetryWindows.keys()) > 0):
             # Build key list just once to cut down # of loops
             netKeyList = []
-            for i in range(0, numRows):
-                curNet = self.networkTable.item(i, 2).data(Qt.UserRole+1)
+            for curNet in self.networkModel.networks():
                 netKeyList.append(curNet.getKey())
                 
             try:
@@ -3037,38 +3079,52 @@ class mainWindow(QMainWindow):
                 pass
         
     def ageOut(self):
-        numRows = self.networkTable.rowCount()
+        numRows = self.networkModel.rowCount()
 
         if self.cbAgeOut.isChecked() and numRows > 0:
             # Handle if timeout checkbox is checked
             maxTime = datetime.datetime.now() - datetime.timedelta(minutes=3)
+            
+            # Collect the stale rows and remove them from the model and plots together
+            # rather than one removeRow / removeSeries at a time
+            agedRows = []
+            agedSeries24 = []
+            agedSeries5 = []
 
-            rowPosition = numRows - 1  #  convert count to index
-            # range goes to last 
-            for i in range(rowPosition, -1, -1):
+            for i in range(0, numRows):
                 try:
-                    curData = self.networkTable.item(i, 2).data(Qt.UserRole+1)
+                    curData = self.networkModel.network(i)
                     
                     # Age out
                     if curData.lastSeen < maxTime:
-                        curSeries = self.networkTable.item(i, 2).data(Qt.UserRole)
+                        curSeries = self.networkModel.series(i)
                         if curData.channel < 20:
-                            self.chart24.removeSeries(curSeries)
+                            agedSeries24.append(curSeries)
                         else:
-                            self.chart5.removeSeries(curSeries)
+                            agedSeries5.append(curSeries)
+                            
+                        if curSeries is self.lastSeries:
+                            self.lastSeries = None
                             
-                        self.networkTable.removeRow(i)
+                        agedRows.append(i)
                         
                 except:
                     curData = None
-                    self.networkTable.removeRow(i)
+                    agedRows.append(i)
+                    
+            self.channelPlot24.removeTraces(agedSeries24)
+            self.channelPlot5.removeTraces(agedSeries5)
+            self.networkModel.removeNetworkRows(agedRows)
 
         
     def onInterface(self):
         pass
             
     def onClearData(self):
-        self.networkTable.setRowCount(0)
+        self.networkModel.clear()
+        self.channelPlot24.clear()
+        self.channelPlot5.clear()
+        self.lastSeries = None
         self.chart24.removeAllSeries()
         self.spectrum24Line = None
         self.chart5.removeAllSeries()
@@ -3270,7 +3326,7 @@ class mainWindow(QMainWindow):
         
         self.updateLock.acquire()
         
-        numItems = self.networkTable.rowCount()
+        numItems = self.networkModel.rowCount()
         
         if numItems == 0:
             outputFile.close()
@@ -3283,8 +3339,7 @@ class mainWindow(QMainWindow):
         
         self.setWaitCursor()
         
-        for i in range(0, numItems):
-            curData = self.networkTable.item(i, 2).data(Qt.UserRole+1)
+        for curData in self.networkModel.networks():
             netlist.append(curData.toJsondict())
             
         outputdict['wifi-aps'] = netlist
@@ -3314,7 +3369,7 @@ class mainWindow(QMainWindow):
 
         self.updateLock.acquire()
 
-        numItems = self.networkTable.rowCount()
+        numItems = self.networkModel.rowCount()
         
         if numItems == 0:
             outputFile.close()
@@ -3324,9 +3379,9 @@ class mainWindow(QMainWindow):
         self.setWaitCursor()
         
         for i in range(0, numItems):
-            curData = self.networkTable.item(i, 2).data(Qt.UserRole+1)
+            curData = self.networkModel.network(i)
 
-            outputFile.write(curData.macAddr  + ',' + self.networkTable.item(i, 1).text() + ',"' + curData.ssid + '",' + curData.security + ',' + curData.privacy)
+            outputFile.write(curData.macAddr  + ',' + self.networkModel.vendor(i) + ',"' + curData.ssid + '",' + curData.security + ',' + curData.privacy)
             outputFile.write(',' + curData.getChannelString() + ',' + str(curData.frequency) + ',' + str(curData.signal) + ',' + str(curData.strongestsignal) + ',' + str(curData.bandwidth) + ',' +
                                     curData.lastSeen.strftime("%m/%d/%Y %H:%M:%S") + ',' + curData.firstSeen.strftime("%m/%d/%Y %H:%M:%S") + ',' + 
                                     str(curData.gps.isValid) + ',' + str(curData.gps.latitude) + ',' + str(curData.gps.longitude) + ',' + str(curData.gps.altitude) + ',' + str(curData.gps.speed) + ',' + 
@@ -3450,9 +3505,12 @@ class mainWindow(QMainWindow):
 
     def stopSpectrum24Line(self):
         if self.spectrum24Line:
+            # Cancel first: a cancelled request re-arms its timer
             if self.btShowSpectrum:
+                self.agentClient.cancel('btspectrum')
                 self.btSpectrumTimer.stop()
             elif self.hackrfShowSpectrum24:
+                self.agentClient.cancel('hackrfspectrum')
                 self.hackrfSpectrumTimer.stop()
                 
             self.spectrum24Line.clear()
@@ -3467,6 +3525,7 @@ class mainWindow(QMainWindow):
 
     def stopSpectrum5Line(self):
         if self.spectrum5Line:
+            self.agentClient.cancel('hackrfspectrum')
             self.hackrfSpectrumTimer.stop()
             self.spectrum5Line.clear()
             self.chart5.removeSeries(self.spectrum5Line)
@@ -3553,7 +3612,8 @@ class mainWindow(QMainWindow):
                     self.statusBar().showMessage('No wireless interfaces found.')
 
                 # Now we can signal that the remote agent is up.
-                
+                # Anything still out to a previous agent is dropped.
+                self.agentClient.cancelAll()
                 self.remoteAgentUp = True
                 self.missedAgentCycles = 0
                 
@@ -3633,6 +3693,7 @@ class mainWindow(QMainWindow):
         else:
             # We're transitioning local
             self.remoteAgentUp = False
+            self.agentClient.cancelAll()
 
             self.lblInterface.setText("Local Interface")
             self.combo.clear()
@@ -3690,6 +3751,8 @@ class mainWindow(QMainWindow):
                 if self.remoteScanThread:
                     self.remoteScanThread.signalStop = True
 
+        self.agentClient.shutdown()
+        
         for curKey in self.telemetryWindows.keys():
             curWindow = self.telemetryWindows[curKey]
             try:
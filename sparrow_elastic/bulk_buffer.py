@@ -3,20 +3,32 @@
 Used by the sparrow-elastic bridge to accumulate Elasticsearch bulk actions
 from the scan loop and flush them in batches, decoupled from HTTP latency.
 
+With an optional SpillLog, actions that overflow the in-memory buffer are
+written to disk instead of being dropped, and replayed oldest first once the
+cluster recovers.
+
 Public API
 ----------
-BulkBuffer(max_size)   -- construct a buffer with an overflow cap
-  .append(action)      -- add an action; drops oldest on overflow (thread-safe)
+BulkBuffer(max_size, spill=None, spill_chunk=500)
+  .append(action)      -- add an action; spills or drops oldest on overflow
   .swap()              -- atomically exchange buffer for empty list (thread-safe)
-  .depth()             -- current number of buffered actions
-  .docs_dropped()      -- cumulative count of dropped-on-overflow actions
+  .depth()             -- current number of in-memory actions
+  .docs_dropped()      -- cumulative count of actions lost (overflow / spill limits)
+  .spill(actions)      -- write actions straight to the spill log (or drop them)
+  .replay_batch()      -- (token, actions) of the oldest spilled segment, or None
+  .commit_replay(token)-- mark a replayed segment as indexed
+  .spill_pending()     -- actions waiting on disk
+  .stats()             -- depth / dropped / spill counters
 """
 
 from __future__ import annotations
 
 import logging
 import threading
-from typing import List
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .spill_log import SpillLog
 
 logger = logging.getLogger(__name__)
 
@@ -27,13 +39,19 @@ _LOG_EVERY_N_DROPS = 100
 class BulkBuffer:
     """Fixed-capacity bulk action buffer with thread-safe append and swap.
 
-    When the buffer is full, the *oldest* entry is evicted (popleft-style) to
-    make room for the new entry.  A cumulative ``docs_dropped`` counter tracks
-    total evictions so operators can monitor overflow pressure.
+    When the buffer is full, the *oldest* entries make room for the new one.
+    Without a spill log the oldest entry is evicted and a cumulative
+    ``docs_dropped`` counter tracks total evictions so operators can monitor
+    overflow pressure.  With a spill log, the oldest ``spill_chunk`` entries
+    are written to disk as one segment (outside the lock) instead.
 
     Args:
-        max_size: Maximum number of actions to hold before evicting the oldest.
-                  Default is 10,000.
+        max_size:    Maximum number of actions to hold in memory.
+                     Default is 10,000.
+        spill:       Optional SpillLog receiving overflow.
+        spill_chunk: Actions moved to disk per overflow.  Spilling in chunks
+                     keeps the per-append cost O(1) amortized and the
+                     segment count low.  Default 500.
 
     Thread safety:
         All public methods acquire ``_lock`` internally.  ``append`` and
@@ -43,64 +61,129 @@ class BulkBuffer:
         does not occur in normal usage.
     """
 
-    def __init__(self, max_size: int = 10_000) -> None:
+    def __init__(self, max_size: int = 10_000, spill: Optional[SpillLog] = None,
+                 spill_chunk: int = 500) -> None:
         self._lock = threading.Lock()
-        self._actions: List[dict] = []
+        self._actions: Deque[dict] = deque()
         self._max_size = max_size
         self._docs_dropped: int = 0
+        self._spill = spill
+        self._spill_chunk = max(1, min(spill_chunk, max_size))
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
     def append(self, action: dict) -> None:
-        """Append *action* to the buffer; evict the oldest if at capacity.
+        """Append *action* to the buffer; spill or evict the oldest if at capacity.
 
-        When the buffer already holds ``max_size`` items, the item at index 0
-        (oldest) is removed and ``docs_dropped`` is incremented.  A WARN is
-        logged once every ``_LOG_EVERY_N_DROPS`` drops to signal sustained
-        overflow pressure without flooding the log.
+        When the buffer already holds ``max_size`` items and no spill log is
+        configured, the oldest item is removed and ``docs_dropped`` is
+        incremented.  A WARN is logged once every ``_LOG_EVERY_N_DROPS`` drops
+        to signal sustained overflow pressure without flooding the log.
 
         Args:
             action: An Elasticsearch bulk action dict, e.g.
                 ``{"_op_type": "index", "_index": "sparrow-wifi",
                    "_id": "...", "_source": {...}}``.
         """
+        overflow: List[dict] = []
+        spill = self._spill
         with self._lock:
             if len(self._actions) >= self._max_size:
-                self._actions.pop(0)  # evict oldest
-                self._docs_dropped += 1
-                if self._docs_dropped % _LOG_EVERY_N_DROPS == 0:
-                    logger.warning(
-                        "BulkBuffer overflow: %d documents dropped so far "
-                        "(max_size=%d). Consider reducing scan delay or "
-                        "increasing flush frequency.",
-                        self._docs_dropped,
-                        self._max_size,
-                    )
+                if spill is not None:
+                    for _ in range(min(self._spill_chunk, len(self._actions))):
+                        overflow.append(self._actions.popleft())
+                else:
+                    self._actions.popleft()  # evict oldest
+                    self._docs_dropped += 1
+                    if self._docs_dropped % _LOG_EVERY_N_DROPS == 0:
+                        logger.warning(
+                            "BulkBuffer overflow: %d documents dropped so far "
+                            "(max_size=%d). Consider reducing scan delay or "
+                            "increasing flush frequency.",
+                            self._docs_dropped,
+                            self._max_size,
+                        )
             self._actions.append(action)
+        if overflow and spill is not None:
+            spill.write(overflow)
 
     def swap(self) -> List[dict]:
-        """Atomically replace the internal buffer with an empty list.
+        """Atomically replace the internal buffer with an empty one.
 
-        Returns the old list so the caller can flush it to Elasticsearch
-        without holding the lock.  The buffer is available for new appends
-        immediately after this call returns.
+        Returns the old contents so the caller can flush them to
+        Elasticsearch without holding the lock.  The buffer is available for
+        new appends immediately after this call returns.
 
         Returns:
             The list of accumulated actions (may be empty).
         """
         with self._lock:
             old = self._actions
-            self._actions = []
-            return old
+            self._actions = deque()
+        return list(old)
 
     def depth(self) -> int:
-        """Return the current number of buffered actions (thread-safe snapshot)."""
+        """Return the current number of in-memory actions (thread-safe snapshot)."""
         with self._lock:
             return len(self._actions)
 
     def docs_dropped(self) -> int:
-        """Return the cumulative number of documents evicted due to overflow."""
+        """Return the cumulative number of documents lost to overflow.
+
+        Includes documents the spill log discarded (size/age limits, corrupt
+        segments, write failures).
+        """
         with self._lock:
-            return self._docs_dropped
+            dropped = self._docs_dropped
+        if self._spill is not None:
+            dropped += self._spill.dropped
+        return dropped
+
+    def spill(self, actions: List[dict]) -> int:
+        """Write *actions* to the spill log, e.g. when a final flush fails.
+
+        Returns:
+            Number of actions saved; without a spill log they are counted as
+            dropped and 0 is returned.
+        """
+        if self._spill is None:
+            with self._lock:
+                self._docs_dropped += len(actions)
+            return 0
+        return self._spill.write(actions)
+
+    def replay_batch(self) -> Optional[Tuple[int, List[dict]]]:
+        """Return ``(token, actions)`` for the oldest spilled segment, or None.
+
+        The segment stays on disk until commit_replay(token) is called, so a
+        failed replay is retried on the next flush.
+        """
+        if self._spill is None:
+            return None
+        return self._spill.peek()
+
+    def commit_replay(self, token: int) -> None:
+        """Remove the spilled segment returned by replay_batch()."""
+        if self._spill is not None:
+            self._spill.commit(token)
+
+    def spill_pending(self) -> int:
+        """Return the number of spilled actions waiting to be replayed."""
+        if self._spill is None:
+            return 0
+        return self._spill.pending_docs()
+
+    def stats(self) -> Dict[str, int]:
+        """Return depth, drop and spill counters for logging."""
+        out = {"depth": self.depth(), "dropped": self.docs_dropped()}
+        if self._spill is not None:
+            spill = self._spill.stats()
+            out.update(
+                spilled=spill["spilled"],
+                replayed=spill["replayed"],
+                spill_pending=spill["pending_docs"],
+                spill_bytes=spill["pending_bytes"],
+            )
+        return out
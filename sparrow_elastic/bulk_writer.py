@@ -0,0 +1,326 @@
+"""NDJSON bulk request writer shared by ElasticsearchClient and OpenSearchClient.
+
+The client libraries' ``helpers.bulk`` expand every action into dicts,
+re-serialize them per document and send one uncompressed body per 500
+actions.  NdjsonBulkWriter serializes each action exactly once into a
+per-thread scratch buffer and gzips the body. Batches are cut by a byte
+budget and by an action count that adapts to how the cluster copes:
+
+- Requests slower than ``target_latency`` shrink the next batch, fast ones
+  grow it.
+- A 429 (whole request or individual items) halves it and backs off before
+  retrying the rejected actions.
+
+``orjson`` is used for serialization when installed, otherwise the standard
+``json`` module.
+
+Public API
+----------
+encode_action(action)                  -- bytes for one action (meta + source lines)
+AdaptiveBatchSizer(initial, minimum, maximum, target_latency)
+  .size / .record(latency, throttled)
+NdjsonBulkWriter(send, max_bytes, compress, sizer, max_retries)
+  .write(actions)                      -- (success_count, errors_list)
+  .stats()
+
+``send(body, headers)`` is supplied by the client and returns
+``(http_status, response_dict)``; it raises only for connection-level
+failures.
+"""
+
+from __future__ import annotations
+
+import functools
+import gzip
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson as _orjson  # type: ignore[import]
+except ImportError:
+    _orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Elasticsearch recommends bulk bodies of a few MB; larger ones mostly add
+# heap pressure on the coordinating node.
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+NDJSON_HEADERS = {"content-type": "application/x-ndjson", "accept": "application/json"}
+
+_META_KEYS = ("_index", "_id", "routing", "pipeline", "if_seq_no", "if_primary_term")
+_OP_TYPES = ("index", "create", "update", "delete")
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), default=str).encode("utf-8")
+
+
+# Chosen once at import so encode_action never re-checks for orjson.
+_dumps: Callable[[Any], bytes] = _json_dumps
+if _orjson is not None:
+    _dumps = functools.partial(_orjson.dumps, default=str)
+
+
+def encode_action(action: dict) -> bytes:
+    """Serialize one ``helpers.bulk``-style action dict to NDJSON lines.
+
+    Accepts the same shape the helpers do: ``_op_type`` (default
+    ``index``), metadata keys, and either ``_source`` or the remaining
+    non-underscore keys as the document.
+
+    Returns:
+        The action/metadata line plus (except for ``delete``) the source line,
+        each terminated by ``\\n``.
+    """
+    op = action.get("_op_type", "index")
+    if op not in _OP_TYPES:
+        raise ValueError(f"unsupported bulk op_type {op!r}")
+    meta = {}
+    for key in _META_KEYS:
+        if key in action:
+            meta[key] = action[key]
+    if "_routing" in action:
+        meta["routing"] = action["_routing"]
+    line = b'{"' + op.encode("ascii") + b'":' + _dumps(meta) + b"}\n"
+    if op == "delete":
+        return line
+    if "_source" in action:
+        source = action["_source"]
+    else:
+        source = {k: v for k, v in action.items() if not k.startswith("_") and k not in _META_KEYS}
+    return line + _dumps(source) + b"\n"
+
+
+# ---------------------------------------------------------------------------
+# AdaptiveBatchSizer
+# ---------------------------------------------------------------------------
+
+class AdaptiveBatchSizer:
+    """Actions-per-request limit steered by latency and throttling (thread-safe).
+
+    Args:
+        initial:        Starting batch size (actions).
+        minimum:        Lower bound.
+        maximum:        Upper bound.
+        target_latency: Seconds a bulk request should take.  Requests under
+                        half of it grow the batch by 25%, requests over it
+                        shrink it by 25%, and a 429 halves it.
+    """
+
+    def __init__(self, initial: int = 500, minimum: int = 50, maximum: int = 5000,
+                 target_latency: float = 1.0) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self._size = max(minimum, min(initial, maximum))
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return self._size
+
+    def record(self, latency: float, throttled: bool = False) -> int:
+        """Adjust the batch size after one request; returns the new size."""
+        with self._lock:
+            if throttled:
+                self._size = max(self.minimum, self._size // 2)
+            elif latency > self.target_latency:
+                self._size = max(self.minimum, self._size * 3 // 4)
+            elif latency < self.target_latency / 2:
+                self._size = min(self.maximum, self._size + max(1, self._size // 4))
+            return self._size
+
+
+# ---------------------------------------------------------------------------
+# NdjsonBulkWriter
+# ---------------------------------------------------------------------------
+
+class BulkThrottledError(Exception):
+    """The cluster kept answering 429 after all retries."""
+
+
+class NdjsonBulkWriter:
+    """Serialize, split, compress and send bulk actions.
+
+    Args:
+        send:        Callable(body: bytes, headers: dict) -> (status, response).
+        max_bytes:   Uncompressed byte budget per request.  A single action
+                     larger than this is still sent, alone.
+        compress:    Gzip request bodies (``content-encoding: gzip``).
+        sizer:       AdaptiveBatchSizer; a default one is created if omitted.
+        max_retries: Retries for 429-rejected requests or items.
+        backoff:     Initial back-off seconds after a 429 (doubles per retry).
+        sleep:       Sleep function; injectable for tests.
+
+    Thread safety:
+        write() may be called from several flusher threads at once; each
+        thread serializes into its own scratch buffer and the sizer is
+        locked.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[bytes, Dict[str, str]], Tuple[int, dict]],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        compress: bool = True,
+        sizer: Optional[AdaptiveBatchSizer] = None,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._send = send
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.sizer = sizer or AdaptiveBatchSizer()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._sleep = sleep
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._throttled = 0
+        self._bytes_raw = 0
+        self._bytes_sent = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def write(self, actions: List[dict]) -> Tuple[int, List[dict]]:
+        """Index *actions*; returns ``(success_count, errors_list)``.
+
+        ``errors_list`` holds the failed response items in the same
+        ``{op_type: item}`` form ``helpers.bulk(raise_on_error=False)``
+        returns.  Connection failures, and 429s that outlast max_retries,
+        raise.
+        """
+        success = 0
+        errors: List[dict] = []
+        pending = [(action, encode_action(action)) for action in actions]
+        attempt = 0
+        while pending:
+            retry: List[Tuple[dict, bytes]] = []
+            for chunk in self._chunks(pending):
+                ok, failed, rejected = self._send_chunk(chunk, attempt)
+                success += ok
+                errors.extend(failed)
+                retry.extend(rejected)
+            if not retry:
+                break
+            attempt += 1
+            if attempt > self.max_retries:
+                # Give up on the still-rejected items; report them as errors.
+                errors.extend(item for _, _, item in retry)  # type: ignore[misc]
+                break
+            self._sleep(self.backoff * (2 ** (attempt - 1)))
+            pending = [(action, line) for action, line, _ in retry]  # type: ignore[misc]
+        return success, errors
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request/byte counters and the current batch size."""
+        with self._stats_lock:
+            return {
+                "requests": self._requests,
+                "throttled": self._throttled,
+                "bytes_raw": self._bytes_raw,
+                "bytes_sent": self._bytes_sent,
+                "batch_size": self.sizer.size,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _chunks(self, pending: List[Tuple[dict, bytes]]):
+        """Yield runs of *pending* within the current count and byte limits."""
+        start = 0
+        while start < len(pending):
+            limit = self.sizer.size
+            end = start
+            size = 0
+            while end < len(pending) and end - start < limit:
+                n = len(pending[end][1])
+                if end > start and size + n > self.max_bytes:
+                    break
+                size += n
+                end += 1
+            yield pending[start:end]
+            start = end
+
+    def _body(self, chunk: List[Tuple[dict, bytes]]) -> Tuple[bytes, int]:
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            buf = self._local.buf = bytearray()
+        del buf[:]
+        for _, line in chunk:
+            buf += line
+        raw = len(buf)
+        if self.compress:
+            return gzip.compress(buf, compresslevel=3, mtime=0), raw
+        return bytes(buf), raw
+
+    def _send_chunk(self, chunk: List[Tuple[dict, bytes]], attempt: int):
+        """Send one request, retrying whole-request 429s.
+
+        Returns:
+            (success_count, errors, rejected) where *rejected* holds
+            ``(action, line, item)`` for items answered with 429.
+        """
+        body, raw = self._body(chunk)
+        headers = dict(NDJSON_HEADERS)
+        if self.compress:
+            headers["content-encoding"] = "gzip"
+
+        tries = attempt
+        while True:
+            start = time.monotonic()
+            status, response = self._send(body, headers)
+            latency = time.monotonic() - start
+            with self._stats_lock:
+                self._requests += 1
+                self._bytes_raw += raw
+                self._bytes_sent += len(body)
+            if status != 429:
+                break
+            with self._stats_lock:
+                self._throttled += 1
+            new_size = self.sizer.record(latency, throttled=True)
+            tries += 1
+            if tries > self.max_retries:
+                raise BulkThrottledError(
+                    f"bulk request rejected with 429 after {self.max_retries} retries"
+                )
+            delay = self.backoff * (2 ** (tries - 1))
+            logger.warning("bulk: cluster returned 429 — batch size now %d, retrying in %.1fs",
+                           new_size, delay)
+            self._sleep(delay)
+
+        if status >= 300 or not isinstance(response, dict):
+            raise RuntimeError(f"bulk request failed with HTTP {status}: {str(response)[:200]}")
+
+        items = response.get("items") or []
+        if not response.get("errors"):
+            self.sizer.record(latency)
+            return len(items), [], []
+
+        success = 0
+        failed: List[dict] = []
+        rejected = []
+        for (action, line), item in zip(chunk, items):
+            result = next(iter(item.values()), {}) if item else {}
+            item_status = result.get("status", 200)
+            if "error" not in result and item_status < 300:
+                success += 1
+            elif item_status == 429:
+                rejected.append((action, line, item))
+            else:
+                failed.append(item)
+        self.sizer.record(latency, throttled=bool(rejected))
+        if rejected:
+            with self._stats_lock:
+                self._throttled += 1
+        return success, failed, rejected
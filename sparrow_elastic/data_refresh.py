@@ -153,6 +153,10 @@ class DataFile:
             return False
 
         logger.info("data_refresh: '%s' updated successfully", self.name)
+        if self.name == "fingerbank.db":
+            # Swap the lookup connection over to the new file straight away.
+            from sparrow_elastic import fingerbank_client
+            fingerbank_client.reload_offline_db()
         return True
 
     # ------------------------------------------------------------------
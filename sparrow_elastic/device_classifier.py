@@ -19,6 +19,7 @@ Evidence keys (all always present, value is ``None`` when unknown):
 Public API
 ----------
 classify(evidence)     -> (str, float, list[str])
+combine_matches(per_class) -> (str, float, list[str])
 reload_rules()         -> int
 get_rule_count()       -> int
 """
@@ -44,6 +45,9 @@ _RULES_FILE = os.path.join(_DATA_DIR, "device_classifier_rules.json")
 #   "_compiled_re": compiled re.Pattern | None (for regex rules)
 _COMPILED_RULES: List[Dict[str, Any]] = []
 _RULES_LOADED: bool = False
+# Bumped by reload_rules() so callers caching classify() results can tell
+# their results are stale.
+_RULES_GENERATION: int = 0
 
 # ── Match-type implementations ────────────────────────────────────────────
 
@@ -183,6 +187,244 @@ def _ensure_loaded() -> None:
         _RULES_LOADED = True
 
 
+# ── Compiled rule index ───────────────────────────────────────────────────
+#
+# classify() runs for every document, so the rule list is compiled into one
+# _KeyIndex per match_key instead of being scanned rule by rule:
+#
+#   equals               dict  pattern -> rule numbers
+#   in_list              dict  pattern -> rule numbers (list values); the
+#                        distinct patterns are substring-checked for strings
+#   cod_major            32-slot table indexed by (cod >> 8) & 0x1F
+#   appearance_category  1024-slot table indexed by appearance >> 6
+#   regex                one alternation of all the key's patterns as a
+#                        prefilter, then one match() of per-rule lookaheads
+#                        that reports every rule that fired
+#
+# Rule numbers are positions in _COMPILED_RULES; classify() sorts the fired
+# numbers so the result is identical to the linear scan.
+
+_COD_MAJOR_SLOTS = 32
+_APPEARANCE_SLOTS = 1024
+
+# Leading global inline flags, e.g. "(?i)" — rewritten as a scoped group so
+# the pattern can sit inside a larger alternation.
+_GLOBAL_FLAGS_RE = re.compile(r"^\(\?([aiLmsux]+)\)")
+# Numbered/named back-references would point at the wrong group once the
+# pattern is wrapped; such rules are always run on their own.
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+def _is_absent(value: Any) -> bool:
+    """True for None, empty strings and empty lists (rules are skipped)."""
+    if value is None:
+        return True
+    if isinstance(value, str) and not value:
+        return True
+    if isinstance(value, list) and not value:
+        return True
+    return False
+
+
+def _scoped_pattern(pattern: str) -> str:
+    """Rewrite ``(?i)body`` as ``(?i:body)`` so it can be embedded."""
+    m = _GLOBAL_FLAGS_RE.match(pattern)
+    if m is None:
+        return pattern
+    return "(?%s:%s)" % (m.group(1), pattern[m.end():])
+
+
+class _KeyIndex:
+    """All rules for one evidence key, compiled for lookup."""
+
+    def __init__(self) -> None:
+        self.equals: Dict[Any, List[int]] = {}
+        self.in_list: Dict[Any, List[int]] = {}
+        self.cod_major: List[Optional[List[int]]] = [None] * _COD_MAJOR_SLOTS
+        self.appearance: List[Optional[List[int]]] = [None] * _APPEARANCE_SLOTS
+        # (rule number, compiled regex) in rule order
+        self.regex_rules: List[Tuple[int, re.Pattern]] = []
+        self.regex_combined: Optional[re.Pattern] = None
+        self.regex_report: Optional[re.Pattern] = None
+        # (index into regex_report's groups(), rule number)
+        self.regex_groups: List[Tuple[int, int]] = []
+        # Regex rules that could not go into the combined pattern
+        self.regex_solo: List[Tuple[int, re.Pattern]] = []
+        # Rules whose pattern fits none of the fast paths (e.g. a non-string
+        # equals pattern that isn't hashable) — evaluated the slow way
+        self.fallback: List[Tuple[int, Dict[str, Any]]] = []
+
+    def add(self, rule_no: int, rule: Dict[str, Any]) -> None:
+        """Add *rule* (number *rule_no* in _COMPILED_RULES) to the index."""
+        match_type = rule["match_type"]
+        pattern = rule["pattern"]
+
+        if match_type == "regex":
+            self.regex_rules.append((rule_no, rule["_compiled_re"]))
+            return
+
+        if match_type in ("equals", "in_list"):
+            table = self.equals if match_type == "equals" else self.in_list
+            try:
+                table.setdefault(pattern, []).append(rule_no)
+            except TypeError:
+                self.fallback.append((rule_no, rule))
+            return
+
+        try:
+            slot = int(pattern)
+        except (TypeError, ValueError):
+            self.fallback.append((rule_no, rule))
+            return
+        table = self.cod_major if match_type == "cod_major" else self.appearance
+        if 0 <= slot < len(table):
+            bucket = table[slot]
+            if bucket is None:
+                bucket = table[slot] = []
+            bucket.append(rule_no)
+        else:
+            self.fallback.append((rule_no, rule))
+
+    def finish(self) -> None:
+        """Build the combined regexes once every rule has been added."""
+        combinable: List[Tuple[int, re.Pattern]] = []
+        for rule_no, compiled in self.regex_rules:
+            if _BACKREF_RE.search(compiled.pattern):
+                self.regex_solo.append((rule_no, compiled))
+            else:
+                combinable.append((rule_no, compiled))
+        if not combinable:
+            return
+        try:
+            # Any-rule prefilter: a plain alternation, cheap to reject with.
+            self.regex_combined = re.compile("|".join(
+                "(?:%s)" % _scoped_pattern(compiled.pattern)
+                for _, compiled in combinable
+            ))
+            # Which-rules report: an optional lookahead per rule, all tried
+            # at position 0.  "(?s:.*?)" in front makes "matches anywhere"
+            # (re.search semantics) testable from the start of the string,
+            # so one match() leaves a group set for every rule that fires.
+            self.regex_report = re.compile("".join(
+                "(?:(?=(?P<r%d>(?s:.*?)(?:%s)))|)" % (rule_no, _scoped_pattern(compiled.pattern))
+                for rule_no, compiled in combinable
+            ))
+        except re.error:
+            # Unusual flags or group names — run the key's rules one by one.
+            self.regex_combined = None
+            self.regex_report = None
+            self.regex_solo = list(self.regex_rules)
+            return
+        self.regex_groups = [
+            (self.regex_report.groupindex["r%d" % rule_no] - 1, rule_no)
+            for rule_no, _ in combinable
+        ]
+
+    def collect(self, value: Any, fired: List[int]) -> None:
+        """Append the numbers of every rule in this key that fires on *value*."""
+        if self.equals:
+            try:
+                hits = self.equals.get(value)
+            except TypeError:  # unhashable value (e.g. a list)
+                hits = None
+            if hits:
+                fired.extend(hits)
+
+        if self.in_list:
+            if isinstance(value, list):
+                seen: set = set()
+                for item in value:
+                    try:
+                        hits = self.in_list.get(item)
+                    except TypeError:
+                        hits = [n for p, nums in self.in_list.items() if p == item for n in nums]
+                    if hits:
+                        for rule_no in hits:
+                            if rule_no not in seen:
+                                seen.add(rule_no)
+                                fired.append(rule_no)
+            elif isinstance(value, str):
+                for pattern, hits in self.in_list.items():
+                    if pattern in value:
+                        fired.extend(hits)
+
+        if isinstance(value, int):
+            slot = (value >> 8) & 0x1F
+            hits = self.cod_major[slot]
+            if hits:
+                fired.extend(hits)
+            slot = value >> 6
+            if 0 <= slot < _APPEARANCE_SLOTS:
+                hits = self.appearance[slot]
+                if hits:
+                    fired.extend(hits)
+
+        if self.regex_rules and isinstance(value, str):
+            self._collect_regex(value, fired)
+
+        for rule_no, rule in self.fallback:
+            if _rule_fires(rule, value):
+                fired.append(rule_no)
+
+    def _collect_regex(self, value: str, fired: List[int]) -> None:
+        """Regex rules: two combined calls instead of one search per rule."""
+        for rule_no, compiled in self.regex_solo:
+            if compiled.search(value):
+                fired.append(rule_no)
+
+        if self.regex_combined is None or self.regex_combined.search(value) is None:
+            return
+        groups = self.regex_report.match(value).groups()  # type: ignore[union-attr]
+        for group_no, rule_no in self.regex_groups:
+            if groups[group_no] is not None:
+                fired.append(rule_no)
+
+
+def _rule_fires(rule: Dict[str, Any], value: Any) -> bool:
+    """Evaluate a single rule against *value* (non-absent)."""
+    match_type = rule["match_type"]
+    pattern = rule["pattern"]
+    if match_type == "regex":
+        return _match_regex(value, rule["_compiled_re"])
+    if match_type == "equals":
+        return _match_equals(value, pattern)
+    if match_type == "in_list":
+        return _match_in_list(value, pattern)
+    if match_type == "cod_major":
+        return _match_cod_major(value, int(pattern))
+    if match_type == "appearance_category":
+        return _match_appearance_category(value, int(pattern))
+    return False
+
+
+def _build_index(rules: List[Dict[str, Any]]) -> Dict[str, _KeyIndex]:
+    """Compile *rules* into a {match_key: _KeyIndex} mapping."""
+    index: Dict[str, _KeyIndex] = {}
+    for rule_no, rule in enumerate(rules):
+        key = rule["match_key"]
+        if key not in index:
+            index[key] = _KeyIndex()
+        index[key].add(rule_no, rule)
+    for key_index in index.values():
+        key_index.finish()
+    return index
+
+
+# The index is rebuilt whenever _COMPILED_RULES is replaced (reload_rules(),
+# or a test swapping the list in directly).
+_INDEX: Dict[str, _KeyIndex] = {}
+_INDEX_SOURCE: Optional[List[Dict[str, Any]]] = None
+
+
+def _get_index() -> Dict[str, _KeyIndex]:
+    """Return the index for the current _COMPILED_RULES list."""
+    global _INDEX, _INDEX_SOURCE
+    if _INDEX_SOURCE is not _COMPILED_RULES:
+        _INDEX = _build_index(_COMPILED_RULES)
+        _INDEX_SOURCE = _COMPILED_RULES
+    return _INDEX
+
+
 # ── Public API ────────────────────────────────────────────────────────────
 
 def reload_rules() -> int:
@@ -191,9 +433,10 @@ def reload_rules() -> int:
     Safe to call at runtime — e.g., after the operator edits the file or
     after a unit test that monkeypatches the file path.
     """
-    global _COMPILED_RULES, _RULES_LOADED
+    global _COMPILED_RULES, _RULES_LOADED, _RULES_GENERATION
     _COMPILED_RULES = _load_rules()
     _RULES_LOADED = True
+    _RULES_GENERATION += 1
     return len(_COMPILED_RULES)
 
 
@@ -203,6 +446,11 @@ def get_rule_count() -> int:
     return len(_COMPILED_RULES)
 
 
+def get_rules_generation() -> int:
+    """Return a counter that changes every time the rules are reloaded."""
+    return _RULES_GENERATION
+
+
 def classify(evidence: Dict[str, Any]) -> Tuple[str, float, List[str]]:
     """Classify a device based on the evidence dict.
 
@@ -229,10 +477,49 @@ def classify(evidence: Dict[str, Any]) -> Tuple[str, float, List[str]]:
     if not _COMPILED_RULES:
         return ("unknown", 0.0, [])
 
+    index = _get_index()
+    fired: List[int] = []
+    for match_key, key_index in index.items():
+        value = evidence.get(match_key)
+        # None, "" and [] are absent evidence
+        if value is None or value == "" or value == []:
+            continue
+        key_index.collect(value, fired)
+
+    if not fired:
+        return ("unknown", 0.0, [])
+
+    # Rule-file order, exactly as the linear scan would have found them, so
+    # combine_matches sees the same per-class order (ties and float rounding
+    # depend on it).
+    fired.sort()
+    per_class: Dict[str, List[Tuple[float, str]]] = {}
+    for rule_no in fired:
+        rule = _COMPILED_RULES[rule_no]
+        cls = rule["class_guess"]
+        if cls not in per_class:
+            per_class[cls] = []
+        per_class[cls].append((rule["confidence"], rule["evidence_tag"]))
+
+    return combine_matches(per_class)
+
+
+def _classify_linear(evidence: Dict[str, Any],
+                     rules: Optional[List[Dict[str, Any]]] = None,
+                     ) -> Tuple[str, float, List[str]]:
+    """Reference implementation: test every rule against *evidence* in turn.
+
+    Kept for the parity test and the classifier benchmark; :func:`classify`
+    must always return exactly what this returns.
+    """
+    if rules is None:
+        _ensure_loaded()
+        rules = _COMPILED_RULES
+
     # per_class: {class_guess -> [(confidence, evidence_tag), ...]}
     per_class: Dict[str, List[Tuple[float, str]]] = {}
 
-    for rule in _COMPILED_RULES:
+    for rule in rules:
         match_key: str = rule["match_key"]
 
         # Skip rules whose key is absent in the evidence dict
@@ -242,11 +529,7 @@ def classify(evidence: Dict[str, Any]) -> Tuple[str, float, List[str]]:
         value = evidence[match_key]
 
         # Skip rules when the value is None or empty string / empty list
-        if value is None:
-            continue
-        if isinstance(value, str) and not value:
-            continue
-        if isinstance(value, list) and not value:
+        if _is_absent(value):
             continue
 
         match_type: str = rule["match_type"]
@@ -2,21 +2,27 @@
 
 Public API
 ----------
-build_wifi_document(net, obs, now_utc)   -> dict
-build_bt_document(dev, obs, now_utc)     -> dict
-compute_doc_id(doc)                      -> str
+build_wifi_document(net, obs, now_utc, cache=None)  -> dict
+build_bt_document(dev, obs, now_utc, cache=None)    -> dict
+compute_doc_id(doc)                                 -> str
+DocumentCache                                       -> per-device static-part cache
 
 ``net`` and ``dev`` are raw agent observation dicts whose keys follow the
 sparrow-wifi wirelessengine.py / sparrowbluetooth.py toJsondict() shapes.
 ``obs`` is the observer context dict; ``now_utc`` is a timezone-aware UTC
-datetime used for event.ingested and temporal observed.* fields.
+datetime used for event.ingested and temporal observed.* fields.  A
+DocumentCache lets repeat scans of the same device skip re-deriving the
+fields that do not change between cycles.
 """
 
 import hashlib
 import logging
 import socket
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 
 from sparrow_elastic.channel_utils import (
     band_for_frequency,
@@ -24,7 +30,7 @@ from sparrow_elastic.channel_utils import (
     compute_occupied_set,
 )
 from sparrow_elastic.controller_signature import is_controller_candidate
-from sparrow_elastic.device_classifier import classify
+from sparrow_elastic.device_classifier import classify, get_rules_generation
 from sparrow_elastic.ble_adv_parser import parse_adv_payload
 from sparrow_elastic.ecs_helpers import to_es_timestamp, DAY_OF_WEEK
 from sparrow_elastic.mac_utils import canonicalize_mac, mac_flags
@@ -51,6 +57,26 @@ def _safe_mac(raw: Optional[str]) -> str:
         return ""
 
 
+@lru_cache(maxsize=4096)
+def _strptime_known(text: str) -> Optional[datetime]:
+    """Parse *text* with the agent's timestamp formats (naive result, or None).
+
+    Memoised: every network in a scan shares a handful of firstseen/lastseen
+    strings, and strptime is the most expensive step of a document build.
+    """
+    for fmt in (
+        "%Y-%m-%d %H:%M:%S.%f",
+        "%Y-%m-%d %H:%M:%S",
+        "%Y-%m-%dT%H:%M:%S.%f",
+        "%Y-%m-%dT%H:%M:%S",
+    ):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
 def _parse_dt(raw) -> Optional[datetime]:
     """Parse a datetime from a string or datetime object.
 
@@ -61,18 +87,7 @@ def _parse_dt(raw) -> Optional[datetime]:
     if isinstance(raw, datetime):
         dt = raw
     else:
-        dt = None
-        for fmt in (
-            "%Y-%m-%d %H:%M:%S.%f",
-            "%Y-%m-%d %H:%M:%S",
-            "%Y-%m-%dT%H:%M:%S.%f",
-            "%Y-%m-%dT%H:%M:%S",
-        ):
-            try:
-                dt = datetime.strptime(str(raw), fmt)
-                break
-            except ValueError:
-                continue
+        dt = _strptime_known(str(raw))
         if dt is None:
             # Last resort: dateutil (may or may not be installed)
             try:
@@ -233,28 +248,194 @@ def compute_doc_id(doc: dict) -> str:
 
 
 # ---------------------------------------------------------------------------
-# Public: build_wifi_document
+# Public: DocumentCache
 # ---------------------------------------------------------------------------
 
-def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
-    """Build an ECS 8.17 WiFi network observation document.
+# Raw agent fields the static/derived part of each document depends on.  Any
+# change to one of these rebuilds the device's cached part; everything else
+# (signal, timestamps, GPS, QBSS load, observer) is merged fresh every cycle.
+_WIFI_STATIC_FIELDS = (
+    "macAddr", "ssid", "mode", "security", "privacy", "cipher",
+    "frequency", "channel", "secondaryChannel", "bandwidth",
+    "vendor_ie_ouis", "wps_enabled", "wps_uuid", "supported_rates",
+    "ht_capabilities", "ht", "vht", "he", "eht", "mac_vendor",
+    "probe_ssid_list",
+)
+
+_BT_STATIC_FIELDS = (
+    "macAddr", "name", "company", "manufacturer", "bluetoothdescription",
+    "bttype", "txpower", "txpowervalid", "uuid", "adv_hex",
+)
+
+
+class DocumentCache:
+    """Per-device cache of the static/derived part of WiFi and BT documents.
+
+    A BSSID's SSID, security, channel, vendor IEs and so on almost never change
+    between scan cycles, yet rebuilding a document re-runs MAC
+    canonicalisation, mac_flags(), compute_occupied_set(), the classifier
+    rule scan, the BLE advertising parse and the fingerprint SHA-1.  With a
+    cache passed to build_wifi_document() / build_bt_document() that work is
+    done once per device and reused until one of the device's static raw
+    fields changes; each cycle only merges the volatile fields.
+
+    Entries are keyed on (kind, raw MAC) and hold a copy of the static raw
+    field values, so a changed field rebuilds that device's entry.  The
+    cached part includes the classifier result, so the whole cache is dropped
+    when device_classifier.reload_rules() loads a new rule set.  Entries not
+    used for ``max_idle_seconds`` are dropped by prune() (the bridge calls it
+    once per cycle); ``max_entries`` caps the size by evicting the least
+    recently used device.
+
+    Cached parts are shared between documents: the builders copy every
+    container they put into a document, so callers may mutate documents
+    freely.
+
+    Not thread-safe; use one cache per builder thread.
 
     Args:
-        net:     Raw agent observation dict.  Keys follow
-                 wirelessengine.py WirelessNetwork.toJsondict(), plus optional
-                 extensions (vendor_ie_ouis, wps_uuid, supported_rates,
-                 ht_capabilities, ht/vht/he/eht, mac_vendor,
-                 probe_ssid_list, wps_enabled).
-        obs:     Observer context dict:
-                     id         -- observer identifier
-                     hostname   -- real hostname
-                     geo        -- dict(lat, lon, alt) or None
-                     gps_status -- GPS status keyword or None
-        now_utc: Timezone-aware UTC datetime.
+        max_idle_seconds: Drop devices not seen for this long.
+        max_entries:      Hard cap on cached devices.
+        clock:            Monotonic time source (injectable for tests).
+    """
 
-    Returns:
-        ECS document dict compatible with the sparrow-wifi index mapping
-        (dynamic:strict).
+    def __init__(self, max_idle_seconds: float = 900.0, max_entries: int = 50_000,
+                 clock=time.monotonic) -> None:
+        self.max_idle_seconds = max_idle_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        # (kind, raw_mac) -> [fingerprint, static_part, last_used]
+        self._entries: "OrderedDict[tuple, list]" = OrderedDict()
+        self._rules_generation = get_rules_generation()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, kind: str, raw: dict, fields: tuple, build) -> dict:
+        """Return the cached static part for *raw*, building it on a miss.
+
+        Args:
+            kind:   "wifi" or "bt" (keeps the two key spaces apart).
+            raw:    Raw agent observation dict.
+            fields: Names of the raw fields the static part depends on.
+            build:  Callable(raw) -> static part, used on a miss.
+        """
+        generation = get_rules_generation()
+        if generation != self._rules_generation:
+            # class_guess/class_conf/class_evidence came from the old rules
+            self._entries.clear()
+            self._rules_generation = generation
+
+        key = (kind, raw.get("macAddr", ""))
+        fingerprint = list(map(raw.get, fields))
+        now = self._clock()
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            entry[2] = now
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        static = build(raw)
+        # Copy list-valued fields so later changes to *raw* can't leak in
+        self._entries[key] = [_copy_list(fingerprint), static, now]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return static
+
+    def prune(self) -> int:
+        """Drop entries idle for longer than max_idle_seconds.
+
+        Returns:
+            Number of entries removed.
+        """
+        cutoff = self._clock() - self.max_idle_seconds
+        removed = 0
+        # Entries are kept in least-recently-used order, so stop at the first
+        # one that is still fresh.
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[2] > cutoff:
+                break
+            del self._entries[key]
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+def _copy_tree(tree: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy nested dicts/lists so a cached part is never aliased by a document."""
+    return {k: (_copy_value(v) if type(v) in _CONTAINERS else v) for k, v in tree.items()}
+
+
+def _copy_list(items: List[Any]) -> List[Any]:
+    """List counterpart of _copy_tree."""
+    return [(_copy_value(v) if type(v) in _CONTAINERS else v) for v in items]
+
+
+def _copy_value(value: Any) -> Any:
+    return _copy_tree(value) if type(value) is dict else _copy_list(value)
+
+
+_CONTAINERS = (dict, list)
+
+
+def _signal_section(signal_dbm: Optional[float]) -> Optional[dict]:
+    """Build the signal.* section for a dBm reading (None when unknown)."""
+    if signal_dbm is None:
+        return None
+    sig_doc: dict = {"strength_dbm": signal_dbm}
+    mw = dbm_to_mw(signal_dbm)
+    if mw is not None:
+        sig_doc["strength_mw"] = mw
+    qual = quality_0_to_5(signal_dbm)
+    if qual is not None:
+        sig_doc["strength_quality_0_5"] = qual
+    return sig_doc
+
+
+def _timestamps(first_seen_raw, last_seen_raw, now_utc: datetime) -> tuple:
+    """Return (first_seen_dt, last_seen_dt) with the first <= last invariant."""
+    first_seen_dt = _parse_dt(first_seen_raw) or now_utc
+    last_seen_dt  = _parse_dt(last_seen_raw)  or now_utc
+    # Defensive: sparrow agent occasionally reports firstseen > lastseen
+    # (observed in production BT scans). Preserve the first/last invariant.
+    if first_seen_dt > last_seen_dt:
+        first_seen_dt, last_seen_dt = last_seen_dt, first_seen_dt
+    return first_seen_dt, last_seen_dt
+
+
+# ---------------------------------------------------------------------------
+# Public: build_wifi_document
+# ---------------------------------------------------------------------------
+
+def _wifi_static(net: dict) -> dict:
+    """Derive the static part of a WiFi document from *net*.
+
+    Reads only the fields listed in _WIFI_STATIC_FIELDS so the result can be
+    cached by DocumentCache.
     """
     # ------------------------------------------------------------------
     # Raw field extraction (wirelessengine.py WirelessNetwork.toJsondict)
@@ -269,17 +450,6 @@ def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
     channel_raw     = net.get("channel")          # int or 0/None
     sec_chan_raw    = net.get("secondaryChannel")
     bandwidth       = net.get("bandwidth")        # int MHz
-    signal_raw      = net.get("signal")           # int dBm
-    station_cnt     = net.get("stationcount")
-    utilization     = net.get("utilization")
-    first_seen_raw  = net.get("firstseen")
-    last_seen_raw   = net.get("lastseen")
-    strongest_sig   = net.get("strongestsignal")
-
-    # Per-AP strongest-signal GPS (observer-side GPS comes from obs)
-    strongest_lat   = net.get("strongestlat")
-    strongest_lon   = net.get("strongestlon")
-    strongest_alt   = net.get("strongestalt")
 
     # Extended fingerprint / capability fields (not in baseline toJsondict;
     # populated by extended agent or test fixtures)
@@ -293,17 +463,6 @@ def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
     mac_vendor_str  = net.get("mac_vendor")        # str or None
     probe_ssids     = net.get("probe_ssid_list")   # list[str] or None
 
-    # ------------------------------------------------------------------
-    # Timestamps
-    # ------------------------------------------------------------------
-    first_seen_dt = _parse_dt(first_seen_raw) or now_utc
-    last_seen_dt  = _parse_dt(last_seen_raw)  or now_utc
-    # Defensive: sparrow agent occasionally reports firstseen > lastseen
-    # (observed in production BT scans). Preserve the first/last invariant.
-    if first_seen_dt > last_seen_dt:
-        first_seen_dt, last_seen_dt = last_seen_dt, first_seen_dt
-    timestamp_str = to_es_timestamp(last_seen_dt)
-
     # ------------------------------------------------------------------
     # MAC canonicalization + flags
     # ------------------------------------------------------------------
@@ -359,18 +518,6 @@ def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
         except (TypeError, ValueError):
             pass
 
-    # ------------------------------------------------------------------
-    # Signal
-    # ------------------------------------------------------------------
-    signal_dbm: Optional[float] = _to_float(signal_raw)
-    # sentinel -1000 means "unknown" in sparrow
-    if signal_dbm is not None and signal_dbm <= -999:
-        signal_dbm = None
-
-    strongest_dbm: Optional[float] = _to_float(strongest_sig)
-    if strongest_dbm is not None and strongest_dbm <= -999:
-        strongest_dbm = None
-
     # ------------------------------------------------------------------
     # Device classification (Step 5 will provide real logic)
     # ------------------------------------------------------------------
@@ -388,22 +535,190 @@ def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
     class_guess, class_conf, class_evidence = classify(class_evidence_dict)
     class_evidence = [str(e) for e in (class_evidence or [])]
 
+    # ------------------------------------------------------------------
+    # Related hash (WiFi fingerprint)
+    # ------------------------------------------------------------------
+    rel_hash, rel_hash_strength = _build_wifi_related_hash(net)
+    device_id = rel_hash if rel_hash else canon_mac
+
+    # ------------------------------------------------------------------
+    # rf.* (static part; controller_candidate depends on signal)
+    # ------------------------------------------------------------------
+    rf_static: dict = {}
+    if freq_int:
+        rf_static["frequency_mhz"] = freq_int
+    if band:
+        rf_static["band"] = band
+    if occupied_set is not None:
+        rf_static["channel_occupied_set"] = occupied_set
+
+    # ------------------------------------------------------------------
+    # wifi.* — the fields ahead of qbss, and those between qbss and
+    # strongest_signal (kept apart so the document's key order is stable)
+    # ------------------------------------------------------------------
+    wifi_head: dict = {}
+
+    # ssid / ssid_hidden
+    if ssid:
+        wifi_head["ssid"] = ssid
+        wifi_head["ssid_hidden"] = False
+    else:
+        wifi_head["ssid_hidden"] = True
+
+    if canon_mac:
+        wifi_head["bssid"] = canon_mac
+
+    if security:
+        wifi_head["security"] = security
+    if cipher:
+        wifi_head["cipher"] = cipher
+    if privacy:
+        wifi_head["privacy"] = privacy
+    if mode:
+        wifi_head["mode"] = mode
+
+    if mac_vendor_str:
+        wifi_head["mac_vendor"] = mac_vendor_str
+
+    # wifi.mac flags
+    if mac_flag_dict:
+        wifi_head["mac"] = {
+            "locally_administered": mac_flag_dict.get("locally_administered", False),
+            "randomized": mac_flag_dict.get("randomized", False),
+        }
+
+    # wifi.channel
+    chan_doc: dict = {}
+    if ch_primary is not None:
+        chan_doc["primary"] = ch_primary
+    if sec_chan_int is not None:
+        chan_doc["secondary"] = sec_chan_int
+    if bw_int is not None:
+        chan_doc["width_mhz"] = bw_int
+    if occupied_set is not None:
+        chan_doc["occupied_set"] = occupied_set
+    if chan_doc:
+        wifi_head["channel"] = chan_doc
+
+    # wifi.capabilities
+    caps: dict = {}
+    if ht_cap_flag is not None:
+        caps["ht"] = bool(ht_cap_flag)
+    if vht_cap_flag is not None:
+        caps["vht"] = bool(vht_cap_flag)
+    if he_cap_flag is not None:
+        caps["he"] = bool(he_cap_flag)
+    if eht_cap_flag is not None:
+        caps["eht"] = bool(eht_cap_flag)
+    if caps:
+        wifi_head["capabilities"] = caps
+
+    wifi_tail: dict = {}
+
+    # wifi.wps
+    wps_doc: dict = {}
+    if wps_enabled is not None:
+        wps_doc["enabled"] = bool(wps_enabled)
+    if wps_uuid:
+        wps_doc["uuid"] = str(wps_uuid)
+    if wps_doc:
+        wifi_tail["wps"] = wps_doc
+
+    # wifi.vendor_ie
+    if vendor_ie_ouis:
+        wifi_tail["vendor_ie"] = {"ouis": list(vendor_ie_ouis)}
+
+    # wifi.probe
+    if probe_ssids:
+        wifi_tail["probe"] = {"ssid_list": list(probe_ssids)}
+
+    return {
+        "canon_mac": canon_mac,
+        "band": band,
+        "mac_vendor": mac_vendor_str,
+        "device_id": device_id,
+        "class_guess": class_guess,
+        "class_conf": class_conf,
+        "class_evidence": class_evidence,
+        "rel_hash": rel_hash,
+        "rel_hash_strength": rel_hash_strength,
+        "rf": rf_static,
+        "wifi_head": wifi_head,
+        "wifi_tail": wifi_tail,
+    }
+
+
+def build_wifi_document(net: dict, obs: dict, now_utc: datetime,
+                        cache: Optional[DocumentCache] = None) -> dict:
+    """Build an ECS 8.17 WiFi network observation document.
+
+    Args:
+        net:     Raw agent observation dict.  Keys follow
+                 wirelessengine.py WirelessNetwork.toJsondict(), plus optional
+                 extensions (vendor_ie_ouis, wps_uuid, supported_rates,
+                 ht_capabilities, ht/vht/he/eht, mac_vendor,
+                 probe_ssid_list, wps_enabled).
+        obs:     Observer context dict:
+                     id         -- observer identifier
+                     hostname   -- real hostname
+                     geo        -- dict(lat, lon, alt) or None
+                     gps_status -- GPS status keyword or None
+        now_utc: Timezone-aware UTC datetime.
+        cache:   Optional DocumentCache; when given, the static/derived part
+                 of the document is reused across calls for the same BSSID.
+
+    Returns:
+        ECS document dict compatible with the sparrow-wifi index mapping
+        (dynamic:strict).
+    """
+    if cache is None:
+        static = _wifi_static(net)
+    else:
+        static = cache.get("wifi", net, _WIFI_STATIC_FIELDS, _wifi_static)
+
+    # ------------------------------------------------------------------
+    # Volatile field extraction
+    # ------------------------------------------------------------------
+    signal_raw      = net.get("signal")           # int dBm
+    station_cnt     = net.get("stationcount")
+    utilization     = net.get("utilization")
+    first_seen_raw  = net.get("firstseen")
+    last_seen_raw   = net.get("lastseen")
+    strongest_sig   = net.get("strongestsignal")
+
+    # Per-AP strongest-signal GPS (observer-side GPS comes from obs)
+    strongest_lat   = net.get("strongestlat")
+    strongest_lon   = net.get("strongestlon")
+    strongest_alt   = net.get("strongestalt")
+
+    # ------------------------------------------------------------------
+    # Timestamps
+    # ------------------------------------------------------------------
+    first_seen_dt, last_seen_dt = _timestamps(first_seen_raw, last_seen_raw, now_utc)
+    timestamp_str = to_es_timestamp(last_seen_dt)
+
+    # ------------------------------------------------------------------
+    # Signal
+    # ------------------------------------------------------------------
+    signal_dbm: Optional[float] = _to_float(signal_raw)
+    # sentinel -1000 means "unknown" in sparrow
+    if signal_dbm is not None and signal_dbm <= -999:
+        signal_dbm = None
+
+    strongest_dbm: Optional[float] = _to_float(strongest_sig)
+    if strongest_dbm is not None and strongest_dbm <= -999:
+        strongest_dbm = None
+
     # ------------------------------------------------------------------
     # Controller-candidate RF signature
     # ------------------------------------------------------------------
     ctrl_candidate = is_controller_candidate(
-        rf_band=band or "unknown",
+        rf_band=static["band"] or "unknown",
         signal_dbm=signal_dbm,
-        device_class=class_guess,
-        mac_vendor=mac_vendor_str,
+        device_class=static["class_guess"],
+        mac_vendor=static["mac_vendor"],
     )
 
-    # ------------------------------------------------------------------
-    # Related hash (WiFi fingerprint)
-    # ------------------------------------------------------------------
-    rel_hash, rel_hash_strength = _build_wifi_related_hash(net)
-    device_id = rel_hash if rel_hash else canon_mac
-
     # ------------------------------------------------------------------
     # GPS (observer-side comes from obs; per-AP strongest_signal below)
     # ------------------------------------------------------------------
@@ -421,6 +736,7 @@ def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
     # ------------------------------------------------------------------
     # Assemble document skeleton
     # ------------------------------------------------------------------
+    canon_mac = static["canon_mac"]
     doc: dict = {
         "@timestamp": timestamp_str,
         "ecs": {"version": _ECS_VERSION},
@@ -439,10 +755,10 @@ def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
             "address": canon_mac,
         },
         "device": {
-            "id": device_id,
-            "class_guess": class_guess,
-            "class_confidence": class_conf,
-            "class_evidence": class_evidence,
+            "id": static["device_id"],
+            "class_guess": static["class_guess"],
+            "class_confidence": static["class_conf"],
+            "class_evidence": list(static["class_evidence"]),
         },
         "related": {
             "mac": [canon_mac] if canon_mac else [],
@@ -458,21 +774,15 @@ def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
     # ------------------------------------------------------------------
     # related.hash (omit entirely when no fingerprint inputs)
     # ------------------------------------------------------------------
-    if rel_hash is not None:
-        doc["related"]["hash"] = rel_hash
-        doc["related"]["hash_strength"] = rel_hash_strength
+    if static["rel_hash"] is not None:
+        doc["related"]["hash"] = static["rel_hash"]
+        doc["related"]["hash_strength"] = static["rel_hash_strength"]
 
     # ------------------------------------------------------------------
     # signal.*
     # ------------------------------------------------------------------
-    if signal_dbm is not None:
-        sig_doc: dict = {"strength_dbm": signal_dbm}
-        mw = dbm_to_mw(signal_dbm)
-        if mw is not None:
-            sig_doc["strength_mw"] = mw
-        qual = quality_0_to_5(signal_dbm)
-        if qual is not None:
-            sig_doc["strength_quality_0_5"] = qual
+    sig_doc = _signal_section(signal_dbm)
+    if sig_doc is not None:
         doc["signal"] = sig_doc
 
     # ------------------------------------------------------------------
@@ -481,73 +791,13 @@ def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
     rf_doc: dict = {
         "signature": {"controller_candidate": ctrl_candidate},
     }
-    if freq_int:
-        rf_doc["frequency_mhz"] = freq_int
-    if band:
-        rf_doc["band"] = band
-    if occupied_set is not None:
-        rf_doc["channel_occupied_set"] = occupied_set
+    rf_doc.update(_copy_tree(static["rf"]))
     doc["rf"] = rf_doc
 
     # ------------------------------------------------------------------
     # wifi.*
     # ------------------------------------------------------------------
-    wifi: dict = {}
-
-    # ssid / ssid_hidden
-    if ssid:
-        wifi["ssid"] = ssid
-        wifi["ssid_hidden"] = False
-    else:
-        wifi["ssid_hidden"] = True
-
-    if canon_mac:
-        wifi["bssid"] = canon_mac
-
-    if security:
-        wifi["security"] = security
-    if cipher:
-        wifi["cipher"] = cipher
-    if privacy:
-        wifi["privacy"] = privacy
-    if mode:
-        wifi["mode"] = mode
-
-    if mac_vendor_str:
-        wifi["mac_vendor"] = mac_vendor_str
-
-    # wifi.mac flags
-    if mac_flag_dict:
-        wifi["mac"] = {
-            "locally_administered": mac_flag_dict.get("locally_administered", False),
-            "randomized": mac_flag_dict.get("randomized", False),
-        }
-
-    # wifi.channel
-    chan_doc: dict = {}
-    if ch_primary is not None:
-        chan_doc["primary"] = ch_primary
-    if sec_chan_int is not None:
-        chan_doc["secondary"] = sec_chan_int
-    if bw_int is not None:
-        chan_doc["width_mhz"] = bw_int
-    if occupied_set is not None:
-        chan_doc["occupied_set"] = occupied_set
-    if chan_doc:
-        wifi["channel"] = chan_doc
-
-    # wifi.capabilities
-    caps: dict = {}
-    if ht_cap_flag is not None:
-        caps["ht"] = bool(ht_cap_flag)
-    if vht_cap_flag is not None:
-        caps["vht"] = bool(vht_cap_flag)
-    if he_cap_flag is not None:
-        caps["he"] = bool(he_cap_flag)
-    if eht_cap_flag is not None:
-        caps["eht"] = bool(eht_cap_flag)
-    if caps:
-        wifi["capabilities"] = caps
+    wifi: dict = _copy_tree(static["wifi_head"])
 
     # wifi.qbss
     qbss: dict = {}
@@ -568,22 +818,7 @@ def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
     if qbss:
         wifi["qbss"] = qbss
 
-    # wifi.wps
-    wps_doc: dict = {}
-    if wps_enabled is not None:
-        wps_doc["enabled"] = bool(wps_enabled)
-    if wps_uuid:
-        wps_doc["uuid"] = str(wps_uuid)
-    if wps_doc:
-        wifi["wps"] = wps_doc
-
-    # wifi.vendor_ie
-    if vendor_ie_ouis:
-        wifi["vendor_ie"] = {"ouis": list(vendor_ie_ouis)}
-
-    # wifi.probe
-    if probe_ssids:
-        wifi["probe"] = {"ssid_list": list(probe_ssids)}
+    wifi.update(_copy_tree(static["wifi_tail"]))
 
     # wifi.strongest_signal (with per-AP geo)
     strongest_doc: dict = {}
@@ -607,20 +842,11 @@ def build_wifi_document(net: dict, obs: dict, now_utc: datetime) -> dict:
 # Public: build_bt_document
 # ---------------------------------------------------------------------------
 
-def build_bt_document(dev: dict, obs: dict, now_utc: datetime) -> dict:
-    """Build an ECS 8.17 Bluetooth device observation document.
-
-    Args:
-        dev:     Raw agent observation dict.  Keys follow
-                 sparrowbluetooth.py BluetoothDevice.toJsondict(), plus
-                 optional extension key ``adv_hex`` (not yet populated by
-                 the agent).
-        obs:     Observer context dict (same shape as build_wifi_document).
-        now_utc: Timezone-aware UTC datetime.
+def _bt_static(dev: dict) -> dict:
+    """Derive the static part of a Bluetooth document from *dev*.
 
-    Returns:
-        ECS document dict compatible with the sparrow-bt index mapping
-        (dynamic:strict).
+    Reads only the fields listed in _BT_STATIC_FIELDS so the result can be
+    cached by DocumentCache.
     """
     # ------------------------------------------------------------------
     # Raw field extraction (BluetoothDevice.toJsondict())
@@ -631,31 +857,13 @@ def build_bt_document(dev: dict, obs: dict, now_utc: datetime) -> dict:
     bt_manufacturer  = dev.get("manufacturer", "")
     bt_description   = dev.get("bluetoothdescription", "")
     bt_type          = dev.get("bttype")          # 1=Classic, 2=LE
-    rssi_raw         = dev.get("rssi")
     tx_power_raw     = dev.get("txpower")
     tx_power_valid   = dev.get("txpowervalid", "False")
-    ibeacon_range    = dev.get("ibeaconrange")
     uuid_str         = dev.get("uuid", "")
-    first_seen_raw   = dev.get("firstseen")
-    last_seen_raw    = dev.get("lastseen")
-
-    # GPS (flat fields as in toJsondict; bt mapping has no geo.altitude)
-    gps_lat          = dev.get("lat")
-    gps_lon          = dev.get("lon")
 
     # BLE raw advertising payload (agent extension -- not yet in baseline)
     adv_hex          = dev.get("adv_hex")
 
-    # ------------------------------------------------------------------
-    # Timestamps
-    # ------------------------------------------------------------------
-    first_seen_dt = _parse_dt(first_seen_raw) or now_utc
-    last_seen_dt  = _parse_dt(last_seen_raw)  or now_utc
-    # Defensive: preserve first/last invariant (see WiFi path for rationale).
-    if first_seen_dt > last_seen_dt:
-        first_seen_dt, last_seen_dt = last_seen_dt, first_seen_dt
-    timestamp_str = to_es_timestamp(last_seen_dt)
-
     # ------------------------------------------------------------------
     # MAC canonicalization
     # ------------------------------------------------------------------
@@ -666,16 +874,8 @@ def build_bt_document(dev: dict, obs: dict, now_utc: datetime) -> dict:
         is_ble = True
     mac_flag_dict = mac_flags(canon_mac, is_ble=is_ble) if canon_mac else {}
 
-    # ------------------------------------------------------------------
-    # Signal
-    # ------------------------------------------------------------------
-    rssi_dbm: Optional[float] = _to_float(rssi_raw)
-    if rssi_dbm is not None and rssi_dbm <= -999:
-        rssi_dbm = None
-
     tx_power_dbm: Optional[float] = _to_float(tx_power_raw)
     tx_power_valid_b = _str_to_bool(tx_power_valid)
-    ibeacon_range_f  = _to_float(ibeacon_range)
 
     # ------------------------------------------------------------------
     # BLE advertising payload (stub returns {})
@@ -698,7 +898,119 @@ def build_bt_document(dev: dict, obs: dict, now_utc: datetime) -> dict:
     }
     class_guess, class_conf, class_evidence = classify(class_evidence_dict)
     class_evidence = [str(e) for e in (class_evidence or [])]
-    device_id = canon_mac
+
+    # ------------------------------------------------------------------
+    # bluetooth.* — everything ahead of ibeacon_range_m, and uuid after it
+    # ------------------------------------------------------------------
+    bt_head: dict = {}
+
+    if bt_name:
+        bt_head["name"] = bt_name
+    if bt_company:
+        bt_head["company"] = bt_company
+    if bt_manufacturer:
+        bt_head["manufacturer"] = bt_manufacturer
+    if bt_description:
+        bt_head["description"] = bt_description
+
+    # bluetooth.type: "classic" or "ble"
+    if bt_type is not None:
+        try:
+            bt_head["type"] = "classic" if int(bt_type) == 1 else "ble"
+        except (TypeError, ValueError):
+            bt_head["type"] = "ble"
+
+    # bluetooth.mac flags
+    if mac_flag_dict:
+        bt_head["mac"] = {
+            "randomized": mac_flag_dict.get("randomized", False),
+            "type": mac_flag_dict.get("addr_type", "unknown"),
+        }
+
+    # bluetooth.advertising / beacon / apple from parsed adv payload
+    adv_doc: dict = {}
+    beacon_doc: dict = {}
+    apple_doc: dict = {}
+
+    if adv_parsed:
+        for key, val in adv_parsed.items():
+            if key.startswith("advertising."):
+                adv_doc[key[len("advertising."):]] = val
+            elif key.startswith("beacon."):
+                beacon_doc[key[len("beacon."):]] = val
+            elif key.startswith("apple."):
+                apple_doc[key[len("apple."):]] = val
+
+    # Native tx_power from sparrow BluetoothDevice (independent of adv parse)
+    if tx_power_valid_b and tx_power_dbm is not None:
+        adv_doc["tx_power_dbm"] = tx_power_dbm
+
+    if adv_doc:
+        bt_head["advertising"] = adv_doc
+    if beacon_doc:
+        bt_head["beacon"] = beacon_doc
+    if apple_doc:
+        bt_head["apple"] = apple_doc
+
+    return {
+        "canon_mac": canon_mac,
+        "mac_vendor": bt_manufacturer or bt_company or None,
+        "class_guess": class_guess,
+        "class_conf": class_conf,
+        "class_evidence": class_evidence,
+        "bt_head": bt_head,
+        "uuid": uuid_str,
+    }
+
+
+def build_bt_document(dev: dict, obs: dict, now_utc: datetime,
+                      cache: Optional[DocumentCache] = None) -> dict:
+    """Build an ECS 8.17 Bluetooth device observation document.
+
+    Args:
+        dev:     Raw agent observation dict.  Keys follow
+                 sparrowbluetooth.py BluetoothDevice.toJsondict(), plus
+                 optional extension key ``adv_hex`` (not yet populated by
+                 the agent).
+        obs:     Observer context dict (same shape as build_wifi_document).
+        now_utc: Timezone-aware UTC datetime.
+        cache:   Optional DocumentCache (see build_wifi_document).
+
+    Returns:
+        ECS document dict compatible with the sparrow-bt index mapping
+        (dynamic:strict).
+    """
+    if cache is None:
+        static = _bt_static(dev)
+    else:
+        static = cache.get("bt", dev, _BT_STATIC_FIELDS, _bt_static)
+
+    # ------------------------------------------------------------------
+    # Volatile field extraction
+    # ------------------------------------------------------------------
+    rssi_raw         = dev.get("rssi")
+    ibeacon_range    = dev.get("ibeaconrange")
+    first_seen_raw   = dev.get("firstseen")
+    last_seen_raw    = dev.get("lastseen")
+
+    # GPS (flat fields as in toJsondict; bt mapping has no geo.altitude)
+    gps_lat          = dev.get("lat")
+    gps_lon          = dev.get("lon")
+
+    # ------------------------------------------------------------------
+    # Timestamps
+    # ------------------------------------------------------------------
+    first_seen_dt, last_seen_dt = _timestamps(first_seen_raw, last_seen_raw, now_utc)
+    timestamp_str = to_es_timestamp(last_seen_dt)
+
+    # ------------------------------------------------------------------
+    # Signal
+    # ------------------------------------------------------------------
+    rssi_dbm: Optional[float] = _to_float(rssi_raw)
+    if rssi_dbm is not None and rssi_dbm <= -999:
+        rssi_dbm = None
+
+    ibeacon_range_f  = _to_float(ibeacon_range)
 
     # ------------------------------------------------------------------
     # RF (Bluetooth is always 2.4 GHz in the sparrow model)
@@ -707,8 +1019,8 @@ def build_bt_document(dev: dict, obs: dict, now_utc: datetime) -> dict:
     ctrl_candidate = is_controller_candidate(
         rf_band=bt_band,
         signal_dbm=rssi_dbm,
-        device_class=class_guess,
-        mac_vendor=bt_manufacturer or bt_company or None,
+        device_class=static["class_guess"],
+        mac_vendor=static["mac_vendor"],
     )
 
     # ------------------------------------------------------------------
@@ -727,6 +1039,7 @@ def build_bt_document(dev: dict, obs: dict, now_utc: datetime) -> dict:
     # ------------------------------------------------------------------
     # Assemble document skeleton
     # ------------------------------------------------------------------
+    canon_mac = static["canon_mac"]
     doc: dict = {
         "@timestamp": timestamp_str,
         "ecs": {"version": _ECS_VERSION},
@@ -745,10 +1058,10 @@ def build_bt_document(dev: dict, obs: dict, now_utc: datetime) -> dict:
             "address": canon_mac,
         },
         "device": {
-            "id": device_id,
-            "class_guess": class_guess,
-            "class_confidence": class_conf,
-            "class_evidence": class_evidence,
+            "id": canon_mac,
+            "class_guess": static["class_guess"],
+            "class_confidence": static["class_conf"],
+            "class_evidence": list(static["class_evidence"]),
         },
         "related": {
             "mac": [canon_mac] if canon_mac else [],
@@ -768,76 +1081,22 @@ def build_bt_document(dev: dict, obs: dict, now_utc: datetime) -> dict:
     # ------------------------------------------------------------------
     # signal.*
     # ------------------------------------------------------------------
-    if rssi_dbm is not None:
-        sig_doc: dict = {"strength_dbm": rssi_dbm}
-        mw = dbm_to_mw(rssi_dbm)
-        if mw is not None:
-            sig_doc["strength_mw"] = mw
-        qual = quality_0_to_5(rssi_dbm)
-        if qual is not None:
-            sig_doc["strength_quality_0_5"] = qual
+    sig_doc = _signal_section(rssi_dbm)
+    if sig_doc is not None:
         doc["signal"] = sig_doc
 
     # ------------------------------------------------------------------
     # bluetooth.*
     # ------------------------------------------------------------------
-    bt: dict = {}
-
-    if bt_name:
-        bt["name"] = bt_name
-    if bt_company:
-        bt["company"] = bt_company
-    if bt_manufacturer:
-        bt["manufacturer"] = bt_manufacturer
-    if bt_description:
-        bt["description"] = bt_description
-
-    # bluetooth.type: "classic" or "ble"
-    if bt_type is not None:
-        try:
-            bt["type"] = "classic" if int(bt_type) == 1 else "ble"
-        except (TypeError, ValueError):
-            bt["type"] = "ble"
-
-    # bluetooth.mac flags
-    if mac_flag_dict:
-        bt["mac"] = {
-            "randomized": mac_flag_dict.get("randomized", False),
-            "type": mac_flag_dict.get("addr_type", "unknown"),
-        }
-
-    # bluetooth.advertising / beacon / apple from parsed adv payload
-    adv_doc: dict = {}
-    beacon_doc: dict = {}
-    apple_doc: dict = {}
-
-    if adv_parsed:
-        for key, val in adv_parsed.items():
-            if key.startswith("advertising."):
-                adv_doc[key[len("advertising."):]] = val
-            elif key.startswith("beacon."):
-                beacon_doc[key[len("beacon."):]] = val
-            elif key.startswith("apple."):
-                apple_doc[key[len("apple."):]] = val
-
-    # Native tx_power from sparrow BluetoothDevice (independent of adv parse)
-    if tx_power_valid_b and tx_power_dbm is not None:
-        adv_doc["tx_power_dbm"] = tx_power_dbm
-
-    if adv_doc:
-        bt["advertising"] = adv_doc
-    if beacon_doc:
-        bt["beacon"] = beacon_doc
-    if apple_doc:
-        bt["apple"] = apple_doc
+    bt: dict = _copy_tree(static["bt_head"])
 
     # bluetooth.ibeacon_range_m
     if ibeacon_range_f is not None and ibeacon_range_f >= 0:
         bt["ibeacon_range_m"] = ibeacon_range_f
 
     # bluetooth.uuid
-    if uuid_str:
-        bt["uuid"] = uuid_str
+    if static["uuid"]:
+        bt["uuid"] = static["uuid"]
 
     # bluetooth.geo (GPS where device was last observed)
     bt_gp = _geo_point(gps_lat_f, gps_lon_f)
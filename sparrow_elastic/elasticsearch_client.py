@@ -12,8 +12,9 @@ import logging
 from typing import Any
 
 import elasticsearch
-import elasticsearch.helpers
+import elasticsearch.serializer
 
+from .bulk_writer import DEFAULT_MAX_BYTES, NdjsonBulkWriter
 from .search_client import SearchClient
 
 logger = logging.getLogger(__name__)
@@ -34,6 +35,23 @@ def _suppress_urllib3_warnings() -> None:
         _URLLIB3_WARNINGS_SUPPRESSED = True
 
 
+# ---------------------------------------------------------------------------
+# Pre-encoded NDJSON bodies
+# ---------------------------------------------------------------------------
+
+class _PreEncodedNdjsonSerializer(elasticsearch.serializer.NdjsonSerializer):
+    """NDJSON serializer that forwards ready-made ``bytes`` bodies untouched.
+
+    The stock serializer appends a newline to a bytes body that doesn't end
+    in one, which corrupts the gzipped bodies NdjsonBulkWriter sends.
+    """
+
+    def dumps(self, data: Any) -> bytes:
+        if isinstance(data, bytes):
+            return data
+        return super().dumps(data)
+
+
 # ---------------------------------------------------------------------------
 # ElasticsearchClient
 # ---------------------------------------------------------------------------
@@ -52,6 +70,8 @@ class ElasticsearchClient(SearchClient):
             "hosts": [url],
             "verify_certs": verify_certs,
             "request_timeout": 30,
+            # Also replaces the compatibility-mode NDJSON mimetype.
+            "serializers": {"application/x-ndjson": _PreEncodedNdjsonSerializer()},
         }
 
         if not verify_certs:
@@ -64,6 +84,11 @@ class ElasticsearchClient(SearchClient):
             kwargs["basic_auth"] = (username, password)
 
         self._client = elasticsearch.Elasticsearch(**kwargs)
+        self._bulk_writer = NdjsonBulkWriter(
+            self._send_bulk,
+            max_bytes=int(settings.get("bulk_max_bytes", DEFAULT_MAX_BYTES)),
+            compress=bool(settings.get("bulk_compress", True)),
+        )
 
     # ------------------------------------------------------------------
     # Probe
@@ -174,15 +199,25 @@ class ElasticsearchClient(SearchClient):
     # ------------------------------------------------------------------
 
     def bulk(self, actions: list[dict]) -> tuple[int, list[dict]]:
-        """Bulk index actions.  Returns (success_count, errors_list)."""
-        success, errors = elasticsearch.helpers.bulk(
-            self._client,
-            actions,
-            chunk_size=500,
-            raise_on_error=False,
-            raise_on_exception=False,
-        )
-        return success, errors if isinstance(errors, list) else []
+        """Bulk index actions.  Returns (success_count, errors_list).
+
+        Actions are serialized once into gzipped NDJSON and sent in batches
+        sized by NdjsonBulkWriter (byte budget, latency and 429 feedback).
+        """
+        if not actions:
+            return 0, []
+        return self._bulk_writer.write(actions)
+
+    def _send_bulk(self, body: bytes, headers: dict) -> tuple[int, dict]:
+        """POST a prepared NDJSON body to _bulk; returns (status, response)."""
+        try:
+            resp = self._client.perform_request("POST", "/_bulk", headers=headers, body=body)
+        except elasticsearch.ApiError as exc:
+            status = exc.meta.status if hasattr(exc, "meta") else getattr(exc, "status_code", None)
+            if status == 429:
+                return 429, exc.body if isinstance(exc.body, dict) else {}
+            raise
+        return resp.meta.status, resp.body
 
     # ------------------------------------------------------------------
     # Close
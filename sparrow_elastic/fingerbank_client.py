@@ -8,6 +8,8 @@ it requires either a ``fingerbank_api_key`` in settings OR a local
 Two lookup modes (preferred order):
   1. Offline DB  — ``sparrow_elastic/data/fingerbank.db`` (SQLite), refreshed
                    weekly via data_refresh.  Queried locally; no API quota.
+                   One read-only connection is kept open and results are
+                   memoised per OUI; a refreshed file is picked up atomically.
   2. Live API    — ``https://api.fingerbank.org/api/v2/combinations/interrogate``
                    Used only when the offline DB is absent or returns no hit.
                    Requires an API key.  Negative results are cached in-memory
@@ -17,6 +19,8 @@ Public API
 ----------
 lookup(mac, dhcp_fingerprint, user_agent) -> Optional[FingerbankResult]
 enrich_classification(per_class, fb_result) -> per_class (mutated + returned)
+reload_offline_db()                       -> drop the offline connection + cache
+offline_cache_stats()                     -> offline lookup hit/miss counters
 """
 
 from __future__ import annotations
@@ -25,9 +29,11 @@ import json
 import logging
 import os
 import sqlite3
+import threading
 import time
 import urllib.error
 import urllib.request
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
@@ -75,6 +81,7 @@ def configure(api_key: Optional[str] = None,
     _api_key = api_key or None
     _offline_db_path = offline_db_path or None
     _NEG_CACHE.clear()
+    _OFFLINE.reload()
     logger.debug(
         "fingerbank_client: configured (api_key=%s, offline_db=%s)",
         "SET" if _api_key else "NONE",
@@ -181,11 +188,196 @@ def _resolve_db_path() -> str:
     return _offline_db_path if _offline_db_path else _DEFAULT_OFFLINE_DB
 
 
+def _oui_of(mac: str) -> Optional[str]:
+    """Return the colon-less, uppercase OUI (first 6 hex chars) of *mac*."""
+    oui = mac.replace(":", "").replace("-", "").upper()[:6]
+    return oui if len(oui) == 6 else None
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """Return (inode, size, mtime_ns) for *path*, or None if it cannot be stat'd.
+
+    data_refresh replaces the DB with ``os.replace()``, so a refresh always
+    shows up as a new inode even when size and mtime happen to match.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class _OfflineIndex:
+    """Persistent read-only connection to the offline DB plus an OUI LRU.
+
+    Every WiFi and BT document goes through lookup() on every scan cycle, and
+    the same few hundred OUIs come up over and over.  Rather than opening the
+    SQLite file per MAC, one read-only connection is held open and results
+    (hits *and* misses) are memoised per OUI in a bounded LRU.
+
+    The file signature is re-checked at most every ``stat_interval`` seconds.
+    When data_refresh swaps in a new DB, a connection to the new file is
+    opened, the cache is dropped and the old connection closed, all under the
+    lock — concurrent lookups see either the old DB or the new one, never a
+    mix.  reload() forces the same swap immediately.
+
+    Thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 4096, stat_interval: float = 5.0) -> None:
+        self.max_entries = max_entries
+        self.stat_interval = stat_interval
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Optional[FingerbankResult]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._path: Optional[str] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.errors = 0
+
+    # ------------------------------------------------------------------
+    # Connection management
+    # ------------------------------------------------------------------
+
+    def _open(self, db_path: str) -> sqlite3.Connection:
+        """Open *db_path* read-only; falls back to a plain connect for odd paths."""
+        try:
+            uri = "file:" + urllib.request.pathname2url(os.path.abspath(db_path)) + "?mode=ro"
+            return sqlite3.connect(uri, uri=True, timeout=5.0, check_same_thread=False)
+        except sqlite3.OperationalError:
+            return sqlite3.connect(db_path, timeout=5.0, check_same_thread=False)
+
+    def _close(self) -> None:
+        """Close the current connection (if any).  Caller holds the lock."""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:  # noqa: BLE001
+                pass
+        self._conn = None
+
+    def _ensure_current(self, db_path: str) -> None:
+        """Swap to a fresh connection if the path or file changed.  Caller holds the lock."""
+        now = time.monotonic()
+        if (self._conn is not None and db_path == self._path
+                and now - self._checked_at < self.stat_interval):
+            return
+        self._checked_at = now
+
+        signature = _file_signature(db_path)
+        if self._conn is not None and db_path == self._path and signature == self._signature:
+            return
+
+        conn = self._open(db_path)
+        self._close()
+        self._conn = conn
+        self._path = db_path
+        self._signature = signature
+        self._cache.clear()
+        self.loads += 1
+        logger.debug("fingerbank_client: offline DB (re)loaded from %s", db_path)
+
+    def reload(self) -> None:
+        """Drop the connection and cache; the next lookup reopens the DB."""
+        with self._lock:
+            self._close()
+            self._path = None
+            self._signature = None
+            self._cache.clear()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def lookup(self, db_path: str, oui: str) -> Optional[FingerbankResult]:
+        """Return the best offline match for *oui*, from cache when possible.
+
+        Raises:
+            sqlite3.Error (or anything else sqlite raises) on a failed query;
+            failures are not cached.
+        """
+        with self._lock:
+            try:
+                self._ensure_current(db_path)
+            except Exception:
+                self.errors += 1
+                raise
+
+            if oui in self._cache:
+                self._cache.move_to_end(oui)
+                self.hits += 1
+                return self._cache[oui]
+
+            self.misses += 1
+            try:
+                row = self._conn.execute(  # type: ignore[union-attr]
+                    """
+                    SELECT d.name, d.type, c.score
+                    FROM combinations c
+                    JOIN devices d ON d.id = c.device_id
+                    WHERE c.mac = ?
+                    ORDER BY c.score DESC LIMIT 1
+                    """,
+                    (oui,),
+                ).fetchone()
+            except Exception:
+                # Schema drift or a corrupt file — reopen on the next call.
+                self.errors += 1
+                self._close()
+                raise
+
+            result = _row_to_result(row)
+            self._cache[oui] = result
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            return result
+
+    def stats(self) -> Dict[str, object]:
+        """Return hit/miss counters and cache occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "cached": len(self._cache),
+                "max_entries": self.max_entries,
+                "loads": self.loads,
+                "errors": self.errors,
+                "db_path": self._path,
+            }
+
+
+_OFFLINE = _OfflineIndex()
+
+
+def _row_to_result(row: Optional[tuple]) -> Optional[FingerbankResult]:
+    """Convert a (name, type, score) row to a FingerbankResult (None stays None)."""
+    if row is None:
+        return None
+
+    name, dev_type, score = row
+    confidence = max(0.0, min(1.0, (score or 0) / 100.0))
+    raw = {"name": name, "type": dev_type, "score": score, "source": "offline_db"}
+    return FingerbankResult(
+        device_model=name or "",
+        device_type=dev_type or "",
+        confidence=confidence,
+        source="offline_db",
+        raw=raw,
+    )
+
+
 def _query_offline_db(db_path: str, mac: str) -> Optional[FingerbankResult]:
     """Query the bundled SQLite DB for the best-match device by MAC OUI.
 
-    Uses a simple JOIN on combinations + devices, ordering by score DESC.
-    Tolerant of schema drift — any sqlite3 exception returns None.
+    Uses a simple JOIN on combinations + devices, ordering by score DESC,
+    through the shared _OfflineIndex (persistent read-only connection and
+    per-OUI LRU).  Tolerant of schema drift — any sqlite3 exception returns
+    None.
 
     SQL (best-effort):
         SELECT d.name, d.type, c.score
@@ -205,43 +397,30 @@ def _query_offline_db(db_path: str, mac: str) -> Optional[FingerbankResult]:
         return None
 
     # Use the first 6 hex chars (OUI) for matching, colon-less, uppercase.
-    oui = mac.replace(":", "").replace("-", "").upper()[:6]
-    if len(oui) < 6:
+    oui = _oui_of(mac)
+    if oui is None:
         return None
 
     try:
-        conn = sqlite3.connect(db_path, timeout=5.0)
-        try:
-            cursor = conn.execute(
-                """
-                SELECT d.name, d.type, c.score
-                FROM combinations c
-                JOIN devices d ON d.id = c.device_id
-                WHERE c.mac = ?
-                ORDER BY c.score DESC LIMIT 1
-                """,
-                (oui,),
-            )
-            row = cursor.fetchone()
-        finally:
-            conn.close()
+        return _OFFLINE.lookup(db_path, oui)
     except Exception as exc:  # noqa: BLE001
         logger.debug("fingerbank_client: offline DB query error: %s", exc)
         return None
 
-    if row is None:
-        return None
 
-    name, dev_type, score = row
-    confidence = max(0.0, min(1.0, (score or 0) / 100.0))
-    raw = {"name": name, "type": dev_type, "score": score, "source": "offline_db"}
-    return FingerbankResult(
-        device_model=name or "",
-        device_type=dev_type or "",
-        confidence=confidence,
-        source="offline_db",
-        raw=raw,
-    )
+def reload_offline_db() -> None:
+    """Drop the offline DB connection and lookup cache.
+
+    data_refresh calls this after replacing ``fingerbank.db``; the next lookup
+    opens the new file.  (Without it the swap is still picked up, within the
+    index's stat interval.)
+    """
+    _OFFLINE.reload()
+
+
+def offline_cache_stats() -> Dict[str, object]:
+    """Return offline lookup counters: hits, misses, hit_rate, cached, loads, errors."""
+    return _OFFLINE.stats()
 
 
 # ---------------------------------------------------------------------------
@@ -12,8 +12,8 @@ import logging
 from typing import Any
 
 import opensearchpy
-import opensearchpy.helpers
 
+from .bulk_writer import DEFAULT_MAX_BYTES, NdjsonBulkWriter
 from .search_client import SearchClient
 
 logger = logging.getLogger(__name__)
@@ -68,6 +68,11 @@ class OpenSearchClient(SearchClient):
             kwargs["http_auth"] = (username, password)
 
         self._client = opensearchpy.OpenSearch(**kwargs)
+        self._bulk_writer = NdjsonBulkWriter(
+            self._send_bulk,
+            max_bytes=int(settings.get("bulk_max_bytes", DEFAULT_MAX_BYTES)),
+            compress=bool(settings.get("bulk_compress", True)),
+        )
 
     # ------------------------------------------------------------------
     # Probe
@@ -200,15 +205,26 @@ class OpenSearchClient(SearchClient):
     # ------------------------------------------------------------------
 
     def bulk(self, actions: list[dict]) -> tuple[int, list[dict]]:
-        """Bulk index actions.  Returns (success_count, errors_list)."""
-        success, errors = opensearchpy.helpers.bulk(
-            self._client,
-            actions,
-            chunk_size=500,
-            raise_on_error=False,
-            raise_on_exception=False,
-        )
-        return success, errors if isinstance(errors, list) else []
+        """Bulk index actions.  Returns (success_count, errors_list).
+
+        Actions are serialized once into gzipped NDJSON and sent in batches
+        sized by NdjsonBulkWriter (byte budget, latency and 429 feedback).
+        """
+        if not actions:
+            return 0, []
+        return self._bulk_writer.write(actions)
+
+    def _send_bulk(self, body: bytes, headers: dict) -> tuple[int, dict]:
+        """POST a prepared NDJSON body to _bulk; returns (status, response)."""
+        try:
+            data = self._client.transport.perform_request(
+                "POST", "/_bulk", headers=headers, body=body
+            )
+        except opensearchpy.TransportError as exc:
+            if exc.status_code == 429:
+                return 429, exc.info if isinstance(exc.info, dict) else {}
+            raise
+        return 200, data
 
     # ------------------------------------------------------------------
     # Close
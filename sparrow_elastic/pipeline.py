@@ -0,0 +1,274 @@
+"""Threaded pipeline stages for the sparrow-elastic bridge.
+
+The bridge runs as three stages connected by bounded queues so that a slow
+agent or a degraded Elasticsearch cluster only backs up its own stage:
+
+    fetch  (main thread, fixed cadence)  -> agent GPS / WiFi / BT polls
+    build  (N worker threads)            -> document build + Fingerbank
+    flush  (one thread per bulk buffer)  -> FlushState-driven bulk writes
+
+Public API
+----------
+StageMetrics(name)                     -- latency / count / error counters
+  .time()                              -- context manager timing one run
+  .record(seconds, ok=True)
+  .snapshot()                          -- dict for logging
+DropOldestQueue(maxsize)               -- bounded queue that never blocks put
+  .offer(item)                         -- enqueue; evicts oldest when full
+StageWorkers(name, queue, handler, workers, metrics)
+  .start() / .stop(drain=True)         -- worker threads draining a queue
+FlushWorker(name, flush_once, interval, metrics)
+  .start() / .stop()                   -- thread calling flush_once() on a timer
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# StageMetrics
+# ---------------------------------------------------------------------------
+
+class StageMetrics:
+    """Per-stage latency and throughput counters (thread-safe).
+
+    Args:
+        name: Stage name used in log output, e.g. ``"build"``.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._errors = 0
+        self._items = 0
+        self._seconds_total = 0.0
+        self._seconds_max = 0.0
+        self._seconds_last = 0.0
+
+    def record(self, seconds: float, ok: bool = True, items: int = 0) -> None:
+        """Record one run of the stage that took *seconds*."""
+        with self._lock:
+            self._runs += 1
+            self._items += items
+            if not ok:
+                self._errors += 1
+            self._seconds_total += seconds
+            self._seconds_last = seconds
+            if seconds > self._seconds_max:
+                self._seconds_max = seconds
+
+    @contextmanager
+    def time(self, items: int = 0) -> Iterator[None]:
+        """Time the enclosed block; an exception counts as an error and re-raises."""
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.record(time.monotonic() - start, ok=False, items=items)
+            raise
+        self.record(time.monotonic() - start, items=items)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters as a plain dict."""
+        with self._lock:
+            return {
+                "runs": self._runs,
+                "items": self._items,
+                "errors": self._errors,
+                "avg_s": round(self._seconds_total / self._runs, 4) if self._runs else 0.0,
+                "max_s": round(self._seconds_max, 4),
+                "last_s": round(self._seconds_last, 4),
+            }
+
+
+# ---------------------------------------------------------------------------
+# DropOldestQueue
+# ---------------------------------------------------------------------------
+
+class DropOldestQueue(queue.Queue):
+    """A bounded ``queue.Queue`` whose producer side never blocks.
+
+    The fetch stage must keep its cadence even when the build stage falls
+    behind, so a full queue discards its oldest item to make room.
+
+    Args:
+        maxsize: Capacity (items).  Must be >= 1.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        super().__init__(maxsize=max(1, maxsize))
+        self.dropped = 0
+
+    def offer(self, item: Any) -> bool:
+        """Enqueue *item* without blocking.
+
+        Returns:
+            True if an older item had to be discarded.
+        """
+        dropped = False
+        while True:
+            try:
+                self.put_nowait(item)
+                return dropped
+            except queue.Full:
+                try:
+                    self.get_nowait()
+                    self.task_done()
+                    self.dropped += 1
+                    dropped = True
+                except queue.Empty:
+                    pass
+
+
+# ---------------------------------------------------------------------------
+# StageWorkers
+# ---------------------------------------------------------------------------
+
+_STOP = object()
+
+
+class StageWorkers:
+    """A pool of daemon threads feeding items from *work_queue* to *handler*.
+
+    Handler exceptions are logged, counted in *metrics* and do not stop the
+    worker.
+
+    Args:
+        name:       Thread-name prefix.
+        work_queue: Queue to consume (typically a DropOldestQueue).
+        handler:    Callable(item) run for each item; an int return value is
+                    counted as the number of items it produced.
+        workers:    Number of threads.
+        metrics:    StageMetrics updated per item.
+    """
+
+    def __init__(self, name: str, work_queue: queue.Queue,
+                 handler: Callable[[Any], Optional[int]], workers: int,
+                 metrics: StageMetrics) -> None:
+        self.name = name
+        self.queue = work_queue
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.metrics = metrics
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start the worker threads."""
+        for n in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"{self.name}-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                start = time.monotonic()
+                try:
+                    handled = self.handler(item)
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("pipeline[%s]: handler error: %s", self.name, exc)
+                    self.metrics.record(time.monotonic() - start, ok=False)
+                else:
+                    self.metrics.record(time.monotonic() - start,
+                                        items=handled if isinstance(handled, int) else 0)
+            finally:
+                self.queue.task_done()
+
+    def stop(self, drain: bool = True, timeout: float = 10.0) -> None:
+        """Stop the workers, optionally after the queued items are handled.
+
+        Stop markers are queued behind any pending work (blocking put, so
+        they are never dropped), so with ``drain=True`` everything queued
+        before the call is still handled.
+        """
+        if not drain:
+            while True:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                except queue.Empty:
+                    break
+        deadline = time.monotonic() + timeout
+        for _ in self._threads:
+            try:
+                self.queue.put(_STOP, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+
+# ---------------------------------------------------------------------------
+# FlushWorker
+# ---------------------------------------------------------------------------
+
+class FlushWorker:
+    """Daemon thread that calls *flush_once* every *interval* seconds.
+
+    *flush_once* decides for itself whether a flush is due (the bridge uses
+    FlushState for that) and returns True when it actually sent a bulk
+    request; only those runs are recorded in *metrics*.  wake() lets a
+    producer trigger an early check, e.g. when a buffer reaches batch size.
+
+    Args:
+        name:       Thread name.
+        flush_once: Callable() -> bool.
+        interval:   Seconds between checks.
+        metrics:    StageMetrics for the bulk requests.
+    """
+
+    def __init__(self, name: str, flush_once: Callable[[], Optional[bool]],
+                 interval: float, metrics: StageMetrics) -> None:
+        self.name = name
+        self.flush_once = flush_once
+        self.interval = max(0.05, interval)
+        self.metrics = metrics
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the flush thread."""
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Ask for a flush check now instead of at the next interval."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            start = time.monotonic()
+            try:
+                flushed = self.flush_once()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("pipeline[%s]: flush error: %s", self.name, exc)
+                self.metrics.record(time.monotonic() - start, ok=False)
+                continue
+            if flushed:
+                self.metrics.record(time.monotonic() - start)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop the thread, waiting up to *timeout* for an in-flight flush."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -39,6 +39,9 @@ _DEFAULTS: dict = {
     "poll_interval_sec": 15.0,
     "flush_interval_sec": 5.0,
     "batch_size": 500,
+    # Bulk request bodies: gzip them, and cap each request's uncompressed size.
+    "bulk_compress": True,
+    "bulk_max_bytes": 5 * 1024 * 1024,
     "fingerbank_api_key": "",
     # Path to the Fingerbank offline SQLite DB.  Empty string means: use the
     # bundled default path (sparrow_elastic/data/fingerbank.db) if it exists.
@@ -0,0 +1,318 @@
+"""Segmented on-disk spill log for bulk actions that don't fit in memory.
+
+BulkBuffer spills its oldest actions here when it reaches ``max_size``
+(typically during an Elasticsearch outage) instead of discarding them.  The
+flusher replays segments oldest first once the cluster accepts writes again.
+
+Each segment is one NDJSON file named ``segment-<seq>.ndjson``::
+
+    {"v": 1, "count": 500, "crc32": 1234567890, "created": 1767225600.0}
+    {"_op_type": "index", "_index": "sparrow-wifi", ...}
+    ...
+
+The header's CRC-32 covers every byte after the header line, so a segment
+truncated by a crash or power loss is detected on replay and discarded
+rather than indexed half-way.  Segments are written to a temp file and
+renamed into place, and segments left over from a previous run are picked up
+on start.
+
+Public API
+----------
+SpillLog(directory, max_bytes, max_age_seconds)
+  .write(actions)        -- append one segment; returns docs written
+  .peek()                -- (seq, actions) for the oldest valid segment, or None
+  .commit(seq)           -- delete a replayed segment
+  .pending_docs()        -- docs currently on disk
+  .stats()               -- spilled / replayed / dropped counters
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_RE = re.compile(r"^segment-(\d{10})\.ndjson$")
+_FORMAT_VERSION = 1
+
+
+def _segment_name(seq: int) -> str:
+    return f"segment-{seq:010d}.ndjson"
+
+
+class _Segment:
+    __slots__ = ("seq", "path", "count", "size", "created")
+
+    def __init__(self, seq: int, path: str, count: int, size: int, created: float) -> None:
+        self.seq = seq
+        self.path = path
+        self.count = count
+        self.size = size
+        self.created = created
+
+
+class SpillLog:
+    """FIFO of NDJSON segments in *directory*, bounded by size and age.
+
+    When a write pushes the log over *max_bytes*, or a segment is older than
+    *max_age_seconds*, the oldest segments are deleted and their documents
+    counted as dropped.
+
+    Args:
+        directory:       Spill directory (created if missing).  Use one
+                         directory per buffer.
+        max_bytes:       Total on-disk budget.  Default 512 MiB.
+        max_age_seconds: Segments older than this are discarded unreplayed.
+                         0 disables the age limit.  Default 24 h.
+        clock:           Wall-clock source (seconds); injectable for tests.
+
+    Thread safety:
+        All public methods hold ``_lock`` (peek() only while picking the
+        segment, not while reading it); writers (overflowing appenders) and
+        the replaying flusher may run concurrently.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age_seconds: float = 24 * 3600.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._segments: Deque[_Segment] = deque()
+        self._bytes = 0
+        self._docs = 0
+        self._next_seq = 1
+        self.spilled = 0
+        self.replayed = 0
+        self.dropped = 0
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def write(self, actions: List[dict]) -> int:
+        """Write *actions* as a new segment at the tail of the log.
+
+        Returns:
+            Number of documents written (0 if *actions* is empty or the
+            write failed; failed documents are counted as dropped).
+        """
+        if not actions:
+            return 0
+        body = "".join(
+            json.dumps(a, separators=(",", ":"), default=str) + "\n" for a in actions
+        ).encode("utf-8")
+        created = self._clock()
+        header = json.dumps({
+            "v": _FORMAT_VERSION,
+            "count": len(actions),
+            "crc32": zlib.crc32(body),
+            "created": created,
+        }).encode("utf-8") + b"\n"
+
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            path = os.path.join(self.directory, _segment_name(seq))
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".segment.tmp-")
+                try:
+                    with os.fdopen(fd, "wb") as fh:
+                        fh.write(header)
+                        fh.write(body)
+                        fh.flush()
+                        os.fsync(fh.fileno())
+                    os.replace(tmp_path, path)
+                except Exception:
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
+                    raise
+            except Exception as exc:
+                self.dropped += len(actions)
+                logger.warning("spill_log: cannot write segment in %s (%s) — %d documents dropped",
+                               self.directory, exc, len(actions))
+                return 0
+
+            segment = _Segment(seq, path, len(actions), len(header) + len(body), created)
+            self._segments.append(segment)
+            self._bytes += segment.size
+            self._docs += segment.count
+            self.spilled += segment.count
+            self._enforce_limits()
+            return len(actions)
+
+    def peek(self) -> Optional[Tuple[int, List[dict]]]:
+        """Return ``(seq, actions)`` for the oldest segment without removing it.
+
+        Expired, unreadable and checksum-mismatched segments are deleted
+        (counted as dropped) and skipped.  Call commit(seq) once the actions
+        have been indexed.
+
+        Returns:
+            The oldest valid segment, or None if the log is empty.
+        """
+        while True:
+            with self._lock:
+                self._expire()
+                if not self._segments:
+                    return None
+                segment = self._segments[0]
+            # Read without the lock so overflowing appenders aren't held up
+            # by the disk; commit(seq) ignores a segment dropped meanwhile.
+            actions = self._read(segment)
+            if actions is not None:
+                return segment.seq, actions
+            with self._lock:
+                if self._segments and self._segments[0] is segment:
+                    self._discard_oldest()
+
+    def commit(self, seq: int) -> None:
+        """Delete segment *seq* after its actions were indexed."""
+        with self._lock:
+            if not self._segments or self._segments[0].seq != seq:
+                return
+            segment = self._segments.popleft()
+            self._bytes -= segment.size
+            self._docs -= segment.count
+            self.replayed += segment.count
+            self._unlink(segment.path)
+
+    def pending_docs(self) -> int:
+        """Return the number of documents currently on disk."""
+        with self._lock:
+            return self._docs
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters plus the current on-disk size."""
+        with self._lock:
+            return {
+                "spilled": self.spilled,
+                "replayed": self.replayed,
+                "dropped": self.dropped,
+                "pending_docs": self._docs,
+                "pending_bytes": self._bytes,
+                "segments": len(self._segments),
+            }
+
+    # ------------------------------------------------------------------
+    # Internals (caller holds _lock unless noted)
+    # ------------------------------------------------------------------
+
+    def _recover(self) -> None:
+        """Index segments left by a previous run (called from __init__)."""
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".segment.tmp-"):
+                # Interrupted write; the segment was never renamed into place.
+                self._unlink(path)
+                continue
+            m = _SEGMENT_RE.match(name)
+            if m:
+                found.append((int(m.group(1)), path))
+
+        for seq, path in sorted(found):
+            header = self._read_header(path)
+            if header is None:
+                logger.warning("spill_log: discarding unreadable segment %s", path)
+                self._unlink(path)
+                continue
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            segment = _Segment(seq, path, int(header.get("count", 0)), size,
+                               float(header.get("created", self._clock())))
+            self._segments.append(segment)
+            self._bytes += segment.size
+            self._docs += segment.count
+            self._next_seq = seq + 1
+
+        if self._segments:
+            logger.info("spill_log: %d documents in %d segments pending replay from %s",
+                        self._docs, len(self._segments), self.directory)
+
+    @staticmethod
+    def _read_header(path: str) -> Optional[dict]:
+        try:
+            with open(path, "rb") as fh:
+                header = json.loads(fh.readline())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(header, dict) or header.get("v") != _FORMAT_VERSION:
+            return None
+        return header
+
+    def _read(self, segment: _Segment) -> Optional[List[dict]]:
+        """Load and verify *segment*.  Called without _lock."""
+        try:
+            with open(segment.path, "rb") as fh:
+                header = json.loads(fh.readline())
+                body = fh.read()
+        except (OSError, ValueError) as exc:
+            logger.warning("spill_log: cannot read %s (%s) — discarding", segment.path, exc)
+            return None
+        if zlib.crc32(body) != header.get("crc32"):
+            logger.warning("spill_log: checksum mismatch in %s — discarding %d documents",
+                           segment.path, segment.count)
+            return None
+        try:
+            return [json.loads(line) for line in body.splitlines() if line]
+        except ValueError as exc:
+            logger.warning("spill_log: bad record in %s (%s) — discarding", segment.path, exc)
+            return None
+
+    def _discard_oldest(self) -> None:
+        segment = self._segments.popleft()
+        self._bytes -= segment.size
+        self._docs -= segment.count
+        self.dropped += segment.count
+        self._unlink(segment.path)
+
+    def _expire(self) -> None:
+        if self.max_age_seconds <= 0:
+            return
+        cutoff = self._clock() - self.max_age_seconds
+        expired = 0
+        while self._segments and self._segments[0].created < cutoff:
+            expired += self._segments[0].count
+            self._discard_oldest()
+        if expired:
+            logger.warning("spill_log: %d spilled documents older than %.0fs discarded",
+                           expired, self.max_age_seconds)
+
+    def _enforce_limits(self) -> None:
+        self._expire()
+        over = 0
+        while self._bytes > self.max_bytes and self._segments:
+            over += self._segments[0].count
+            self._discard_oldest()
+        if over:
+            logger.warning("spill_log: over %d bytes — %d oldest spilled documents dropped",
+                           self.max_bytes, over)
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,246 @@
+#!/usr/bin/python3
+#
+# Copyright 2017 ghostop14
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+# Shared agent HTTP client for the GUI.
+#
+# Every GUI call to a remote agent goes through one keep-alive requests.Session,
+# so repeated polls reuse their connections instead of paying a TCP handshake
+# (one full round trip to a distant agent) on every request.
+#
+# AgentClient runs agent calls on a small fixed pool of worker threads and
+# delivers the results on the Qt thread through a signal.  Calls are identified
+# by a key ('gps', 'btspectrum', ...).  Submitting a key that is already in
+# flight does not start another request; the callback is attached to the one
+# that is running, so a timer firing faster than a slow agent answers can't
+# pile up threads.  cancel() and cancelAll() drop whatever is outstanding, so a
+# response that arrives after the user turned a feature off or switched agents
+# is never delivered.
+#
+# Every callback is called exactly once.  When the call raises or is cancelled
+# the callback gets errorResult(errCode, errString) instead of a response, so
+# a caller that disabled a button or stopped a timer until the answer arrives
+# always gets to undo it.
+
+import queue
+from threading import Thread, Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Connections kept open per agent.  Covers the client's workers plus the scan
+# thread and dialogs that call agentGet() directly.
+AGENT_POOL_SIZE = 8
+
+# errCode passed to errorResult().  -1 matches "agent unreachable" from the
+# request helpers; -2 is already their "bad response".
+REQUEST_FAILED = -1
+REQUEST_CANCELLED = -3
+
+_agentSession = None
+_sessionLock = Lock()
+
+# ------------------  Shared session  ------------------------------
+def agentSession():
+    global _agentSession
+
+    with _sessionLock:
+        if _agentSession is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=AGENT_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _agentSession = session
+
+    return _agentSession
+
+def agentGet(url, waitTimeout=6):
+    # Returns (statusCode, body).  statusCode is -1 if the agent couldn't be
+    # reached and body is empty for anything other than a 200.
+    try:
+        # Not using a timeout can cause the request to hang indefinitely
+        response = agentSession().get(url, timeout=waitTimeout)
+    except:
+        return -1, ""
+
+    if response.status_code != 200:
+        return response.status_code, ""
+
+    return response.status_code, response.text
+
+def agentPost(url, data, waitTimeout=6):
+    # Returns (statusCode, body), statusCode -1 if the agent couldn't be reached
+    try:
+        response = agentSession().post(url, data=data, timeout=waitTimeout)
+    except:
+        return -1, ""
+
+    return response.status_code, response.text
+
+# ------------------  Asynchronous requests  ------------------------------
+class AgentRequest(object):
+    def __init__(self, key, func, args, epoch, errorResult=None):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.epoch = epoch
+        self.errorResult = errorResult
+        self.callbacks = []
+        self.cancelled = False
+        self.result = None
+        self.error = None
+
+    def fail(self, errCode, errString):
+        # Hands errorResult(errCode, errString) to the callbacks in place of a response
+        callbacks = self.callbacks
+        self.callbacks = []
+
+        if self.errorResult is None:
+            return
+
+        for callback in callbacks:
+            callback(self.errorResult(errCode, errString))
+
+class AgentClient(QObject):
+    # Emitted from a worker thread, handled on the thread that owns the client
+    requestDone = pyqtSignal(object)
+    # (key, errString) when a call raises, for the window's status bar
+    requestFailed = pyqtSignal(str, str)
+
+    def __init__(self, numWorkers=4, parent=None):
+        super().__init__(parent)
+
+        self.numWorkers = numWorkers
+        self.workers = []
+        self.requestQueue = queue.Queue()
+
+        # key -> AgentRequest in flight.  Only touched on the Qt thread.
+        self.pending = {}
+        # Bumped by cancelAll() so anything submitted earlier is dropped
+        self.epoch = 0
+
+        # Counters for the status / debugging
+        self.started = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+        self.requestDone.connect(self.onRequestDone)
+
+    def startWorkers(self):
+        while len(self.workers) < self.numWorkers:
+            # Daemon threads: a request blocked on a dead agent must not hold up exit
+            worker = Thread(target=self.workerLoop, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, key, func, args=(), callback=None, errorResult=None):
+        # Runs func(*args) on a worker and calls callback(result) on the Qt thread.
+        # If the call raises or is cancelled, callback gets errorResult(errCode, errString)
+        # (REQUEST_FAILED / REQUEST_CANCELLED) instead; without errorResult it isn't called.
+        # Returns False if the request was merged into one already in flight.
+        request = self.pending.get(key)
+
+        if request is not None:
+            if (callback is not None) and (callback not in request.callbacks):
+                request.callbacks.append(callback)
+
+            self.coalesced += 1
+            return False
+
+        request = AgentRequest(key, func, tuple(args), self.epoch, errorResult)
+
+        if callback is not None:
+            request.callbacks.append(callback)
+
+        self.pending[key] = request
+        self.started += 1
+
+        self.startWorkers()
+        self.requestQueue.put(request)
+
+        return True
+
+    def isPending(self, key):
+        return key in self.pending
+
+    def cancel(self, key):
+        request = self.pending.pop(key, None)
+
+        if request is not None:
+            request.cancelled = True
+            request.fail(REQUEST_CANCELLED, 'Request cancelled')
+
+    def cancelAll(self):
+        self.epoch += 1
+
+        cancelled = list(self.pending.values())
+        self.pending = {}
+
+        for request in cancelled:
+            request.cancelled = True
+            request.fail(REQUEST_CANCELLED, 'Request cancelled')
+
+    def shutdown(self):
+        self.cancelAll()
+
+        for worker in self.workers:
+            self.requestQueue.put(None)
+
+        self.workers = []
+
+    def workerLoop(self):
+        while True:
+            request = self.requestQueue.get()
+
+            if request is None:
+                return
+
+            if request.cancelled:
+                # Dropped while it was still queued
+                continue
+
+            try:
+                request.result = request.func(*request.args)
+            except Exception as e:
+                request.error = e
+
+            try:
+                self.requestDone.emit(request)
+            except RuntimeError:
+                # Client was deleted while the request ran (application exit)
+                return
+
+    def onRequestDone(self, request):
+        if self.pending.get(request.key) is request:
+            del self.pending[request.key]
+
+        if request.cancelled or (request.epoch != self.epoch):
+            self.dropped += 1
+            return
+
+        if request.error is not None:
+            errString = 'Agent request failed: ' + str(request.error)
+            self.requestFailed.emit(str(request.key), errString)
+            request.fail(REQUEST_FAILED, errString)
+            return
+
+        for callback in request.callbacks:
+            callback(request.result)
@@ -0,0 +1,281 @@
+#!/usr/bin/python3
+#
+# Copyright 2017 ghostop14
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+# Agent event stream.
+#
+# The agent publishes every completed WiFi scan, Bluetooth device snapshot and
+# GPS change into an AgentEventStream.  '/events' serves it as newline-delimited
+# JSON on a single long-lived connection:
+#
+#   {"type": "hello", "epoch": "9f3ab2c1", "id": 41}
+#   {"id": 42, "type": "wifi", "interface": "wlan0", "time": 1700000000.0, "data": {...}}
+#   {"type": "heartbeat"}
+#
+# Events are numbered and the last few hundred are kept, so a client that
+# reconnects with lastid=<id>&epoch=<epoch> gets whatever it missed.  If the
+# events it needs are gone (or the agent restarted) it gets {"type": "reset"}
+# and should treat the next events as a fresh start.
+#
+# AgentStreamReader is the matching client.  Only the standard library is used
+# so the GUI, sparrow-elastic and scripts can all share it.
+
+import http.client
+import json
+import os
+import time
+import urllib.parse
+from collections import deque
+from threading import Condition
+
+EVENT_TYPES = ['wifi', 'bluetooth', 'gps']
+
+class AgentStreamUnsupported(Exception):
+    # The agent predates '/events'; callers should fall back to polling
+    pass
+
+class AgentEventStream(object):
+    MAX_EVENTS = 256          # events kept for clients resuming after a reconnect
+    HEARTBEAT_INTERVAL = 15.0 # seconds of silence before a heartbeat line goes out
+    RESUME_WINDOW = 120.0     # seconds to keep recording events after the last client leaves
+
+    def __init__(self, maxEvents=None):
+        if maxEvents is None:
+            maxEvents = AgentEventStream.MAX_EVENTS
+
+        self.epoch = os.urandom(4).hex()
+        self.lastId = 0
+        self.closed = False
+        # (id, type, encoded line).  Lines are encoded once and shared by every client.
+        self.events = deque(maxlen=maxEvents)
+        self.condition = Condition()
+        self.subscribedInterfaces = {}  # {interface: number of connected clients asking for it}
+        self.clientCount = 0
+        self.lastClientTime = None
+
+    def hasClients(self):
+        # True while anyone is connected or could still come back and resume
+        if self.clientCount > 0:
+            return True
+
+        return (self.lastClientTime is not None) and ((time.monotonic() - self.lastClientTime) < AgentEventStream.RESUME_WINDOW)
+
+    def publish(self, eventType, interface, data):
+        # Returns the id assigned to the event, or 0 if nobody is listening
+        with self.condition:
+            if self.closed or not self.hasClients():
+                return 0
+
+            self.lastId += 1
+            eventDict = {'id': self.lastId, 'type': eventType, 'interface': interface,
+                         'time': time.time(), 'data': data}
+            self.events.append((self.lastId, eventType, (json.dumps(eventDict) + '\n').encode('UTF-8')))
+            self.condition.notify_all()
+
+            return self.lastId
+
+    def addClient(self, interfaces):
+        with self.condition:
+            self.clientCount += 1
+            for curInterface in interfaces:
+                self.subscribedInterfaces[curInterface] = self.subscribedInterfaces.get(curInterface, 0) + 1
+
+    def removeClient(self, interfaces):
+        with self.condition:
+            self.clientCount -= 1
+            self.lastClientTime = time.monotonic()
+            for curInterface in interfaces:
+                refCount = self.subscribedInterfaces.get(curInterface, 0) - 1
+                if refCount > 0:
+                    self.subscribedInterfaces[curInterface] = refCount
+                else:
+                    self.subscribedInterfaces.pop(curInterface, None)
+
+    def getSubscribedInterfaces(self):
+        with self.condition:
+            return list(self.subscribedInterfaces.keys())
+
+    def resumePoint(self, lastId, epoch):
+        # Returns (startId, reset).  Events with id > startId are sent next.
+        with self.condition:
+            if lastId is None or epoch != self.epoch:
+                # New client, or one from before an agent restart: start with new events
+                return self.lastId, (lastId is not None)
+
+            if lastId > self.lastId:
+                return self.lastId, True
+
+            if len(self.events) > 0:
+                oldestId = self.events[0][0]
+            else:
+                oldestId = self.lastId + 1
+
+            if lastId < oldestId - 1:
+                # Missed events have already been dropped
+                return self.lastId, True
+
+            return lastId, False
+
+    def waitForEvents(self, afterId, eventTypes=None, timeout=None):
+        # Blocks until there is an event newer than afterId (or timeout/close).
+        # Returns (lastIdSeen, [encoded lines]) with lines filtered by eventTypes.
+        with self.condition:
+            if self.lastId <= afterId and not self.closed:
+                self.condition.wait(timeout)
+
+            lines = []
+            lastIdSeen = afterId
+            for curId, curType, curLine in self.events:
+                if curId <= afterId:
+                    continue
+
+                lastIdSeen = curId
+                if (eventTypes is None) or (curType in eventTypes):
+                    lines.append(curLine)
+
+            return lastIdSeen, lines
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+class AgentStreamReader(object):
+    # Reads an agent's '/events' stream, reconnecting and resuming from the last
+    # event id on failure.  Iterate events() to get event dictionaries; 'reset'
+    # events are passed through so the caller can drop any accumulated state.
+    def __init__(self, agentIP, agentPort, interfaces=None, eventTypes=None, timeout=45.0):
+        self.agentIP = agentIP
+        self.agentPort = int(agentPort)
+        self.interfaces = interfaces or []
+        self.eventTypes = eventTypes
+        # Must be longer than the agent's heartbeat interval
+        self.timeout = timeout
+        self.lastId = None
+        self.epoch = None
+        self.signalStop = False
+        self.connection = None
+        self.reconnectDelay = 1.0
+        self.maxReconnectDelay = 30.0
+
+    def getURL(self):
+        params = []
+        if len(self.interfaces) > 0:
+            params.append('interfaces=' + ','.join(self.interfaces))
+        if self.eventTypes:
+            params.append('types=' + ','.join(self.eventTypes))
+        # Only resume with both halves of the hello; the agent resets anyway
+        # when either one is missing.
+        if self.lastId is not None and self.epoch is not None:
+            params.append('lastid=' + str(self.lastId))
+            params.append('epoch=' + str(self.epoch))
+
+        url = '/events'
+        if len(params) > 0:
+            url += '?' + '&'.join(params)
+
+        return url
+
+    def stop(self):
+        self.signalStop = True
+        connection = self.connection
+        if connection is not None:
+            try:
+                # Unblocks a read waiting on the socket
+                connection.sock.shutdown(2)
+            except:
+                pass
+
+    def readEvents(self):
+        # One connection.  Raises on connection/HTTP errors; returns when the
+        # agent closes the stream.
+        self.connection = http.client.HTTPConnection(self.agentIP, self.agentPort, timeout=self.timeout)
+        try:
+            self.connection.request('GET', self.getURL())
+            response = self.connection.getresponse()
+            if response.status == 404:
+                raise AgentStreamUnsupported('Agent does not provide /events')
+            if response.status != 200:
+                raise ConnectionError('HTTP ' + str(response.status) + ' from agent event stream')
+
+            while not self.signalStop:
+                line = response.readline()
+                if not line:
+                    return
+
+                eventDict = json.loads(line)
+                eventType = eventDict.get('type')
+
+                if eventType == 'heartbeat':
+                    continue
+
+                if eventType == 'hello':
+                    self.epoch = eventDict['epoch']
+                    self.lastId = eventDict['id']
+                    # A good connection resets the backoff
+                    self.reconnectDelay = 1.0
+                    continue
+
+                if 'id' in eventDict:
+                    self.lastId = eventDict['id']
+
+                yield eventDict
+        finally:
+            try:
+                self.connection.close()
+            except:
+                pass
+            self.connection = None
+
+    def events(self):
+        while not self.signalStop:
+            try:
+                for eventDict in self.readEvents():
+                    yield eventDict
+            except AgentStreamUnsupported:
+                raise
+            except Exception:
+                if self.signalStop:
+                    break
+
+                time.sleep(self.reconnectDelay)
+                self.reconnectDelay = min(self.reconnectDelay * 2, self.maxReconnectDelay)
+
+def parseStreamQuery(queryString):
+    # Parses the '/events' query string.  Returns (interfaces, eventTypes, lastId, epoch).
+    params = urllib.parse.parse_qs(queryString)
+
+    interfaces = []
+    for curInterface in ','.join(params.get('interfaces', [])).split(','):
+        # Same sanitizing as /wireless/networks/
+        if len(curInterface) > 0 and curInterface.isalnum() and curInterface not in interfaces:
+            interfaces.append(curInterface)
+
+    eventTypes = None
+    if 'types' in params:
+        eventTypes = [t for t in ','.join(params['types']).split(',') if t in EVENT_TYPES]
+
+    try:
+        lastId = int(params['lastid'][0])
+    except:
+        lastId = None
+
+    epoch = params.get('epoch', [None])[0]
+
+    return interfaces, eventTypes, lastId, epoch
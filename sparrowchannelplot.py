@@ -0,0 +1,367 @@
+#!/usr/bin/python3
+#
+# Copyright 2017 ghostop14
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import time
+
+from PyQt5.QtWidgets import QGraphicsObject, QGraphicsSimpleTextItem
+from PyQt5.QtGui import QPen, QBrush, QColor, QPainterPath, QPainterPathStroker, QPolygonF
+from PyQt5.QtCore import Qt, QPointF, QRectF, QTimer
+
+# Channel plot renderer for the 2.4 / 5 GHz charts.
+#
+# The main window used to give every network its own QLineSeries.  QtCharts
+# keeps a graphics item per series and repaints each one separately, so a few
+# hundred networks made chart redraws the most expensive thing in the GUI.
+#
+# ChannelPlotItem is a single graphics item inside the QChart that draws every
+# network of a band in one paint.  Traces are mapped to chart coordinates once
+# and cached, traces of the same colour are merged into one QPainterPath so a
+# redraw is one drawPath per colour, a trace whose points did not change does
+# not trigger anything, and repaints are capped at maxRedrawRate per second.
+# Hover and click still identify the network under the pointer.
+
+# ------------------  Network Trace  ------------------------------
+class ChannelTrace(object):
+    # One network's shape on a channel plot.  setName()/name() match the
+    # QLineSeries calls the main window already makes on its series.
+    def __init__(self, color):
+        self.color = QColor(color)
+        self.rgba = self.color.rgba()
+        self.title = ''
+        self.points = ()
+        self.selected = False
+        self.plot = None
+
+        # Caches in plot item coordinates, dropped when the points or the
+        # plot area change
+        self.polygon = None
+        self.hitShape = None
+
+    def setName(self, name):
+        self.title = name
+
+    def name(self):
+        return self.title
+
+    def setPoints(self, points):
+        # Returns False (and does nothing) if the shape is unchanged
+        points = tuple(points)
+
+        if points == self.points:
+            return False
+
+        self.points = points
+        self.polygon = None
+        self.hitShape = None
+
+        if self.plot:
+            self.plot.traceChanged(self)
+
+        return True
+
+    def setSelected(self, selected):
+        if selected == self.selected:
+            return
+
+        self.selected = selected
+
+        if self.plot:
+            self.plot.traceChanged(self)
+
+# ------------------  Channel Plot Item  ------------------------------
+class ChannelPlotItem(QGraphicsObject):
+    # Draws ChannelTraces in chart's plot area using the value ranges of
+    # xAxis and yAxis.
+    def __init__(self, chart, xAxis, yAxis, maxRedrawRate=5.0):
+        super().__init__(chart)
+
+        self.chart = chart
+        self.xAxis = xAxis
+        self.yAxis = yAxis
+
+        self.traces = []
+        self.lineWidth = 2
+        self.selectedWidth = 6
+        self.hitTolerance = 8
+
+        # Merged path per colour.  A colour missing from the dict is rebuilt
+        # on the next paint.
+        self.colorPaths = {}
+        self.colorOrder = []
+
+        self.plotArea = QRectF(chart.plotArea())
+
+        # Sits above the chart's own series (spectrum lines) and below the label
+        self.setZValue(50)
+        self.setAcceptHoverEvents(True)
+        self.setAcceptedMouseButtons(Qt.MouseButton.LeftButton)
+
+        chart.plotAreaChanged.connect(self.onPlotAreaChanged)
+        xAxis.rangeChanged.connect(self.onRangeChanged)
+        yAxis.rangeChanged.connect(self.onRangeChanged)
+
+        # Redraw rate cap
+        self.minRedrawInterval = 1.0 / maxRedrawRate
+        self.lastRedraw = 0.0
+        self.redrawTimer = QTimer()
+        self.redrawTimer.setSingleShot(True)
+        self.redrawTimer.timeout.connect(self.redraw)
+
+        # Hover / click label, same behavior as the old QHoverLineSeries callout
+        self.label = QGraphicsSimpleTextItem(chart)
+        self.label.setBrush(QBrush(Qt.GlobalColor.white))
+        self.label.setZValue(100)
+        self.label.hide()
+        self.hoverTrace = None
+
+        self.labelTimer = QTimer()
+        self.labelTimerTimeout = 3000
+        self.labelTimer.timeout.connect(self.onLabelTimer)
+        self.labelTimer.setSingleShot(True)
+        self.timerRunning = False
+
+    # ----------------- Traces -----------------
+    def addTrace(self, trace):
+        trace.plot = self
+        self.traces.append(trace)
+        self.invalidateColor(trace.rgba)
+
+    def removeTraces(self, traces):
+        removed = set(id(trace) for trace in traces if trace is not None and trace.plot is self)
+
+        if len(removed) == 0:
+            return
+
+        for trace in traces:
+            if trace is not None and id(trace) in removed:
+                trace.plot = None
+                self.colorPaths.pop(trace.rgba, None)
+                if trace is self.hoverTrace:
+                    self.hoverTrace = None
+
+        self.traces = [trace for trace in self.traces if id(trace) not in removed]
+        self.scheduleRedraw()
+
+    def removeTrace(self, trace):
+        self.removeTraces([trace])
+
+    def clear(self):
+        for trace in self.traces:
+            trace.plot = None
+
+        self.traces = []
+        self.colorPaths = {}
+        self.hoverTrace = None
+        self.label.hide()
+        self.scheduleRedraw()
+
+    def traceChanged(self, trace):
+        self.invalidateColor(trace.rgba)
+
+    def invalidateColor(self, rgba):
+        self.colorPaths.pop(rgba, None)
+        self.scheduleRedraw()
+
+    # ----------------- Redraw scheduling -----------------
+    def scheduleRedraw(self):
+        if self.redrawTimer.isActive():
+            return
+
+        wait = self.lastRedraw + self.minRedrawInterval - time.monotonic()
+
+        if wait <= 0:
+            self.redraw()
+        else:
+            self.redrawTimer.start(int(wait * 1000) + 1)
+
+    def redraw(self):
+        self.lastRedraw = time.monotonic()
+        self.update()
+
+    def onPlotAreaChanged(self, plotArea):
+        self.prepareGeometryChange()
+        self.plotArea = QRectF(plotArea)
+        self.invalidateGeometry()
+
+    def onRangeChanged(self, minValue, maxValue):
+        self.invalidateGeometry()
+
+    def invalidateGeometry(self):
+        for trace in self.traces:
+            trace.polygon = None
+            trace.hitShape = None
+
+        self.colorPaths = {}
+        # Resizes are not rate limited
+        self.update()
+
+    # ----------------- Geometry -----------------
+    def plotTransform(self):
+        # (xMin, xScale, left, yMin, yScale, bottom) for value -> item coordinates
+        xMin = self.xAxis.min()
+        xSpan = self.xAxis.max() - xMin
+        yMin = self.yAxis.min()
+        ySpan = self.yAxis.max() - yMin
+        area = self.plotArea
+
+        if xSpan == 0 or ySpan == 0:
+            return (xMin, 0.0, area.left(), yMin, 0.0, area.bottom())
+
+        return (xMin, area.width() / xSpan, area.left(), yMin, area.height() / ySpan, area.bottom())
+
+    def mapToPlot(self, x, y):
+        xMin, xScale, left, yMin, yScale, bottom = self.plotTransform()
+        return QPointF(left + (x - xMin) * xScale, bottom - (y - yMin) * yScale)
+
+    def tracePolygon(self, trace, transform=None):
+        polygon = trace.polygon
+
+        if polygon is None:
+            if transform is None:
+                transform = self.plotTransform()
+
+            xMin, xScale, left, yMin, yScale, bottom = transform
+            polygon = QPolygonF([QPointF(left + (x - xMin) * xScale, bottom - (y - yMin) * yScale) for x, y in trace.points])
+            trace.polygon = polygon
+
+        return polygon
+
+    def traceHitShape(self, trace):
+        if trace.hitShape is None:
+            path = QPainterPath()
+            path.addPolygon(self.tracePolygon(trace))
+            stroker = QPainterPathStroker()
+            stroker.setWidth(self.hitTolerance)
+            trace.hitShape = stroker.createStroke(path)
+
+        return trace.hitShape
+
+    def colorPath(self, rgba):
+        path = self.colorPaths.get(rgba)
+
+        if path is None:
+            transform = self.plotTransform()
+            path = QPainterPath()
+            for trace in self.traces:
+                if trace.rgba == rgba and not trace.selected and len(trace.points) > 0:
+                    path.addPolygon(self.tracePolygon(trace, transform))
+            self.colorPaths[rgba] = path
+
+        return path
+
+    def traceAt(self, pos):
+        # Topmost trace under pos: the selected one, then the most recently added
+        if not self.plotArea.contains(pos):
+            return None
+
+        candidates = [trace for trace in self.traces if trace.selected]
+        candidates.extend(reversed(self.traces))
+
+        for trace in candidates:
+            if len(trace.points) == 0:
+                continue
+
+            polygon = self.tracePolygon(trace)
+            bounds = polygon.boundingRect().adjusted(-self.hitTolerance, -self.hitTolerance, self.hitTolerance, self.hitTolerance)
+            if bounds.contains(pos) and self.traceHitShape(trace).contains(pos):
+                return trace
+
+        return None
+
+    # ----------------- QGraphicsItem -----------------
+    def boundingRect(self):
+        return self.plotArea
+
+    def paint(self, painter, option, widget=None):
+        if painter is None:
+            return
+
+        painter.save()
+        painter.setClipRect(self.plotArea)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
+        # Colours are drawn in order of first use so overlaps look the same
+        # from one redraw to the next
+        colors = {}
+        for trace in self.traces:
+            if trace.rgba not in colors:
+                colors[trace.rgba] = trace.color
+
+        for rgba, color in colors.items():
+            pen = QPen(color)
+            pen.setWidth(self.lineWidth)
+            painter.setPen(pen)
+            painter.drawPath(self.colorPath(rgba))
+
+        for trace in self.traces:
+            if trace.selected and len(trace.points) > 0:
+                pen = QPen(trace.color)
+                pen.setWidth(self.selectedWidth)
+                painter.setPen(pen)
+                painter.drawPolyline(self.tracePolygon(trace))
+
+        painter.restore()
+
+    # ----------------- Hover / click -----------------
+    def showLabel(self, trace, pos):
+        self.label.setText(trace.name())
+        bR = self.label.boundingRect()
+        self.label.setPos(pos.x() - bR.width()/2, pos.y() - bR.height()/2-7)
+        self.label.show()
+
+    def onLabelTimer(self):
+        self.label.hide()
+        self.timerRunning = False
+
+    def hoverMoveEvent(self, event):
+        if event is None:
+            return
+
+        trace = self.traceAt(event.pos())
+
+        if trace is not None:
+            if trace is not self.hoverTrace:
+                self.labelTimer.stop()
+                self.timerRunning = False
+                self.showLabel(trace, event.pos())
+        elif self.hoverTrace is not None and not self.timerRunning:
+            self.label.hide()
+
+        self.hoverTrace = trace
+
+    def hoverLeaveEvent(self, event):
+        if not self.timerRunning:
+            self.label.hide()
+
+        self.hoverTrace = None
+
+    def mousePressEvent(self, event):
+        if event is None:
+            return
+
+        trace = self.traceAt(event.pos())
+
+        if trace is None:
+            event.ignore()
+            return
+
+        self.showLabel(trace, event.pos())
+        self.timerRunning = True
+        self.labelTimer.start(self.labelTimerTimeout)
@@ -28,7 +28,6 @@ from socket import *
 import datetime
 from threading import Thread, Lock
 from time import sleep
-import requests
 import json
 import re
 # import urllib
@@ -37,6 +36,7 @@ from urllib.request import urlretrieve
 import os
 
 from sparrowmap import MapEngineBase,  MapEngineOSM
+from sparrowagentclient import agentGet, agentPost
 from sparrowwifiagent import FileSystemFile
 from sparrowbluetooth import BluetoothDevice
 from telemetry import BluetoothTelemetry
@@ -65,18 +65,9 @@ def saveFileDialog(fileSpec="CSV Files (*.csv);;All Files (*)"):
 
 
 # ------------------  Global functions for agent HTTP requests ------------------------------
+# These go through the GUI's shared keep-alive agent session
 def makeGetRequest(url):
-    try:
-        # Not using a timeout can cause the request to hang indefinitely
-        response = requests.get(url, timeout=2)
-    except:
-        return -1, ""
-
-    if response.status_code != 200:
-        return response.status_code, ""
-
-    htmlResponse=response.text
-    return response.status_code, htmlResponse
+    return agentGet(url, 2)
 
 def getRemoteBluetoothRunningServices(agentIP, agentPort):
     url = "http://" + agentIP + ":" + str(agentPort) + "/bluetooth/running"
@@ -256,13 +247,7 @@ def stopRecord(agentIP, agentPort):
 
 def makePostRequest(url, jsonstr):
         # use something like jsonstr = json.dumps(somestring) to get the right format
-        try:
-            response = requests.post(url, data=jsonstr, timeout=2)
-        except:
-            return -1, ""
-
-        htmlResponse=response.text
-        return response.status_code, htmlResponse
+        return agentPost(url, jsonstr, 2)
 
 def updateRemoteConfig(remoteIP, remotePort, startupCfg, runningCfg, sendRestart=False):
     url = "http://" + remoteIP + ":" + str(remotePort) + "/system/config"
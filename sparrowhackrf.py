@@ -22,14 +22,178 @@ import os
 import subprocess
 # import sys
 import signal
+import math
+import time
 from time import sleep
 import re
-from threading import Lock
 import datetime
 from dateutil import parser
 import json
+import numpy as np
 from sparrowcommon import BaseThreadClass
 
+# ------------------  Spectrum store ----------------------------------
+class HackrfSpectrum(object):
+    # Power per frequency bin from hackrf_sweep.
+    #
+    # Bins live in a fixed NumPy array on a grid that starts at minFreq (NaN =
+    # not seen yet).  hackrf_sweep starts its lines on whole MHz, so the grid
+    # step is the largest one that both the line starts and binWidth fall on
+    # (binWidth itself for 2.4 GHz).
+    #
+    # The sweep thread only splits off each line's start frequency as it comes
+    # in.  When a sweep wraps back to the bottom of the range, the whole sweep's
+    # values are parsed with one np.fromstring, written with one indexed
+    # assignment, and a copy is published as the snapshot.  Readers only ever
+    # use the published snapshot, which is never written again, so they need no
+    # lock and never see half a sweep.
+    
+    # hackrf_sweep rounds the sweep range up to whole 20 MHz tuning steps, so
+    # lines can run past maxFreq
+    SWEEP_OVERSHOOT = 40    # MHz
+    PUBLISH_INTERVAL = 0.1  # seconds between snapshots if a sweep takes longer
+    MAX_PENDING_LINES = 512
+    
+    def __init__(self, minFreq, maxFreq, binWidth):
+        # minFreq/maxFreq in MHz, binWidth in Hz
+        self.baseFreq = int(minFreq * 1000000)
+        self.binWidth = int(binWidth)
+        self.gridStep = math.gcd(self.binWidth, 1000000)
+        self.binStride = self.binWidth // self.gridStep
+        
+        numBins = int((maxFreq - minFreq + HackrfSpectrum.SWEEP_OVERSHOOT) * 1000000) // self.gridStep + 1
+        self.frequencies = self.baseFreq + np.arange(numBins, dtype=np.int64) * self.gridStep
+        
+        self.powers = np.full(numBins, np.nan)
+        self.snapshot = self.powers.copy()
+        
+        # Lines of the sweep in progress: start frequency and the unparsed values
+        self.pendingStarts = []
+        self.pendingValues = []
+        self.lastStartFreq = -1
+        self.lastPublish = time.monotonic()
+        
+        # (lowFreq, highFreq, freqToChannel, inclusive) -> (bin indices, group starts, channels)
+        self.channelMaps = {}
+        
+    def fill(self, power):
+        self.writePending()
+        self.powers.fill(power)
+        self.publish()
+        
+    def publish(self):
+        self.writePending()
+        self.snapshot = self.powers.copy()
+        self.lastPublish = time.monotonic()
+        
+    def addSweepLine(self, dataline):
+        # One hackrf_sweep output line:
+        #   date, time, hz_low, hz_high, hz_bin_width, num_samples, dB, dB, ...
+        # Returns False if the line isn't a data line.
+        fields = dataline.split(',', 6)
+        
+        if len(fields) < 7:
+            return False
+            
+        try:
+            startFreq = int(fields[2])
+        except ValueError:
+            return False
+            
+        # A new sweep started over at the bottom of the range
+        if (startFreq <= self.lastStartFreq) or (len(self.pendingStarts) >= HackrfSpectrum.MAX_PENDING_LINES) or \
+           ((time.monotonic() - self.lastPublish) > HackrfSpectrum.PUBLISH_INTERVAL):
+            self.publish()
+            
+        self.lastStartFreq = startFreq
+        self.pendingStarts.append(startFreq)
+        self.pendingValues.append(fields[6])
+        
+        return True
+        
+    def writePending(self):
+        if len(self.pendingStarts) == 0:
+            return
+            
+        starts = self.pendingStarts
+        texts = self.pendingValues
+        self.pendingStarts = []
+        self.pendingValues = []
+        
+        numLines = len(starts)
+        valueCounts = set(curText.count(',') for curText in texts)
+        values = np.fromstring(','.join(texts), sep=',')
+        
+        if len(valueCounts) != 1 or len(values) != numLines * (valueCounts.pop() + 1):
+            # Lines of different lengths: one at a time
+            for startFreq, curText in zip(starts, texts):
+                self.writeLine(startFreq, np.fromstring(curText, sep=','))
+            return
+            
+        # Values are binWidth apart, same as the per-bin frequencies the sweep
+        # was asked for.  A start that isn't on the grid is rounded onto it.
+        firstBins = np.rint((np.array(starts, dtype=np.int64) - self.baseFreq) / self.gridStep).astype(np.int64)
+        binIndices = (firstBins[:, None] + np.arange(len(values) // numLines) * self.binStride).ravel()
+        
+        inArray = (binIndices >= 0) & (binIndices < len(self.powers))
+        self.powers[binIndices[inArray]] = values[inArray]
+        
+    def writeLine(self, startFreq, values):
+        firstBin = int(round((startFreq - self.baseFreq) / self.gridStep))
+        binIndices = firstBin + np.arange(len(values)) * self.binStride
+        
+        inArray = (binIndices >= 0) & (binIndices < len(self.powers))
+        self.powers[binIndices[inArray]] = values[inArray]
+        
+    def channelMap(self, lowFreq, highFreq, freqToChannel, inclusive):
+        # Bins in [lowFreq, highFreq) (or [lowFreq, highFreq]) grouped by the
+        # channel freqToChannel gives them.  The channel functions never
+        # decrease with frequency so every channel is one contiguous run.
+        mapKey = (lowFreq, highFreq, freqToChannel, inclusive)
+        
+        if mapKey not in self.channelMaps:
+            if inclusive:
+                inRange = (self.frequencies >= lowFreq) & (self.frequencies <= highFreq)
+            else:
+                inRange = (self.frequencies >= lowFreq) & (self.frequencies < highFreq)
+                
+            binIndices = np.nonzero(inRange)[0]
+            groupStarts = []
+            channels = []
+            
+            for i, curFreq in enumerate(self.frequencies[binIndices].tolist()):
+                channel = freqToChannel(float(curFreq)/1000000.0)
+                if len(channels) == 0 or channel != channels[-1]:
+                    groupStarts.append(i)
+                    channels.append(channel)
+                    
+            self.channelMaps[mapKey] = (binIndices, np.array(groupStarts, dtype=np.intp), np.array(channels))
+            
+        return self.channelMaps[mapKey]
+        
+    def toChannels(self, lowFreq, highFreq, freqToChannel, inclusive, powerOffset):
+        # {channel: strongest bin power - powerOffset (floored at -100)} for
+        # the channels that have been seen
+        binIndices, groupStarts, channels = self.channelMap(lowFreq, highFreq, freqToChannel, inclusive)
+        
+        if len(binIndices) == 0:
+            return {}
+            
+        channelPowers = np.fmax.reduceat(self.snapshot[binIndices], groupStarts)
+        
+        # NaN means no bin of that channel has been seen yet
+        seen = ~np.isnan(channelPowers)
+        channelPowers = np.maximum(channelPowers[seen] - powerOffset, -100.0)
+        
+        return dict(zip(channels[seen].tolist(), channelPowers.tolist()))
+        
+    def toDict(self):
+        # {frequency (Hz): power} for the bins that have been seen
+        snapshot = self.snapshot
+        seen = np.nonzero(~np.isnan(snapshot))[0]
+        
+        return dict(zip(self.frequencies[seen].tolist(), snapshot[seen].tolist()))
+
 # ------------------  Ubertooth Specan scanning Thread ----------------------------------
 class HackrfSweepThread(BaseThreadClass):
     def __init__(self, parentHackrf):
@@ -88,31 +252,17 @@ class HackrfSweepThread(BaseThreadClass):
         #	fprintf(fd, "\n");
 
         iteration = 0
+        spectrumStore = self.parentHackrf.spectrumStore
         
         while not hackrfsweepProc.poll() and not self.signalStop:
-            dataline = hackrfsweepProc.stdout.readline().decode('UTF-8').replace('\n', '')
-            
-            dataline = dataline.replace(' ', '')
-            data = dataline.split(',')
+            dataline = hackrfsweepProc.stdout.readline().decode('UTF-8')
             
             # First 6 fields are setup: date/time, start/end freq, etc.
-            if len(data) > 6:
-                try:
-                    startfreq = int(data[2])
-                    
-                    # debug:
-                    # print('DEBUG: ' + str(startfreq) + "," + data[3])
-                    
-                    numSamples = len(data) - 6
-                    self.parentHackrf.spectrumLock.acquire()
-
-                    if numSamples > 0:
-                        for i in range(0, numSamples):
-                            self.parentHackrf.spectrum[startfreq + i * self.binWidth] = float(data[i+6])
-
-                    self.parentHackrf.spectrumLock.release()
-                except:
-                    pass
+            # The power values are parsed in one go into the spectrum array.
+            try:
+                spectrumStore.addSweepLine(dataline)
+            except:
+                pass
                     
             # Just give the thread a chance to release resources
             iteration += 1
@@ -120,6 +270,8 @@ class HackrfSweepThread(BaseThreadClass):
                 iteration = 0
                 sleep(0.01)
                 
+        spectrumStore.publish()
+        
         try:
             os.kill(hackrfsweepProc.pid, signal.SIGINT)
             
@@ -132,13 +284,13 @@ class HackrfSweepThread(BaseThreadClass):
 class SparrowHackrf(object):
     def __init__(self):
         
-        self.spectrum = {}
         self.minFreq = 2400
         self.maxFreq = 2500 # 5900
         self.binWidth = 500000
         self.gain = 40
 
-        self.spectrumLock = Lock()
+        # Replaced for each scan.  Readers take its published snapshot, no lock needed.
+        self.spectrumStore = HackrfSpectrum(self.minFreq, self.maxFreq, self.binWidth)
         # This scan thread is for the spectrum
         self.spectrumScanThread = None
 
@@ -148,14 +300,8 @@ class SparrowHackrf(object):
             self.hasHackrf = False
 
     def resetSpectrum(self):
-        self.spectrum.clear()
-        
-        # + 1 is for the range loop.  range goes 1 less than numNetries
-        numEntries = int((self.maxFreq - self.minFreq) * 1000000 / self.binWidth) + 1
-        freqHz = self.minFreq * 1000000
-        
-        for i in range(0, numEntries):
-            self.spectrum[freqHz + i * self.binWidth] = -100.0
+        self.spectrumStore = HackrfSpectrum(self.minFreq, self.maxFreq, self.binWidth)
+        self.spectrumStore.fill(-100.0)
             
         
     def getNumHackrfDevices():
@@ -215,7 +361,7 @@ class SparrowHackrf(object):
         self.spectrumScanThread.lna_gain = lna_gain
         self.spectrumScanThread.vga_gain = vga_gain
 
-        self.spectrum.clear()
+        self.spectrumStore = HackrfSpectrum(self.minFreq, self.maxFreq, self.binWidth)
         # self.resetSpectrum()
         
         self.spectrumScanThread.start()
@@ -252,51 +398,13 @@ class SparrowHackrf(object):
         subprocess.run(['pkill', '-9','hackrf_sweep'], stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
         
     def spectrum24ToChannels(self):
-        retVal = {}
-
-        # if len(self.spectrum) < 14001:
-        #    return retVal
-            
-        self.spectrumLock.acquire()
-        try:
-            for curKey in self.spectrum.keys():
-                # curKey is frequency
-                if curKey >= 2400000000 and curKey < 3000000000:
-                    curFreq = float(curKey)/1000000.0
-                    channel = SparrowHackrf.fFreqTo24Channel(curFreq)
-                    power = self.spectrum[curKey] - 25.0
-                    if power <= -100.0:
-                        power = -100.0
-                    retVal[channel] = power
-        except:
-            pass
-
-        self.spectrumLock.release()
-        
-        return retVal
-        
+        # Channels that share bins (the clamped edges below ch 1 and above
+        # ch 14) report the strongest one
+        return self.spectrumStore.toChannels(2400000000, 3000000000, SparrowHackrf.fFreqTo24Channel, False, 25.0)
         
     def spectrum5ToChannels(self):
-        retVal = {}
-        
-        self.spectrumLock.acquire()
-        try:
-            for curKey in self.spectrum.keys():
-                # curKey is frequency
-                if curKey >= 5180000000 and curKey <= 5835000000:
-                    curFreq = float(curKey)/1000000.0
-                    channel = SparrowHackrf.fFreqTo5Channel(curFreq)
-                    power = self.spectrum[curKey]
-                    # 5 Ghz with the gain the noise floor is a bit higher.
-                    power = self.spectrum[curKey] - 30.0
-                    if power <= -100.0:
-                        power = -100.0
-                    retVal[channel] = power
-        except:
-            pass
-
-        self.spectrumLock.release()
-        return retVal
+        # 5 Ghz with the gain the noise floor is a bit higher.
+        return self.spectrumStore.toChannels(5180000000, 5835000000, SparrowHackrf.fFreqTo5Channel, True, 30.0)
         
     def fFreqTo24Channel(frequency):
         # Note: This function returns a float for partial channels
@@ -367,12 +475,13 @@ if __name__ == '__main__':
         
     hackrf.stopScanning()
     
-    print('Spectrum Length: ' + str(len(hackrf.spectrum)))
+    spectrum = hackrf.spectrumStore.toDict()
+    print('Spectrum Length: ' + str(len(spectrum)))
     
     i = 0
     
-    for curKey in hackrf.spectrum.keys():
-        print('spectrum[' + str(curKey) + '] = ' + str(hackrf.spectrum[curKey]))
+    for curKey in spectrum.keys():
+        print('spectrum[' + str(curKey) + '] = ' + str(spectrum[curKey]))
         i += 1
         
         if i > 50:
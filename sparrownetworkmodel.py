@@ -0,0 +1,548 @@
+#!/usr/bin/python3
+#
+# Copyright 2017 ghostop14
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+from typing import Optional
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex
+from PyQt5.QtGui import QBrush
+
+# Model/view replacement for the main window's QTableWidget network list.
+#
+# The table used to hold 14 QTableWidgetItems per network and rewrite every
+# one of them (two strftime calls included) on every scan, then re-sort the
+# whole widget.  Here the networks live in parallel row arrays indexed by
+# network key, cell text is only formatted when the view asks for a visible
+# cell, and a scan's updates go out as one dataChanged per run of
+# consecutive rows.
+
+NETWORK_TABLE_HEADERS = ['macAddr', 'vendor','SSID', 'Security', 'Privacy', 'Channel', 'Frequency', 'Signal Strength', 'Bandwidth', '% Utilization','Stations','Last Seen', 'First Seen', 'GPS']
+
+COL_MACADDR = 0
+COL_VENDOR = 1
+COL_SSID = 2
+COL_SECURITY = 3
+COL_PRIVACY = 4
+COL_CHANNEL = 5
+COL_FREQUENCY = 6
+COL_SIGNAL = 7
+COL_BANDWIDTH = 8
+COL_UTILIZATION = 9
+COL_STATIONS = 10
+COL_LASTSEEN = 11
+COL_FIRSTSEEN = 12
+COL_GPS = 13
+
+# Same roles the QTableWidget version stored on the SSID item
+SeriesRole = Qt.ItemDataRole.UserRole
+NetworkRole = Qt.ItemDataRole.UserRole+1
+SortRole = Qt.ItemDataRole.UserRole+3
+
+# Alignment matches the old Int/Float/DateTableWidgetItem classes
+_rightAligned = (COL_CHANNEL, COL_FREQUENCY, COL_SIGNAL, COL_BANDWIDTH, COL_UTILIZATION, COL_STATIONS)
+_centerAligned = (COL_LASTSEEN, COL_FIRSTSEEN)
+
+def channelSortValue(channelStr):
+    # Multi-channel entries such as "3+5" sort on the first channel
+    try:
+        return int(channelStr)
+    except:
+        try:
+            return int(str(channelStr).split('+')[0])
+        except:
+            return 0
+
+# rowsUpdated() sends rows this close together as one dataChanged range.  Each
+# range costs the sorting proxy a re-sort, so re-announcing a few unchanged
+# rows is much cheaper than splitting a scan's updates into hundreds of
+# small ranges.
+UPDATE_MERGE_GAP = 64
+
+def contiguousRanges(rows, maxGap=0):
+    # [7, 2, 3, 4, 9, 8] -> [(2, 4), (7, 9)]
+    # With maxGap, runs separated by up to maxGap missing rows are joined.
+    ranges = []
+
+    for row in sorted(set(rows)):
+        if ranges and row - ranges[-1][1] <= maxGap + 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+
+    return [(first, last) for first, last in ranges]
+
+# ------------------  Network Table Model  ------------------------------
+class NetworkTableModel(QAbstractTableModel):
+    # vendorLookup is a callable(macAddr) -> vendor string.  It is only called
+    # when the vendor cell is displayed or sorted on.
+    def __init__(self, vendorLookup=None, parent=None):
+        super().__init__(parent)
+
+        self.vendorLookup = vendorLookup
+
+        # Row-aligned arrays.  rowForKey maps network key -> row.
+        self._keys = []
+        self._nets = []
+        self._series = []
+        self._brushes = []
+        self._text = []      # Formatted row text, None until displayed
+        self._sortKeys = []  # Sort values, None until sorted on
+        self._rowForKey = {}
+
+    # ----------------- Qt model interface -----------------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self._nets)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(NETWORK_TABLE_HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return NETWORK_TABLE_HEADERS[section]
+            else:
+                return str(section + 1)
+
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = index.row()
+        col = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.cellText(row, col)
+        elif role == SortRole:
+            return self.sortValue(row, col)
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            if col in _rightAligned:
+                return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+            elif col in _centerAligned:
+                return Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if col == COL_SSID:
+                return self._brushes[row]
+        elif role == NetworkRole:
+            return self._nets[row]
+        elif role == SeriesRole:
+            return self._series[row]
+
+        return None
+
+    # ----------------- Store access -----------------
+    def network(self, row):
+        return self._nets[row]
+
+    def series(self, row):
+        return self._series[row]
+
+    def networks(self):
+        return list(self._nets)
+
+    def rowForKey(self, key):
+        return self._rowForKey.get(key, -1)
+
+    def vendor(self, row):
+        return self.cellText(row, COL_VENDOR)
+
+    def cellText(self, row, col):
+        text = self._text[row]
+
+        if text is None:
+            text = self._formatRow(self._nets[row])
+            self._text[row] = text
+
+        return text[col]
+
+    def sortValue(self, row, col):
+        keys = self._sortKeys[row]
+
+        if keys is None:
+            keys = self._sortRow(row)
+            self._sortKeys[row] = keys
+
+        return keys[col]
+
+    def _ssidText(self, curNet):
+        if len(curNet.ssid) == 0:
+            return '<Unknown>'
+        else:
+            return curNet.ssid
+
+    def _vendorText(self, curNet):
+        if self.vendorLookup:
+            return self.vendorLookup(curNet.macAddr) or ''
+        else:
+            return ''
+
+    def _formatRow(self, curNet):
+        if curNet.gps.isValid:
+            gpsText = 'Yes'
+        else:
+            gpsText = 'No'
+
+        return (curNet.macAddr, self._vendorText(curNet), self._ssidText(curNet), curNet.security, curNet.privacy,
+                    str(curNet.getChannelString()), str(curNet.frequency), str(curNet.signal), str(curNet.bandwidth),
+                    str(curNet.utilization), str(curNet.stationcount),
+                    curNet.lastSeen.strftime("%m/%d/%Y %H:%M:%S"), curNet.firstSeen.strftime("%m/%d/%Y %H:%M:%S"), gpsText)
+
+    def _sortRow(self, row):
+        curNet = self._nets[row]
+
+        try:
+            utilization = float(curNet.utilization)
+        except:
+            utilization = 0.0
+
+        # Text columns sort on their displayed text like the old table did.
+        # Timestamps sort at the table's one-second display resolution.
+        if self._text[row] is not None:
+            vendorText = self._text[row][COL_VENDOR]
+        else:
+            vendorText = self._vendorText(curNet)
+
+        return (curNet.macAddr, vendorText, self._ssidText(curNet), curNet.security, curNet.privacy,
+                    channelSortValue(curNet.getChannelString()), int(curNet.frequency), int(curNet.signal), int(curNet.bandwidth),
+                    utilization, int(curNet.stationcount),
+                    curNet.lastSeen.replace(microsecond=0), curNet.firstSeen.replace(microsecond=0), 'Yes' if curNet.gps.isValid else 'No')
+
+    # ----------------- Updates -----------------
+    def addNetworks(self, newRows):
+        # newRows is a list of (network, series, QColor).  All of them go in
+        # with a single beginInsertRows/endInsertRows.
+        if len(newRows) == 0:
+            return
+
+        firstRow = len(self._nets)
+        self.beginInsertRows(QModelIndex(), firstRow, firstRow + len(newRows) - 1)
+
+        for curNet, curSeries, curColor in newRows:
+            curKey = curNet.getKey()
+            self._rowForKey[curKey] = len(self._nets)
+            self._keys.append(curKey)
+            self._nets.append(curNet)
+            self._series.append(curSeries)
+            self._brushes.append(QBrush(curColor))
+            self._text.append(None)
+            self._sortKeys.append(None)
+
+        self.endInsertRows()
+
+    def replaceNetwork(self, row, curNet):
+        # Swap in a newer scan of the network at row without notifying views.
+        # Call rowsUpdated() once with all of the replaced rows afterwards.
+        self._nets[row] = curNet
+
+    def rowsUpdated(self, rows):
+        # Drop cached text for rows and tell the views, one dataChanged per
+        # run of nearby rows (see UPDATE_MERGE_GAP)
+        if len(rows) == 0:
+            return
+
+        lastCol = len(NETWORK_TABLE_HEADERS) - 1
+
+        for firstRow, lastRow in contiguousRanges(rows, UPDATE_MERGE_GAP):
+            for row in range(firstRow, lastRow+1):
+                self._text[row] = None
+                self._sortKeys[row] = None
+
+                # A network's key changes if we learn a hidden SSID
+                curKey = self._nets[row].getKey()
+                oldKey = self._keys[row]
+                if curKey != oldKey:
+                    if self._rowForKey.get(oldKey) == row:
+                        del self._rowForKey[oldKey]
+                    self._rowForKey[curKey] = row
+                    self._keys[row] = curKey
+
+            self.dataChanged.emit(self.index(firstRow, 0), self.index(lastRow, lastCol))
+
+    def removeNetworkRows(self, rows):
+        # Remove rows, one beginRemoveRows per run of consecutive rows.
+        # Runs are removed bottom up so earlier row numbers stay valid.
+        if len(rows) == 0:
+            return
+
+        for firstRow, lastRow in reversed(contiguousRanges(rows)):
+            self.beginRemoveRows(QModelIndex(), firstRow, lastRow)
+
+            for rowArray in (self._keys, self._nets, self._series, self._brushes, self._text, self._sortKeys):
+                del rowArray[firstRow:lastRow+1]
+
+            self.endRemoveRows()
+
+        self._rowForKey = {curKey: row for row, curKey in enumerate(self._keys)}
+
+    def clear(self):
+        self.beginResetModel()
+        self._keys = []
+        self._nets = []
+        self._series = []
+        self._brushes = []
+        self._text = []
+        self._sortKeys = []
+        self._rowForKey = {}
+        self.endResetModel()
+
+# ------------------  Sort / Filter Proxy  ------------------------------
+class NetworkSortFilterProxyModel(QAbstractProxyModel):
+    # Sorted and filtered view of a NetworkTableModel.
+    #
+    # QSortFilterProxyModel calls back into Python for every comparison,
+    # which made re-sorting a few thousand rows after each scan cost more
+    # than the old table.  This proxy keeps the row mapping in two Python
+    # lists and orders it with list.sort() on the model's cached sort values
+    # (typed: channel numbers, timestamps, ...).  The filter is a substring
+    # match on the MAC address, vendor or SSID.
+    #
+    # Rows removed from the model are removed from the view in proxy order,
+    # rows added or updated trigger one re-sort/re-filter per signal, and the
+    # view's selection follows its network through re-sorts.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.filterText = ''
+        self.sortColumn = -1
+        self.sortOrder = Qt.SortOrder.AscendingOrder
+        self._source: Optional[NetworkTableModel] = None
+        self._proxyToSource = []
+        self._sourceToProxy = []
+
+    def setSourceModel(self, sourceModel):
+        if not isinstance(sourceModel, NetworkTableModel):
+            raise TypeError('NetworkSortFilterProxyModel needs a NetworkTableModel')
+
+        self.beginResetModel()
+
+        oldModel = self._source
+        if oldModel is not None:
+            oldModel.dataChanged.disconnect(self._onSourceDataChanged)
+            oldModel.rowsInserted.disconnect(self._onSourceRowsInserted)
+            oldModel.rowsAboutToBeRemoved.disconnect(self._onSourceRowsAboutToBeRemoved)
+            oldModel.rowsRemoved.disconnect(self._onSourceRowsRemoved)
+            oldModel.modelAboutToBeReset.disconnect(self.beginResetModel)
+            oldModel.modelReset.disconnect(self._onSourceModelReset)
+
+        super().setSourceModel(sourceModel)
+        # Typed reference; sourceModel() only returns a QAbstractItemModel
+        self._source = sourceModel
+
+        sourceModel.dataChanged.connect(self._onSourceDataChanged)
+        sourceModel.rowsInserted.connect(self._onSourceRowsInserted)
+        sourceModel.rowsAboutToBeRemoved.connect(self._onSourceRowsAboutToBeRemoved)
+        sourceModel.rowsRemoved.connect(self._onSourceRowsRemoved)
+        sourceModel.modelAboutToBeReset.connect(self.beginResetModel)
+        sourceModel.modelReset.connect(self._onSourceModelReset)
+
+        self._buildMapping()
+        self.endResetModel()
+
+    # ----------------- Sorting / filtering -----------------
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sortColumn = column
+        self.sortOrder = order
+        self._relayout()
+
+    def setFilterText(self, filterText):
+        self.filterText = filterText.strip().lower()
+        self._relayout()
+
+    def filterAcceptsRow(self, sourceRow):
+        if len(self.filterText) == 0:
+            return True
+
+        source = self._source
+        if source is None:
+            return False
+
+        for col in (COL_MACADDR, COL_VENDOR, COL_SSID):
+            if self.filterText in str(source.sortValue(sourceRow, col)).lower():
+                return True
+
+        return False
+
+    def isIdentity(self):
+        return self.sortColumn < 0 and len(self.filterText) == 0
+
+    def sourceRow(self, proxyRow):
+        if proxyRow < 0 or proxyRow >= len(self._proxyToSource):
+            return -1
+
+        return self._proxyToSource[proxyRow]
+
+    def _buildMapping(self):
+        source = self._source
+        if source is None:
+            self._proxyToSource = []
+            self._sourceToProxy = []
+            return
+
+        numRows = source.rowCount()
+
+        if len(self.filterText) > 0:
+            rows = [row for row in range(numRows) if self.filterAcceptsRow(row)]
+        else:
+            rows = list(range(numRows))
+
+        if self.sortColumn >= 0:
+            col = self.sortColumn
+            rows.sort(key=lambda row: source.sortValue(row, col), reverse=(self.sortOrder == Qt.SortOrder.DescendingOrder))
+
+        self._proxyToSource = rows
+        self._sourceToProxy = [-1] * numRows
+        for proxyRow, sourceRow in enumerate(rows):
+            self._sourceToProxy[sourceRow] = proxyRow
+
+    def _relayout(self):
+        # Re-sort / re-filter everything in one layout change, keeping
+        # persistent indexes (selection, current cell) on the same network
+        self.layoutAboutToBeChanged.emit()
+
+        oldIndexes = self.persistentIndexList()
+        sourceCells = [(self._proxyToSource[index.row()], index.column()) for index in oldIndexes]
+
+        self._buildMapping()
+
+        newIndexes = []
+        for sourceRow, col in sourceCells:
+            proxyRow = self._sourceToProxy[sourceRow]
+            if proxyRow >= 0:
+                newIndexes.append(self.createIndex(proxyRow, col))
+            else:
+                newIndexes.append(QModelIndex())
+
+        self.changePersistentIndexList(oldIndexes, newIndexes)
+        self.layoutChanged.emit()
+
+    # ----------------- Source model signals -----------------
+    def _onSourceDataChanged(self, topLeft, bottomRight, roles=[]):
+        if len(self._proxyToSource) == 0 and len(self.filterText) == 0:
+            return
+
+        if self.isIdentity():
+            self.dataChanged.emit(self.mapFromSource(topLeft), self.mapFromSource(bottomRight))
+            return
+
+        self._relayout()
+
+        if len(self._proxyToSource) > 0:
+            # The changed rows are scattered through the view now.  The view
+            # only repaints what is visible anyway.
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._proxyToSource)-1, self.columnCount()-1))
+
+    def _onSourceRowsInserted(self, parent, first, last):
+        count = last - first + 1
+
+        if first < len(self._sourceToProxy):
+            self._proxyToSource = [row + count if row >= first else row for row in self._proxyToSource]
+
+        self._sourceToProxy[first:first] = [-1] * count
+
+        newRows = [row for row in range(first, last+1) if self.filterAcceptsRow(row)]
+
+        if len(newRows) > 0:
+            firstProxyRow = len(self._proxyToSource)
+            self.beginInsertRows(QModelIndex(), firstProxyRow, firstProxyRow + len(newRows) - 1)
+            self._proxyToSource.extend(newRows)
+            self._sourceToProxy = [-1] * len(self._sourceToProxy)
+            for proxyRow, sourceRow in enumerate(self._proxyToSource):
+                self._sourceToProxy[sourceRow] = proxyRow
+            self.endInsertRows()
+
+            if self.sortColumn >= 0:
+                self._relayout()
+
+    def _onSourceRowsAboutToBeRemoved(self, parent, first, last):
+        proxyRows = [self._sourceToProxy[row] for row in range(first, last+1) if self._sourceToProxy[row] >= 0]
+
+        for firstProxyRow, lastProxyRow in reversed(contiguousRanges(proxyRows)):
+            self.beginRemoveRows(QModelIndex(), firstProxyRow, lastProxyRow)
+            del self._proxyToSource[firstProxyRow:lastProxyRow+1]
+            self.endRemoveRows()
+
+    def _onSourceRowsRemoved(self, parent, first, last):
+        count = last - first + 1
+
+        self._proxyToSource = [row - count if row > last else row for row in self._proxyToSource]
+        self._sourceToProxy = [-1] * (len(self._sourceToProxy) - count)
+        for proxyRow, sourceRow in enumerate(self._proxyToSource):
+            self._sourceToProxy[sourceRow] = proxyRow
+
+    def _onSourceModelReset(self):
+        self._buildMapping()
+        self.endResetModel()
+
+    # ----------------- Qt proxy interface -----------------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self._proxyToSource)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(NETWORK_TABLE_HEADERS)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or row >= len(self._proxyToSource) or column < 0 or column >= len(NETWORK_TABLE_HEADERS):
+            return QModelIndex()
+
+        return self.createIndex(row, column)
+
+    # Flat model.  PyQt declares parent() as overloads of QObject.parent() and
+    # QAbstractItemModel.parent(index); the view only ever calls the latter.
+    def parent(self, index=None):  # type: ignore[override]
+        return QModelIndex()
+
+    def mapToSource(self, proxyIndex):
+        if self._source is None or not proxyIndex.isValid() or proxyIndex.row() >= len(self._proxyToSource):
+            return QModelIndex()
+
+        return self._source.index(self._proxyToSource[proxyIndex.row()], proxyIndex.column())
+
+    def mapFromSource(self, sourceIndex):
+        if not sourceIndex.isValid():
+            return QModelIndex()
+
+        proxyRow = self._sourceToProxy[sourceIndex.row()]
+
+        if proxyRow < 0:
+            return QModelIndex()
+
+        return self.createIndex(proxyRow, sourceIndex.column())
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal:
+            if self._source is None:
+                return None
+            return self._source.headerData(section, orientation, role)
+        elif role == Qt.ItemDataRole.DisplayRole:
+            return str(section + 1)
+
+        return None
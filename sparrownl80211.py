@@ -0,0 +1,581 @@
+#!/usr/bin/python3
+#
+# Copyright 2017 ghostop14
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+# nl80211 scan backend.  Talks to the kernel over a generic netlink socket
+# (the same requests 'iw dev <if> scan' makes), triggers a scan, dumps the BSS
+# list and builds WirelessNetwork objects straight from the attributes and raw
+# information elements.  No process spawn and no text round-trip.
+#
+# Field semantics deliberately follow what WirelessEngine.parseIWoutput pulls
+# out of iw's text for the same elements (names for ciphers/auth suites,
+# channel width, secondary channel location, etc.) so either backend produces
+# the same WirelessNetwork objects.
+
+import datetime
+import errno
+import os
+import socket
+import struct
+from threading import Lock
+
+# ------------------  Netlink / generic netlink constants ------------------------------
+NETLINK_GENERIC = 16
+SOL_NETLINK = 270
+NETLINK_ADD_MEMBERSHIP = 1
+
+NLM_F_REQUEST = 0x01
+NLM_F_MULTI = 0x02
+NLM_F_ACK = 0x04
+NLM_F_DUMP = 0x300
+
+NLMSG_NOOP = 1
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+NLA_TYPE_MASK = 0x3fff  # strips NLA_F_NESTED / NLA_F_NET_BYTEORDER
+
+GENL_ID_CTRL = 0x10
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+CTRL_ATTR_MCAST_GROUPS = 7
+CTRL_ATTR_MCAST_GRP_NAME = 1
+CTRL_ATTR_MCAST_GRP_ID = 2
+
+# ------------------  nl80211 constants ------------------------------
+NL80211_CMD_GET_SCAN = 32
+NL80211_CMD_TRIGGER_SCAN = 33
+NL80211_CMD_NEW_SCAN_RESULTS = 34
+NL80211_CMD_SCAN_ABORTED = 35
+
+NL80211_ATTR_IFINDEX = 3
+NL80211_ATTR_SCAN_FREQUENCIES = 44
+NL80211_ATTR_SCAN_SSIDS = 45
+NL80211_ATTR_BSS = 47
+
+NL80211_BSS_BSSID = 1
+NL80211_BSS_FREQUENCY = 2
+NL80211_BSS_CAPABILITY = 5
+NL80211_BSS_INFORMATION_ELEMENTS = 6
+NL80211_BSS_SIGNAL_MBM = 7
+
+# Capability field bits
+WLAN_CAPABILITY_ESS = 0x0001
+WLAN_CAPABILITY_IBSS = 0x0002
+WLAN_CAPABILITY_CF_POLLABLE = 0x0004
+WLAN_CAPABILITY_CF_POLL_REQUEST = 0x0008
+WLAN_CAPABILITY_PRIVACY = 0x0010
+
+# Information element IDs
+IE_SSID = 0
+IE_DS_PARAMS = 3
+IE_BSS_LOAD = 11
+IE_RSN = 48
+IE_HT_OPERATION = 61
+IE_VHT_OPERATION = 192
+IE_VENDOR = 221
+
+_OUI_IEEE = b'\x00\x0f\xac'
+_OUI_MS = b'\x00\x50\xf2'
+_OUI_WFA = b'\x50\x6f\x9a'
+
+# Same names iw prints for cipher / AKM suite selectors
+_CIPHER_NAMES = {
+    0: 'Use group cipher suite',
+    1: 'WEP-40',
+    2: 'TKIP',
+    4: 'CCMP',
+    5: 'WEP-104',
+}
+
+_IEEE_CIPHER_NAMES = dict(_CIPHER_NAMES)
+_IEEE_CIPHER_NAMES.update({
+    6: 'AES-128-CMAC',
+    7: 'NO-GROUP',
+    8: 'GCMP-128',
+    9: 'GCMP-256',
+    10: 'CCMP-256',
+    11: 'BIP-GMAC-128',
+    12: 'BIP-GMAC-256',
+    13: 'BIP-CMAC-256',
+})
+
+_MS_AUTH_NAMES = {
+    1: 'IEEE 802.1X',
+    2: 'PSK',
+}
+
+_IEEE_AUTH_NAMES = {
+    1: 'IEEE 802.1X',
+    2: 'PSK',
+    3: 'FT/IEEE 802.1X',
+    4: 'FT/PSK',
+    5: 'IEEE 802.1X/SHA-256',
+    6: 'PSK/SHA-256',
+    7: 'TDLS/TPK',
+    8: 'SAE',
+    9: 'FT/SAE',
+    11: 'IEEE 802.1X/SUITE-B',
+    12: 'IEEE 802.1X/SUITE-B-192',
+    13: 'FT/IEEE 802.1X/SHA-384',
+    14: 'FILS/SHA-256',
+    15: 'FILS/SHA-384',
+    16: 'FT/FILS/SHA-256',
+    17: 'FT/FILS/SHA-384',
+    18: 'OWE',
+}
+
+_WFA_AUTH_NAMES = {
+    1: 'OSEN',
+    2: 'DPP',
+}
+
+_SECONDARY_OFFSET = ['no', 'above', '[reserved!]', 'below']
+
+# VHT operation channel width -> the bandwidth WirelessEngine has always reported for it
+_VHT_WIDTH_MHZ = {0: 40, 1: 80, 2: 160, 3: 80}
+
+_NLMSGHDR = struct.Struct('=IHHII')
+_GENLMSGHDR = struct.Struct('=BBH')
+_NLATTR = struct.Struct('=HH')
+_NLMSGERR = struct.Struct('=i')
+
+# ------------------  Errors ------------------------------
+class NL80211Error(Exception):
+    # The backend itself can't be used (no netlink, no nl80211, malformed reply).
+    # Callers should fall back to the iw subprocess.
+    pass
+
+# ------------------  Netlink attribute helpers ------------------------------
+def nlaAlign(length):
+    return (length + 3) & ~3
+
+def packAttr(attrType, payload):
+    attrLen = _NLATTR.size + len(payload)
+    return _NLATTR.pack(attrLen, attrType) + payload + b'\x00' * (nlaAlign(attrLen) - attrLen)
+
+def packAttrU32(attrType, value):
+    return packAttr(attrType, struct.pack('=I', value))
+
+def packAttrString(attrType, value):
+    return packAttr(attrType, value.encode('ascii') + b'\x00')
+
+def parseAttrs(data, offset=0, end=None):
+    # Returns {type: payload bytes}.  Later duplicates win, same as libnl.
+    retVal = {}
+    if end is None:
+        end = len(data)
+
+    while offset + _NLATTR.size <= end:
+        attrLen, attrType = _NLATTR.unpack_from(data, offset)
+        if attrLen < _NLATTR.size or offset + attrLen > end:
+            break
+
+        retVal[attrType & NLA_TYPE_MASK] = data[offset + _NLATTR.size:offset + attrLen]
+        offset += nlaAlign(attrLen)
+
+    return retVal
+
+def parseAttrList(data):
+    # Nested arrays (e.g. multicast groups) where the attr type is just an index
+    return [payload for _, payload in sorted(parseAttrs(data).items())]
+
+def packMessage(msgType, flags, seq, cmd, attrs=b'', version=1):
+    payload = _GENLMSGHDR.pack(cmd, version, 0) + attrs
+    return _NLMSGHDR.pack(_NLMSGHDR.size + len(payload), msgType, flags, seq, 0) + payload
+
+def iterMessages(data):
+    # Yields (msgType, flags, seq, payload) for every netlink message in a datagram
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        msgLen, msgType, flags, seq, _ = _NLMSGHDR.unpack_from(data, offset)
+        if msgLen < _NLMSGHDR.size or offset + msgLen > len(data):
+            break
+
+        yield msgType, flags, seq, data[offset + _NLMSGHDR.size:offset + msgLen]
+        offset += nlaAlign(msgLen)
+
+def iwErrorCode(errNum):
+    # iw exits with the negated errno as its status byte (EBUSY -> 240, ENETDOWN -> 156, ...).
+    # Reusing those values keeps WirelessNetwork.ERR_* and the busy-retry logic working.
+    return (-errNum) & 0xff
+
+# ------------------  Information element decoding ------------------------------
+def escapeSSID(data):
+    # Same escaping iw applies before printing an SSID
+    retVal = []
+    lastIndex = len(data) - 1
+    for i, curByte in enumerate(data):
+        if 0x20 < curByte < 0x7f and curByte != 0x5c:
+            retVal.append(chr(curByte))
+        elif curByte == 0x20 and i != 0 and i != lastIndex:
+            retVal.append(' ')
+        else:
+            retVal.append('\\x%.2x' % curByte)
+
+    return ''.join(retVal)
+
+def _suiteName(suite, ieeeNames, msNames):
+    oui = suite[0:3]
+    suiteType = suite[3]
+
+    if oui == _OUI_IEEE and suiteType in ieeeNames:
+        return ieeeNames[suiteType]
+    if oui == _OUI_MS and suiteType in msNames:
+        return msNames[suiteType]
+    if oui == _OUI_WFA and ieeeNames is _IEEE_AUTH_NAMES and suiteType in _WFA_AUTH_NAMES:
+        return _WFA_AUTH_NAMES[suiteType]
+
+    return '%.2x-%.2x-%.2x:%d' % (oui[0], oui[1], oui[2], suiteType)
+
+def parseRSN(data, defaultCipher, defaultAuth):
+    # Returns (pairwise cipher names, auth suite names).  None means iw prints no
+    # such line for this element, which leaves the network's field unchanged.
+    if len(data) < 2:
+        return None, None
+
+    data = data[2:]   # Version
+
+    if len(data) < 4:
+        return [defaultCipher], None
+
+    data = data[4:]   # Group cipher
+
+    if len(data) < 2:
+        return [defaultCipher], None
+
+    count = data[0] | (data[1] << 8)
+    if 2 + count * 4 > len(data):
+        return None, None
+
+    pairwise = [_suiteName(data[2 + i * 4:6 + i * 4], _IEEE_CIPHER_NAMES, _CIPHER_NAMES) for i in range(count)]
+    data = data[2 + count * 4:]
+
+    if len(data) < 2:
+        return pairwise, [defaultAuth]
+
+    count = data[0] | (data[1] << 8)
+    if 2 + count * 4 > len(data):
+        return pairwise, None
+
+    authSuites = [_suiteName(data[2 + i * 4:6 + i * 4], _IEEE_AUTH_NAMES, _MS_AUTH_NAMES) for i in range(count)]
+
+    return pairwise, authSuites
+
+def iterIEs(data):
+    offset = 0
+    while offset + 2 <= len(data):
+        ieId = data[offset]
+        ieLen = data[offset + 1]
+        if offset + 2 + ieLen > len(data):
+            break
+
+        yield ieId, data[offset + 2:offset + 2 + ieLen]
+        offset += 2 + ieLen
+
+def _applySecurity(curNetwork, pairwise, authSuites):
+    if pairwise is not None and len(pairwise) > 0:
+        curNetwork.privacy = '/'.join(pairwise).replace(' ', '/')
+        curNetwork.cipher = curNetwork.privacy
+
+    if authSuites is not None and len(authSuites) > 0:
+        curNetwork.security = ' '.join(authSuites)
+
+def applyIEs(curNetwork, ies, convertSSID):
+    # Elements are applied in frame order, so when an element repeats
+    # (e.g. WPA and RSN both present) the later one wins as it does with iw's text.
+    for ieId, ieData in iterIEs(ies):
+        if ieId == IE_SSID:
+            if len(ieData) > 0 and len(ieData) <= 32:
+                curNetwork.ssid = convertSSID(escapeSSID(ieData))
+        elif ieId == IE_DS_PARAMS:
+            if len(ieData) == 1:
+                curNetwork.channel = ieData[0]
+        elif ieId == IE_BSS_LOAD:
+            if len(ieData) == 5:
+                curNetwork.stationcount = ieData[0] | (ieData[1] << 8)
+                curNetwork.utilization = round(float(ieData[2]) / 255.0 * 100.0 * 100.0) / 100.0
+        elif ieId == IE_RSN:
+            pairwise, authSuites = parseRSN(ieData, 'CCMP', 'IEEE 802.1X')
+            _applySecurity(curNetwork, pairwise, authSuites)
+        elif ieId == IE_HT_OPERATION:
+            if len(ieData) == 22:
+                curNetwork.channel = ieData[0]
+                location = _SECONDARY_OFFSET[ieData[1] & 0x03]
+                curNetwork.secondaryChannelLocation = location
+                if location == 'above':
+                    curNetwork.secondaryChannel = curNetwork.channel + 4
+                elif location == 'below':
+                    curNetwork.secondaryChannel = curNetwork.channel - 4
+        elif ieId == IE_VHT_OPERATION:
+            if len(ieData) >= 5:
+                if ieData[0] in _VHT_WIDTH_MHZ:
+                    curNetwork.bandwidth = _VHT_WIDTH_MHZ[ieData[0]]
+                curNetwork.thirdChannel = ieData[1]
+        elif ieId == IE_VENDOR:
+            if len(ieData) >= 6 and ieData[0:3] == _OUI_MS and ieData[3] == 1:
+                # WPA (pre-RSN) element
+                pairwise, authSuites = parseRSN(ieData[4:], 'TKIP', 'IEEE 802.1X')
+                _applySecurity(curNetwork, pairwise, authSuites)
+
+# ------------------  Scanner ------------------------------
+def _defaultSocketFactory():
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_GENERIC)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+    sock.bind((0, 0))
+    return sock
+
+class NL80211Scanner(object):
+    # The nl80211 family id and scan multicast group are resolved once and
+    # shared.  Each scan uses its own short-lived socket so concurrent scans on
+    # different interfaces never see each other's replies.
+    RECV_SIZE = 65536
+    SCAN_TIMEOUT = 15.0  # seconds to wait for the kernel's scan-complete event
+
+    def __init__(self, socketFactory=None, networkFactory=None, convertSSID=None, interfaceIndex=None):
+        super().__init__()
+        self.socketFactory = socketFactory if socketFactory is not None else _defaultSocketFactory
+        self.interfaceIndex = interfaceIndex if interfaceIndex is not None else socket.if_nametoindex
+
+        if networkFactory is None or convertSSID is None:
+            from wirelessengine import WirelessNetwork, WirelessEngine
+            networkFactory = WirelessNetwork
+            convertSSID = WirelessEngine.convertUnknownToString
+
+        self.networkFactory = networkFactory
+        self.convertSSID = convertSSID
+
+        self.familyId = None
+        self.scanGroupId = None
+        self.familyLock = Lock()
+        self.seq = 0
+        self.seqLock = Lock()
+
+    def nextSeq(self):
+        with self.seqLock:
+            self.seq = (self.seq + 1) & 0xffffffff
+            if self.seq == 0:
+                self.seq = 1
+            return self.seq
+
+    def openSocket(self):
+        try:
+            sock = self.socketFactory()
+        except (OSError, AttributeError) as e:
+            # AF_NETLINK missing (non-Linux) or no permission to open it
+            raise NL80211Error('Unable to open generic netlink socket: ' + str(e))
+
+        sock.settimeout(self.SCAN_TIMEOUT)
+        return sock
+
+    def request(self, sock, msgType, flags, cmd, attrs=b''):
+        seq = self.nextSeq()
+        sock.send(packMessage(msgType, flags | NLM_F_REQUEST, seq, cmd, attrs))
+        return seq
+
+    def readReplies(self, sock, seq):
+        # Yields the genl payloads of every reply to seq until the ack/done.
+        # Raises OSError with the kernel's errno on an error reply.
+        while True:
+            data = sock.recv(self.RECV_SIZE)
+            if len(data) == 0:
+                raise NL80211Error('Netlink socket closed')
+
+            for msgType, flags, msgSeq, payload in iterMessages(data):
+                if msgSeq != seq:
+                    # Multicast events (seq 0) or stale replies
+                    continue
+
+                if msgType == NLMSG_DONE:
+                    return
+                elif msgType == NLMSG_ERROR:
+                    errNum = _NLMSGERR.unpack_from(payload, 0)[0]
+                    if errNum != 0:
+                        raise OSError(-errNum, os.strerror(-errNum))
+                    return
+                elif msgType == NLMSG_NOOP:
+                    continue
+
+                yield payload
+
+                if not (flags & NLM_F_MULTI):
+                    return
+
+    def resolveFamily(self, sock):
+        # Returns the scan multicast group id; looked up once per scanner.
+        with self.familyLock:
+            if self.familyId is not None and self.scanGroupId is not None:
+                return self.scanGroupId
+
+            seq = self.request(sock, GENL_ID_CTRL, NLM_F_ACK, CTRL_CMD_GETFAMILY, packAttrString(CTRL_ATTR_FAMILY_NAME, 'nl80211'))
+
+            try:
+                for payload in self.readReplies(sock, seq):
+                    attrs = parseAttrs(payload, _GENLMSGHDR.size)
+
+                    if CTRL_ATTR_FAMILY_ID in attrs:
+                        self.familyId = struct.unpack_from('=H', attrs[CTRL_ATTR_FAMILY_ID])[0]
+
+                    if CTRL_ATTR_MCAST_GROUPS in attrs:
+                        for curGroup in parseAttrList(attrs[CTRL_ATTR_MCAST_GROUPS]):
+                            groupAttrs = parseAttrs(curGroup)
+                            groupName = groupAttrs.get(CTRL_ATTR_MCAST_GRP_NAME, b'').rstrip(b'\x00')
+                            if groupName == b'scan' and CTRL_ATTR_MCAST_GRP_ID in groupAttrs:
+                                self.scanGroupId = struct.unpack_from('=I', groupAttrs[CTRL_ATTR_MCAST_GRP_ID])[0]
+            except OSError as e:
+                raise NL80211Error('nl80211 not available: ' + str(e))
+
+            if self.familyId is None or self.scanGroupId is None:
+                self.familyId = None
+                raise NL80211Error('nl80211 family or scan group not found')
+
+            return self.scanGroupId
+
+    def triggerAndWait(self, sock, ifIndex, frequency):
+        attrs = packAttrU32(NL80211_ATTR_IFINDEX, ifIndex)
+        # Wildcard SSID makes it an active scan, the same as 'iw dev <if> scan'
+        attrs += packAttr(NL80211_ATTR_SCAN_SSIDS | 0x8000, packAttr(1, b''))
+        if frequency != 0:
+            attrs += packAttr(NL80211_ATTR_SCAN_FREQUENCIES | 0x8000, packAttrU32(1, int(frequency)))
+
+        seq = self.request(sock, self.familyId, NLM_F_ACK, NL80211_CMD_TRIGGER_SCAN, attrs)
+
+        # The ack and the scan-complete event are read off the same socket.  Events
+        # seen before the ack belong to an earlier scan and are ignored.
+        acked = False
+        while True:
+            data = sock.recv(self.RECV_SIZE)
+            if len(data) == 0:
+                raise NL80211Error('Netlink socket closed')
+
+            for msgType, flags, msgSeq, payload in iterMessages(data):
+                if msgType == NLMSG_ERROR and msgSeq == seq:
+                    errNum = _NLMSGERR.unpack_from(payload, 0)[0]
+                    if errNum != 0:
+                        raise OSError(-errNum, os.strerror(-errNum))
+                    acked = True
+                elif msgType == self.familyId and len(payload) >= _GENLMSGHDR.size:
+                    cmd = payload[0]
+                    if not acked or cmd not in (NL80211_CMD_NEW_SCAN_RESULTS, NL80211_CMD_SCAN_ABORTED):
+                        continue
+
+                    eventAttrs = parseAttrs(payload, _GENLMSGHDR.size)
+                    eventIf = eventAttrs.get(NL80211_ATTR_IFINDEX)
+                    if eventIf is None or struct.unpack_from('=I', eventIf)[0] != ifIndex:
+                        continue
+
+                    return cmd == NL80211_CMD_NEW_SCAN_RESULTS
+
+    def dumpScan(self, sock, ifIndex):
+        retVal = {}
+        now = datetime.datetime.now()
+
+        seq = self.request(sock, self.familyId, NLM_F_DUMP, NL80211_CMD_GET_SCAN, packAttrU32(NL80211_ATTR_IFINDEX, ifIndex))
+
+        for payload in self.readReplies(sock, seq):
+            attrs = parseAttrs(payload, _GENLMSGHDR.size)
+            if NL80211_ATTR_BSS not in attrs:
+                continue
+
+            curNetwork = self.buildNetwork(parseAttrs(attrs[NL80211_ATTR_BSS]), now)
+            if curNetwork is not None and curNetwork.channel > 0:
+                # Same rule as the text parser: entries without a channel are incomplete
+                retVal[curNetwork.getKey()] = curNetwork
+
+        return retVal
+
+    def buildNetwork(self, bssAttrs, now):
+        bssid = bssAttrs.get(NL80211_BSS_BSSID)
+        if bssid is None or len(bssid) != 6:
+            return None
+
+        curNetwork = self.networkFactory()
+        curNetwork.lastSeen = now
+        curNetwork.firstSeen = now
+        curNetwork.macAddr = ':'.join('%02x' % curByte for curByte in bssid)
+
+        if NL80211_BSS_FREQUENCY in bssAttrs:
+            curNetwork.frequency = struct.unpack_from('=I', bssAttrs[NL80211_BSS_FREQUENCY])[0]
+
+        if NL80211_BSS_CAPABILITY in bssAttrs:
+            capability = struct.unpack_from('=H', bssAttrs[NL80211_BSS_CAPABILITY])[0]
+            # "ESS Privacy" / "IBSS Privacy" only read adjacent in iw's capability
+            # list when none of the flags printed between them are set
+            privacyAdjacent = (capability & WLAN_CAPABILITY_PRIVACY) and not (capability & (WLAN_CAPABILITY_CF_POLLABLE | WLAN_CAPABILITY_CF_POLL_REQUEST))
+
+            if capability & WLAN_CAPABILITY_ESS:
+                curNetwork.mode = "AP"
+                if privacyAdjacent and not (capability & WLAN_CAPABILITY_IBSS):
+                    curNetwork.security = "WEP"
+                    curNetwork.privacy = "WEP"
+            elif capability & WLAN_CAPABILITY_IBSS:
+                curNetwork.mode = "Ad Hoc"
+                curNetwork.security = "[Ad-Hoc] Open"
+                if privacyAdjacent:
+                    curNetwork.security = "[Ad-Hoc] WEP"
+                    curNetwork.privacy = "WEP"
+
+        if NL80211_BSS_SIGNAL_MBM in bssAttrs:
+            signalMBM = struct.unpack_from('=i', bssAttrs[NL80211_BSS_SIGNAL_MBM])[0]
+            curNetwork.signal = int(signalMBM / 100)
+            curNetwork.strongestsignal = curNetwork.signal
+
+        if NL80211_BSS_INFORMATION_ELEMENTS in bssAttrs:
+            applyIEs(curNetwork, bssAttrs[NL80211_BSS_INFORMATION_ELEMENTS], self.convertSSID)
+
+        return curNetwork
+
+    def scan(self, interfaceName, frequency=0):
+        # Returns (retCode, errString, networks) just like WirelessEngine.scanForNetworks.
+        # Raises NL80211Error if netlink/nl80211 can't be used at all.
+        try:
+            ifIndex = self.interfaceIndex(interfaceName)
+        except OSError as e:
+            errNum = e.errno if e.errno else errno.ENODEV
+            return iwErrorCode(errNum), 'command failed: ' + os.strerror(errNum) + ' (-' + str(errNum) + ')', {}
+
+        sock = self.openSocket()
+
+        try:
+            scanGroupId = self.resolveFamily(sock)
+
+            try:
+                sock.setsockopt(SOL_NETLINK, NETLINK_ADD_MEMBERSHIP, scanGroupId)
+            except OSError as e:
+                raise NL80211Error('Unable to join nl80211 scan group: ' + str(e))
+
+            try:
+                if not self.triggerAndWait(sock, ifIndex, frequency):
+                    # iw prints 'scan aborted!' and exits cleanly with nothing listed
+                    return 0, '', {}
+
+                return 0, '', self.dumpScan(sock, ifIndex)
+            except socket.timeout:
+                return iwErrorCode(errno.ETIMEDOUT), 'Scan timed out', {}
+            except OSError as e:
+                errNum = e.errno if e.errno else errno.EIO
+                return iwErrorCode(errNum), 'command failed: ' + os.strerror(errNum) + ' (-' + str(errNum) + ')', {}
+            except (struct.error, IndexError) as e:
+                raise NL80211Error('Malformed nl80211 reply: ' + str(e))
+        finally:
+            try:
+                sock.close()
+            except:
+                pass
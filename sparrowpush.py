@@ -0,0 +1,472 @@
+#!/usr/bin/python3
+#
+# Copyright 2017 ghostop14
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+# Agent -> controller push.
+#
+# Scan payloads queued by the agent are coalesced into batches and sent to the
+# controller's '/api/ingest/batch' as gzip-compressed NDJSON (one
+# '/api/ingest' request body per line) over a single keep-alive session.
+# Controllers without the batch endpoint get the lines one at a time on
+# '/api/ingest' instead.
+#
+# Batches that can't be delivered go to a PushJournal on disk and are resent
+# oldest first once the controller answers again, with exponential backoff in
+# between.  The journal is bounded; when it is full the oldest batches are
+# dropped.  It is reloaded on start so an agent restart doesn't lose them.
+
+import datetime
+import json
+import os
+import queue
+import time
+from collections import deque
+from threading import Thread, Lock
+
+import requests
+
+from sparrowcommon import gzipCompress, gzipUncompress
+
+class PushRejected(Exception):
+    # The controller refused the batch (bad key, bad request).  Resending won't help.
+    pass
+
+class PushJournal(object):
+    MAX_BYTES = 32 * 1024 * 1024
+
+    # Batch files are named <sequence>-<payload count>-<oldest queued time in ms>.ndjson.gz
+    SUFFIX = '.ndjson.gz'
+
+    def __init__(self, directory, maxBytes=None):
+        if maxBytes is None:
+            maxBytes = PushJournal.MAX_BYTES
+
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.batches = deque()  # (sequence, filename, size, count, queuedTime)
+        self.totalBytes = 0
+        self.payloadCount = 0
+        self.nextSequence = 1
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.load()
+
+    def load(self):
+        found = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(PushJournal.SUFFIX):
+                continue
+
+            try:
+                sequence, count, queuedMs = filename[:-len(PushJournal.SUFFIX)].split('-')
+                fullPath = os.path.join(self.directory, filename)
+                found.append((int(sequence), fullPath, os.path.getsize(fullPath), int(count), int(queuedMs) / 1000.0))
+            except:
+                continue
+
+        found.sort()
+        for curBatch in found:
+            self.batches.append(curBatch)
+            self.totalBytes += curBatch[2]
+            self.payloadCount += curBatch[3]
+
+        if len(found) > 0:
+            self.nextSequence = found[-1][0] + 1
+
+    def __len__(self):
+        return len(self.batches)
+
+    def append(self, body, count, queuedTime):
+        # Stores a compressed batch.  Returns the number of payloads dropped to make room.
+        dropped = 0
+        while len(self.batches) > 0 and (self.totalBytes + len(body)) > self.maxBytes:
+            dropped += self.popOldest()
+
+        if len(body) > self.maxBytes:
+            return dropped + count
+
+        filename = os.path.join(self.directory, '%012d-%d-%d%s' % (self.nextSequence, count, int(queuedTime * 1000), PushJournal.SUFFIX))
+        tmpFilename = filename + '.tmp'
+        with open(tmpFilename, 'wb') as outputFile:
+            outputFile.write(body)
+        os.replace(tmpFilename, filename)
+
+        self.batches.append((self.nextSequence, filename, len(body), count, queuedTime))
+        self.nextSequence += 1
+        self.totalBytes += len(body)
+        self.payloadCount += count
+
+        return dropped
+
+    def peek(self):
+        # Returns (sequence, body, count, queuedTime) for the oldest batch, or None
+        while len(self.batches) > 0:
+            sequence, filename, size, count, queuedTime = self.batches[0]
+            try:
+                with open(filename, 'rb') as inputFile:
+                    return sequence, inputFile.read(), count, queuedTime
+            except:
+                # Deleted out from under us
+                self.popOldest()
+
+        return None
+
+    def remove(self, sequence):
+        if len(self.batches) > 0 and self.batches[0][0] == sequence:
+            self.popOldest()
+
+    def popOldest(self):
+        sequence, filename, size, count, queuedTime = self.batches.popleft()
+        self.totalBytes -= size
+        self.payloadCount -= count
+        try:
+            os.remove(filename)
+        except:
+            pass
+
+        return count
+
+    def oldestTime(self):
+        if len(self.batches) > 0:
+            return self.batches[0][4]
+
+        return None
+
+class ControllerPushClient(Thread):
+    MAX_QUEUE = 1000          # payloads waiting in memory for the push thread
+    MAX_BATCH_PAYLOADS = 50
+    MAX_BATCH_DELAY = 1.0     # seconds to wait for more payloads after the first
+    REQUEST_TIMEOUT = 10.0
+    INITIAL_BACKOFF = 1.0
+    MAX_BACKOFF = 300.0
+    RATE_WINDOW = 60.0        # seconds averaged for payloadspersecond
+
+    def __init__(self, cfg, journalDir=None):
+        super(ControllerPushClient, self).__init__()
+        self.daemon = True
+        self.signalStop = False
+        self.threadRunning = False
+        self.queue = queue.Queue(maxsize=ControllerPushClient.MAX_QUEUE)
+        self.controllerURL = ""
+        self.controllerAPIKey = ""
+        self.controllerAgentName = ""
+        self.pushEnabled = False
+        # None until the controller has told us whether it has /api/ingest/batch
+        self.batchSupported = None
+        self.session = requests.Session()
+        self.backoff = 0.0
+        self.nextAttempt = 0.0
+
+        if journalDir is None:
+            journalDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pushjournal')
+
+        self.journal = PushJournal(journalDir)
+
+        self.statsLock = Lock()
+        self.startTime = time.time()
+        self.payloadsQueued = 0
+        self.payloadsSent = 0
+        self.batchesSent = 0
+        self.bytesSent = 0
+        self.bytesUncompressed = 0
+        self.payloadsJournaled = 0
+        self.payloadsDropped = 0
+        self.sendFailures = 0
+        self.lastSuccess = None
+        self.lastDeliveryLag = None
+        self.recentSends = deque()  # (time, payload count) within RATE_WINDOW
+
+        self.configure(cfg)
+
+    def configure(self, cfg):
+        if cfg is None:
+            return
+        controllerURL = cfg.controllerURL if cfg.controllerURL else ""
+        controllerURL = controllerURL.rstrip('/')
+        if controllerURL != self.controllerURL:
+            self.batchSupported = None
+            self.nextAttempt = 0.0
+        self.controllerURL = controllerURL
+        self.controllerAPIKey = cfg.controllerAPIKey if cfg.controllerAPIKey else ""
+        self.controllerAgentName = cfg.controllerAgentName if cfg.controllerAgentName else ""
+        self.pushEnabled = cfg.pushEnabled and len(self.controllerURL) > 0
+
+    def stop(self):
+        self.signalStop = True
+        try:
+            self.queue.put_nowait(None)
+        except:
+            pass
+
+    def enqueue(self, scan_type, interface, payload):
+        if not self.pushEnabled or len(self.controllerURL) == 0:
+            return
+        item = {
+            'scan_type': scan_type,
+            'interface': interface,
+            'payload': payload,
+            'received_at': datetime.datetime.utcnow().isoformat() + 'Z',
+            'queued': time.time()
+        }
+        try:
+            self.queue.put_nowait(item)
+            with self.statsLock:
+                self.payloadsQueued += 1
+        except queue.Full:
+            with self.statsLock:
+                self.payloadsDropped += 1
+            print('Controller push queue is full. Dropping payload.')
+
+    def collectBatch(self, timeout=1.0):
+        # Blocks up to timeout for a payload, then gathers whatever else arrives
+        # within MAX_BATCH_DELAY.
+        try:
+            item = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return []
+
+        items = []
+        deadline = time.monotonic() + ControllerPushClient.MAX_BATCH_DELAY
+        while item is not None:
+            items.append(item)
+            if len(items) >= ControllerPushClient.MAX_BATCH_PAYLOADS or self.signalStop:
+                break
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+        return items
+
+    def encodeBatch(self, items):
+        # Returns (gzip'd NDJSON, uncompressed size)
+        lines = []
+        for curItem in items:
+            body = {
+                'agent_name': self.controllerAgentName,
+                'scan_type': curItem['scan_type'],
+                'interface': curItem['interface'],
+                'payload': curItem['payload'],
+                'received_at': curItem['received_at'],
+            }
+            lines.append(json.dumps(body))
+
+        ndjson = '\n'.join(lines) + '\n'
+
+        return gzipCompress(ndjson), len(ndjson)
+
+    def postBatch(self, body):
+        headers = {}
+        if len(self.controllerAPIKey) > 0:
+            headers['X-API-Key'] = self.controllerAPIKey
+
+        if self.batchSupported is not False:
+            batchHeaders = dict(headers)
+            batchHeaders['Content-Type'] = 'application/x-ndjson'
+            batchHeaders['Content-Encoding'] = 'gzip'
+
+            response = self.session.post(self.controllerURL + '/api/ingest/batch', data=body, headers=batchHeaders,
+                                         timeout=ControllerPushClient.REQUEST_TIMEOUT)
+            if response.status_code in [404, 405]:
+                # Older controller
+                self.batchSupported = False
+            else:
+                self.checkResponse(response)
+                self.batchSupported = True
+                return
+
+        # One at a time.  A failure part way through resends the earlier lines
+        # with the rest of the batch, so the controller may see duplicates.
+        headers['Content-Type'] = 'application/json'
+        for curLine in gzipUncompress(body).splitlines():
+            if len(curLine) == 0:
+                continue
+
+            response = self.session.post(self.controllerURL + '/api/ingest', data=curLine.encode('UTF-8'), headers=headers,
+                                         timeout=ControllerPushClient.REQUEST_TIMEOUT)
+            self.checkResponse(response)
+
+    def checkResponse(self, response):
+        if response.status_code >= 400:
+            if response.status_code < 500 and response.status_code not in [408, 429]:
+                raise PushRejected('Controller rejected payload: ' + str(response.status_code))
+
+            raise RuntimeError('Bad status code: ' + str(response.status_code))
+
+    def deliver(self, body, count, rawSize, queuedTime, journalSequence=None):
+        # Returns True if the batch is done with (sent or rejected)
+        try:
+            self.postBatch(body)
+        except PushRejected as e:
+            print('Failed to push payload to controller: ' + str(e))
+            with self.statsLock:
+                self.payloadsDropped += count
+            if journalSequence is not None:
+                self.journal.remove(journalSequence)
+            return True
+        except Exception as e:
+            with self.statsLock:
+                self.sendFailures += 1
+
+            if self.backoff == 0.0:
+                print('Unable to reach controller, holding payloads: ' + str(e))
+                self.backoff = ControllerPushClient.INITIAL_BACKOFF
+            else:
+                self.backoff = min(self.backoff * 2, ControllerPushClient.MAX_BACKOFF)
+            self.nextAttempt = time.monotonic() + self.backoff
+
+            if journalSequence is None:
+                self.spill(body, count, queuedTime)
+
+            return False
+
+        self.backoff = 0.0
+        self.nextAttempt = 0.0
+        if journalSequence is not None:
+            self.journal.remove(journalSequence)
+
+        now = time.time()
+        with self.statsLock:
+            self.payloadsSent += count
+            self.batchesSent += 1
+            self.bytesSent += len(body)
+            if rawSize:
+                self.bytesUncompressed += rawSize
+            self.lastSuccess = now
+            self.lastDeliveryLag = now - queuedTime
+            self.recentSends.append((now, count))
+
+        return True
+
+    def spill(self, body, count, queuedTime):
+        try:
+            dropped = self.journal.append(body, count, queuedTime)
+        except Exception as e:
+            print('Unable to write push journal: ' + str(e))
+            dropped = count
+            count = 0
+
+        with self.statsLock:
+            self.payloadsJournaled += count
+            self.payloadsDropped += dropped
+
+    def sendItems(self, items):
+        body, rawSize = self.encodeBatch(items)
+        queuedTime = min([curItem['queued'] for curItem in items])
+
+        # Keep ordering: nothing new goes out ahead of journaled batches
+        if len(self.journal) > 0 or time.monotonic() < self.nextAttempt or self.signalStop:
+            self.spill(body, len(items), queuedTime)
+        else:
+            self.deliver(body, len(items), rawSize, queuedTime)
+
+    def sendJournal(self):
+        # Resend journaled batches, oldest first, until one fails
+        while (not self.signalStop) and len(self.journal) > 0 and time.monotonic() >= self.nextAttempt:
+            # Don't let new payloads pile up while catching up
+            if self.queue.qsize() >= ControllerPushClient.MAX_BATCH_PAYLOADS:
+                return
+
+            batch = self.journal.peek()
+            if batch is None:
+                return
+
+            sequence, body, count, queuedTime = batch
+            if not self.deliver(body, count, None, queuedTime, sequence):
+                return
+
+    def run(self):
+        self.threadRunning = True
+        while (not self.signalStop):
+            items = self.collectBatch()
+            if len(items) > 0:
+                self.sendItems(items)
+
+            self.sendJournal()
+
+        # Whatever is still queued survives the restart in the journal
+        items = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if item is not None:
+                items.append(item)
+
+        if len(items) > 0:
+            self.sendItems(items)
+
+        self.session.close()
+        self.threadRunning = False
+
+    def getStats(self):
+        now = time.time()
+        with self.statsLock:
+            while len(self.recentSends) > 0 and (now - self.recentSends[0][0]) > ControllerPushClient.RATE_WINDOW:
+                self.recentSends.popleft()
+
+            recentCount = 0
+            for curTime, curCount in self.recentSends:
+                recentCount += curCount
+
+            stats = {
+                'enabled': self.pushEnabled,
+                'controllerurl': self.controllerURL,
+                'batchendpoint': self.batchSupported,
+                'queued': self.queue.qsize(),
+                'payloadsqueued': self.payloadsQueued,
+                'payloadssent': self.payloadsSent,
+                'batchessent': self.batchesSent,
+                'bytessent': self.bytesSent,
+                'bytesuncompressed': self.bytesUncompressed,
+                'payloadsjournaled': self.payloadsJournaled,
+                'payloadsdropped': self.payloadsDropped,
+                'sendfailures': self.sendFailures,
+                'payloadspersecond': recentCount / ControllerPushClient.RATE_WINDOW,
+                'lastsuccess': self.lastSuccess,
+                'lastdeliverylag': self.lastDeliveryLag,
+                'backoff': self.backoff,
+            }
+
+        stats['journalbatches'] = len(self.journal)
+        stats['journalpayloads'] = self.journal.payloadCount
+        stats['journalbytes'] = self.journal.totalBytes
+
+        # Age of the oldest payload not yet delivered
+        try:
+            oldestTime = self.journal.oldestTime()
+        except IndexError:
+            # Sent while we were looking
+            oldestTime = None
+
+        if oldestTime is not None:
+            stats['lag'] = now - oldestTime
+        else:
+            stats['lag'] = 0.0
+
+        return stats
@@ -0,0 +1,223 @@
+#!/usr/bin/python3
+#
+# Copyright 2017 ghostop14
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+# Incremental agent recordings.
+#
+# A recording is a table of CSV rows keyed by network/device.  Rather than
+# rewriting the whole CSV every scan, changed rows are appended to an
+# observation log next to it:
+#
+#   <name>.csv.obslog     one JSON line per changed row: ["<key>", "<csv row>"]
+#   <name>.csv.snapshot   every row as of the last compaction, same format
+#
+# The first line of both is [null, "<csv header>"].  Once the log grows past
+# the snapshot it is folded into a new snapshot and truncated, so disk writes
+# per scan follow the number of changed rows rather than the table size.
+# The CSV itself is regenerated on compaction, on demand (writeCSV) and when
+# the recording is closed, after which the log and snapshot are removed.
+#
+# If the agent dies mid-recording, rebuildRecording() regenerates the CSV from
+# whatever log and snapshot were left behind.
+
+import json
+import os
+from threading import Lock
+
+LOG_SUFFIX = '.obslog'
+SNAPSHOT_SUFFIX = '.snapshot'
+RECORDING_SUFFIXES = [LOG_SUFFIX, SNAPSHOT_SUFFIX]
+
+def isRecordingSidecar(filename):
+    for curSuffix in RECORDING_SUFFIXES:
+        if filename.endswith(curSuffix):
+            return True
+
+    return False
+
+def hasRecordingSidecar(csvFilename):
+    for curSuffix in RECORDING_SUFFIXES:
+        if os.path.isfile(csvFilename + curSuffix):
+            return True
+
+    return False
+
+def removeRecordingSidecars(csvFilename):
+    for curSuffix in RECORDING_SUFFIXES:
+        try:
+            os.remove(csvFilename + curSuffix)
+        except:
+            pass
+
+def readRecordLines(filename, rows):
+    # Replays a log or snapshot into rows.  Returns the header, or None.
+    # A torn last line from a crash is skipped.
+    header = None
+
+    try:
+        with open(filename, 'r') as inputFile:
+            for curLine in inputFile:
+                try:
+                    key, row = json.loads(curLine)
+                except:
+                    continue
+
+                if key is None:
+                    header = row
+                else:
+                    rows[key] = row
+    except:
+        pass
+
+    return header
+
+def writeFileAtomic(filename, lines):
+    tmpFilename = filename + '.tmp'
+
+    with open(tmpFilename, 'w') as outputFile:
+        for curLine in lines:
+            outputFile.write(curLine)
+
+    os.replace(tmpFilename, filename)
+
+    return os.path.getsize(filename)
+
+class IncrementalRecording(object):
+    # Bytes the log may reach before compaction, regardless of snapshot size
+    MIN_COMPACT_BYTES = 256 * 1024
+
+    def __init__(self, csvFilename, header):
+        self.csvFilename = csvFilename
+        self.logFilename = csvFilename + LOG_SUFFIX
+        self.snapshotFilename = csvFilename + SNAPSHOT_SUFFIX
+        self.header = header
+        # rows is read by the HTTP thread when the CSV is requested
+        self.lock = Lock()
+        self.rows = {}
+        self.pending = []
+        self.logFile = None
+        self.logBytes = 0
+        self.snapshotBytes = 0
+        self.closed = False
+
+        # Header-only CSV so the recording shows up in /system/getrecordings right away
+        self.compact()
+
+    def update(self, key, row):
+        # Queue a row for the next flush.  Returns True if it differed from the last one.
+        with self.lock:
+            if self.rows.get(key) == row:
+                return False
+
+            self.rows[key] = row
+            self.pending.append(json.dumps([key, row]) + '\n')
+
+        return True
+
+    def flush(self):
+        with self.lock:
+            if self.closed or len(self.pending) == 0:
+                return
+
+            pending = self.pending
+            self.pending = []
+
+            if self.logFile is None:
+                self.logFile = open(self.logFilename, 'a')
+                if self.logBytes == 0:
+                    pending.insert(0, json.dumps([None, self.header]) + '\n')
+
+            data = ''.join(pending)
+            self.logFile.write(data)
+            self.logFile.flush()
+            self.logBytes += len(data)
+
+            if self.logBytes > max(self.snapshotBytes, IncrementalRecording.MIN_COMPACT_BYTES):
+                self.compactLocked()
+
+    def compact(self):
+        with self.lock:
+            self.compactLocked()
+
+    def compactLocked(self):
+        # Snapshot first, then truncate the log.  A crash in between just replays
+        # rows the snapshot already has.
+        lines = [json.dumps([None, self.header]) + '\n']
+        for curKey, curRow in self.rows.items():
+            lines.append(json.dumps([curKey, curRow]) + '\n')
+
+        self.snapshotBytes = writeFileAtomic(self.snapshotFilename, lines)
+
+        if self.logFile is not None:
+            self.logFile.close()
+            self.logFile = None
+
+        open(self.logFilename, 'w').close()
+        self.logBytes = 0
+
+        self.writeCSVLocked()
+
+    def writeCSV(self):
+        with self.lock:
+            if not self.closed:
+                self.writeCSVLocked()
+
+    def writeCSVLocked(self):
+        lines = [self.header + '\n']
+        for curRow in self.rows.values():
+            lines.append(curRow + '\n')
+
+        writeFileAtomic(self.csvFilename, lines)
+
+    def close(self):
+        # Final CSV, then drop the log and snapshot
+        self.flush()
+
+        with self.lock:
+            if self.closed:
+                return
+
+            if self.logFile is not None:
+                self.logFile.close()
+                self.logFile = None
+
+            self.writeCSVLocked()
+            removeRecordingSidecars(self.csvFilename)
+            self.closed = True
+
+def rebuildRecording(csvFilename):
+    # Regenerates csvFilename from a log/snapshot left by an interrupted recording.
+    # Returns True if there was anything to rebuild from.
+    rows = {}
+    header = readRecordLines(csvFilename + SNAPSHOT_SUFFIX, rows)
+    logHeader = readRecordLines(csvFilename + LOG_SUFFIX, rows)
+
+    if header is None:
+        header = logHeader
+
+    if header is None:
+        return False
+
+    lines = [header + '\n']
+    for curRow in rows.values():
+        lines.append(curRow + '\n')
+
+    writeFileAtomic(csvFilename, lines)
+
+    return True
@@ -0,0 +1,219 @@
+#!/usr/bin/python3
+#
+# Copyright 2017 ghostop14
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+# Incremental WiFi scan results.
+#
+# The agent keeps one NetworkDiffTracker per scan flight (interface + hunt
+# channels).  Every successful scan bumps the tracker's generation and records
+# which networks were added, changed or removed.  A client that already holds
+# generation N asks for '/wireless/networks/<if>?since=N&epoch=E' and only gets
+# the delta; NetworkDiffMirror applies those deltas to rebuild the full list.
+#
+# Networks are plain WirelessNetwork.toJsondict() dictionaries here so the
+# module has no dependencies and can be used by sparrow-elastic as well.
+
+import datetime
+import os
+from threading import Lock
+
+# Fields that change on every scan without the network itself changing.  They
+# are never compared; clients refresh them from the response's 'seen' block.
+VOLATILE_FIELDS = ('lastseen', 'lat', 'lon', 'alt', 'speed', 'gpsvalid')
+
+# Also ignored when comparing: firstseen is reset on every agent-side parse and
+# the strongest* fields follow signal, which has its own threshold.
+_IGNORED_FIELDS = frozenset(VOLATILE_FIELDS + ('firstseen', 'signal', 'strongestsignal',
+                                               'strongestlat', 'strongestlon', 'strongestalt',
+                                               'strongestspeed', 'strongestgpsvalid'))
+
+def networkDictKey(netDict):
+    # Same key as WirelessNetwork.getKey()
+    return netDict['macAddr'] + netDict['ssid'] + str(netDict['channel'])
+
+class NetworkDiffTracker(object):
+    SIGNAL_THRESHOLD = 3    # dB change before a network is reported as changed
+    MAX_HISTORY = 64        # generations a client can fall behind before it gets a full list
+
+    def __init__(self):
+        self.lock = Lock()
+        # A new epoch means generation numbers from a previous agent run are meaningless
+        self.epoch = os.urandom(4).hex()
+        self.generation = 0
+        self.lastResult = {'errCode': 0, 'errString': '', 'gps': {}}
+        self.seen = {}
+
+        self._reported = {}     # {key: netDict as last reported to clients}
+        self._addedGen = {}     # {key: generation the key (re)appeared}
+        self._modifiedGen = {}  # {key: generation the reported dict last changed}
+        self._removedGen = {}   # {key: generation the key disappeared}
+
+    def _fieldsChanged(self, oldDict, newDict):
+        if abs(int(newDict['signal']) - int(oldDict['signal'])) >= NetworkDiffTracker.SIGNAL_THRESHOLD:
+            return True
+
+        for curField in newDict.keys():
+            if curField in _IGNORED_FIELDS:
+                continue
+
+            if oldDict.get(curField) != newDict[curField]:
+                return True
+
+        return False
+
+    def update(self, resultDict):
+        # resultDict is the dictionary WirelessEngine.getNetworksAsDict() builds.
+        # Adds 'generation' and 'epoch' to it so full responses can seed a client.
+        with self.lock:
+            self.lastResult = {'errCode': resultDict['errCode'], 'errString': resultDict['errString'],
+                               'gps': resultDict['gps']}
+
+            if resultDict['errCode'] == 0:
+                self.generation += 1
+                curGen = self.generation
+
+                currentKeys = set()
+                netList = resultDict['networks']
+
+                for curNet in netList:
+                    curKey = networkDictKey(curNet)
+                    currentKeys.add(curKey)
+
+                    oldNet = self._reported.get(curKey)
+
+                    if oldNet is None:
+                        self._reported[curKey] = curNet
+                        self._addedGen[curKey] = curGen
+                        self._modifiedGen[curKey] = curGen
+                        self._removedGen.pop(curKey, None)
+                    elif self._fieldsChanged(oldNet, curNet):
+                        self._reported[curKey] = curNet
+                        self._modifiedGen[curKey] = curGen
+
+                for curKey in list(self._reported.keys()):
+                    if curKey not in currentKeys:
+                        del self._reported[curKey]
+                        del self._addedGen[curKey]
+                        del self._modifiedGen[curKey]
+                        self._removedGen[curKey] = curGen
+
+                # Forget removals no client could still need
+                oldestGen = curGen - NetworkDiffTracker.MAX_HISTORY
+                for curKey in [k for k, gen in self._removedGen.items() if gen <= oldestGen]:
+                    del self._removedGen[curKey]
+
+                seen = {'lastseen': str(datetime.datetime.now())}
+                if len(netList) > 0:
+                    # Every network in a scan carries the same GPS position
+                    for curField in VOLATILE_FIELDS[1:]:
+                        seen[curField] = netList[0][curField]
+                self.seen = seen
+
+            resultDict['generation'] = self.generation
+            resultDict['epoch'] = self.epoch
+
+    def changesSince(self, sinceGeneration, epoch=None):
+        with self.lock:
+            retVal = dict(self.lastResult)
+            retVal['generation'] = self.generation
+            retVal['epoch'] = self.epoch
+            # Reported dictionaries keep the lastseen/GPS from when they were last sent
+            retVal['seen'] = self.seen
+
+            if ((epoch is not None and epoch != self.epoch) or (sinceGeneration > self.generation) or
+                    (sinceGeneration < self.generation - NetworkDiffTracker.MAX_HISTORY)):
+                retVal['full'] = True
+                retVal['networks'] = list(self._reported.values())
+                return retVal
+
+            added = []
+            changed = []
+
+            for curKey, curNet in self._reported.items():
+                if self._addedGen[curKey] > sinceGeneration:
+                    added.append(curNet)
+                elif self._modifiedGen[curKey] > sinceGeneration:
+                    changed.append(curNet)
+
+            retVal['full'] = False
+            retVal['added'] = added
+            retVal['changed'] = changed
+            retVal['removed'] = [k for k, gen in self._removedGen.items() if gen > sinceGeneration]
+
+            return retVal
+
+class NetworkDiffMirror(object):
+    # Client-side copy of an agent's network list, kept current from diff responses.
+    def __init__(self):
+        self.epoch = None
+        self.generation = None
+        self.networks = {}  # {key: netDict}
+
+    def reset(self):
+        self.epoch = None
+        self.generation = None
+        self.networks = {}
+
+    def getQueryString(self):
+        # Empty until the first response; the agent then answers with a full list
+        if self.generation is None or self.epoch is None:
+            return ''
+
+        return 'since=' + str(self.generation) + '&epoch=' + str(self.epoch)
+
+    def apply(self, responseDict):
+        # Returns (errCode, errString, {key: netDict}, updatedKeys).  updatedKeys holds
+        # the keys whose dictionaries were replaced; the rest only had their
+        # lastseen and GPS fields refreshed.
+        errCode = responseDict['errCode']
+        errString = responseDict['errString']
+
+        if errCode != 0:
+            return errCode, errString, {}, set()
+
+        if responseDict.get('full', True):
+            # Plain full list, or the agent could not produce a diff for our generation
+            self.networks = {}
+            for curNet in responseDict['networks']:
+                self.networks[networkDictKey(curNet)] = curNet
+
+            updatedKeys = set(self.networks.keys())
+        else:
+            for curKey in responseDict['removed']:
+                self.networks.pop(curKey, None)
+
+            updatedKeys = set()
+            for curNet in responseDict['added'] + responseDict['changed']:
+                curKey = networkDictKey(curNet)
+                self.networks[curKey] = curNet
+                updatedKeys.add(curKey)
+
+        seen = responseDict.get('seen')
+        if seen:
+            for curNet in self.networks.values():
+                curNet.update(seen)
+
+        self.generation = responseDict.get('generation')
+        self.epoch = responseDict.get('epoch')
+
+        if self.epoch is None:
+            # Older agent without diff support; keep asking for full lists
+            self.generation = None
+
+        return errCode, errString, self.networks, updatedKeys
@@ -39,6 +39,10 @@ from http import server as HTTPServer
 from socketserver import ThreadingMixIn
 
 from wirelessengine import WirelessEngine
+from sparrowscandiff import NetworkDiffTracker
+from sparrowagentstream import AgentEventStream, parseStreamQuery
+from sparrowpush import ControllerPushClient
+from sparrowrecording import IncrementalRecording, isRecordingSidecar, hasRecordingSidecar, removeRecordingSidecars, rebuildRecording
 from sparrowgps import GPSEngine, GPSEngineStatic,  GPSStatus,  SparrowGPS
 
 try:
@@ -75,6 +79,14 @@ class _ScanFlight:
 _inflight = {}            # {(interface, hunt_channels_tuple): _ScanFlight}
 _inflight_lock = Lock()   # protects _inflight dict and lockList creation
 
+# Generation-numbered change tracking behind '/wireless/networks/<if>?since=N'
+_diffTrackers = {}        # {(interface, hunt_channels_tuple): NetworkDiffTracker}
+
+# Completed scans / GPS changes for '/events' stream clients
+agentEventStream = AgentEventStream()
+streamScanThread = None
+streamScanThreadLock = Lock()
+
 gpsEngine = None
 curTime = datetime.datetime.now()
 
@@ -131,6 +143,7 @@ def deleteRecordingFiles(filelist):
         dirname, filename = os.path.split(curFilename)
         if len(filename) > 0:
             fullpath = recordingsDir + '/' + filename
+            removeRecordingSidecars(fullpath)
             try:
                 os.remove(fullpath)
             except:
@@ -153,7 +166,8 @@ def getRecordingFiles():
         for filename in os.listdir(recordingsDir):
             fullPath = recordingsDir + '/' + filename
 
-            if not os.path.isdir(fullPath):
+            # Incremental recording logs are internal; the CSV is what gets listed
+            if (not os.path.isdir(fullPath)) and (not isRecordingSidecar(filename)):
                 curFile = FileSystemFile()
                 curFile.filename = filename
                 curFile.size = os.path.getsize(fullPath)
@@ -622,97 +636,6 @@ class AgentConfigSettings(object):
         return True
 
 # ------------------  Controller Push Client ------------------------------
-class ControllerPushClient(Thread):
-    def __init__(self, cfg):
-        super(ControllerPushClient, self).__init__()
-        self.daemon = True
-        self.signalStop = False
-        self.threadRunning = False
-        self.queue = queue.Queue(maxsize=200)
-        self.controllerURL = ""
-        self.controllerAPIKey = ""
-        self.controllerAgentName = ""
-        self.pushEnabled = False
-        self.configure(cfg)
-
-    def configure(self, cfg):
-        if cfg is None:
-            return
-        controllerURL = cfg.controllerURL if cfg.controllerURL else ""
-        self.controllerURL = controllerURL.rstrip('/')
-        self.controllerAPIKey = cfg.controllerAPIKey if cfg.controllerAPIKey else ""
-        self.controllerAgentName = cfg.controllerAgentName if cfg.controllerAgentName else ""
-        self.pushEnabled = cfg.pushEnabled and len(self.controllerURL) > 0
-
-    def stop(self):
-        self.signalStop = True
-        try:
-            self.queue.put_nowait(None)
-        except:
-            pass
-
-    def enqueue(self, scan_type, interface, payload):
-        if not self.pushEnabled or len(self.controllerURL) == 0:
-            return
-        item = {
-            'scan_type': scan_type,
-            'interface': interface,
-            'payload': payload,
-            'attempts': 0,
-            'received_at': datetime.datetime.utcnow().isoformat() + 'Z'
-        }
-        try:
-            self.queue.put_nowait(item)
-        except queue.Full:
-            print('Controller push queue is full. Dropping payload.')
-
-    def run(self):
-        self.threadRunning = True
-        while (not self.signalStop):
-            try:
-                item = self.queue.get(timeout=1.0)
-            except queue.Empty:
-                continue
-
-            if item is None:
-                try:
-                    self.queue.task_done()
-                except:
-                    pass
-                continue
-
-            endpoint = self.controllerURL + '/api/ingest'
-            headers = {'Content-Type': 'application/json'}
-            if len(self.controllerAPIKey) > 0:
-                headers['X-API-Key'] = self.controllerAPIKey
-
-            body = {
-                'agent_name': self.controllerAgentName,
-                'scan_type': item['scan_type'],
-                'interface': item['interface'],
-                'payload': item['payload'],
-                'received_at': item['received_at'],
-            }
-
-            try:
-                response = requests.post(endpoint, json=body, headers=headers, timeout=5)
-                if response.status_code >= 400:
-                    raise RuntimeError('Bad status code: ' + str(response.status_code))
-            except Exception as e:
-                item['attempts'] += 1
-                if item['attempts'] < 3 and (not self.signalStop):
-                    try:
-                        self.queue.put_nowait(item)
-                    except queue.Full:
-                        print('Controller push queue is full. Dropping payload.')
-                else:
-                    print('Failed to push payload to controller: ' + str(e))
-            finally:
-                self.queue.task_done()
-
-        self.threadRunning = False
-
-
 def startPushClient(cfg):
     global controllerPushClient
 
@@ -732,6 +655,14 @@ def stopPushClient():
 
     if controllerPushClient:
         controllerPushClient.stop()
+
+        # Give it a moment to journal anything still queued
+        i=0
+        maxCycles = 2 /0.2
+        while (controllerPushClient.threadRunning) and (i<maxCycles):
+            sleep(0.2)
+            i += 1
+
         controllerPushClient = None
 
 
@@ -741,8 +672,229 @@ def queuePushPayload(scan_type, interface, payload):
     if controllerPushClient and controllerPushClient.pushEnabled:
         controllerPushClient.enqueue(scan_type, interface, payload)
 
+# ------------------  Coalesced WiFi scans  ------------------------------
+def getAgentGPSCoord():
+    # Current position from whichever GPS source the agent is using, or None
+    if useMavlink:
+        gpsCoord = GPSStatus()
+        gpsCoord.gpsInstalled = True
+        gpsCoord.gpsRunning = True
+        gpsCoord.isValid = mavlinkGPSThread.synchronized
+        gpsCoord.latitude = mavlinkGPSThread.latitude
+        gpsCoord.longitude = mavlinkGPSThread.longitude
+        gpsCoord.altitude = mavlinkGPSThread.altitude
+        gpsCoord.speed = mavlinkGPSThread.vehicle.getAirSpeed()
+        return gpsCoord
+    elif gpsEngine.gpsValid():
+        return gpsEngine.lastCoord
+    else:
+        return None
+
+def runWifiScanFlight(curInterface, huntChannelList, huntInterfaces=None):
+    # Single-flight request coalescing: callers with the same interface + hunt
+    # channels share one scan, and a scan younger than _SCAN_CACHE_TTL is reused.
+    # huntInterfaces spreads the hunt channels across additional radios.
+    #
+    # Returns (errmsg, jsonstr, netdict, diffTracker).  errmsg is None on success.
+    # netdict is only returned to the caller that actually ran the scan.
+    global lockList
+
+    if huntInterfaces is None:
+        huntInterfaces = []
+
+    flightKey = (curInterface, tuple(huntChannelList))
+    if len(huntInterfaces) > 0:
+        flightKey = (curInterface, tuple(huntChannelList), tuple(huntInterfaces))
+
+    with _inflight_lock:
+        diffTracker = _diffTrackers.get(flightKey)
+        if diffTracker is None:
+            diffTracker = NetworkDiffTracker()
+            _diffTrackers[flightKey] = diffTracker
+
+    # Fast path: return cached result if fresh enough
+    cached = _scanCache.get(flightKey)
+    if cached and (time.monotonic() - cached[0]) < _SCAN_CACHE_TTL:
+        return None, cached[1], None, diffTracker
+
+    # Check if a scan with these parameters is already in-flight
+    leader = False
+    with _inflight_lock:
+        flight = _inflight.get(flightKey)
+        if flight is None:
+            flight = _ScanFlight()
+            _inflight[flightKey] = flight
+            leader = True
+        # Ensure per-interface lock exists (under _inflight_lock to fix TOCTOU)
+        for lockInterface in [curInterface] + huntInterfaces:
+            if lockInterface not in lockList:
+                lockList[lockInterface] = Lock()
+
+    if not leader:
+        # Wait for the leader's scan to finish
+        flight.event.wait(timeout=25)
+        if flight.error:
+            return flight.error, None, None, diffTracker
+        elif flight.result:
+            return None, flight.result, None, diffTracker
+        else:
+            return 'Scan timeout', None, None, diffTracker
+
+    # Leader path: perform the actual scan
+    curLock = lockList[curInterface]
+    jsonstr = ''
+    netdict = None
+    try:
+        if (len(huntInterfaces) > 0) and (len(huntChannelList) > 0):
+            # Each radio's hunt thread takes its own lock from lockList
+            gpsCoord = getAgentGPSCoord()
+            retCode, errString, netdict=WirelessEngine.getNetworksAsDict(curInterface, gpsCoord, huntChannelList,
+                                                                         huntInterfaces, lockList)
+        else:
+            with curLock:
+                gpsCoord = getAgentGPSCoord()
+                retCode, errString, netdict=WirelessEngine.getNetworksAsDict(curInterface, gpsCoord, huntChannelList)
+
+        if useRPILeds and not useMavlink:
+            if gpsCoord is not None:
+                SparrowRPi.redLED(SparrowRPi.LIGHT_STATE_ON)
+            else:
+                SparrowRPi.redLED(SparrowRPi.LIGHT_STATE_HEARTBEAT)
+
+        # Stamps netdict with the new generation/epoch
+        diffTracker.update(netdict)
+        jsonstr = json.dumps(netdict)
+
+        # Cache before signaling waiters so new arrivals hit the fast path
+        _scanCache[flightKey] = (time.monotonic(), jsonstr)
+        flight.result = jsonstr
+
+        if retCode == 0:
+            agentEventStream.publish('wifi', curInterface, netdict)
+    except Exception as e:
+        flight.error = str(e)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(flightKey, None)
+        flight.event.set()
+
+    if flight.error:
+        return flight.error, None, None, diffTracker
+
+    return None, jsonstr, netdict, diffTracker
+
+def getBluetoothDeviceDicts():
+    # Discovered bluetooth devices as json dictionaries, stamped with the current position
+    gpsCoord = SparrowGPS()
+    agentCoord = getAgentGPSCoord()
+    if agentCoord is not None:
+        gpsCoord.copy(agentCoord)
+
+    # errcode, devices = bluetooth.getDiscoveredDevices()
+    bluetooth.updateDeviceList()
+
+    bluetooth.deviceLock.acquire()
+    devdict = []
+    now = datetime.datetime.now()
+    for curKey in bluetooth.devices.keys():
+        curDevice = bluetooth.devices[curKey]
+        elapsedTime =  now - curDevice.lastSeen
+
+        # This is a little bit of a hack for the BlueHydra side since it can take a while to see devices or have
+        # them show up in the db.  For LE discovery scans this will always be pretty quick.
+        if elapsedTime.total_seconds() < 120:
+            curDevice.gps.copy(gpsCoord)
+            if curDevice.rssi >= curDevice.strongestRssi:
+                curDevice.strongestRssi = curDevice.rssi
+                curDevice.strongestgps.copy(gpsCoord)
+
+        entryDict = curDevice.toJsondict()
+        devdict.append(entryDict)
+
+    bluetooth.deviceLock.release()
+
+    return devdict
+
+# ------------------  Event stream scan thread  ------------------------------
+class StreamScanThread(Thread):
+    # Runs while '/events' clients are connected.  Scans the interfaces they asked
+    # for (through runWifiScanFlight, so polling clients share the same scans),
+    # and publishes bluetooth snapshots and GPS changes.
+    def __init__(self):
+        super(StreamScanThread, self).__init__()
+        self.signalStop = False
+        self.scanDelay = 0.5  # seconds
+        self.bluetoothInterval = 2.0  # seconds
+        self.threadRunning = False
+        self.daemon = True
+        self.lastGPS = None
+        self.lastBluetooth = 0.0
+
+    def publishGPS(self):
+        gpsCoord = getAgentGPSCoord()
+
+        if gpsCoord is not None:
+            curGPS = (True, gpsCoord.latitude, gpsCoord.longitude, gpsCoord.altitude, gpsCoord.speed)
+        else:
+            curGPS = (False, 0.0, 0.0, 0.0, 0.0)
+
+        if curGPS == self.lastGPS:
+            return
+
+        self.lastGPS = curGPS
+        gpsdict = {}
+        gpsdict['gpssynch'] = str(curGPS[0])
+        if curGPS[0]:
+            gpsPos = {}
+            gpsPos['latitude'] = curGPS[1]
+            gpsPos['longitude'] = curGPS[2]
+            gpsPos['altitude'] = curGPS[3]
+            gpsPos['speed'] = curGPS[4]
+            gpsdict['gpspos'] = gpsPos
+
+        agentEventStream.publish('gps', '', gpsdict)
+
+    def run(self):
+        self.threadRunning = True
+
+        while (not self.signalStop) and agentEventStream.hasClients() and (not agentEventStream.closed):
+            # Results are published by runWifiScanFlight when a scan actually runs
+            for curInterface in agentEventStream.getSubscribedInterfaces():
+                try:
+                    runWifiScanFlight(curInterface, [])
+                except:
+                    pass
+
+            try:
+                self.publishGPS()
+            except:
+                pass
+
+            if hasBluetooth and bluetooth.discoveryRunning() and ((time.monotonic() - self.lastBluetooth) >= self.bluetoothInterval):
+                self.lastBluetooth = time.monotonic()
+                try:
+                    btdict = {'errcode': 0, 'errmsg': '', 'devices': getBluetoothDeviceDicts()}
+                    agentEventStream.publish('bluetooth', '', btdict)
+                except:
+                    pass
+
+            sleep(self.scanDelay)
+
+        self.threadRunning = False
+
+def startStreamScanThread():
+    global streamScanThread
+
+    with streamScanThreadLock:
+        if (streamScanThread is None) or (not streamScanThread.is_alive()):
+            streamScanThread = StreamScanThread()
+            streamScanThread.start()
+
 # ------------------  Agent auto scan thread  ------------------------------
 class AutoAgentScanThread(Thread):
+    WIFI_HEADER = 'macAddr,vendor,SSID,Security,Privacy,Channel,Frequency,Signal Strength,Strongest Signal Strength,Bandwidth,Last Seen,First Seen,GPS Valid,Latitude,Longitude,Altitude,Speed,Strongest GPS Valid,Strongest Latitude,Strongest Longitude,Strongest Altitude,Strongest Speed'
+    BT_HEADER = 'uuid,Address,Name,Company,Manufacturer,Type,RSSI,TX Power,Strongest RSSI,Est Range (m),Last Seen,GPS Valid,Latitude,Longitude,Altitude,Speed,Strongest GPS Valid,Strongest Latitude,Strongest Longitude,Strongest Altitude,Strongest Speed'
+
     def __init__(self, interface):
         global lockList
         global hasBluetooth
@@ -755,8 +907,8 @@ class AutoAgentScanThread(Thread):
         self.discoveredNetworks = {}
         self.discoveredBluetoothDevices = {}
         self.daemon = True
-        self._networksDirty = False
-        self._lastExportTime = 0.0
+        # Keys of networks updated since the last export
+        self._changedNetworks = set()
 
         try:
             self.hostname = os.uname()[1]
@@ -783,6 +935,13 @@ class AutoAgentScanThread(Thread):
         self.btfilename = './recordings/' + self.hostname  + '_bt_' + str(now.year) + "-" + TwoDigits(str(now.month)) + "-" + TwoDigits(str(now.day))
         self.btfilename += "_" + TwoDigits(str(now.hour)) + "_" + TwoDigits(str(now.minute)) + "_" + TwoDigits(str(now.second)) + ".csv"
 
+        self.wifiRecording = IncrementalRecording(self.filename, AutoAgentScanThread.WIFI_HEADER)
+
+        if hasBluetooth:
+            self.btRecording = IncrementalRecording(self.btfilename, AutoAgentScanThread.BT_HEADER)
+        else:
+            self.btRecording = None
+
         if hasBluetooth:
             print('Capturing on ' + interface + ' and writing wifi to ' + self.filename)
             print('and writing bluetooth to ' + self.btfilename)
@@ -843,7 +1002,7 @@ class AutoAgentScanThread(Thread):
                         curKey = curNet.getKey()
                         if curKey not in self.discoveredNetworks.keys():
                             self.discoveredNetworks[curKey] = curNet
-                            self._networksDirty = True
+                            self._changedNetworks.add(curKey)
                         else:
                             # Network exists, need to update it.
                             pastNet = self.discoveredNetworks[curKey]
@@ -861,7 +1020,15 @@ class AutoAgentScanThread(Thread):
                                 curNet.strongestgps.isValid = pastNet.strongestgps.isValid
 
                             self.discoveredNetworks[curKey] = curNet
-                            self._networksDirty = True
+                            self._changedNetworks.add(curKey)
+
+                    if agentEventStream.hasClients():
+                        netdict = {'errCode': 0, 'errString': '', 'networks': []}
+                        for curNet in wirelessNetworks.values():
+                            netdict['networks'].append(curNet.toJsondict())
+                        netdict['gps'] = {'latitude': gpsCoord.latitude, 'longitude': gpsCoord.longitude,
+                                          'altitude': gpsCoord.altitude, 'speed': gpsCoord.speed}
+                        agentEventStream.publish('wifi', self.interface, netdict)
 
                     if not self.signalStop:
                         self.exportNetworks()
@@ -898,8 +1065,25 @@ class AutoAgentScanThread(Thread):
             # Start normal discovery
             bluetooth.stopDiscovery()
 
+        # Final CSVs
+        self.wifiRecording.close()
+        if self.btRecording:
+            self.btRecording.close()
+
         self.threadRunning = False
 
+    def refreshRecording(self, fullPath):
+        # Brings the CSV up to date if fullPath is one of ours.  Called from the
+        # HTTP thread before a recording is sent.
+        fullPath = os.path.abspath(fullPath)
+
+        for curRecording in [self.wifiRecording, self.btRecording]:
+            if curRecording and os.path.abspath(curRecording.csvFilename) == fullPath:
+                curRecording.writeCSV()
+                return True
+
+        return False
+
     def ouiLookup(self, macAddr):
         clientVendor = ""
 
@@ -913,14 +1097,7 @@ class AutoAgentScanThread(Thread):
         return clientVendor
 
     def exportBluetoothDevices(self, devices):
-        try:
-            btOutputFile = open(self.btfilename, 'w')
-        except:
-            print('ERROR: Unable to write to bluetooth file ' + self.filename)
-            return
-
-        btOutputFile.write('uuid,Address,Name,Company,Manufacturer,Type,RSSI,TX Power,Strongest RSSI,Est Range (m),Last Seen,GPS Valid,Latitude,Longitude,Altitude,Speed,Strongest GPS Valid,Strongest Latitude,Strongest Longitude,Strongest Altitude,Strongest Speed\n')
-
+        # Only devices whose row changed reach the disk
         for curKey in devices.keys():
             curData = devices[curKey]
 
@@ -935,43 +1112,46 @@ class AutoAgentScanThread(Thread):
             else:
                 txPower = 'Unknown'
 
-            btOutputFile.write(curData.uuid  + ',' + curData.macAddress + ',"' + curData.name + '","' + curData.company + '","' + curData.manufacturer)
-            btOutputFile.write('","' + btType + '",' + str(curData.rssi) + ',' + str(curData.strongestRssi) + ',' + txPower + ',' + str(curData.iBeaconRange) + ',' +
-                                    curData.lastSeen.strftime("%m/%d/%Y %H:%M:%S") + ',' +
-                                    str(curData.gps.isValid) + ',' + str(curData.gps.latitude) + ',' + str(curData.gps.longitude) + ',' + str(curData.gps.altitude) + ',' + str(curData.gps.speed) + ',' +
-                                    str(curData.strongestgps.isValid) + ',' + str(curData.strongestgps.latitude) + ',' + str(curData.strongestgps.longitude) + ',' + str(curData.strongestgps.altitude) + ',' + str(curData.strongestgps.speed) + '\n')
-
-        btOutputFile.close()
+            row = (curData.uuid  + ',' + curData.macAddress + ',"' + curData.name + '","' + curData.company + '","' + curData.manufacturer +
+                   '","' + btType + '",' + str(curData.rssi) + ',' + str(curData.strongestRssi) + ',' + txPower + ',' + str(curData.iBeaconRange) + ',' +
+                   curData.lastSeen.strftime("%m/%d/%Y %H:%M:%S") + ',' +
+                   str(curData.gps.isValid) + ',' + str(curData.gps.latitude) + ',' + str(curData.gps.longitude) + ',' + str(curData.gps.altitude) + ',' + str(curData.gps.speed) + ',' +
+                   str(curData.strongestgps.isValid) + ',' + str(curData.strongestgps.latitude) + ',' + str(curData.strongestgps.longitude) + ',' + str(curData.strongestgps.altitude) + ',' + str(curData.strongestgps.speed))
 
-    def exportNetworks(self):
-        now = time.monotonic()
-        if not self._networksDirty and (now - self._lastExportTime) < 5.0:
-            return
-        self._networksDirty = False
-        self._lastExportTime = now
+            self.btRecording.update(curKey, row)
 
         try:
-            self.outputFile = open(self.filename, 'w')
+            self.btRecording.flush()
         except:
-            print('ERROR: Unable to write to wifi file ' + self.filename)
+            print('ERROR: Unable to write to bluetooth file ' + self.btfilename)
+
+    def exportNetworks(self):
+        # Appends networks updated since the last call to the recording log
+        if len(self._changedNetworks) == 0:
             return
 
-        self.outputFile.write('macAddr,vendor,SSID,Security,Privacy,Channel,Frequency,Signal Strength,Strongest Signal Strength,Bandwidth,Last Seen,First Seen,GPS Valid,Latitude,Longitude,Altitude,Speed,Strongest GPS Valid,Strongest Latitude,Strongest Longitude,Strongest Altitude,Strongest Speed\n')
+        changedNetworks = self._changedNetworks
+        self._changedNetworks = set()
 
-        for netKey in self.discoveredNetworks.keys():
+        for netKey in changedNetworks:
             curData = self.discoveredNetworks[netKey]
             vendor = self.ouiLookup(curData.macAddr)
 
             if vendor is None:
                 vendor = ''
 
-            self.outputFile.write(curData.macAddr  + ',' + vendor + ',"' + curData.ssid + '",' + curData.security + ',' + curData.privacy)
-            self.outputFile.write(',' + curData.getChannelString() + ',' + str(curData.frequency) + ',' + str(curData.signal) + ',' + str(curData.strongestsignal) + ',' + str(curData.bandwidth) + ',' +
-                                    curData.lastSeen.strftime("%m/%d/%Y %H:%M:%S") + ',' + curData.firstSeen.strftime("%m/%d/%Y %H:%M:%S") + ',' +
-                                    str(curData.gps.isValid) + ',' + str(curData.gps.latitude) + ',' + str(curData.gps.longitude) + ',' + str(curData.gps.altitude) + ',' + str(curData.gps.speed) + ',' +
-                                    str(curData.strongestgps.isValid) + ',' + str(curData.strongestgps.latitude) + ',' + str(curData.strongestgps.longitude) + ',' + str(curData.strongestgps.altitude) + ',' + str(curData.strongestgps.speed) + '\n')
+            row = (curData.macAddr  + ',' + vendor + ',"' + curData.ssid + '",' + curData.security + ',' + curData.privacy +
+                   ',' + curData.getChannelString() + ',' + str(curData.frequency) + ',' + str(curData.signal) + ',' + str(curData.strongestsignal) + ',' + str(curData.bandwidth) + ',' +
+                   curData.lastSeen.strftime("%m/%d/%Y %H:%M:%S") + ',' + curData.firstSeen.strftime("%m/%d/%Y %H:%M:%S") + ',' +
+                   str(curData.gps.isValid) + ',' + str(curData.gps.latitude) + ',' + str(curData.gps.longitude) + ',' + str(curData.gps.altitude) + ',' + str(curData.gps.speed) + ',' +
+                   str(curData.strongestgps.isValid) + ',' + str(curData.strongestgps.latitude) + ',' + str(curData.strongestgps.longitude) + ',' + str(curData.strongestgps.altitude) + ',' + str(curData.strongestgps.speed))
+
+            self.wifiRecording.update(netKey, row)
 
-        self.outputFile.close()
+        try:
+            self.wifiRecording.flush()
+        except:
+            print('ERROR: Unable to write to wifi file ' + self.filename)
 
 # ------------------  Announce thread  ------------------------------
 class AnnounceThread(Thread):
@@ -1083,6 +1263,8 @@ class SparrowWiFiAgent(object):
         except KeyboardInterrupt:
             pass
 
+        # Release any '/events' handlers so server_close() doesn't wait on them
+        agentEventStream.close()
         httpd.server_close()
 
         if useRPILeds:
@@ -1707,6 +1889,7 @@ class SparrowWiFiAgentRequestHandler(HTTPServer.BaseHTTPRequestHandler):
                                     '/cell/status',
                                     '/cell/results',
                                     '/system/getrecordings',
+                                    '/system/pushstats',
                                     '/bluetooth/present',
                                    '/bluetooth/scanstart',
                                   '/bluetooth/scanstop',
@@ -1728,6 +1911,7 @@ class SparrowWiFiAgentRequestHandler(HTTPServer.BaseHTTPRequestHandler):
 
         # partials that have more in the URL
         allowedstarturls=['/wireless/networks/',
+                                    '/events',
                                     '/falcon/startmonmode/',
                                     '/falcon/stopmonmode/',
                                     '/falcon/scanrunning/',
@@ -1751,6 +1935,63 @@ class SparrowWiFiAgentRequestHandler(HTTPServer.BaseHTTPRequestHandler):
 
         return False
 
+    def sendEventStream(s):
+        # Long-lived '/events' response: newline-delimited JSON until the client goes away
+        queryString = ''
+        if '?' in s.path:
+            queryString = s.path.split('?', 1)[1]
+
+        interfaces, eventTypes, lastId, epoch = parseStreamQuery(queryString)
+
+        if lastId is None:
+            try:
+                lastId = int(s.headers.get('Last-Event-ID'))
+            except:
+                lastId = None
+
+        try:
+            s.send_response(200)
+            s.send_header("Content-type", "application/x-ndjson")
+            s.send_header("Cache-Control", "no-cache")
+            if allowCors:
+                s.send_header("Access-Control-Allow-Origin", "*")
+            s.end_headers()
+        except:
+            return
+
+        startId, reset = agentEventStream.resumePoint(lastId, epoch)
+
+        agentEventStream.addClient(interfaces)
+        startStreamScanThread()
+
+        try:
+            hellodict = {'type': 'hello', 'epoch': agentEventStream.epoch, 'id': startId}
+            s.wfile.write((json.dumps(hellodict) + '\n').encode("UTF-8"))
+            if reset:
+                s.wfile.write((json.dumps({'type': 'reset'}) + '\n').encode("UTF-8"))
+            s.wfile.flush()
+
+            lastWrite = time.monotonic()
+
+            while not agentEventStream.closed:
+                startId, lines = agentEventStream.waitForEvents(startId, eventTypes, AgentEventStream.HEARTBEAT_INTERVAL)
+
+                if len(lines) > 0:
+                    s.wfile.write(b''.join(lines))
+                elif (time.monotonic() - lastWrite) >= AgentEventStream.HEARTBEAT_INTERVAL:
+                    # Lets both ends notice a dead connection
+                    s.wfile.write((json.dumps({'type': 'heartbeat'}) + '\n').encode("UTF-8"))
+                else:
+                    continue
+
+                s.wfile.flush()
+                lastWrite = time.monotonic()
+        except:
+            # Client disconnected
+            pass
+        finally:
+            agentEventStream.removeClient(interfaces)
+
     def sendFile(s, passedfilename):
         # Directory traversal safety check
         dirname, runfilename = os.path.split(os.path.abspath(__file__))
@@ -1759,6 +2000,14 @@ class SparrowWiFiAgentRequestHandler(HTTPServer.BaseHTTPRequestHandler):
 
         fullPath = recordingsDir + '/' + filename
 
+        # Recordings are kept as an incremental log; bring the CSV up to date first
+        if (recordThread is None) or (not recordThread.refreshRecording(fullPath)):
+            if hasRecordingSidecar(fullPath):
+                try:
+                    rebuildRecording(fullPath)
+                except:
+                    pass
+
         if not os.path.isfile(fullPath):
             s.send_response(400)
             s.send_header("Content-type", "application/json")
@@ -1864,7 +2113,7 @@ class SparrowWiFiAgentRequestHandler(HTTPServer.BaseHTTPRequestHandler):
 
             """Respond to a GET request."""
             if (not s.path.startswith('/system/getrecording/') and (not s.path == ('/bluetooth/scanstatus')) and
-                (not s.path == ('/spectrum/scanstatus'))):
+                (not s.path == ('/spectrum/scanstatus')) and (not s.path.startswith('/events'))):
                 # In getrecording we may adjust the content type header based on file extension
                 # Spectrum we'll gzip
                 try:
@@ -1889,6 +2138,8 @@ class SparrowWiFiAgentRequestHandler(HTTPServer.BaseHTTPRequestHandler):
                     s.wfile.write(jsonstr.encode("UTF-8"))
                 except:
                     pass
+            elif s.path.startswith('/events'):
+                s.sendEventStream()
             elif '/wireless/networks/' in s.path:
                 # THIS IS THE NORMAL SCAN
                 inputstr = s.path.replace('/wireless/networks/', '')
@@ -1914,18 +2165,37 @@ class SparrowWiFiAgentRequestHandler(HTTPServer.BaseHTTPRequestHandler):
                         pass
                     return
 
-                if '?' in inputstr:
-                    splitlist = inputstr.split('?')
-                    curInterface = splitlist[0]
-                else:
-                    curInterface = inputstr
-
-                p = re.compile('.*Frequencies=(.*)', re.IGNORECASE)
+                p = re.compile('.*Frequencies=([^&]*)', re.IGNORECASE)
                 try:
                     channelStr = p.search(inputstr).group(1)
                 except:
                     channelStr = ""
 
+                # Incremental mode: since=<generation>[&epoch=<epoch>]
+                p = re.compile('.*[?&]since=([0-9]+)', re.IGNORECASE)
+                try:
+                    sinceGeneration = int(p.search(inputstr).group(1))
+                except:
+                    sinceGeneration = None
+
+                p = re.compile('.*[?&]epoch=([0-9a-fA-F]+)', re.IGNORECASE)
+                try:
+                    sinceEpoch = p.search(inputstr).group(1).lower()
+                except:
+                    sinceEpoch = None
+
+                # Multi-radio hunt: HuntInterfaces=wlan1,wlan2 share the Frequencies list with this interface
+                p = re.compile('.*[?&]HuntInterfaces=([^&]*)', re.IGNORECASE)
+                try:
+                    huntInterfaceStr = p.search(inputstr).group(1)
+                except:
+                    huntInterfaceStr = ""
+
+                huntInterfaces = []
+                for curItem in huntInterfaceStr.split(','):
+                    if curItem.isalnum() and (curItem != fieldValue) and (curItem not in huntInterfaces):
+                        huntInterfaces.append(curItem)
+
                 huntChannelList = []
 
                 if ',' in channelStr:
@@ -1948,87 +2218,24 @@ class SparrowWiFiAgentRequestHandler(HTTPServer.BaseHTTPRequestHandler):
                     SparrowRPi.greenLED(SparrowRPi.LIGHT_STATE_OFF)
                     sleep(0.1)
 
-                # --- Single-flight request coalescing ---
-                # Requests with the same interface + hunt channels share one scan.
-                flightKey = (curInterface, tuple(huntChannelList))
+                errmsg, jsonstr, netdict, diffTracker = runWifiScanFlight(fieldValue, huntChannelList, huntInterfaces)
 
-                # Fast path: return cached result if fresh enough
-                cached = _scanCache.get(flightKey)
-                if cached and (time.monotonic() - cached[0]) < _SCAN_CACHE_TTL:
-                    s.wfile.write(cached[1].encode("UTF-8"))
-                    return
-
-                # Check if a scan with these parameters is already in-flight
-                leader = False
-                with _inflight_lock:
-                    flight = _inflight.get(flightKey)
-                    if flight is None:
-                        flight = _ScanFlight()
-                        _inflight[flightKey] = flight
-                        leader = True
-                    # Ensure per-interface lock exists (under _inflight_lock to fix TOCTOU)
-                    if curInterface not in lockList:
-                        lockList[curInterface] = Lock()
-
-                if not leader:
-                    # Wait for the leader's scan to finish
-                    flight.event.wait(timeout=25)
-                    if flight.error:
-                        errdict = {'errcode': 1, 'errmsg': flight.error}
-                        s.wfile.write(json.dumps(errdict).encode("UTF-8"))
-                    elif flight.result:
-                        s.wfile.write(flight.result.encode("UTF-8"))
-                    else:
-                        errdict = {'errcode': 1, 'errmsg': 'Scan timeout'}
-                        s.wfile.write(json.dumps(errdict).encode("UTF-8"))
-                    return
-
-                # Leader path: perform the actual scan
-                curLock = lockList[curInterface]
-                jsonstr = ''
-                try:
-                    with curLock:
-                        if useMavlink:
-                            gpsCoord = GPSStatus()
-                            gpsCoord.gpsInstalled = True
-                            gpsCoord.gpsRunning = True
-                            gpsCoord.isValid = mavlinkGPSThread.synchronized
-                            gpsCoord.latitude = mavlinkGPSThread.latitude
-                            gpsCoord.longitude = mavlinkGPSThread.longitude
-                            gpsCoord.altitude = mavlinkGPSThread.altitude
-                            gpsCoord.speed = mavlinkGPSThread.vehicle.getAirSpeed()
-                            retCode, errString, jsonstr=WirelessEngine.getNetworksAsJson(fieldValue, gpsCoord, huntChannelList)
-                        elif gpsEngine.gpsValid():
-                            retCode, errString, jsonstr=WirelessEngine.getNetworksAsJson(fieldValue, gpsEngine.lastCoord, huntChannelList)
-                            if useRPILeds:
-                                SparrowRPi.redLED(SparrowRPi.LIGHT_STATE_ON)
-                        else:
-                            retCode, errString, jsonstr=WirelessEngine.getNetworksAsJson(fieldValue, None, huntChannelList)
-                            if useRPILeds:
-                                SparrowRPi.redLED(SparrowRPi.LIGHT_STATE_HEARTBEAT)
-
-                    # Cache before signaling waiters so new arrivals hit the fast path
-                    _scanCache[flightKey] = (time.monotonic(), jsonstr)
-                    flight.result = jsonstr
-                except Exception as e:
-                    flight.error = str(e)
-                finally:
-                    with _inflight_lock:
-                        _inflight.pop(flightKey, None)
-                    flight.event.set()
-
-                if flight.error:
-                    errdict = {'errcode': 1, 'errmsg': flight.error}
+                if errmsg is not None:
+                    errdict = {'errcode': 1, 'errmsg': errmsg}
                     s.wfile.write(json.dumps(errdict).encode("UTF-8"))
                     return
 
-                s.wfile.write(jsonstr.encode("UTF-8"))
+                if sinceGeneration is not None:
+                    s.wfile.write(json.dumps(diffTracker.changesSince(sinceGeneration, sinceEpoch)).encode("UTF-8"))
+                else:
+                    s.wfile.write(jsonstr.encode("UTF-8"))
 
-                try:
-                    payload = json.loads(jsonstr)
-                    queuePushPayload('wifi', curInterface, payload)
-                except:
-                    pass
+                if netdict is not None:
+                    # Only the request that actually scanned pushes the result
+                    try:
+                        queuePushPayload('wifi', fieldValue, netdict)
+                    except:
+                        pass
             elif s.path == '/gps/status':
                 jsondict={}
 
@@ -2079,6 +2286,18 @@ class SparrowWiFiAgentRequestHandler(HTTPServer.BaseHTTPRequestHandler):
                 responsedict = {}
                 responsedict['files'] = filelist
 
+                jsonstr = json.dumps(responsedict)
+                try:
+                    s.wfile.write(jsonstr.encode("UTF-8"))
+                except:
+                    pass
+            elif s.path == '/system/pushstats':
+                if controllerPushClient:
+                    responsedict = controllerPushClient.getStats()
+                else:
+                    responsedict = {}
+                    responsedict['enabled'] = False
+
                 jsonstr = json.dumps(responsedict)
                 try:
                     s.wfile.write(jsonstr.encode("UTF-8"))
@@ -2242,42 +2461,7 @@ class SparrowWiFiAgentRequestHandler(HTTPServer.BaseHTTPRequestHandler):
                         except:
                             pass
                     elif function == 'status':
-                            # have to get the GPS:
-                        gpsCoord = SparrowGPS()
-                        if useMavlink:
-                            gpsCoord.gpsInstalled = True
-                            gpsCoord.gpsRunning = True
-                            gpsCoord.isValid = mavlinkGPSThread.synchronized
-                            gpsCoord.latitude = mavlinkGPSThread.latitude
-                            gpsCoord.longitude = mavlinkGPSThread.longitude
-                            gpsCoord.altitude = mavlinkGPSThread.altitude
-                            gpsCoord.speed = mavlinkGPSThread.vehicle.getAirSpeed()
-                        elif gpsEngine.gpsValid():
-                            gpsCoord.copy(gpsEngine.lastCoord)
-
-                        # errcode, devices = bluetooth.getDiscoveredDevices()
-                        bluetooth.updateDeviceList()
-
-                        bluetooth.deviceLock.acquire()
-                        devdict = []
-                        now = datetime.datetime.now()
-                        for curKey in bluetooth.devices.keys():
-                            curDevice = bluetooth.devices[curKey]
-                            elapsedTime =  now - curDevice.lastSeen
-
-                            # This is a little bit of a hack for the BlueHydra side since it can take a while to see devices or have
-                            # them show up in the db.  For LE discovery scans this will always be pretty quick.
-                            if elapsedTime.total_seconds() < 120:
-                                curDevice.gps.copy(gpsCoord)
-                                if curDevice.rssi >= curDevice.strongestRssi:
-                                    curDevice.strongestRssi = curDevice.rssi
-                                    curDevice.strongestgps.copy(gpsCoord)
-
-                            entryDict = curDevice.toJsondict()
-                            devdict.append(entryDict)
-
-                        bluetooth.deviceLock.release()
-                        responsedict['devices'] = devdict
+                        responsedict['devices'] = getBluetoothDeviceDicts()
                     else:
                         responsedict['errcode'] = 1
                         responsedict['errmsg'] = 'Unknown command'
@@ -3031,6 +3215,7 @@ if __name__ == '__main__':
     argparser.add_argument('--allowcors', help="Allow Cross Domain Resource Sharing", action='store_true', default=False, required=False)
     argparser.add_argument('--delaystart', help="Wait <delaystart> seconds before initializing", default=0, required=False)
     argparser.add_argument('--debughttp', help="Print each URL request", action='store_true', default=False, required=False)
+    argparser.add_argument('--scanbackend', help="How WiFi scans are run: 'auto' (nl80211 netlink with iw fallback), 'iw', or 'nl80211'.  Default is auto.", choices=['auto', 'iw', 'nl80211'], default='auto', required=False)
     args = argparser.parse_args()
 
     if len(args.staticcoord) > 0:
@@ -3210,6 +3395,17 @@ if __name__ == '__main__':
 
     runningcfg.pushEnabled = pushEnabled
 
+    if 'scanbackend' not in settings.keys():
+        scanBackendName = args.scanbackend
+    else:
+        scanBackendName = settings['scanbackend']
+
+    try:
+        WirelessEngine.setScanBackend(scanBackendName)
+    except ValueError as e:
+        print('WARNING: ' + str(e) + '.  Using iw.')
+        WirelessEngine.setScanBackend('iw')
+
     # Now start logic
 
     if runningcfg.useRPiLEDs:
@@ -0,0 +1,173 @@
+"""
+Generator script — run once to produce the canned nl80211 scan dumps.
+Not deployed; kept alongside the dumps for maintenance reference.
+
+Each ``*.bin`` file is a sequence of NL80211_CMD_NEW_SCAN_RESULTS netlink
+messages exactly as the kernel returns them for an NL80211_CMD_GET_SCAN dump
+(sequence numbers are zero and get rewritten by the fake responder in the
+tests).  ``home_2ghz.bin`` carries the same BSSes as
+``tests/data/iw_scans/home_2ghz.txt`` so both scan backends can be checked
+against the same expected output.
+"""
+
+import os
+import struct
+import sys
+
+DUMPS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.join(DUMPS_DIR, "..", "..", ".."))
+
+from sparrownl80211 import (  # noqa: E402
+    NLM_F_MULTI,
+    NL80211_ATTR_BSS,
+    NL80211_ATTR_IFINDEX,
+    NL80211_BSS_BSSID,
+    NL80211_BSS_CAPABILITY,
+    NL80211_BSS_FREQUENCY,
+    NL80211_BSS_INFORMATION_ELEMENTS,
+    NL80211_BSS_SIGNAL_MBM,
+    NL80211_CMD_NEW_SCAN_RESULTS,
+    packAttr,
+    packAttrU32,
+    packMessage,
+)
+
+# Family id the fake responder hands out
+FAMILY_ID = 0x1c
+IFINDEX = 3
+
+CCMP = b"\x00\x0f\xac\x04"
+TKIP = b"\x00\x0f\xac\x02"
+GCMP256 = b"\x00\x0f\xac\x09"
+PSK = b"\x00\x0f\xac\x02"
+SAE = b"\x00\x0f\xac\x08"
+DOT1X = b"\x00\x0f\xac\x01"
+FT_DOT1X = b"\x00\x0f\xac\x03"
+WPA_TKIP = b"\x00\x50\xf2\x02"
+WPA_CCMP = b"\x00\x50\xf2\x04"
+WPA_PSK = b"\x00\x50\xf2\x02"
+
+
+def ie(ie_id, data):
+    return bytes([ie_id, len(data)]) + data
+
+
+def ssid(name):
+    return ie(0, name)
+
+
+def rates(*values):
+    return ie(1, bytes(values))
+
+
+def ds_params(channel):
+    return ie(3, bytes([channel]))
+
+
+def bss_load(stations, utilisation):
+    return ie(11, struct.pack("<HBH", stations, utilisation, 0))
+
+
+def suites(items):
+    return struct.pack("<H", len(items)) + b"".join(items)
+
+
+def rsn(group, pairwise, akms, caps=0):
+    return ie(48, struct.pack("<H", 1) + group + suites(pairwise) + suites(akms) + struct.pack("<H", caps))
+
+
+def wpa(group, pairwise, akms):
+    return ie(221, b"\x00\x50\xf2\x01" + struct.pack("<H", 1) + group + suites(pairwise) + suites(akms))
+
+
+def ht_capabilities():
+    return ie(45, b"\xad\x01\x03" + b"\xff\xff" + b"\x00" * 21)
+
+
+def ht_operation(primary, offset):
+    return ie(61, bytes([primary, offset]) + b"\x00" * 20)
+
+
+def vht_operation(width, seg1, seg2=0):
+    return ie(192, bytes([width, seg1, seg2]) + b"\xfc\xff")
+
+
+def wmm():
+    return ie(221, b"\x00\x50\xf2\x02\x01\x01\x80\x00" + b"\x03\xa4\x00\x00\x27\xa4\x00\x00\x42\x43\x5e\x00\x62\x32\x2f\x00")
+
+
+def wps():
+    return ie(221, b"\x00\x50\xf2\x04" + b"\x10\x4a\x00\x01\x10\x10\x44\x00\x01\x02")
+
+
+def interworking(hessid):
+    return ie(107, b"\x01" + hessid)
+
+
+def bss(bssid, freq, capability, signal_mbm, ies):
+    attrs = packAttr(NL80211_BSS_BSSID, bytes(int(x, 16) for x in bssid.split(":")))
+    attrs += packAttrU32(NL80211_BSS_FREQUENCY, freq)
+    attrs += packAttr(NL80211_BSS_CAPABILITY, struct.pack("=H", capability))
+    attrs += packAttr(NL80211_BSS_SIGNAL_MBM, struct.pack("=i", signal_mbm))
+    attrs += packAttr(NL80211_BSS_INFORMATION_ELEMENTS, b"".join(ies))
+    body = packAttrU32(NL80211_ATTR_IFINDEX, IFINDEX) + packAttr(NL80211_ATTR_BSS | 0x8000, attrs)
+    return packMessage(FAMILY_ID, NLM_F_MULTI, 0, NL80211_CMD_NEW_SCAN_RESULTS, body)
+
+
+HOME_2GHZ = [
+    bss("a0:04:60:1c:22:31", 2437, 0x0411, -4100, [
+        ssid(b"HomeNet-2G"), rates(0x82, 0x84, 0x8b, 0x96, 0x0c, 0x12, 0x18, 0x24),
+        ds_params(6), ie(42, b"\x04"), ie(50, b"\x30\x48\x60\x6c"),
+        rsn(CCMP, [CCMP], [PSK]), bss_load(3, 48), ht_capabilities(),
+        ht_operation(6, 0), ie(127, b"\x04\x00\x08\x00\x00\x00\x00\x40"), wmm(), wps(),
+    ]),
+    bss("3c:37:86:5e:01:f2", 2412, 0x0431, -6700, [
+        ssid(b"CoffeeShop Guest"), rates(0x82, 0x84, 0x8b, 0x96, 0x24, 0x30, 0x48, 0x6c),
+        ds_params(1), ie(42, b"\x00"), ie(50, b"\x0c\x12\x18\x60"), ht_capabilities(),
+        ht_operation(1, 1), ie(74, b"\x14\x00\x0a\x00\x2c\x01\xc8\x00\x14\x00\x05\x00\x19\x00"),
+        wpa(WPA_TKIP, [WPA_TKIP, WPA_CCMP], [WPA_PSK]),
+        rsn(TKIP, [TKIP, CCMP], [PSK], caps=0x000c),
+    ]),
+    bss("00:0f:66:4a:19:0b", 2462, 0x0411, -8300, [
+        ssid(b"linksys"), rates(0x82, 0x84, 0x8b, 0x96, 0x0c, 0x12, 0x18, 0x24),
+        ds_params(11), ie(42, b"\x04"), ie(50, b"\x30\x48\x60\x6c"),
+    ]),
+    bss("02:1a:11:f0:88:7e", 2422, 0x0002, -7700, [
+        ssid(b"adhoc-mesh"), rates(0x82, 0x84, 0x8b, 0x96), ds_params(3), ie(6, b"\x00\x00"),
+    ]),
+    bss("02:1a:11:f0:88:7f", 2422, 0x0012, -7900, [
+        ssid(b"adhoc-secure"), rates(0x82, 0x84, 0x8b, 0x96), ds_params(3), ie(6, b"\x00\x00"),
+    ]),
+]
+
+OFFICE_5GHZ = [
+    bss("60:38:e0:b2:10:04", 5180, 0x1111, -5800, [
+        ssid(b"Office-5G"), rates(0x8c, 0x12, 0x98, 0x24, 0xb0, 0x48, 0x60, 0x6c),
+        bss_load(17, 112), ht_capabilities(), ht_operation(36, 1), vht_operation(1, 42),
+        rsn(CCMP, [CCMP], [DOT1X, FT_DOT1X], caps=0x0080),
+        interworking(b"\x60\x38\xe0\xb2\x10\x00"), wmm(),
+    ]),
+    bss("60:38:e0:b2:10:05", 5745, 0x1111, -7100, [
+        ssid(b"Office-5G-Upper"), ht_operation(149, 3), vht_operation(2, 163),
+        rsn(CCMP, [CCMP, GCMP256], [SAE], caps=0x00c0),
+    ]),
+    bss("60:38:e0:b2:10:06", 5200, 0x0011, -6600, [
+        ssid(b"\x00" * 8), ht_operation(40, 0), rsn(CCMP, [CCMP], [PSK]),
+    ]),
+    bss("60:38:e0:b2:10:07", 5220, 0x0001, -6900, [
+        ssid(" Café ".encode("utf-8")), ht_operation(44, 0),
+    ]),
+    # No DS params / HT operation: dropped like the text parser drops it
+    bss("60:38:e0:b2:10:08", 5240, 0x0011, -8000, [ssid(b"no-channel")]),
+]
+
+
+def write_dump(filename, messages):
+    with open(os.path.join(DUMPS_DIR, filename), "wb") as f:
+        f.write(b"".join(messages))
+
+
+if __name__ == "__main__":
+    write_dump("home_2ghz.bin", HOME_2GHZ)
+    write_dump("office_5ghz.bin", OFFICE_5GHZ)
@@ -0,0 +1,227 @@
+"""Tests for the GUI's shared agent client (sparrowagentclient).
+
+Covers:
+- agentGet/agentPost status handling and keep-alive connection reuse.
+- AgentClient delivering results on the Qt thread through its signal.
+- Coalescing of duplicate in-flight requests.
+- Dropping responses after cancel()/cancelAll(), and worker exceptions.
+- errorResult delivered to the callback when a call raises or is cancelled.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Set, Tuple, cast
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from sparrowagentclient import (  # noqa: E402
+    REQUEST_CANCELLED,
+    REQUEST_FAILED,
+    AgentClient,
+    agentGet,
+    agentPost,
+)
+
+_app = QApplication.instance() or QApplication([])
+
+
+def _waitFor(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        _app.processEvents()
+        time.sleep(0.005)
+    _app.processEvents()
+    return condition()
+
+
+class _AgentServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler):
+        super().__init__(address, handler)
+        # Client addresses seen, one per TCP connection
+        self.connections: Set[Tuple[str, int]] = set()
+
+
+class _AgentHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        cast(_AgentServer, self.server).connections.add(self.client_address)
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/gps/status":
+            self._reply(200, '{"ok": true}')
+        else:
+            self._reply(404, "missing")
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        self._reply(200, self.rfile.read(length).decode())
+
+
+class TestAgentGet(unittest.TestCase):
+    def setUp(self):
+        self.server = _AgentServer(("127.0.0.1", 0), _AgentHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base = "http://127.0.0.1:%d" % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_status_and_body(self):
+        self.assertEqual(agentGet(self.base + "/gps/status"), (200, '{"ok": true}'))
+        self.assertEqual(agentGet(self.base + "/nothing"), (404, ""))
+        self.assertEqual(agentPost(self.base + "/system/config", '{"a": 1}'), (200, '{"a": 1}'))
+
+    def test_unreachable_agent(self):
+        self.assertEqual(agentGet("http://127.0.0.1:1/gps/status", 1), (-1, ""))
+
+    def test_connection_is_reused(self):
+        for _ in range(5):
+            self.assertEqual(agentGet(self.base + "/gps/status")[0], 200)
+        self.assertEqual(len(self.server.connections), 1)
+
+
+class TestAgentClient(unittest.TestCase):
+    def setUp(self):
+        self.client = AgentClient(numWorkers=2)
+        self.release = threading.Event()
+        self.calls = []
+
+    def tearDown(self):
+        self.release.set()
+        self.client.shutdown()
+
+    def _blockingCall(self, value):
+        self.calls.append(threading.current_thread())
+        self.release.wait(5)
+        return value
+
+    def test_result_delivered_on_qt_thread(self):
+        results = []
+        self.release.set()
+        self.assertTrue(self.client.submit("gps", self._blockingCall, ("fix",),
+                                           lambda r: results.append((r, threading.current_thread()))))
+        self.assertTrue(_waitFor(lambda: results))
+        self.assertEqual(results[0], ("fix", threading.main_thread()))
+        self.assertIsNot(self.calls[0], threading.main_thread())
+        self.assertFalse(self.client.isPending("gps"))
+
+    def test_duplicate_requests_coalesce(self):
+        first, second = [], []
+        self.assertTrue(self.client.submit("gps", self._blockingCall, (1,), first.append))
+        self.assertFalse(self.client.submit("gps", self._blockingCall, (2,), second.append))
+        self.assertFalse(self.client.submit("gps", self._blockingCall, (3,), first.append))
+        self.release.set()
+
+        self.assertTrue(_waitFor(lambda: first and second))
+        self.assertEqual((first, second), ([1], [1]))
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.client.coalesced, 2)
+
+    def test_different_keys_run_concurrently(self):
+        results = []
+        self.client.submit("gps", self._blockingCall, ("a",), results.append)
+        self.client.submit("btspectrum", self._blockingCall, ("b",), results.append)
+        self.assertTrue(_waitFor(lambda: len(self.calls) == 2))
+        self.release.set()
+        self.assertTrue(_waitFor(lambda: len(results) == 2))
+        self.assertEqual(sorted(results), ["a", "b"])
+
+    def test_cancel_delivers_error_result(self):
+        results = []
+        self.client.submit("singleshot", self._blockingCall, ("scan",), results.append,
+                           lambda errCode, errString: (errCode, errString, []))
+        self.assertTrue(_waitFor(lambda: self.calls))
+        self.client.cancelAll()
+        self.assertEqual(results, [(REQUEST_CANCELLED, "Request cancelled", [])])
+
+        # The late response is still dropped
+        self.release.set()
+        self.assertTrue(_waitFor(lambda: self.client.dropped == 1))
+        self.assertEqual(len(results), 1)
+
+    def test_cancelled_response_is_dropped(self):
+        results = []
+        self.client.submit("btspectrum", self._blockingCall, ("old",), results.append)
+        self.assertTrue(_waitFor(lambda: self.calls))
+        self.client.cancel("btspectrum")
+
+        # A new request for the key starts right away instead of joining the cancelled one
+        self.assertTrue(self.client.submit("btspectrum", self._blockingCall, ("new",), results.append))
+        self.release.set()
+
+        self.assertTrue(_waitFor(lambda: results and self.client.dropped == 1))
+        self.assertEqual(results, ["new"])
+
+    def test_cancel_all_drops_previous_agent(self):
+        results = []
+        self.client.submit("gps", self._blockingCall, ("agent1",), results.append)
+        self.assertTrue(_waitFor(lambda: self.calls))
+        self.client.cancelAll()
+        self.release.set()
+        self.assertTrue(_waitFor(lambda: self.client.dropped == 1))
+        self.assertEqual(results, [])
+        self.assertFalse(self.client.isPending("gps"))
+
+    def test_cancelled_before_start_never_runs(self):
+        self.client.submit("gps", self._blockingCall, ("busy1",))
+        self.client.submit("btspectrum", self._blockingCall, ("busy2",))
+        self.assertTrue(_waitFor(lambda: len(self.calls) == 2))
+        self.client.submit("hackrfspectrum", self._blockingCall, ("queued",))
+        self.client.cancel("hackrfspectrum")
+        self.release.set()
+        self.assertTrue(_waitFor(lambda: not self.client.pending))
+        time.sleep(0.05)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_exception_delivers_error_result(self):
+        results = []
+        failures = []
+        self.client.requestFailed.connect(lambda key, errString: failures.append(key))
+
+        def failing():
+            raise ValueError("bad response")
+
+        self.client.submit("gps", failing, (), results.append,
+                           lambda errCode, errString: (errCode, errString))
+        self.assertTrue(_waitFor(lambda: results))
+        self.assertEqual(results, [(REQUEST_FAILED, "Agent request failed: bad response")])
+        self.assertEqual(failures, ["gps"])
+        results.clear()
+
+        # Without an errorResult the callback is left alone
+        self.client.submit("gps", failing, (), results.append)
+        self.assertTrue(_waitFor(lambda: not self.client.isPending("gps")))
+        self.assertEqual(results, [])
+
+        # The worker survives and serves the next request
+        self.release.set()
+        self.client.submit("gps", self._blockingCall, ("ok",), results.append)
+        self.assertTrue(_waitFor(lambda: results))
+        self.assertEqual(results, ["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+"""Tests for the agent event stream (sparrowagentstream).
+
+Covers:
+- AgentEventStream numbering, type filtering and the resume/reset rules.
+- parseStreamQuery sanitizing, and the reader only resuming with an epoch.
+- AgentStreamReader against a small HTTP server speaking the '/events'
+  protocol: hello handling, resume after a dropped connection, and the
+  404 fallback signal for agents without the endpoint.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import List, cast
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sparrowagentstream import (  # noqa: E402
+    AgentEventStream,
+    AgentStreamReader,
+    AgentStreamUnsupported,
+    parseStreamQuery,
+)
+
+
+def _ids(lines):
+    return [json.loads(line)["id"] for line in lines]
+
+
+class TestAgentEventStream(unittest.TestCase):
+    def setUp(self):
+        self.stream = AgentEventStream(maxEvents=4)
+
+    def test_nothing_recorded_without_clients(self):
+        self.assertEqual(self.stream.publish("wifi", "wlan0", {}), 0)
+
+    def test_publish_and_filter(self):
+        self.stream.addClient(["wlan0"])
+        self.stream.publish("wifi", "wlan0", {"n": 1})
+        self.stream.publish("gps", "", {"n": 2})
+
+        lastId, lines = self.stream.waitForEvents(0, ["wifi"], timeout=0)
+        self.assertEqual(lastId, 2)
+        self.assertEqual(_ids(lines), [1])
+        self.assertEqual(json.loads(lines[0])["data"], {"n": 1})
+
+    def test_interface_refcounts(self):
+        self.stream.addClient(["wlan0", "wlan1"])
+        self.stream.addClient(["wlan0"])
+        self.stream.removeClient(["wlan0", "wlan1"])
+        self.assertEqual(self.stream.getSubscribedInterfaces(), ["wlan0"])
+
+    def test_events_kept_briefly_after_last_client(self):
+        self.stream.addClient([])
+        self.stream.removeClient([])
+        self.assertEqual(self.stream.publish("gps", "", {}), 1)
+
+    def test_resume_points(self):
+        self.stream.addClient([])
+        for _ in range(6):
+            self.stream.publish("wifi", "wlan0", {})
+        epoch = self.stream.epoch
+
+        # Buffer holds ids 3..6
+        self.assertEqual(self.stream.resumePoint(None, None), (6, False))
+        self.assertEqual(self.stream.resumePoint(4, epoch), (4, False))
+        self.assertEqual(self.stream.resumePoint(2, epoch), (2, False))
+        self.assertEqual(self.stream.resumePoint(1, epoch), (6, True))
+        self.assertEqual(self.stream.resumePoint(9, epoch), (6, True))
+        self.assertEqual(self.stream.resumePoint(4, epoch + "0"), (6, True))
+
+    def test_wait_times_out(self):
+        self.stream.addClient([])
+        self.assertEqual(self.stream.waitForEvents(0, timeout=0.01), (0, []))
+
+    def test_close_wakes_waiters(self):
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(self.stream.waitForEvents(0, timeout=5)))
+        waiter.start()
+        self.stream.close()
+        waiter.join(2)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(result, [(0, [])])
+
+
+class TestParseStreamQuery(unittest.TestCase):
+    def test_parse(self):
+        interfaces, types, lastId, epoch = parseStreamQuery(
+            "interfaces=wlan0,wlan1,wlan0,bad;rm&types=wifi,nope&lastid=7&epoch=abcd")
+        self.assertEqual(interfaces, ["wlan0", "wlan1"])
+        self.assertEqual(types, ["wifi"])
+        self.assertEqual(lastId, 7)
+        self.assertEqual(epoch, "abcd")
+
+    def test_empty(self):
+        self.assertEqual(parseStreamQuery(""), ([], None, None, None))
+
+    def test_reader_url_needs_epoch_to_resume(self):
+        reader = AgentStreamReader("127.0.0.1", 8020, ["wlan0"], timeout=5)
+        reader.lastId = 7
+        self.assertEqual(reader.getURL(), "/events?interfaces=wlan0")
+        reader.epoch = "abcd"
+        self.assertEqual(parseStreamQuery(reader.getURL().split("?", 1)[1]),
+                         (["wlan0"], None, 7, "abcd"))
+
+
+class _StreamServer(HTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StreamHandler)
+        self.stream = AgentEventStream()
+        self.requests: List[str] = []
+        self.dropAfter = 2
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    # Serves server.stream the way the agent does, dropping the connection
+    # after server.dropAfter events to exercise resume.
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = cast(_StreamServer, self.server)
+        if not self.path.startswith("/events"):
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        server.requests.append(self.path)
+        query = self.path.split("?", 1)[1] if "?" in self.path else ""
+        _, types, lastId, epoch = parseStreamQuery(query)
+        startId, reset = server.stream.resumePoint(lastId, epoch)
+
+        self.send_response(200)
+        self.send_header("Content-type", "application/x-ndjson")
+        self.end_headers()
+        server.stream.addClient([])
+        try:
+            self.wfile.write((json.dumps({"type": "hello", "epoch": server.stream.epoch, "id": startId}) + "\n").encode())
+            if reset:
+                self.wfile.write(b'{"type": "reset"}\n')
+            sent = 0
+            while sent < server.dropAfter and not server.stream.closed:
+                startId, lines = server.stream.waitForEvents(startId, types, 0.2)
+                for line in lines[:server.dropAfter - sent]:
+                    self.wfile.write(line)
+                    sent += 1
+                self.wfile.flush()
+        finally:
+            server.stream.removeClient([])
+
+
+class TestAgentStreamReader(unittest.TestCase):
+    def setUp(self):
+        self.server = _StreamServer()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.stream.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_reads_and_resumes(self):
+        stream = self.server.stream
+        # Keep events from the start even before the reader connects
+        stream.addClient([])
+        for i in range(5):
+            stream.publish("wifi", "wlan0", {"n": i})
+
+        reader = AgentStreamReader("127.0.0.1", self.server.server_address[1], ["wlan0"], ["wifi"], timeout=5)
+        reader.lastId = 0
+        reader.epoch = stream.epoch
+        reader.reconnectDelay = 0.01
+
+        received = []
+        for event in reader.events():
+            received.append(event["data"]["n"])
+            if len(received) == 5:
+                reader.stop()
+
+        self.assertEqual(received, [0, 1, 2, 3, 4])
+        # Dropped every two events, each reconnect resuming from the last id
+        self.assertIn("lastid=2", self.server.requests[1])
+        self.assertIn("lastid=4", self.server.requests[2])
+        self.assertIn("interfaces=wlan0", self.server.requests[0])
+
+    def test_reset_passed_through(self):
+        reader = AgentStreamReader("127.0.0.1", self.server.server_address[1], timeout=5)
+        reader.lastId = 3
+        reader.epoch = "stale"
+
+        first = next(reader.events())
+        reader.stop()
+        self.assertEqual(first["type"], "reset")
+
+    def test_missing_endpoint(self):
+        class _NotFound(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self.send_response(404)
+                self.end_headers()
+
+        server = HTTPServer(("127.0.0.1", 0), _NotFound)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            reader = AgentStreamReader("127.0.0.1", server.server_address[1], timeout=5)
+            with self.assertRaises(AgentStreamUnsupported):
+                next(reader.events())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,12 +5,14 @@ Covers:
 - Overflow eviction (oldest dropped, docs_dropped incremented)
 - Concurrent appends from multiple threads
 - Swap while another thread is appending (no interleaving corruption)
+- Overflow spilled to a SpillLog and replayed instead of dropped
 """
 
 from __future__ import annotations
 
 import os
 import sys
+import tempfile
 import threading
 import time
 import unittest
@@ -18,6 +20,7 @@ import unittest
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from sparrow_elastic.bulk_buffer import BulkBuffer
+from sparrow_elastic.spill_log import SpillLog
 
 
 def _action(i: int) -> dict:
@@ -123,6 +126,52 @@ class TestBulkBufferOverflow(unittest.TestCase):
         self.assertEqual(buf.docs_dropped(), 199)
 
 
+class TestBulkBufferSpill(unittest.TestCase):
+    """Overflow goes to the spill log in chunks and is replayed oldest first."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.spill = SpillLog(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_overflow_spills_instead_of_dropping(self):
+        buf = BulkBuffer(max_size=4, spill=self.spill, spill_chunk=2)
+        for i in range(7):
+            buf.append(_action(i))
+
+        self.assertEqual(buf.docs_dropped(), 0)
+        self.assertEqual(buf.spill_pending(), 4)
+        self.assertEqual([a["_source"]["n"] for a in buf.swap()], [4, 5, 6])
+
+        replayed = []
+        while True:
+            pending = buf.replay_batch()
+            if pending is None:
+                break
+            token, actions = pending
+            replayed.extend(a["_source"]["n"] for a in actions)
+            buf.commit_replay(token)
+        self.assertEqual(replayed, [0, 1, 2, 3])
+        self.assertEqual(buf.stats()["replayed"], 4)
+        self.assertEqual(buf.spill_pending(), 0)
+
+    def test_spill_without_log_counts_dropped(self):
+        buf = BulkBuffer(max_size=10)
+        self.assertEqual(buf.spill([_action(0), _action(1)]), 0)
+        self.assertEqual(buf.docs_dropped(), 2)
+        self.assertIsNone(buf.replay_batch())
+
+    def test_explicit_spill_is_replayable(self):
+        buf = BulkBuffer(max_size=10, spill=self.spill)
+        self.assertEqual(buf.spill([_action(0)]), 1)
+        batch = buf.replay_batch()
+        assert batch is not None
+        token, actions = batch
+        self.assertEqual(actions, [_action(0)])
+
+
 class TestBulkBufferConcurrent(unittest.TestCase):
     """Thread safety: concurrent appends and concurrent append-while-swap."""
 
@@ -0,0 +1,302 @@
+"""Tests for sparrow_elastic.bulk_writer and the clients' NDJSON bulk path.
+
+Covers:
+- encode_action() output for index / delete / helper-style actions
+- Byte-budget and batch-size splitting
+- AdaptiveBatchSizer reacting to latency and 429s
+- Whole-request and per-item 429 retries, error items passed through
+- ElasticsearchClient / OpenSearchClient against a local HTTP _bulk stub
+  (gzip body decoded and parsed by the stub)
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Tuple, cast
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sparrow_elastic.bulk_writer import (
+    AdaptiveBatchSizer,
+    BulkThrottledError,
+    NdjsonBulkWriter,
+    encode_action,
+)
+
+
+def _action(i: int, pad: int = 0) -> dict:
+    return {"_op_type": "index", "_index": "test", "_id": str(i),
+            "_source": {"n": i, "pad": "x" * pad}}
+
+
+def _parse_ndjson(body: bytes) -> list:
+    lines = [json.loads(line) for line in body.splitlines() if line]
+    docs = []
+    i = 0
+    while i < len(lines):
+        meta = lines[i]
+        op = next(iter(meta))
+        if op == "delete":
+            docs.append((op, meta[op], None))
+            i += 1
+        else:
+            docs.append((op, meta[op], lines[i + 1]))
+            i += 2
+    return docs
+
+
+def _ok_response(docs: list) -> dict:
+    return {"took": 1, "errors": False,
+            "items": [{op: {"_id": meta.get("_id"), "status": 201}} for op, meta, _ in docs]}
+
+
+class _RecordingSend:
+    """send() double: decodes each body and answers from a script."""
+
+    def __init__(self, script=None):
+        self.requests = []
+        self.script = list(script or [])
+
+    def __call__(self, body, headers):
+        if headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        docs = _parse_ndjson(body)
+        self.requests.append(docs)
+        if self.script:
+            return self.script.pop(0)(docs)
+        return 200, _ok_response(docs)
+
+
+class TestEncodeAction(unittest.TestCase):
+
+    def test_index_action(self):
+        lines = encode_action(_action(7)).splitlines()
+        self.assertEqual(json.loads(lines[0]), {"index": {"_index": "test", "_id": "7"}})
+        self.assertEqual(json.loads(lines[1]), {"n": 7, "pad": ""})
+
+    def test_delete_has_no_source_line(self):
+        data = encode_action({"_op_type": "delete", "_index": "t", "_id": "1"})
+        self.assertEqual(data, b'{"delete":{"_index":"t","_id":"1"}}\n')
+
+    def test_helper_style_document_without_source(self):
+        lines = encode_action({"_index": "t", "a": 1, "b": "x"}).splitlines()
+        self.assertEqual(json.loads(lines[1]), {"a": 1, "b": "x"})
+
+    def test_unsupported_op_type(self):
+        with self.assertRaises(ValueError):
+            encode_action({"_op_type": "upsert", "_index": "t"})
+
+
+class TestSplitting(unittest.TestCase):
+
+    def test_split_by_count(self):
+        send = _RecordingSend()
+        writer = NdjsonBulkWriter(send, sizer=AdaptiveBatchSizer(initial=50, minimum=50, maximum=50))
+        success, errors = writer.write([_action(i) for i in range(120)])
+        self.assertEqual((success, errors), (120, []))
+        self.assertEqual([len(r) for r in send.requests], [50, 50, 20])
+
+    def test_split_by_bytes(self):
+        send = _RecordingSend()
+        one = len(encode_action(_action(0, pad=1000)))
+        writer = NdjsonBulkWriter(send, max_bytes=one * 3 + 10, compress=False)
+        writer.write([_action(i, pad=1000) for i in range(7)])
+        self.assertEqual([len(r) for r in send.requests], [3, 3, 1])
+        ids = [meta["_id"] for r in send.requests for _, meta, _ in r]
+        self.assertEqual(ids, [str(i) for i in range(7)])
+
+    def test_compressed_body_smaller(self):
+        send = _RecordingSend()
+        writer = NdjsonBulkWriter(send)
+        writer.write([_action(i, pad=200) for i in range(100)])
+        stats = writer.stats()
+        self.assertLess(stats["bytes_sent"], stats["bytes_raw"] / 5)
+
+
+class TestAdaptiveBatchSizer(unittest.TestCase):
+
+    def test_grow_shrink_and_throttle(self):
+        sizer = AdaptiveBatchSizer(initial=400, minimum=50, maximum=1000, target_latency=1.0)
+        self.assertEqual(sizer.record(0.1), 500)
+        self.assertEqual(sizer.record(0.7), 500)
+        self.assertEqual(sizer.record(2.0), 375)
+        self.assertEqual(sizer.record(0.1, throttled=True), 187)
+        for _ in range(20):
+            sizer.record(0.0, throttled=True)
+        self.assertEqual(sizer.size, 50)
+        for _ in range(50):
+            sizer.record(0.0)
+        self.assertEqual(sizer.size, 1000)
+
+
+class TestThrottling(unittest.TestCase):
+
+    def test_request_429_retried_with_backoff(self):
+        sleeps = []
+        send = _RecordingSend([lambda docs: (429, {"error": "too many"})])
+        writer = NdjsonBulkWriter(send, sleep=sleeps.append,
+                                  sizer=AdaptiveBatchSizer(initial=400))
+        self.assertEqual(writer.write([_action(i) for i in range(10)]), (10, []))
+        self.assertEqual(len(send.requests), 2)
+        self.assertEqual(sleeps, [0.5])
+        # Halved by the 429, then grown 25% by the fast retry.
+        self.assertEqual(writer.sizer.size, 250)
+        self.assertEqual(writer.stats()["throttled"], 1)
+
+    def test_request_429_gives_up(self):
+        send = _RecordingSend([lambda docs: (429, {})] * 10)
+        writer = NdjsonBulkWriter(send, max_retries=2, sleep=lambda s: None)
+        with self.assertRaises(BulkThrottledError):
+            writer.write([_action(0)])
+        self.assertEqual(len(send.requests), 3)
+
+    def test_item_429_only_rejected_items_retried(self):
+        def partial(docs):
+            items = []
+            for op, meta, _ in docs:
+                if meta["_id"] == "1":
+                    items.append({op: {"_id": "1", "status": 429,
+                                       "error": {"type": "es_rejected_execution_exception"}}})
+                elif meta["_id"] == "2":
+                    items.append({op: {"_id": "2", "status": 400,
+                                       "error": {"type": "mapper_parsing_exception"}}})
+                else:
+                    items.append({op: {"_id": meta["_id"], "status": 201}})
+            return 200, {"errors": True, "items": items}
+
+        send = _RecordingSend([partial])
+        writer = NdjsonBulkWriter(send, sleep=lambda s: None)
+        success, errors = writer.write([_action(i) for i in range(4)])
+        self.assertEqual(success, 3)
+        self.assertEqual(errors, [{"index": {"_id": "2", "status": 400,
+                                             "error": {"type": "mapper_parsing_exception"}}}])
+        self.assertEqual([meta["_id"] for _, meta, _ in send.requests[1]], ["1"])
+
+    def test_server_error_raises(self):
+        send = _RecordingSend([lambda docs: (503, {"error": "unavailable"})])
+        writer = NdjsonBulkWriter(send)
+        with self.assertRaises(RuntimeError):
+            writer.write([_action(0)])
+
+
+# ---------------------------------------------------------------------------
+# Local HTTP _bulk stub
+# ---------------------------------------------------------------------------
+
+class _BulkStubServer(ThreadingHTTPServer):
+    def __init__(self, throttle: int):
+        super().__init__(("127.0.0.1", 0), _BulkStubHandler)
+        self.lock = threading.Lock()
+        self.requests: List[Tuple[str, Any, bytes]] = []
+        self.throttle = throttle
+
+
+class _BulkStubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._reply(200, {"version": {"number": "8.17.0"}, "tagline": "You Know, for Search"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        server = cast(_BulkStubServer, self.server)
+        with server.lock:
+            server.requests.append((self.path, self.headers, body))
+            throttle = server.throttle > 0
+            if throttle:
+                server.throttle -= 1
+        if throttle:
+            self._reply(429, {"error": {"type": "es_rejected_execution_exception"}, "status": 429})
+            return
+        self._reply(200, _ok_response(_parse_ndjson(body)))
+
+
+class _BulkStub:
+    def __init__(self, throttle: int = 0):
+        self.server = _BulkStubServer(throttle)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self.server
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestClientsAgainstStub(unittest.TestCase):
+
+    def _check(self, client, server):
+        actions = [_action(i, pad=50) for i in range(1200)]
+        success, errors = client.bulk(actions)
+        self.assertEqual((success, errors), (1200, []))
+        bulk_requests = [r for r in server.requests if r[0].endswith("/_bulk")]
+        self.assertGreaterEqual(len(bulk_requests), 2)
+        path, headers, body = bulk_requests[0]
+        self.assertEqual(headers.get("Content-Encoding"), "gzip")
+        self.assertIn("x-ndjson", headers.get("Content-Type", ""))
+        ids = [meta["_id"] for _, _, b in bulk_requests for _, meta, _ in _parse_ndjson(b)]
+        self.assertEqual(ids, [str(i) for i in range(1200)])
+
+    def test_elasticsearch_client(self):
+        try:
+            from sparrow_elastic.elasticsearch_client import ElasticsearchClient
+        except ImportError:
+            self.skipTest("elasticsearch not installed")
+        with _BulkStub() as server:
+            client = ElasticsearchClient({"url": f"http://127.0.0.1:{server.server_address[1]}"})
+            try:
+                self._check(client, server)
+            finally:
+                client.close()
+
+    def test_opensearch_client(self):
+        try:
+            from sparrow_elastic.opensearch_client import OpenSearchClient
+        except ImportError:
+            self.skipTest("opensearch-py not installed")
+        with _BulkStub() as server:
+            client = OpenSearchClient({"url": f"http://127.0.0.1:{server.server_address[1]}"})
+            try:
+                self._check(client, server)
+            finally:
+                client.close()
+
+    def test_opensearch_client_429_shrinks_batches(self):
+        try:
+            from sparrow_elastic.opensearch_client import OpenSearchClient
+        except ImportError:
+            self.skipTest("opensearch-py not installed")
+        with _BulkStub(throttle=1) as server:
+            client = OpenSearchClient({"url": f"http://127.0.0.1:{server.server_address[1]}"})
+            client._bulk_writer.backoff = 0.01
+            try:
+                self.assertEqual(client.bulk([_action(i) for i in range(10)]), (10, []))
+                self.assertEqual(client._bulk_writer.stats()["throttled"], 1)
+                self.assertLess(client._bulk_writer.sizer.size, 500)
+            finally:
+                client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
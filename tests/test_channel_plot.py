@@ -0,0 +1,155 @@
+"""Tests for the batched channel plot renderer (sparrowchannelplot).
+
+Covers:
+- ChannelTrace skipping unchanged points and notifying its plot otherwise.
+- Value -> plot-area mapping from the chart axes.
+- Per-colour path merging and cache invalidation.
+- Hit testing for hover/click, with the selected trace on top.
+- Redraw rate capping and batch removal.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtChart import QChart, QChartView, QValueAxis  # noqa: E402
+from PyQt5.QtCore import QPointF, Qt  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from sparrowchannelplot import ChannelPlotItem, ChannelTrace  # noqa: E402
+
+_app = QApplication.instance() or QApplication([])
+
+
+def _axis(lo, hi, align, chart):
+    axis = QValueAxis()
+    axis.setMin(lo)
+    axis.setMax(hi)
+    chart.addAxis(axis, align)
+    return axis
+
+
+class _PlotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.chart = QChart()
+        xAxis = _axis(0, 16, Qt.AlignmentFlag.AlignBottom, self.chart)
+        yAxis = _axis(-100, -10, Qt.AlignmentFlag.AlignLeft, self.chart)
+        self.view = QChartView(self.chart)
+        self.view.resize(640, 480)
+        self.view.show()
+        _app.processEvents()
+        self.plot = ChannelPlotItem(self.chart, xAxis, yAxis, maxRedrawRate=1000.0)
+        self.redraws = 0
+        original = self.plot.redraw
+
+        def countingRedraw():
+            self.redraws += 1
+            original()
+
+        self.plot.redraw = countingRedraw
+        self.plot.redrawTimer.timeout.disconnect()
+        self.plot.redrawTimer.timeout.connect(self.plot.redraw)
+
+    def tearDown(self):
+        self.view.close()
+
+    def _trace(self, color, channel, signal):
+        trace = ChannelTrace(color)
+        trace.setPoints([(channel - 2, -100), (channel - 2, signal), (channel + 2, signal), (channel + 2, -100)])
+        self.plot.addTrace(trace)
+        return trace
+
+
+class TestChannelTrace(unittest.TestCase):
+    def test_unchanged_points_are_ignored(self):
+        trace = ChannelTrace(Qt.GlobalColor.red)
+        self.assertTrue(trace.setPoints([(1, -50), (2, -50)]))
+        self.assertFalse(trace.setPoints([(1, -50), (2, -50)]))
+        self.assertTrue(trace.setPoints([(1, -60), (2, -60)]))
+
+    def test_name(self):
+        trace = ChannelTrace(Qt.GlobalColor.red)
+        trace.setName("lab")
+        self.assertEqual(trace.name(), "lab")
+
+
+class TestChannelPlotItem(_PlotTestCase):
+    def test_maps_values_into_plot_area(self):
+        area = self.plot.plotArea
+        self.assertGreater(area.width(), 0)
+        self.assertEqual(self.plot.mapToPlot(0, -100), QPointF(area.left(), area.bottom()))
+        self.assertEqual(self.plot.mapToPlot(16, -10), QPointF(area.right(), area.top()))
+
+    def test_same_colour_traces_share_one_path(self):
+        self._trace(Qt.GlobalColor.red, 3, -40)
+        self._trace(Qt.GlobalColor.red, 9, -60)
+        self._trace(Qt.GlobalColor.blue, 6, -50)
+        redPath = self.plot.colorPath(ChannelTrace(Qt.GlobalColor.red).rgba)
+        self.assertEqual(redPath.elementCount(), 8)
+        self.assertEqual(len(self.plot.colorPaths), 1)
+
+    def test_unchanged_update_keeps_cached_path(self):
+        trace = self._trace(Qt.GlobalColor.red, 6, -50)
+        rgba = trace.rgba
+        self.plot.colorPath(rgba)
+        trace.setPoints(list(trace.points))
+        self.assertIn(rgba, self.plot.colorPaths)
+        trace.setPoints([(4, -100), (4, -45), (8, -45), (8, -100)])
+        self.assertNotIn(rgba, self.plot.colorPaths)
+
+    def test_trace_at_finds_line_under_pointer(self):
+        low = self._trace(Qt.GlobalColor.red, 3, -80)
+        high = self._trace(Qt.GlobalColor.blue, 11, -30)
+        self.assertIs(self.plot.traceAt(self.plot.mapToPlot(3, -80)), low)
+        self.assertIs(self.plot.traceAt(self.plot.mapToPlot(11, -30)), high)
+        self.assertIsNone(self.plot.traceAt(self.plot.mapToPlot(7, -50)))
+
+    def test_selected_trace_wins_overlap(self):
+        first = self._trace(Qt.GlobalColor.red, 6, -50)
+        self._trace(Qt.GlobalColor.blue, 6, -50)
+        pos = self.plot.mapToPlot(6, -50)
+        self.assertIsNot(self.plot.traceAt(pos), first)
+        first.setSelected(True)
+        self.assertIs(self.plot.traceAt(pos), first)
+
+    def test_redraw_rate_is_capped(self):
+        self.plot.minRedrawInterval = 60.0
+        self.plot.lastRedraw = 0.0
+        self.redraws = 0
+        self._trace(Qt.GlobalColor.red, 6, -50)
+        self._trace(Qt.GlobalColor.red, 9, -50)
+        self._trace(Qt.GlobalColor.red, 12, -50)
+        self.assertEqual(self.redraws, 1)
+        self.assertTrue(self.plot.redrawTimer.isActive())
+
+    def test_remove_traces(self):
+        keep = self._trace(Qt.GlobalColor.red, 3, -50)
+        drop = [self._trace(Qt.GlobalColor.blue, 6, -50), self._trace(Qt.GlobalColor.green, 9, -50)]
+        self.plot.removeTraces(drop + [None])
+        self.assertEqual(self.plot.traces, [keep])
+        self.assertIsNone(drop[0].plot)
+
+    def test_plot_area_change_drops_cached_geometry(self):
+        trace = self._trace(Qt.GlobalColor.red, 6, -50)
+        before = self.plot.tracePolygon(trace).at(1)
+        self.view.resize(800, 600)
+        _app.processEvents()
+        self.assertEqual(self.plot.plotArea, self.chart.plotArea())
+        after = self.plot.tracePolygon(trace).at(1)
+        self.assertNotEqual(before, after)
+        self.assertEqual(after, self.plot.mapToPlot(4, -50))
+
+    def test_paint_does_not_fail(self):
+        self._trace(Qt.GlobalColor.red, 6, -50).setSelected(True)
+        self._trace(Qt.GlobalColor.blue, 3, -70)
+        self.view.grab()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""Tests for the controller's event bus (controller.app.events).
+
+Covers:
+- publish() returns without waiting for slow handlers.
+- Per-subscriber ordering and isolation between subscribers.
+- drop_oldest / drop_newest queue policies and coalescing by key.
+- One subscription covering several events sees them in publish order.
+- Handler errors are counted and don't stop the worker.
+- Metrics and shutdown draining.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from controller.app.events import DROP_NEWEST, EventBus  # noqa: E402
+
+
+class _Gate:
+    """Handler that blocks until released and records what it saw."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.seen = []
+
+    def __call__(self, payload):
+        self.started.set()
+        self.release.wait(5)
+        self.seen.append(payload["n"])
+
+
+class TestEventBus(unittest.TestCase):
+    def setUp(self):
+        self.bus = EventBus()
+
+    def tearDown(self):
+        self.bus.shutdown(timeout=1)
+
+    def test_publish_does_not_wait_for_handlers(self):
+        gate = _Gate()
+        self.bus.subscribe("scan.completed", gate)
+
+        started = time.monotonic()
+        for i in range(3):
+            self.bus.publish("scan.completed", {"n": i})
+        self.assertLess(time.monotonic() - started, 0.5)
+
+        gate.release.set()
+        self.assertTrue(self.bus.wait_idle(5))
+        self.assertEqual(gate.seen, [0, 1, 2])
+
+    def test_slow_subscriber_does_not_delay_others(self):
+        gate = _Gate()
+        fast = []
+        self.bus.subscribe("scan.completed", gate, name="slow")
+        self.bus.subscribe("scan.completed", lambda p: fast.append(p["n"]), name="fast")
+
+        self.bus.publish("scan.completed", {"n": 1})
+        deadline = time.monotonic() + 5
+        while not fast and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(fast, [1])
+        self.assertEqual(gate.seen, [])
+        gate.release.set()
+
+    def test_drop_oldest(self):
+        gate = _Gate()
+        sub = self.bus.subscribe("e", gate, max_queue=2)
+        self.bus.publish("e", {"n": 0})
+        gate.started.wait(5)
+        for i in range(1, 5):
+            self.bus.publish("e", {"n": i})
+
+        gate.release.set()
+        self.bus.wait_idle(5)
+        self.assertEqual(gate.seen, [0, 3, 4])
+        self.assertEqual(sub.metrics()["dropped"], 2)
+
+    def test_drop_newest(self):
+        gate = _Gate()
+        self.bus.subscribe("e", gate, max_queue=2, policy=DROP_NEWEST)
+        self.bus.publish("e", {"n": 0})
+        gate.started.wait(5)
+        for i in range(1, 5):
+            self.bus.publish("e", {"n": i})
+
+        gate.release.set()
+        self.bus.wait_idle(5)
+        self.assertEqual(gate.seen, [0, 1, 2])
+
+    def test_coalesce(self):
+        gate = _Gate()
+        sub = self.bus.subscribe("scan.progress", gate, coalesce_key=lambda p: p["scan"])
+        self.bus.publish("scan.progress", {"scan": "a", "n": 0})
+        gate.started.wait(5)
+        self.bus.publish("scan.progress", {"scan": "a", "n": 1})
+        self.bus.publish("scan.progress", {"scan": "b", "n": 2})
+        self.bus.publish("scan.progress", {"scan": "a", "n": 3})
+
+        gate.release.set()
+        self.bus.wait_idle(5)
+        # Latest "a" keeps the queue position of the first queued "a"
+        self.assertEqual(gate.seen, [0, 3, 2])
+        self.assertEqual(sub.metrics()["coalesced"], 1)
+
+    def test_multi_event_subscription_keeps_order(self):
+        seen = []
+        sub = self.bus.subscribe_events(
+            ["scan.progress", "scan.completed"],
+            lambda name, p: seen.append((name, p["n"])),
+            coalesce_keys={"scan.progress": lambda p: p["scan"]},
+        )
+        for i in range(5):
+            self.bus.publish("scan.progress", {"scan": "a", "n": i})
+        self.bus.publish("scan.completed", {"scan": "a", "n": 5})
+        self.bus.wait_idle(5)
+
+        self.assertEqual(seen[-1], ("scan.completed", 5))
+        self.assertEqual([n for _, n in seen], sorted(n for _, n in seen))
+        self.assertEqual(len(self.bus.metrics()), 1)
+        self.assertEqual(sub.metrics()["events"], ["scan.progress", "scan.completed"])
+
+    def test_handler_errors_counted(self):
+        seen = []
+
+        def handler(payload):
+            if payload["n"] == 0:
+                raise RuntimeError("boom")
+            seen.append(payload["n"])
+
+        sub = self.bus.subscribe("e", handler)
+        self.bus.publish("e", {"n": 0})
+        self.bus.publish("e", {"n": 1})
+        self.bus.wait_idle(5)
+
+        self.assertEqual(seen, [1])
+        self.assertEqual(sub.metrics()["errors"], 1)
+
+    def test_metrics(self):
+        self.bus.subscribe("e", lambda p: time.sleep(0.02), name="sleepy")
+        self.bus.publish("e", {})
+        self.bus.wait_idle(5)
+
+        metrics = self.bus.metrics()
+        self.assertEqual(len(metrics), 1)
+        self.assertEqual(metrics[0]["name"], "sleepy")
+        self.assertEqual(metrics[0]["delivered"], 1)
+        self.assertEqual(metrics[0]["queue_depth"], 0)
+        self.assertGreaterEqual(metrics[0]["handler_seconds_max"], 0.02)
+
+    def test_shutdown_drains(self):
+        seen = []
+        self.bus.subscribe("e", lambda p: seen.append(p["n"]))
+        for i in range(20):
+            self.bus.publish("e", {"n": i})
+        self.bus.shutdown(timeout=5)
+
+        self.assertEqual(seen, list(range(20)))
+        self.bus.publish("e", {"n": 99})
+        self.assertEqual(self.bus.metrics(), [])
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            self.bus.subscribe("e", print, policy="block")
+
+
+if __name__ == "__main__":
+    unittest.main()
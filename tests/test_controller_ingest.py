@@ -0,0 +1,202 @@
+"""Tests for the controller's batch ingest endpoint (/api/ingest/batch).
+
+The ingest router runs on its own FastAPI app against a temporary SQLite
+database.
+
+Covers:
+- gzip'd NDJSON and plain JSON bodies.
+- Rows stored in one insert with ids returned in order.
+- Per-item rejections (bad JSON, unknown agent, validation) alongside
+  accepted payloads; 401 when only the API key was wrong.
+- One aggregated ingest.batch event per request.
+- Agent lookups cached and invalidated once agent changes are committed.
+- Body decoding runs in the threadpool, off the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict, cast
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("httpx")
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("CONTROLLER_DB_URL", "sqlite:///" + os.path.join(_db_dir, "controller.db"))
+
+from unittest.mock import patch  # noqa: E402
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete, select  # noqa: E402
+
+from controller.app import services  # noqa: E402
+from controller.app.database import Base, engine, get_session  # noqa: E402
+from controller.app.events import event_bus  # noqa: E402
+from controller.app.models import Agent, PushPayload  # noqa: E402
+from controller.app.routers import ingest  # noqa: E402
+from controller.app.schemas import AgentCreate  # noqa: E402
+
+
+def _item(n, agent_name="pi1", scan_type="wifi"):
+    return {"agent_name": agent_name, "scan_type": scan_type, "interface": "wlan0",
+            "payload": {"n": n}, "received_at": "2026-01-01T00:00:00Z"}
+
+
+def _ndjson(items):
+    return gzip.compress(("\n".join(json.dumps(i) for i in items) + "\n").encode())
+
+
+class TestIngestBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=engine)
+        app = FastAPI()
+        app.include_router(ingest.router)
+        cls.client = TestClient(app)
+        cls.events = []
+        event_bus.subscribe("ingest.batch", cls.events.append)
+
+    def setUp(self):
+        with get_session() as db:
+            db.execute(delete(PushPayload))
+            db.execute(delete(Agent))
+            db.add(Agent(name="pi1", base_url="http://pi1:8020"))
+            db.add(Agent(name="pi2", base_url="http://pi2:8020", api_key="secret"))
+        services.invalidate_agent_cache()
+        event_bus.wait_idle(5)
+        self.events.clear()
+
+    def _post_ndjson(self, items, api_key=None):
+        headers = {"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}
+        if api_key:
+            headers["X-API-Key"] = api_key
+        return self.client.post("/api/ingest/batch", content=_ndjson(items), headers=headers)
+
+    def _stored(self):
+        with get_session() as db:
+            rows = db.execute(select(PushPayload).order_by(PushPayload.id)).scalars()
+            return [(row.agent.name, cast(Dict[str, Any], row.payload)["n"]) for row in rows]
+
+    def test_gzip_ndjson(self):
+        response = self._post_ndjson([_item(0), _item(1), _item(2, "pi2")], api_key="secret")
+        self.assertEqual(response.status_code, 202)
+        body = response.json()
+        self.assertEqual(body["accepted"], 3)
+        self.assertEqual(body["rejected"], [])
+        self.assertEqual(body["push_ids"], sorted(body["push_ids"]))
+        self.assertEqual(self._stored(), [("pi1", 0), ("pi1", 1), ("pi2", 2)])
+
+    def test_plain_json_forms(self):
+        response = self.client.post("/api/ingest/batch", json=[_item(0)])
+        self.assertEqual(response.json()["accepted"], 1)
+        response = self.client.post("/api/ingest/batch", json={"payloads": [_item(1)]})
+        self.assertEqual(response.json()["accepted"], 1)
+        response = self.client.post("/api/ingest/batch", json={"nope": 1})
+        self.assertEqual(response.status_code, 400)
+
+    def test_partial_rejection(self):
+        body = _ndjson([_item(0), _item(1, "ghost"), _item(2, scan_type="nope")])
+        body = gzip.compress(gzip.decompress(body) + b"{not json\n")
+        response = self.client.post("/api/ingest/batch", content=body,
+                                    headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"})
+
+        self.assertEqual(response.status_code, 202)
+        result = response.json()
+        self.assertEqual(result["accepted"], 1)
+        self.assertEqual([r["index"] for r in result["rejected"]], [1, 2, 3])
+        self.assertEqual(result["rejected"][0]["error"], "Agent not found")
+        self.assertEqual(self._stored(), [("pi1", 0)])
+
+    def test_bad_api_key(self):
+        response = self._post_ndjson([_item(0, "pi2")], api_key="wrong")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self._stored(), [])
+
+        # Mixed with good payloads the rest still go in
+        response = self._post_ndjson([_item(0, "pi2"), _item(1)], api_key="wrong")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self._stored(), [("pi1", 1)])
+
+    def test_one_event_per_batch(self):
+        self._post_ndjson([_item(0), _item(1, scan_type="bluetooth"), _item(2, "pi2")], api_key="secret")
+        self.assertTrue(event_bus.wait_idle(5))
+
+        self.assertEqual(len(self.events), 1)
+        event = self.events[0]
+        self.assertEqual(event["count"], 3)
+        agents = {a["agent_name"]: a for a in event["agents"]}
+        self.assertEqual(agents["pi1"]["scan_types"], {"wifi": 1, "bluetooth": 1})
+        self.assertEqual(agents["pi2"]["count"], 1)
+        self.assertNotIn("payload", event)
+
+    def test_agent_lookup_cached(self):
+        self._post_ndjson([_item(0, "pi3")])
+        with get_session() as db:
+            db.add(Agent(name="pi3", base_url="http://pi3:8020"))
+
+        # Cached miss until the cache is dropped (agent registration does this)
+        self.assertEqual(self._post_ndjson([_item(1, "pi3")]).json()["accepted"], 0)
+        services.invalidate_agent_cache()
+        self.assertEqual(self._post_ndjson([_item(2, "pi3")]).json()["accepted"], 1)
+
+    def test_agent_changes_invalidate_after_commit(self):
+        def lookup():
+            # An ingest request on another session, e.g. during the metadata refresh
+            with get_session() as other:
+                return services.resolve_push_agent(other, None, "pi3")
+
+        with patch.object(services, "refresh_agent_metadata", lambda session, agent: lookup()):
+            with get_session() as db:
+                services.create_agent(db, AgentCreate.model_validate({"name": "pi3", "base_url": "http://pi3:8020"}))
+        self.assertIsNotNone(lookup())
+
+        with get_session() as db:
+            agent = db.execute(select(Agent).where(Agent.name == "pi3")).scalar_one()
+            db.delete(agent)
+            db.flush()
+            services.invalidate_agent_cache_on_commit(db)
+            self.assertIsNotNone(lookup())
+        self.assertIsNone(lookup())
+
+    def test_too_many_items(self):
+        original = ingest.MAX_BATCH_ITEMS
+        ingest.MAX_BATCH_ITEMS = 2
+        try:
+            response = self._post_ndjson([_item(0), _item(1), _item(2)])
+        finally:
+            ingest.MAX_BATCH_ITEMS = original
+        self.assertEqual(response.status_code, 413)
+
+    def test_decode_off_event_loop(self):
+        on_loop = []
+        decode = ingest._decode_batch
+
+        def recording_decode(*args):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return decode(*args)
+
+        with patch.object(ingest, "_decode_batch", recording_decode):
+            response = self._post_ndjson([_item(0)])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(on_loop, [False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+"""Tests for the controller's WebSocket fan-out (controller.app.notifier).
+
+Covers:
+- Each event is serialized once and queued per client without waiting on
+  slow sockets; full queues drop their oldest message.
+- Event type and agent filters, including /ws/scans query parameters.
+- Large scan.completed responses replaced by a summary and fetch link.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+from typing import Any, Dict, List, Optional, cast
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import WebSocket  # noqa: E402
+
+from controller.app import notifier as notifier_module  # noqa: E402
+from controller.app.notifier import ClientFilter, ScanNotifier, serialize_event  # noqa: E402
+
+
+class _FakeSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent: List[Dict[str, Any]] = []
+        self.gate: Optional[asyncio.Event] = None
+
+    async def accept(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def send_text(self, text):
+        if self.gate is not None:
+            await self.gate.wait()
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+
+def _ws(socket: _FakeSocket) -> WebSocket:
+    return cast(WebSocket, socket)
+
+
+async def _settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestScanNotifier(unittest.TestCase):
+    def test_slow_client_does_not_delay_others(self):
+        async def scenario():
+            notifier = ScanNotifier(max_client_queue=2)
+            slow, fast = _FakeSocket(), _FakeSocket()
+            gate = slow.gate = asyncio.Event()
+            await notifier.connect(_ws(slow))
+            await notifier.connect(_ws(fast))
+
+            for i in range(5):
+                await notifier.broadcast({"event": "scan.progress", "n": i})
+                await _settle()
+
+            self.assertEqual([m["n"] for m in fast.sent], [0, 1, 2, 3, 4])
+            self.assertEqual(slow.sent, [])
+
+            gate.set()
+            await _settle()
+            # First message was already in flight; then only the newest two survived
+            self.assertEqual([m["n"] for m in slow.sent], [0, 3, 4])
+            self.assertEqual(notifier.stats()["dropped"], 2)
+
+            await notifier.disconnect(_ws(slow))
+            await notifier.disconnect(_ws(fast))
+
+        asyncio.run(scenario())
+
+    def test_serialized_once(self):
+        async def scenario():
+            notifier = ScanNotifier()
+            sockets = [_FakeSocket() for _ in range(3)]
+            for socket in sockets:
+                await notifier.connect(_ws(socket))
+
+            with mock.patch.object(notifier_module, "serialize_event", wraps=serialize_event) as serialize:
+                await notifier.broadcast({"event": "scan.started", "scan_id": 1})
+                await _settle()
+
+            self.assertEqual(serialize.call_count, 1)
+            self.assertTrue(all(len(socket.sent) == 1 for socket in sockets))
+
+        asyncio.run(scenario())
+
+    def test_filters(self):
+        async def scenario():
+            notifier = ScanNotifier()
+            completed_only, agent_two = _FakeSocket(), _FakeSocket()
+            await notifier.connect(_ws(completed_only), ClientFilter.from_query("scan.completed", None))
+            await notifier.connect(_ws(agent_two), ClientFilter.from_query(None, "2,sensor-3"))
+
+            await notifier.broadcast({"event": "scan.started", "agent_id": 2})
+            await notifier.broadcast({"event": "scan.completed", "agent_id": 1, "response": {}})
+            await notifier.broadcast({"event": "ingest.batch", "agents": [{"agent_id": 9, "agent_name": "sensor-3"}]})
+            await _settle()
+
+            self.assertEqual([m["event"] for m in completed_only.sent], ["scan.completed"])
+            self.assertEqual([m["event"] for m in agent_two.sent], ["scan.started", "ingest.batch"])
+
+        asyncio.run(scenario())
+
+
+class TestSerializeEvent(unittest.TestCase):
+    def test_small_completed_sent_whole(self):
+        message = {"event": "scan.completed", "scan_id": 4, "response": {"networks": [{"ssid": "a"}]}}
+        self.assertEqual(json.loads(serialize_event(message)), message)
+
+    def test_large_completed_summarized(self):
+        networks = [{"ssid": "x" * 100, "macAddr": "aa"} for _ in range(1000)]
+        message = {"event": "scan.completed", "scan_id": 4, "agent_id": 1,
+                   "response": {"errCode": 0, "networks": networks}}
+
+        sent = json.loads(serialize_event(message))
+        self.assertNotIn("response", sent)
+        self.assertEqual(sent["fetch_url"], "/api/scans/4")
+        self.assertEqual(sent["response_summary"], {"errCode": 0, "networks": 1000})
+        self.assertEqual(sent["agent_id"], 1)
+
+
+class TestWebSocketQuery(unittest.TestCase):
+    def test_query_parameters_filter(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from controller.app.routers import stream
+
+        app = FastAPI()
+        app.include_router(stream.router)
+        shared = notifier_module.notifier
+
+        @app.post("/broadcast")
+        async def broadcast(message: dict):
+            await shared.broadcast(message)
+
+        with TestClient(app) as client:
+            with client.websocket_connect("/ws/scans?events=scan.failed&agents=7") as ws:
+                client.post("/broadcast", json={"event": "scan.completed", "agent_id": 7})
+                client.post("/broadcast", json={"event": "scan.failed", "agent_id": 8})
+                client.post("/broadcast", json={"event": "scan.failed", "agent_id": 7, "error": "x"})
+                self.assertEqual(ws.receive_json(), {"event": "scan.failed", "agent_id": 7, "error": "x"})
+
+
+if __name__ == "__main__":
+    unittest.main()
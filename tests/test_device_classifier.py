@@ -4,7 +4,8 @@ classification.
 
 Covers: empty evidence, single-rule fires, multi-rule reinforcement,
 conflict resolution, case insensitivity, missing/None evidence keys,
-rules-file resilience, and public API contracts.
+rules-file resilience, public API contracts, and parity between the
+compiled rule index and the linear rule scan.
 """
 
 import sys
@@ -501,5 +502,127 @@ class TestSpecificRuleCategories(unittest.TestCase):
         self.assertIn("appearance:heart_rate", tags)
 
 
+# ── Compiled index parity ─────────────────────────────────────────────────
+
+_VENDOR_SAMPLES = [
+    "DJI Technology", "Apple, Inc.", "Samsung Electronics", "Google LLC",
+    "Amazon Technologies", "Ring LLC", "Nest Labs", "Tesla Motors",
+    "Ubiquiti Inc.", "Cisco Systems", "Aruba Networks", "Netgear",
+    "HP, Inc", "HP-Print", "Canon Inc.", "Sony Corp", "Bose", "Sonos",
+    "Fitbit", "Garmin", "EPSON", "Intel Corporate", "Holy Stone", "Parrot SA",
+    "Espressif", "Skydio", "Autel Robotics", "Yuneec",
+]
+_NAME_SAMPLES = [
+    "AirPods Pro", "Galaxy Buds2", "Powerbeats Pro", "Beats Studio",
+    "Apple Watch", "fitbit charge", "LG TV", "Samsung TV", "MX Master 3",
+    "Magic Mouse", "Logitech Keyboard", "Hue bridge", "my phone", "Tesla Model 3",
+]
+_SSID_SAMPLES = [
+    "HP-Print-42-LaserJet", "Canon_XYZ123", "EPSON1234", "Ring Setup",
+    "config-ring-7", "Tesla", "Hue-bridge", "home-wifi", "", "DIRECT-xx",
+]
+
+
+def _parity_corpus():
+    """Evidence dicts that exercise every rule, overlaps and misses."""
+    import itertools
+    continuity = ["airpods", "apple_watch", "iphone", "macbook", "nearby",
+                  "handoff", "airtag", "unknown_type", None]
+    corpus = []
+    for vendor, name, ssid, cod, appearance, cont in zip(
+        itertools.cycle(_VENDOR_SAMPLES + [None]),
+        itertools.cycle(_NAME_SAMPLES + [None, ""]),
+        itertools.cycle(_SSID_SAMPLES + [None]),
+        itertools.cycle([None] + [m << 8 for m in range(32)] + [0x5A020C, True]),
+        itertools.cycle([None] + [c << 6 for c in range(0, 70, 3)] + [0x0341, 65535]),
+        itertools.cycle(continuity),
+    ):
+        corpus.append({
+            "oui_vendor": vendor, "bt_cod": cod, "bt_appearance": appearance,
+            "bt_name": name, "bt_company": None, "wifi_ssid": ssid,
+            "wifi_vendor_ies": None, "service_uuids": None,
+            "apple_continuity_type": cont,
+        })
+        if len(corpus) >= 600:
+            break
+    return corpus
+
+
+class TestCompiledIndexParity(unittest.TestCase):
+
+    def setUp(self):
+        dc.reload_rules()
+
+    def test_bundled_rules_match_linear_scan(self):
+        for evidence in _parity_corpus():
+            self.assertEqual(dc.classify(evidence), dc._classify_linear(evidence),
+                             evidence)
+
+    def test_single_key_evidence_matches_linear_scan(self):
+        # One key at a time, so each rule's own result is compared
+        for evidence in _parity_corpus()[:200]:
+            for key, value in evidence.items():
+                single = {key: value}
+                self.assertEqual(dc.classify(single), dc._classify_linear(single),
+                                 single)
+
+    def test_other_match_types_and_awkward_patterns(self):
+        """in_list, overlapping regexes, back-references and odd patterns."""
+        raw_rules = [
+            {"match_key": "service_uuids", "match_type": "in_list",
+             "pattern": "180d", "class_guess": "wearable",
+             "confidence": 0.6, "evidence_tag": "uuid:hr"},
+            {"match_key": "wifi_vendor_ies", "match_type": "in_list",
+             "pattern": "0050f2", "class_guess": "laptop",
+             "confidence": 0.3, "evidence_tag": "ie:ms"},
+            {"match_key": "wifi_ssid", "match_type": "regex",
+             "pattern": "(?i)cam", "class_guess": "iot",
+             "confidence": 0.5, "evidence_tag": "ssid:cam"},
+            {"match_key": "wifi_ssid", "match_type": "regex",
+             "pattern": "(?i)^camera", "class_guess": "iot",
+             "confidence": 0.4, "evidence_tag": "ssid:camera"},
+            {"match_key": "wifi_ssid", "match_type": "regex",
+             "pattern": r"(ab)\1", "class_guess": "phone",
+             "confidence": 0.7, "evidence_tag": "ssid:abab"},
+            {"match_key": "wifi_ssid", "match_type": "equals",
+             "pattern": "camera", "class_guess": "phone",
+             "confidence": 0.5, "evidence_tag": "ssid:eq"},
+            {"match_key": "bt_appearance", "match_type": "appearance_category",
+             "pattern": 2000, "class_guess": "phone",
+             "confidence": 0.5, "evidence_tag": "appearance:big"},
+            {"match_key": "bt_cod", "match_type": "cod_major",
+             "pattern": "9", "class_guess": "wearable",
+             "confidence": 0.5, "evidence_tag": "cod:str"},
+        ]
+        rules = [rule for rule in map(dc._compile_rule, raw_rules) if rule is not None]
+        self.assertEqual(len(rules), len(raw_rules))
+        samples = [
+            {"service_uuids": ["180a", "180d", "180d"]},
+            {"service_uuids": "0000180d-0000"},
+            {"wifi_vendor_ies": "00:17:f2,0050f2"},
+            {"wifi_vendor_ies": ["0050f2"], "service_uuids": []},
+            {"wifi_ssid": "camera"},
+            {"wifi_ssid": "Camera abab"},
+            {"wifi_ssid": "webcam"},
+            {"wifi_ssid": "abab"},
+            {"bt_appearance": 2000 << 6, "bt_cod": 0x0900},
+            {"wifi_ssid": ["camera"]},
+        ]
+        original_rules = dc._COMPILED_RULES
+        try:
+            dc._COMPILED_RULES = rules
+            for evidence in samples:
+                self.assertEqual(dc.classify(evidence),
+                                 dc._classify_linear(evidence, rules), evidence)
+        finally:
+            dc._COMPILED_RULES = original_rules
+
+    def test_index_follows_reload(self):
+        dc.classify({"oui_vendor": "DJI"})
+        first = dc._get_index()
+        dc.reload_rules()
+        self.assertIsNot(dc._get_index(), first)
+
+
 if __name__ == "__main__":
     unittest.main()
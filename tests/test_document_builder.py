@@ -12,13 +12,19 @@ Covers:
 - related.hash absent when no fingerprint inputs
 - related.hash present + hash_strength when some inputs
 - class_evidence always present as list
+- DocumentCache: identical output, volatile fields merged, static-field
+  changes rebuild, idle eviction, no aliasing between documents,
+  classifier rule reloads invalidate cached classifications
 """
 
 import hashlib
+import json
 import pytest
 from datetime import datetime, timezone, timedelta
 
+import sparrow_elastic.device_classifier as device_classifier
 from sparrow_elastic.document_builder import (
+    DocumentCache,
     build_wifi_document,
     build_bt_document,
     compute_doc_id,
@@ -623,3 +629,138 @@ class TestMappingCompliance:
         doc = build_bt_document(_full_bt_dev(), _OBS_WITH_GPS, _NOW)
         extra = set(doc.keys()) - _ALLOWED_BT_TOPLEVEL
         assert not extra, f"Extra keys not in mapping: {extra}"
+
+
+# ---------------------------------------------------------------------------
+# DocumentCache
+# ---------------------------------------------------------------------------
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDocumentCache:
+    def test_cached_wifi_matches_uncached(self):
+        cache = DocumentCache()
+        for _ in range(3):
+            doc = build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW, cache=cache)
+            assert doc == build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW)
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hits"] == 2
+
+    def test_cached_bt_matches_uncached(self):
+        cache = DocumentCache()
+        for _ in range(3):
+            doc = build_bt_document(_full_bt_dev(), _OBS_WITH_GPS, _NOW, cache=cache)
+            assert doc == build_bt_document(_full_bt_dev(), _OBS_WITH_GPS, _NOW)
+        assert cache.stats()["hits"] == 2
+
+    def test_volatile_fields_merged_fresh(self):
+        cache = DocumentCache()
+        build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW, cache=cache)
+
+        net = _full_wifi_net()
+        net["signal"] = -40
+        net["stationcount"] = 9
+        doc = build_wifi_document(net, _OBS_NO_GPS, _NOW + timedelta(hours=1), cache=cache)
+
+        assert cache.stats()["hits"] == 1
+        assert doc["signal"]["strength_dbm"] == -40.0
+        assert doc["wifi"]["qbss"]["station_count"] == 9
+        assert "geo" not in doc["observer"]
+        assert doc == build_wifi_document(net, _OBS_NO_GPS, _NOW + timedelta(hours=1))
+
+    def test_static_field_change_rebuilds(self):
+        cache = DocumentCache()
+        build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW, cache=cache)
+
+        net = _full_wifi_net()
+        net["ssid"] = "Renamed"
+        net["vendor_ie_ouis"] = ["00:50:f2"]
+        doc = build_wifi_document(net, _OBS_WITH_GPS, _NOW, cache=cache)
+
+        assert cache.stats()["misses"] == 2
+        assert len(cache) == 1
+        assert doc["wifi"]["ssid"] == "Renamed"
+        assert doc["wifi"]["vendor_ie"] == {"ouis": ["00:50:f2"]}
+
+    def test_wifi_and_bt_keys_are_separate(self):
+        cache = DocumentCache()
+        dev = _full_bt_dev()
+        dev["macAddr"] = _full_wifi_net()["macAddr"]
+        build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW, cache=cache)
+        doc = build_bt_document(dev, _OBS_WITH_GPS, _NOW, cache=cache)
+        assert "bluetooth" in doc
+        assert len(cache) == 2
+
+    def test_documents_do_not_alias_cache(self):
+        cache = DocumentCache()
+        first = build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW, cache=cache)
+        first["device"]["class_evidence"].append("fingerbank:x")
+        first["wifi"]["channel"]["occupied_set"].append(999)
+        first["rf"]["channel_occupied_set"].append(999)
+
+        second = build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW, cache=cache)
+        assert "fingerbank:x" not in second["device"]["class_evidence"]
+        assert 999 not in second["wifi"]["channel"]["occupied_set"]
+        assert 999 not in second["rf"]["channel_occupied_set"]
+
+    def test_prune_drops_idle_devices(self):
+        clock = _FakeClock()
+        cache = DocumentCache(max_idle_seconds=60, clock=clock)
+        build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW, cache=cache)
+        clock.now += 30
+        build_bt_document(_full_bt_dev(), _OBS_WITH_GPS, _NOW, cache=cache)
+
+        clock.now += 45
+        assert cache.prune() == 1
+        assert len(cache) == 1
+        clock.now += 60
+        assert cache.prune() == 1
+        assert cache.stats()["evictions"] == 2
+
+    def test_max_entries_evicts_least_recent(self):
+        cache = DocumentCache(max_entries=2)
+        for i in range(3):
+            net = _full_wifi_net()
+            net["macAddr"] = "00:11:22:33:44:%02x" % i
+            build_wifi_document(net, _OBS_WITH_GPS, _NOW, cache=cache)
+        assert len(cache) == 2
+        net = _full_wifi_net()
+        net["macAddr"] = "00:11:22:33:44:00"
+        build_wifi_document(net, _OBS_WITH_GPS, _NOW, cache=cache)
+        assert cache.stats()["misses"] == 4
+
+    def test_rule_reload_invalidates_classification(self, tmp_path, monkeypatch):
+        rules_file = tmp_path / "rules.json"
+
+        def write_rules(class_guess):
+            rules_file.write_text(json.dumps({"rules": [{
+                "match_key": "wifi_ssid", "match_type": "equals",
+                "pattern": "TestNetwork", "class_guess": class_guess,
+                "confidence": 0.8, "evidence_tag": "ssid:test",
+            }]}))
+            device_classifier.reload_rules()
+
+        monkeypatch.setattr(device_classifier, "_RULES_FILE", str(rules_file))
+        try:
+            write_rules("access_point")
+            cache = DocumentCache()
+            doc = build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW, cache=cache)
+            assert doc["device"]["class_guess"] == "access_point"
+
+            write_rules("camera")
+            doc = build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW, cache=cache)
+            assert doc["device"]["class_guess"] == "camera"
+            assert cache.stats()["misses"] == 2
+
+            doc = build_wifi_document(_full_wifi_net(), _OBS_WITH_GPS, _NOW, cache=cache)
+            assert doc["device"]["class_guess"] == "camera"
+            assert cache.stats()["hits"] == 1
+        finally:
+            monkeypatch.undo()
+            device_classifier.reload_rules()
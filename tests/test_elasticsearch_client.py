@@ -134,37 +134,64 @@ class TestEnsureInitialIndex:
 # ---------------------------------------------------------------------------
 
 class TestBulk:
-    def test_bulk_returns_helpers_result(self):
+    @staticmethod
+    def _response(body, status=200):
+        resp = MagicMock()
+        resp.meta.status = status
+        resp.body = body
+        return resp
+
+    def test_bulk_posts_gzipped_ndjson(self):
+        import gzip
         client, mock_es = _make_client()
+        mock_es.perform_request.return_value = self._response(
+            {"errors": False, "items": [{"index": {"_id": "1", "status": 201}}]}
+        )
         actions = [{"_index": "test", "_id": "1", "_source": {"field": "val"}}]
 
-        with patch("elasticsearch.helpers.bulk", return_value=(1, [])) as mock_bulk:
-            success, errors = client.bulk(actions)
+        success, errors = client.bulk(actions)
 
         assert success == 1
         assert errors == []
-        mock_bulk.assert_called_once()
+        args, kwargs = mock_es.perform_request.call_args
+        assert args == ("POST", "/_bulk")
+        assert kwargs["headers"]["content-encoding"] == "gzip"
+        assert gzip.decompress(kwargs["body"]) == (
+            b'{"index":{"_index":"test","_id":"1"}}\n{"field":"val"}\n'
+        )
 
-    def test_bulk_passes_chunk_size_and_flags(self):
+    def test_bulk_returns_item_errors(self):
         client, mock_es = _make_client()
-        actions = [{"_index": "test", "_id": "1", "_source": {}}]
+        failed = {"index": {"_id": "2", "status": 404,
+                            "error": {"type": "index_not_found_exception"}}}
+        mock_es.perform_request.return_value = self._response(
+            {"errors": True, "items": [{"index": {"_id": "1", "status": 201}}, failed]}
+        )
+        actions = [{"_index": "t", "_id": str(i), "_source": {}} for i in (1, 2)]
 
-        with patch("elasticsearch.helpers.bulk", return_value=(1, [])) as mock_bulk:
-            client.bulk(actions)
+        success, errors = client.bulk(actions)
 
-        _, kwargs = mock_bulk.call_args
-        assert kwargs.get("chunk_size") == 500
-        assert kwargs.get("raise_on_error") is False
-        assert kwargs.get("raise_on_exception") is False
+        assert success == 1
+        assert errors == [failed]
 
-    def test_bulk_returns_empty_errors_list_when_helpers_returns_empty(self):
+    def test_bulk_empty_actions_sends_nothing(self):
         client, mock_es = _make_client()
 
-        with patch("elasticsearch.helpers.bulk", return_value=(5, [])):
-            success, errors = client.bulk([])
+        success, errors = client.bulk([])
 
-        assert success == 5
+        assert success == 0
         assert errors == []
+        mock_es.perform_request.assert_not_called()
+
+    def test_bulk_compress_setting_off(self):
+        client, mock_es = _make_client({"bulk_compress": False})
+        mock_es.perform_request.return_value = self._response({"errors": False, "items": [{}]})
+
+        client.bulk([{"_index": "t", "_id": "1", "_source": {}}])
+
+        _, kwargs = mock_es.perform_request.call_args
+        assert "content-encoding" not in kwargs["headers"]
+        assert kwargs["body"].startswith(b'{"index"')
 
 
 # ---------------------------------------------------------------------------
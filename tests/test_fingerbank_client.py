@@ -1,6 +1,7 @@
 """Tests for sparrow_elastic.fingerbank_client.
 
 All external I/O (sqlite3, urllib) is mocked — no live network calls are made.
+The offline-index tests use a throwaway SQLite file in a temp directory.
 """
 
 from __future__ import annotations
@@ -13,6 +14,7 @@ import sys
 import time
 import unittest
 from dataclasses import FrozenInstanceError
+from pathlib import Path
 from unittest.mock import MagicMock, call, patch
 
 # Ensure the project root is on sys.path.
@@ -30,6 +32,7 @@ def _reset_module():
     fb._api_key = None
     fb._offline_db_path = None
     fb._NEG_CACHE.clear()
+    fb._OFFLINE = fb._OfflineIndex()
 
 
 def _make_live_response(data: dict, status: int = 200) -> MagicMock:
@@ -580,6 +583,124 @@ class TestDataRefreshRegistry(unittest.TestCase):
         self.assertIn("fingerbank.org", df.url)
 
 
+# ---------------------------------------------------------------------------
+# Offline index: persistent connection, OUI LRU, reload on replace
+# ---------------------------------------------------------------------------
+
+def _write_offline_db(path: str, rows) -> None:
+    """Create a minimal Fingerbank-shaped SQLite DB from (oui, name, type, score) rows."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE devices (id INTEGER PRIMARY KEY, name TEXT, type TEXT)")
+        conn.execute("CREATE TABLE combinations (mac TEXT, device_id INTEGER, score INTEGER)")
+        for i, (oui, name, dev_type, score) in enumerate(rows, start=1):
+            conn.execute("INSERT INTO devices VALUES (?, ?, ?)", (i, name, dev_type))
+            conn.execute("INSERT INTO combinations VALUES (?, ?, ?)", (oui, i, score))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class TestOfflineIndex(unittest.TestCase):
+    """Uses a real temporary SQLite file rather than mocks."""
+
+    def setUp(self):
+        import tempfile
+        _reset_module()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "fingerbank.db")
+        _write_offline_db(self.db_path, [
+            ("AABBCC", "Apple iPhone 13", "Phone", 85),
+            ("AABBCC", "Apple iPad", "Tablet", 40),
+            ("112233", "HP LaserJet", "Printer", 70),
+        ])
+        fb.configure(offline_db_path=self.db_path)
+
+    def tearDown(self):
+        fb.reload_offline_db()
+        _reset_module()
+        self.tmpdir.cleanup()
+
+    def _found(self, mac):
+        result = fb.lookup(mac)
+        assert result is not None, f"no offline match for {mac}"
+        return result
+
+    def test_best_score_per_oui(self):
+        result = self._found("aa-bb-cc-00-11-22")
+        self.assertEqual(result.device_model, "Apple iPhone 13")
+        self.assertAlmostEqual(result.confidence, 0.85)
+
+    def test_connection_opened_once_and_results_memoised(self):
+        real_connect = sqlite3.connect
+        with patch("sqlite3.connect", side_effect=real_connect) as mock_connect:
+            for _ in range(50):
+                fb.lookup("AA:BB:CC:DD:EE:FF")
+                fb.lookup("11:22:33:44:55:66")
+                fb.lookup("DE:AD:BE:EF:00:01")   # miss
+        self.assertEqual(mock_connect.call_count, 1)
+
+        stats = fb.offline_cache_stats()
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["hits"], 147)
+        self.assertEqual(stats["cached"], 3)
+        self.assertEqual(stats["loads"], 1)
+
+    def test_same_oui_shares_cache_entry(self):
+        fb.lookup("AA:BB:CC:00:00:01")
+        fb.lookup("AA:BB:CC:00:00:02")
+        self.assertEqual(fb.offline_cache_stats()["misses"], 1)
+
+    def test_lru_is_bounded(self):
+        fb._OFFLINE.max_entries = 2
+        for mac in ("AA:BB:CC:00:00:00", "11:22:33:00:00:00", "DE:AD:BE:00:00:00"):
+            fb.lookup(mac)
+        self.assertEqual(fb.offline_cache_stats()["cached"], 2)
+        # Oldest OUI was evicted and has to be queried again
+        fb.lookup("AA:BB:CC:00:00:00")
+        self.assertEqual(fb.offline_cache_stats()["misses"], 4)
+
+    def test_replaced_file_is_picked_up(self):
+        fb._OFFLINE.stat_interval = 0.0
+        self.assertEqual(self._found("AA:BB:CC:00:00:00").device_model, "Apple iPhone 13")
+        self.assertIsNone(fb.lookup("DE:AD:BE:00:00:00"))
+
+        # Same swap data_refresh does: write beside it, then os.replace()
+        new_path = self.db_path + ".new"
+        _write_offline_db(new_path, [
+            ("AABBCC", "Apple iPhone 15", "Phone", 90),
+            ("DEADBE", "Dead Beef Cam", "Camera", 60),
+        ])
+        os.replace(new_path, self.db_path)
+
+        self.assertEqual(self._found("AA:BB:CC:00:00:00").device_model, "Apple iPhone 15")
+        self.assertEqual(self._found("DE:AD:BE:00:00:00").device_model, "Dead Beef Cam")
+        self.assertEqual(fb.offline_cache_stats()["loads"], 2)
+
+    def test_reload_drops_cache(self):
+        fb.lookup("AA:BB:CC:00:00:00")
+        fb.reload_offline_db()
+        self.assertEqual(fb.offline_cache_stats()["cached"], 0)
+        fb.lookup("AA:BB:CC:00:00:00")
+        self.assertEqual(fb.offline_cache_stats()["loads"], 2)
+
+    def test_data_refresh_reloads_index(self):
+        from sparrow_elastic.data_refresh import DataFile
+        df = DataFile(name="fingerbank.db", url="http://example.invalid/db",
+                      max_age_days=7, format="raw")
+        fb.lookup("AA:BB:CC:00:00:00")
+
+        mock_resp = MagicMock()
+        mock_resp.read.return_value = b"not really sqlite"
+        mock_resp.__enter__ = lambda s: s
+        mock_resp.__exit__ = MagicMock(return_value=False)
+        with patch("urllib.request.urlopen", return_value=mock_resp), \
+             patch.object(DataFile, "path", new=Path(self.tmpdir.name) / "fingerbank.db"):
+            self.assertTrue(df.refresh(force=True))
+
+        self.assertEqual(fb.offline_cache_stats()["cached"], 0)
+
+
 # ---------------------------------------------------------------------------
 # Integration: enrich then combine — Tier 1 still dominant
 # ---------------------------------------------------------------------------
@@ -0,0 +1,154 @@
+"""Tests for the HackRF spectrum store (sparrowhackrf.HackrfSpectrum).
+
+Covers:
+- hackrf_sweep line parsing into the fixed bin array, including lines that
+  run past either end of the array and non-data lines.
+- Readers only seeing published snapshots, published on sweep wrap.
+- 2.4 / 5 GHz channel aggregation matching the per-bin dict version, with
+  the clamped 2.4 GHz edge channels reporting their strongest bin.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sparrowhackrf import HackrfSpectrum, SparrowHackrf  # noqa: E402
+
+
+def _line(startFreq, values, binWidth=500000):
+    endFreq = startFreq + 5000000
+    return "2026-01-01, 12:00:00.000000, %d, %d, %.2f, 20, %s\n" % (
+        startFreq, endFreq, binWidth, ", ".join("%.2f" % v for v in values))
+
+
+def _legacyChannels(spectrum, lowFreq, highFreq, freqToChannel, inclusive, offset):
+    # Per-key loop the store replaced
+    retVal = {}
+    for curKey in spectrum.keys():
+        inRange = curKey <= highFreq if inclusive else curKey < highFreq
+        if curKey >= lowFreq and inRange:
+            power = spectrum[curKey] - offset
+            if power <= -100.0:
+                power = -100.0
+            retVal[freqToChannel(float(curKey) / 1000000.0)] = power
+    return retVal
+
+
+def _hackrf(store):
+    hackrf = SparrowHackrf.__new__(SparrowHackrf)
+    hackrf.spectrumStore = store
+    return hackrf
+
+
+class TestSweepLines(unittest.TestCase):
+    def setUp(self):
+        self.store = HackrfSpectrum(2400, 2500, 500000)
+
+    def test_line_fills_one_slice(self):
+        self.assertTrue(self.store.addSweepLine(_line(2410000000, [-70.0, -71.5, -72.0])))
+        self.store.publish()
+        self.assertEqual(self.store.toDict(), {2410000000: -70.0, 2410500000: -71.5, 2411000000: -72.0})
+
+    def test_non_data_lines_are_ignored(self):
+        self.assertFalse(self.store.addSweepLine(""))
+        self.assertFalse(self.store.addSweepLine("hackrf_sweep version 2022.09.1\n"))
+        self.assertFalse(self.store.addSweepLine("2026-01-01, 12:00:00, abc, 1, 2, 3, -70\n"))
+
+    def test_lines_past_the_array_are_clipped(self):
+        numBins = len(self.store.powers)
+        lastFreq = int(self.store.frequencies[-1])
+        self.store.addSweepLine(_line(lastFreq - 500000, [-60.0, -61.0, -62.0]))
+        self.store.addSweepLine(_line(2399000000, [-50.0, -51.0, -52.0, -53.0]))
+        self.store.publish()
+        spectrum = self.store.toDict()
+        self.assertEqual(spectrum[lastFreq], -61.0)
+        self.assertEqual(spectrum[2400000000], -52.0)
+        self.assertEqual(len(self.store.powers), numBins)
+
+    def test_readers_see_published_snapshots_only(self):
+        self.store.addSweepLine(_line(2400000000, [-70.0]))
+        self.store.addSweepLine(_line(2405000000, [-71.0]))
+        self.assertEqual(self.store.toDict(), {})
+
+        # Starting over at the bottom publishes the finished sweep
+        self.store.addSweepLine(_line(2400000000, [-40.0]))
+        self.assertEqual(self.store.toDict(), {2400000000: -70.0, 2405000000: -71.0})
+
+        snapshot = self.store.snapshot
+        self.store.addSweepLine(_line(2405000000, [-30.0]))
+        self.store.publish()
+        self.assertEqual(snapshot[10], -71.0)
+
+    def test_strided_bins_keep_exact_frequencies(self):
+        store = HackrfSpectrum(5170, 5840, 1600000)
+        store.addSweepLine(_line(5175000000, [-60.0, -61.0, -62.0], 1600000))
+        store.addSweepLine(_line(5168000000, [-50.0, -51.0, -52.0], 1600000))
+        store.publish()
+        self.assertEqual(store.toDict(), {5171200000: -52.0, 5175000000: -60.0,
+                                          5176600000: -61.0, 5178200000: -62.0})
+
+    def test_mixed_line_lengths(self):
+        self.store.addSweepLine(_line(2410000000, [-70.0, -71.0]))
+        self.store.addSweepLine(_line(2420000000, [-60.0, -61.0, -62.0]))
+        self.store.publish()
+        self.assertEqual(self.store.toDict(), {2410000000: -70.0, 2410500000: -71.0, 2420000000: -60.0,
+                                               2420500000: -61.0, 2421000000: -62.0})
+
+    def test_fill(self):
+        self.store.fill(-100.0)
+        self.assertEqual(set(self.store.toDict().values()), {-100.0})
+
+
+class TestChannels(unittest.TestCase):
+    def _sweep(self, store, minFreq, maxFreq, binWidth, seed):
+        # One line per 5 MHz like hackrf_sweep, so with 1.6 MHz bins the
+        # lines don't start on a multiple of the bin width
+        spectrum = {}
+        freq = minFreq * 1000000
+        i = 0
+        while freq < maxFreq * 1000000:
+            values = [-90.0 + ((seed * 7 + i * 13 + k * 5) % 60) for k in range(5000000 // binWidth)]
+            store.addSweepLine(_line(freq, values, binWidth))
+            for k, value in enumerate(values):
+                spectrum[freq + k * binWidth] = value
+            freq += 5000000
+            i += 1
+        store.publish()
+        return spectrum
+
+    def test_24_matches_per_bin_version(self):
+        store = HackrfSpectrum(2400, 2500, 500000)
+        spectrum = self._sweep(store, 2400, 2500, 500000, 1)
+        legacy = _legacyChannels(spectrum, 2400000000, 3000000000, SparrowHackrf.fFreqTo24Channel, False, 25.0)
+        channels = _hackrf(store).spectrum24ToChannels()
+
+        self.assertEqual(set(channels), set(legacy))
+        for channel in legacy:
+            if channel in (-1.0, 16.0):
+                continue
+            self.assertEqual(channels[channel], legacy[channel])
+
+        # Clamped edges report the strongest of the bins that share them
+        lowEdge = [v for f, v in spectrum.items() if f <= 2402000000]
+        self.assertEqual(channels[-1.0], max(max(lowEdge) - 25.0, -100.0))
+
+    def test_5_matches_per_bin_version(self):
+        store = HackrfSpectrum(5170, 5840, 1600000)
+        spectrum = self._sweep(store, 5170, 5840, 1600000, 3)
+        legacy = _legacyChannels(spectrum, 5180000000, 5835000000, SparrowHackrf.fFreqTo5Channel, True, 30.0)
+        self.assertEqual(_hackrf(store).spectrum5ToChannels(), legacy)
+
+    def test_unseen_channels_are_left_out(self):
+        store = HackrfSpectrum(2400, 2500, 500000)
+        store.addSweepLine(_line(2437000000, [-40.0, -50.0]))
+        store.publish()
+        channels = _hackrf(store).spectrum24ToChannels()
+        self.assertEqual(channels, {6.0: -65.0, 6.1: -75.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+"""Tests for multi-interface hunt scans (WirelessEngine.huntScan).
+
+scanForNetworks is replaced with a fake radio so these run without hardware.
+
+Covers:
+- Frequencies are split across interfaces and every one is scanned once.
+- Interfaces scan concurrently, each under its own lock.
+- Results merge by key keeping the strongest signal.
+- Per-interface timing and error reporting in getNetworksAsDict.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("dateutil")
+pytest.importorskip("gps3")
+
+from wirelessengine import WirelessEngine, WirelessNetwork  # noqa: E402
+
+
+def _net(mac, signal, channel=36):
+    net = WirelessNetwork()
+    net.macAddr = mac
+    net.ssid = "lab"
+    net.channel = channel
+    net.signal = signal
+    net.strongestsignal = signal
+    return net
+
+
+class _FakeRadios:
+    """scanForNetworks stand-in: records calls and per-interface concurrency."""
+
+    def __init__(self, delay=0.05, results=None, errors=None):
+        self.delay = delay
+        self.results = results or {}
+        self.errors = errors or {}
+        self.calls = []
+        self.active = {}
+        self.maxActive = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, interfaceName, frequency=0):
+        with self.lock:
+            self.calls.append((interfaceName, frequency))
+            self.active[interfaceName] = self.active.get(interfaceName, 0) + 1
+            self.maxActive = max(self.maxActive, sum(self.active.values()))
+        time.sleep(self.delay)
+        with self.lock:
+            self.active[interfaceName] -= 1
+
+        if interfaceName in self.errors:
+            return self.errors[interfaceName], "failed", {}
+
+        nets = {}
+        for net in self.results.get((interfaceName, frequency), []):
+            nets[net.getKey()] = net
+        return 0, "", nets
+
+
+class TestHuntScan(unittest.TestCase):
+    def test_frequencies_split_and_scanned_in_parallel(self):
+        radios = _FakeRadios()
+        with mock.patch.object(WirelessEngine, "scanForNetworks", radios):
+            retCode, _, _, timing = WirelessEngine.huntScan(
+                ["wlan0", "wlan1"], [5180, 5200, 5220, 5240])
+
+        self.assertEqual(retCode, 0)
+        self.assertEqual(sorted(f for _, f in radios.calls), [5180, 5200, 5220, 5240])
+        self.assertEqual(timing["wlan0"]["frequencies"], [5180, 5220])
+        self.assertEqual(timing["wlan1"]["frequencies"], [5200, 5240])
+        self.assertEqual(radios.maxActive, 2)
+
+    def test_interface_locks_are_used(self):
+        radios = _FakeRadios()
+        locks = {"wlan0": threading.Lock(), "wlan1": threading.Lock()}
+        locks["wlan1"].acquire()
+
+        def release_later():
+            time.sleep(0.2)
+            locks["wlan1"].release()
+
+        threading.Thread(target=release_later).start()
+        with mock.patch.object(WirelessEngine, "scanForNetworks", radios):
+            _, _, _, timing = WirelessEngine.huntScan(["wlan0", "wlan1"], [5180, 5200], locks)
+
+        # wlan1 had to wait for the lock; wlan0 did not
+        self.assertGreaterEqual(timing["wlan1"]["seconds"], 0.2)
+        self.assertLess(timing["wlan0"]["seconds"], 0.2)
+
+    def test_merge_keeps_strongest(self):
+        radios = _FakeRadios(delay=0, results={
+            ("wlan0", 5180): [_net("aa", -70)],
+            ("wlan1", 5200): [_net("aa", -50), _net("bb", -60)],
+        })
+        with mock.patch.object(WirelessEngine, "scanForNetworks", radios):
+            _, _, networks, _ = WirelessEngine.huntScan(["wlan0", "wlan1"], [5180, 5200])
+
+        self.assertEqual(len(networks), 2)
+        aa = networks[_net("aa", 0).getKey()]
+        self.assertEqual(aa.signal, -50)
+        self.assertEqual(aa.strongestsignal, -50)
+
+    def test_partial_failure_still_succeeds(self):
+        radios = _FakeRadios(delay=0, errors={"wlan1": WirelessNetwork.ERR_NETDOWN})
+        with mock.patch.object(WirelessEngine, "scanForNetworks", radios):
+            retCode, _, _, timing = WirelessEngine.huntScan(["wlan0", "wlan1"], [5180, 5200])
+
+        self.assertEqual(retCode, 0)
+        self.assertEqual(timing["wlan1"]["errCode"], WirelessNetwork.ERR_NETDOWN)
+
+    def test_all_failed(self):
+        radios = _FakeRadios(delay=0, errors={"wlan0": WirelessNetwork.ERR_NETDOWN,
+                                              "wlan1": WirelessNetwork.ERR_OPNOTSUPPORTED})
+        with mock.patch.object(WirelessEngine, "scanForNetworks", radios):
+            retCode, errString, _, _ = WirelessEngine.huntScan(["wlan0", "wlan1"], [5180, 5200])
+
+        self.assertEqual(retCode, WirelessNetwork.ERR_NETDOWN)
+        self.assertEqual(errString, "failed")
+
+    def test_more_interfaces_than_frequencies(self):
+        radios = _FakeRadios(delay=0)
+        with mock.patch.object(WirelessEngine, "scanForNetworks", radios):
+            _, _, _, timing = WirelessEngine.huntScan(["wlan0", "wlan1", "wlan2"], [5180])
+
+        self.assertEqual(list(timing.keys()), ["wlan0"])
+
+
+class TestGetNetworksAsDictHunt(unittest.TestCase):
+    def test_multi_interface_reports_timing(self):
+        radios = _FakeRadios(delay=0, results={("wlan1", 5200): [_net("aa", -60)]})
+        with mock.patch.object(WirelessEngine, "scanForNetworks", radios):
+            retCode, _, result = WirelessEngine.getNetworksAsDict(
+                "wlan0", None, [5180, 5200], ["wlan1", "wlan0"])
+
+        self.assertEqual(retCode, 0)
+        self.assertEqual(sorted(result["interfacetiming"].keys()), ["wlan0", "wlan1"])
+        self.assertEqual(len(result["networks"]), 1)
+
+    def test_single_interface_hunt_unchanged(self):
+        radios = _FakeRadios(delay=0, results={("wlan0", 5200): [_net("aa", -60)]})
+        with mock.patch.object(WirelessEngine, "scanForNetworks", radios):
+            retCode, _, result = WirelessEngine.getNetworksAsDict("wlan0", None, [5180, 5200])
+
+        self.assertEqual(retCode, 0)
+        self.assertNotIn("interfacetiming", result)
+        self.assertEqual(radios.calls, [("wlan0", 5180), ("wlan0", 5200)])
+        self.assertEqual(len(result["networks"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""Tests for WirelessEngine.parseIWoutput against recorded ``iw dev <if> scan`` output.
+
+Covers:
+- Every recorded scan in tests/data/iw_scans parses to the networks captured
+  in the matching ``*.expected.json`` (generated with the original
+  regex-per-field parser, so this is a parity check).
+- A list of lines parses the same as the equivalent string.
+- Lines that carry several field keywords keep the historical precedence.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import sys
+import unittest
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# wirelessengine pulls in dateutil and gps3 (via sparrowgps)
+pytest.importorskip("dateutil")
+pytest.importorskip("gps3")
+
+from wirelessengine import WirelessEngine  # noqa: E402
+
+_CORPUS_DIR = os.path.join(os.path.dirname(__file__), "data", "iw_scans")
+
+
+def _comparable(networks: dict) -> dict:
+    """Return {key: toJsondict()} with the wall-clock timestamps removed."""
+    result = {}
+    for key, net in networks.items():
+        d = net.toJsondict()
+        del d["firstseen"]
+        del d["lastseen"]
+        result[key] = d
+    return result
+
+
+def _corpus_files() -> list:
+    return sorted(glob.glob(os.path.join(_CORPUS_DIR, "*.txt")))
+
+
+class TestRecordedScans(unittest.TestCase):
+    """Recorded scans parse to their expected networks."""
+
+    def test_corpus_present(self):
+        self.assertGreater(len(_corpus_files()), 0)
+
+    def test_recorded_scans_match_expected(self):
+        for scan_file in _corpus_files():
+            with self.subTest(scan=os.path.basename(scan_file)):
+                with open(scan_file, "r") as f:
+                    scan_text = f.read()
+                with open(scan_file[:-4] + ".expected.json", "r") as f:
+                    expected = json.load(f)
+
+                result = _comparable(WirelessEngine.parseIWoutput(scan_text))
+                self.assertEqual(result, expected)
+
+    def test_list_input_matches_string_input(self):
+        for scan_file in _corpus_files():
+            with self.subTest(scan=os.path.basename(scan_file)):
+                with open(scan_file, "r") as f:
+                    scan_text = f.read()
+
+                self.assertEqual(
+                    _comparable(WirelessEngine.parseIWoutput(scan_text.splitlines())),
+                    _comparable(WirelessEngine.parseIWoutput(scan_text)),
+                )
+
+
+class TestLineClassification(unittest.TestCase):
+    """Targeted checks on individual BSS blocks."""
+
+    def _parse_one(self, body: str):
+        text = "BSS 00:11:22:33:44:55(on wlan0)\n" + body
+        networks = WirelessEngine.parseIWoutput(text)
+        self.assertEqual(len(networks), 1)
+        return list(networks.values())[0]
+
+    def test_fields_from_typical_block(self):
+        net = self._parse_one(
+            "\tfreq: 5180\n"
+            "\tcapability: ESS Privacy (0x0011)\n"
+            "\tsignal: -58.00 dBm\n"
+            "\tSSID: lab\n"
+            "\tBSS Load:\n"
+            "\t\t * station count: 4\n"
+            "\t\t * channel utilisation: 51/255\n"
+            "\tHT operation:\n"
+            "\t\t * primary channel: 36\n"
+            "\t\t * secondary channel offset: above\n"
+            "\tRSN:\t * Version: 1\n"
+            "\t\t * Pairwise ciphers: CCMP TKIP\n"
+            "\t\t * Authentication suites: PSK\n"
+        )
+        self.assertEqual(net.ssid, "lab")
+        self.assertEqual(net.mode, "AP")
+        self.assertEqual(net.frequency, 5180)
+        self.assertEqual(net.signal, -58)
+        self.assertEqual(net.strongestsignal, -58)
+        self.assertEqual(net.channel, 36)
+        self.assertEqual(net.secondaryChannel, 40)
+        self.assertEqual(net.stationcount, 4)
+        self.assertEqual(net.utilization, 20.0)
+        self.assertEqual(net.cipher, "CCMP/TKIP")
+        self.assertEqual(net.security, "PSK")
+
+    def test_ssid_containing_other_keywords_falls_through(self):
+        """The SSID handler never consumed the line, so later fields still apply."""
+        net = self._parse_one(
+            "\tSSID: freq: 9999\n"
+            "\tDS Parameter set: channel 6\n"
+        )
+        self.assertEqual(net.ssid, "freq: 9999")
+        self.assertEqual(net.frequency, 9999)
+
+    def test_network_without_channel_is_dropped(self):
+        networks = WirelessEngine.parseIWoutput(
+            "BSS 00:11:22:33:44:55(on wlan0)\n"
+            "\tfreq: 2412\n"
+            "\tSSID: incomplete\n"
+        )
+        self.assertEqual(networks, {})
+
+    def test_lines_before_first_bss_ignored(self):
+        networks = WirelessEngine.parseIWoutput(
+            "\tSSID: orphan\n"
+            "\tDS Parameter set: channel 1\n"
+        )
+        self.assertEqual(networks, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+"""Tests for the sparrow-wifi network table model (sparrownetworkmodel).
+
+Covers:
+- Keyed row store: add, key lookup, replace, removal of scattered rows and
+  re-keying when a hidden SSID is learned.
+- Lazy cell formatting and the cached text being dropped on update.
+- Batched dataChanged / rowsRemoved ranges.
+- Proxy sorting on typed values (multi-channel strings, signal), filtering,
+  row insert/remove mapping and the selection following a re-sort.
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QPersistentModelIndex, Qt  # noqa: E402
+from PyQt5.QtGui import QColor  # noqa: E402
+
+from sparrownetworkmodel import (  # noqa: E402
+    COL_CHANNEL, COL_LASTSEEN, COL_SIGNAL, COL_SSID, COL_VENDOR,
+    NetworkRole, NetworkSortFilterProxyModel, NetworkTableModel, contiguousRanges,
+)
+from wirelessengine import WirelessNetwork  # noqa: E402
+
+
+def _net(mac, ssid="lab", channel=6, signal=-60):
+    net = WirelessNetwork()
+    net.macAddr = mac
+    net.ssid = ssid
+    net.channel = channel
+    net.frequency = 2437
+    net.signal = signal
+    net.lastSeen = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    net.firstSeen = datetime.datetime(2026, 1, 1, 11, 0, 0)
+    return net
+
+
+class _CountingVendor:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, macAddr):
+        self.calls += 1
+        return "Vendor-" + macAddr[:2]
+
+
+def _model(nets, vendor=None):
+    model = NetworkTableModel(vendor)
+    model.addNetworks([(n, None, QColor(Qt.GlobalColor.red)) for n in nets])
+    return model
+
+
+class TestContiguousRanges(unittest.TestCase):
+    def test_groups_runs(self):
+        self.assertEqual(contiguousRanges([7, 2, 3, 4, 9, 8]), [(2, 4), (7, 9)])
+
+    def test_merges_small_gaps(self):
+        self.assertEqual(contiguousRanges([1, 3, 4, 10], maxGap=1), [(1, 4), (10, 10)])
+
+    def test_empty_and_duplicates(self):
+        self.assertEqual(contiguousRanges([]), [])
+        self.assertEqual(contiguousRanges([5, 5]), [(5, 5)])
+
+
+class TestNetworkTableModel(unittest.TestCase):
+    def test_add_and_lookup(self):
+        nets = [_net("aa:00:00:00:00:%02x" % i) for i in range(3)]
+        model = _model(nets)
+        self.assertEqual(model.rowCount(), 3)
+        self.assertEqual(model.columnCount(), 14)
+        self.assertEqual(model.rowForKey(nets[2].getKey()), 2)
+        self.assertEqual(model.rowForKey("missing"), -1)
+        self.assertIs(model.index(1, COL_SSID).data(NetworkRole), nets[1])
+
+    def test_formats_lazily_and_caches(self):
+        vendor = _CountingVendor()
+        model = _model([_net("aa:00:00:00:00:01")], vendor)
+        self.assertEqual(vendor.calls, 0)
+        self.assertEqual(model.index(0, COL_LASTSEEN).data(), "01/01/2026 12:00:00")
+        self.assertEqual(model.index(0, COL_VENDOR).data(), "Vendor-aa")
+        self.assertEqual(model.cellText(0, COL_SIGNAL), "-60")
+        self.assertEqual(vendor.calls, 1)
+
+    def test_unknown_ssid_text(self):
+        model = _model([_net("aa:00:00:00:00:01", ssid="")])
+        self.assertEqual(model.cellText(0, COL_SSID), "<Unknown>")
+
+    def test_rows_updated_emits_one_range_per_run(self):
+        model = _model([_net("aa:%02x:00:00:00:00" % (i // 256) + ":%02x" % (i % 256)) for i in range(300)])
+        model.cellText(1, COL_SIGNAL)
+        ranges = []
+        model.dataChanged.connect(lambda tl, br: ranges.append((tl.row(), br.row())))
+
+        newer = _net(model.network(1).macAddr, signal=-40)
+        model.replaceNetwork(1, newer)
+        model.rowsUpdated([1, 2, 4, 200])
+
+        # Small gaps are merged into one range, far-apart rows are not
+        self.assertEqual(ranges, [(1, 4), (200, 200)])
+        self.assertEqual(model.cellText(1, COL_SIGNAL), "-40")
+
+    def test_rows_updated_rekeys_learned_ssid(self):
+        net = _net("aa:00:00:00:00:01", ssid="")
+        model = _model([net])
+        oldKey = net.getKey()
+        net.ssid = "found"
+        model.rowsUpdated([0])
+        self.assertEqual(model.rowForKey(oldKey), -1)
+        self.assertEqual(model.rowForKey(net.getKey()), 0)
+
+    def test_remove_scattered_rows(self):
+        nets = [_net("aa:00:00:00:00:%02x" % i) for i in range(6)]
+        model = _model(nets)
+        removed = []
+        model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+
+        model.removeNetworkRows([0, 1, 4])
+
+        self.assertEqual(removed, [(4, 4), (0, 1)])
+        self.assertEqual([n.macAddr for n in model.networks()],
+                         [nets[2].macAddr, nets[3].macAddr, nets[5].macAddr])
+        self.assertEqual(model.rowForKey(nets[5].getKey()), 2)
+
+    def test_clear(self):
+        model = _model([_net("aa:00:00:00:00:01")])
+        model.clear()
+        self.assertEqual(model.rowCount(), 0)
+        self.assertEqual(model.rowForKey("aa:00:00:00:00:01lab6"), -1)
+
+
+class TestNetworkSortFilterProxyModel(unittest.TestCase):
+    def _proxy(self, model):
+        proxy = NetworkSortFilterProxyModel()
+        proxy.setSourceModel(model)
+        return proxy
+
+    def _column(self, proxy, col):
+        return [proxy.index(r, col).data() for r in range(proxy.rowCount())]
+
+    def test_sorts_channels_numerically(self):
+        model = _model([_net("aa:00:00:00:00:01", channel=11),
+                        _net("aa:00:00:00:00:02", channel=3),
+                        _net("aa:00:00:00:00:03", channel=100)])
+        model.network(1).secondaryChannel = 7
+        model.network(1).bandwidth = 40
+        model.rowsUpdated([1])
+        proxy = self._proxy(model)
+        proxy.sort(COL_CHANNEL, Qt.SortOrder.AscendingOrder)
+        self.assertEqual([c.split('+')[0] for c in self._column(proxy, COL_CHANNEL)], ["3", "11", "100"])
+
+    def test_stays_sorted_after_update(self):
+        model = _model([_net("aa:00:00:00:00:01", signal=-70),
+                        _net("aa:00:00:00:00:02", signal=-50)])
+        proxy = self._proxy(model)
+        proxy.sort(COL_SIGNAL, Qt.SortOrder.DescendingOrder)
+        self.assertEqual(self._column(proxy, COL_SIGNAL), ["-50", "-70"])
+
+        model.replaceNetwork(0, _net("aa:00:00:00:00:01", signal=-30))
+        model.rowsUpdated([0])
+        self.assertEqual(self._column(proxy, COL_SIGNAL), ["-30", "-50"])
+        self.assertEqual(proxy.sourceRow(0), 0)
+
+    def test_stays_sorted_after_scattered_batch_update(self):
+        signals = [-90, -80, -70, -60, -50, -40]
+        model = _model([_net("aa:00:00:00:00:%02x" % i, signal=s) for i, s in enumerate(signals)])
+        proxy = self._proxy(model)
+        proxy.sort(COL_SIGNAL, Qt.SortOrder.DescendingOrder)
+
+        # Rows 0, 2 and 4 go out as three separate dataChanged ranges
+        for row, signal in ((0, -35), (2, -85), (4, -65)):
+            model.replaceNetwork(row, _net("aa:00:00:00:00:%02x" % row, signal=signal))
+        model.rowsUpdated([0, 2, 4])
+
+        self.assertEqual(self._column(proxy, COL_SIGNAL), ["-35", "-40", "-60", "-65", "-80", "-85"])
+
+    def test_filter_matches_mac_vendor_ssid(self):
+        model = _model([_net("aa:00:00:00:00:01", ssid="Office"),
+                        _net("bb:00:00:00:00:02", ssid="home")], _CountingVendor())
+        proxy = self._proxy(model)
+
+        proxy.setFilterText("OFF")
+        self.assertEqual(self._column(proxy, COL_SSID), ["Office"])
+        proxy.setFilterText("vendor-bb")
+        self.assertEqual(self._column(proxy, COL_SSID), ["home"])
+        proxy.setFilterText("")
+        self.assertEqual(proxy.rowCount(), 2)
+
+    def test_insert_and_remove_while_sorted_and_filtered(self):
+        model = _model([_net("aa:00:00:00:00:01", ssid="keep", signal=-70),
+                        _net("aa:00:00:00:00:02", ssid="drop", signal=-40)])
+        proxy = self._proxy(model)
+        proxy.sort(COL_SIGNAL, Qt.SortOrder.DescendingOrder)
+        proxy.setFilterText("keep")
+
+        model.addNetworks([(_net("aa:00:00:00:00:03", ssid="keep", signal=-50), None, QColor(Qt.GlobalColor.red)),
+                           (_net("aa:00:00:00:00:04", ssid="drop", signal=-30), None, QColor(Qt.GlobalColor.red))])
+        self.assertEqual(self._column(proxy, COL_SIGNAL), ["-50", "-70"])
+
+        model.removeNetworkRows([1, 2])
+        self.assertEqual(self._column(proxy, COL_SIGNAL), ["-70"])
+        self.assertEqual(proxy.sourceRow(0), 0)
+
+        proxy.setFilterText("")
+        self.assertEqual(self._column(proxy, COL_SIGNAL), ["-30", "-70"])
+
+    def test_persistent_index_follows_resort(self):
+        model = _model([_net("aa:00:00:00:00:01", signal=-70),
+                        _net("aa:00:00:00:00:02", signal=-50)])
+        proxy = self._proxy(model)
+        proxy.sort(COL_SIGNAL, Qt.SortOrder.DescendingOrder)
+        selected = QPersistentModelIndex(proxy.index(1, COL_SSID))
+        self.assertEqual(proxy.sourceRow(selected.row()), 0)
+
+        model.replaceNetwork(0, _net("aa:00:00:00:00:01", signal=-30))
+        model.rowsUpdated([0])
+
+        self.assertEqual(selected.row(), 0)
+        self.assertEqual(proxy.sourceRow(selected.row()), 0)
+
+    def test_source_row_of_no_selection(self):
+        proxy = self._proxy(_model([]))
+        self.assertEqual(proxy.sourceRow(-1), -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
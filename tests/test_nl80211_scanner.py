@@ -0,0 +1,349 @@
+"""Tests for the nl80211 netlink scan backend (sparrownl80211.NL80211Scanner).
+
+All tests are fully offline: a fake generic-netlink responder stands in for
+the kernel and replays the canned BSS dumps in tests/data/nl80211.
+
+Covers:
+- A dump of the same BSSes as tests/data/iw_scans/home_2ghz.txt produces the
+  same networks the iw text parser does.
+- IE decoding: RSN/WPA suites, HT/VHT operation, BSS load, SSID escaping.
+- Error handling: busy/down errors map to the iw exit codes, aborted scans,
+  missing nl80211 family raises NL80211Error.
+- WirelessEngine.scanForNetworks backend selection and iw fallback.
+"""
+
+from __future__ import annotations
+
+import errno
+import json
+import os
+import socket
+import struct
+import sys
+import unittest
+from collections import deque
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# wirelessengine pulls in dateutil and gps3 (via sparrowgps)
+pytest.importorskip("dateutil")
+pytest.importorskip("gps3")
+
+import sparrownl80211 as nl  # noqa: E402
+import wirelessengine  # noqa: E402
+from wirelessengine import WirelessEngine, WirelessNetwork  # noqa: E402
+
+_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+_FAMILY_ID = 0x1c
+_SCAN_GROUP = 5
+_IFINDEX = 3
+
+
+def _load_dump(name: str) -> bytes:
+    with open(os.path.join(_DATA_DIR, "nl80211", name), "rb") as f:
+        return f.read()
+
+
+def _comparable(networks: dict) -> dict:
+    result = {}
+    for key, net in networks.items():
+        d = net.toJsondict()
+        del d["firstseen"]
+        del d["lastseen"]
+        result[key] = d
+    return result
+
+
+def _error_msg(seq: int, err: int, orig: bytes = b"") -> bytes:
+    payload = struct.pack("=i", err) + orig[:16].ljust(16, b"\x00")
+    return struct.pack("=IHHII", 16 + len(payload), nl.NLMSG_ERROR, 0, seq, 0) + payload
+
+
+class FakeNetlinkSocket:
+    """Minimal generic-netlink responder driven by canned dump bytes."""
+
+    def __init__(self, dump: bytes = b"", family_errno: int = 0,
+                 trigger_errno: int = 0, abort: bool = False):
+        self.dump = dump
+        self.family_errno = family_errno
+        self.trigger_errno = trigger_errno
+        self.abort = abort
+        self.pending = deque()
+        self.requests = []
+        self.groups = []
+        self.closed = False
+
+    # socket API used by the scanner -------------------------------------
+    def settimeout(self, timeout):
+        pass
+
+    def setsockopt(self, level, option, value):
+        if level == nl.SOL_NETLINK and option == nl.NETLINK_ADD_MEMBERSHIP:
+            self.groups.append(value)
+
+    def close(self):
+        self.closed = True
+
+    def recv(self, size):
+        if not self.pending:
+            raise socket.timeout("no more canned replies")
+        return self.pending.popleft()
+
+    def send(self, data: bytes):
+        for msg_type, flags, seq, payload in nl.iterMessages(data):
+            cmd = payload[0]
+            attrs = nl.parseAttrs(payload, 4)
+            self.requests.append((msg_type, flags, cmd, attrs))
+
+            if msg_type == nl.GENL_ID_CTRL:
+                self._reply_family(seq, data)
+            elif cmd == nl.NL80211_CMD_TRIGGER_SCAN:
+                self._reply_trigger(seq, data)
+            elif cmd == nl.NL80211_CMD_GET_SCAN:
+                self._reply_dump(seq)
+        return len(data)
+
+    # responders ----------------------------------------------------------
+    def _reply_family(self, seq, request):
+        if self.family_errno:
+            self.pending.append(_error_msg(seq, -self.family_errno, request))
+            return
+
+        groups = nl.packAttr(1, nl.packAttrString(nl.CTRL_ATTR_MCAST_GRP_NAME, "config")
+                             + nl.packAttrU32(nl.CTRL_ATTR_MCAST_GRP_ID, 4))
+        groups += nl.packAttr(2, nl.packAttrString(nl.CTRL_ATTR_MCAST_GRP_NAME, "scan")
+                              + nl.packAttrU32(nl.CTRL_ATTR_MCAST_GRP_ID, _SCAN_GROUP))
+        attrs = nl.packAttrString(nl.CTRL_ATTR_FAMILY_NAME, "nl80211")
+        attrs += nl.packAttr(nl.CTRL_ATTR_FAMILY_ID, struct.pack("=H", _FAMILY_ID))
+        attrs += nl.packAttr(nl.CTRL_ATTR_MCAST_GROUPS | 0x8000, groups)
+        reply = nl.packMessage(nl.GENL_ID_CTRL, 0, seq, 1, attrs)
+        self.pending.append(reply + _error_msg(seq, 0, request))
+
+    def _reply_trigger(self, seq, request):
+        if self.trigger_errno:
+            self.pending.append(_error_msg(seq, -self.trigger_errno, request))
+            return
+
+        self.pending.append(_error_msg(seq, 0, request))
+        # Another interface finishing first must be ignored
+        other = nl.packMessage(_FAMILY_ID, 0, 0, nl.NL80211_CMD_NEW_SCAN_RESULTS,
+                               nl.packAttrU32(nl.NL80211_ATTR_IFINDEX, _IFINDEX + 1))
+        cmd = nl.NL80211_CMD_SCAN_ABORTED if self.abort else nl.NL80211_CMD_NEW_SCAN_RESULTS
+        event = nl.packMessage(_FAMILY_ID, 0, 0, cmd, nl.packAttrU32(nl.NL80211_ATTR_IFINDEX, _IFINDEX))
+        self.pending.append(other + event)
+
+    def _reply_dump(self, seq):
+        messages = []
+        for msg_type, flags, _, payload in nl.iterMessages(self.dump):
+            messages.append(struct.pack("=IHHII", 16 + len(payload), msg_type, flags, seq, 0)
+                            + payload + b"\x00" * (nl.nlaAlign(len(payload)) - len(payload)))
+        # Two BSSes per datagram, like a small receive buffer would give
+        for i in range(0, len(messages), 2):
+            self.pending.append(b"".join(messages[i:i + 2]))
+        self.pending.append(struct.pack("=IHHII", 20, nl.NLMSG_DONE, nl.NLM_F_MULTI, seq, 0) + b"\x00" * 4)
+
+
+def _scanner(fake: FakeNetlinkSocket) -> nl.NL80211Scanner:
+    return nl.NL80211Scanner(socketFactory=lambda: fake,
+                             networkFactory=WirelessNetwork,
+                             convertSSID=WirelessEngine.convertUnknownToString,
+                             interfaceIndex=lambda name: _IFINDEX)
+
+
+class TestScanParity(unittest.TestCase):
+    """The netlink backend agrees with the iw text parser."""
+
+    def test_home_dump_matches_iw_text_parse(self):
+        with open(os.path.join(_DATA_DIR, "iw_scans", "home_2ghz.expected.json"), "r") as f:
+            expected = json.load(f)
+
+        fake = FakeNetlinkSocket(_load_dump("home_2ghz.bin"))
+        ret_code, err_string, networks = _scanner(fake).scan("wlan0")
+
+        self.assertEqual(ret_code, 0)
+        self.assertEqual(err_string, "")
+        self.assertEqual(_comparable(networks), expected)
+        self.assertTrue(fake.closed)
+
+
+class TestIEDecoding(unittest.TestCase):
+    """Field extraction from the 5 GHz dump."""
+
+    @classmethod
+    def setUpClass(cls):
+        fake = FakeNetlinkSocket(_load_dump("office_5ghz.bin"))
+        _, _, networks = _scanner(fake).scan("wlan0")
+        cls.networks = {net.macAddr: net for net in networks.values()}
+
+    def test_entries_without_channel_dropped(self):
+        self.assertEqual(len(self.networks), 4)
+        self.assertNotIn("60:38:e0:b2:10:08", self.networks)
+
+    def test_vht_80(self):
+        net = self.networks["60:38:e0:b2:10:04"]
+        self.assertEqual(net.ssid, "Office-5G")
+        self.assertEqual(net.frequency, 5180)
+        self.assertEqual(net.signal, -58)
+        self.assertEqual(net.channel, 36)
+        self.assertEqual(net.secondaryChannelLocation, "above")
+        self.assertEqual(net.secondaryChannel, 40)
+        self.assertEqual(net.bandwidth, 80)
+        self.assertEqual(net.thirdChannel, 42)
+        self.assertEqual(net.stationcount, 17)
+        self.assertEqual(net.utilization, 43.92)
+        self.assertEqual(net.security, "IEEE 802.1X FT/IEEE 802.1X")
+        self.assertEqual(net.cipher, "CCMP")
+
+    def test_vht_160_sae(self):
+        net = self.networks["60:38:e0:b2:10:05"]
+        self.assertEqual(net.channel, 149)
+        self.assertEqual(net.secondaryChannelLocation, "below")
+        self.assertEqual(net.secondaryChannel, 145)
+        self.assertEqual(net.bandwidth, 160)
+        self.assertEqual(net.thirdChannel, 163)
+        self.assertEqual(net.security, "SAE")
+        self.assertEqual(net.cipher, "CCMP/GCMP-256")
+
+    def test_hidden_ssid(self):
+        net = self.networks["60:38:e0:b2:10:06"]
+        self.assertEqual(net.ssid, "<Unknown (8)>")
+        self.assertEqual(net.secondaryChannelLocation, "no")
+        self.assertEqual(net.security, "PSK")
+
+    def test_ssid_escaped_like_iw(self):
+        net = self.networks["60:38:e0:b2:10:07"]
+        self.assertEqual(net.ssid, "\\x20Caf\\xc3\\xa9\\x20")
+        self.assertEqual(net.mode, "AP")
+        self.assertEqual(net.security, "Open")
+
+
+class TestScanRequests(unittest.TestCase):
+    """What the scanner sends and how it handles kernel replies."""
+
+    def test_joins_scan_group_and_triggers_on_interface(self):
+        fake = FakeNetlinkSocket(_load_dump("home_2ghz.bin"))
+        _scanner(fake).scan("wlan0")
+
+        self.assertEqual(fake.groups, [_SCAN_GROUP])
+        trigger = [r for r in fake.requests if r[2] == nl.NL80211_CMD_TRIGGER_SCAN][0]
+        self.assertEqual(struct.unpack("=I", trigger[3][nl.NL80211_ATTR_IFINDEX])[0], _IFINDEX)
+        self.assertIn(nl.NL80211_ATTR_SCAN_SSIDS, trigger[3])
+        self.assertNotIn(nl.NL80211_ATTR_SCAN_FREQUENCIES, trigger[3])
+
+    def test_frequency_limits_scan(self):
+        fake = FakeNetlinkSocket(_load_dump("home_2ghz.bin"))
+        _scanner(fake).scan("wlan0", 2437)
+
+        trigger = [r for r in fake.requests if r[2] == nl.NL80211_CMD_TRIGGER_SCAN][0]
+        freqs = nl.parseAttrList(trigger[3][nl.NL80211_ATTR_SCAN_FREQUENCIES])
+        self.assertEqual([struct.unpack("=I", f)[0] for f in freqs], [2437])
+
+    def test_family_resolved_once(self):
+        scanner = _scanner(FakeNetlinkSocket(_load_dump("home_2ghz.bin")))
+        scanner.scan("wlan0")
+
+        fake = FakeNetlinkSocket(_load_dump("home_2ghz.bin"))
+        scanner.socketFactory = lambda: fake
+        ret_code, _, networks = scanner.scan("wlan0")
+
+        self.assertEqual(ret_code, 0)
+        self.assertEqual(len(networks), 5)
+        self.assertFalse([r for r in fake.requests if r[0] == nl.GENL_ID_CTRL])
+
+    def test_busy_maps_to_iw_exit_code(self):
+        fake = FakeNetlinkSocket(trigger_errno=errno.EBUSY)
+        ret_code, err_string, networks = _scanner(fake).scan("wlan0")
+
+        self.assertEqual(ret_code, WirelessNetwork.ERR_DEVICEBUSY)
+        self.assertIn("busy", err_string)
+        self.assertEqual(networks, {})
+
+    def test_netdown_maps_to_iw_exit_code(self):
+        fake = FakeNetlinkSocket(trigger_errno=errno.ENETDOWN)
+        ret_code, _, _ = _scanner(fake).scan("wlan0")
+        self.assertEqual(ret_code, WirelessNetwork.ERR_NETDOWN)
+
+    def test_aborted_scan_returns_nothing(self):
+        fake = FakeNetlinkSocket(_load_dump("home_2ghz.bin"), abort=True)
+        ret_code, _, networks = _scanner(fake).scan("wlan0")
+
+        self.assertEqual(ret_code, 0)
+        self.assertEqual(networks, {})
+
+    def test_unknown_interface(self):
+        def no_such_device(name):
+            raise OSError(errno.ENODEV, "No such device")
+
+        scanner = nl.NL80211Scanner(socketFactory=FakeNetlinkSocket,
+                                    networkFactory=WirelessNetwork,
+                                    convertSSID=WirelessEngine.convertUnknownToString,
+                                    interfaceIndex=no_such_device)
+        ret_code, _, networks = scanner.scan("wlan9")
+        self.assertEqual(ret_code, (-errno.ENODEV) & 0xff)
+        self.assertEqual(networks, {})
+
+    def test_missing_family_raises(self):
+        fake = FakeNetlinkSocket(family_errno=errno.ENOENT)
+        with self.assertRaises(nl.NL80211Error):
+            _scanner(fake).scan("wlan0")
+        self.assertTrue(fake.closed)
+
+
+class TestBackendSelection(unittest.TestCase):
+    """WirelessEngine.scanForNetworks picks nl80211 and falls back to iw."""
+
+    def setUp(self):
+        self._saved = (wirelessengine.scanBackend, wirelessengine._nl80211Scanner)
+
+    def tearDown(self):
+        wirelessengine.scanBackend, wirelessengine._nl80211Scanner = self._saved
+
+    def test_auto_uses_netlink(self):
+        wirelessengine.scanBackend = "auto"
+        wirelessengine._nl80211Scanner = _scanner(FakeNetlinkSocket(_load_dump("home_2ghz.bin")))
+
+        with patch.object(WirelessEngine, "scanForNetworksIW") as iw_scan:
+            ret_code, _, networks = WirelessEngine.scanForNetworks("wlan0")
+
+        iw_scan.assert_not_called()
+        self.assertEqual(ret_code, 0)
+        self.assertEqual(len(networks), 5)
+
+    def test_auto_falls_back_to_iw_and_stays_there(self):
+        wirelessengine.scanBackend = "auto"
+        wirelessengine._nl80211Scanner = _scanner(FakeNetlinkSocket(family_errno=errno.ENOENT))
+
+        with patch.object(WirelessEngine, "scanForNetworksIW", return_value=(0, "", {})) as iw_scan:
+            result = WirelessEngine.scanForNetworks("wlan0", 2412)
+
+        iw_scan.assert_called_once_with("wlan0", 2412, False)
+        self.assertEqual(result, (0, "", {}))
+        self.assertEqual(WirelessEngine.getScanBackend(), "iw")
+
+    def test_nl80211_only_does_not_fall_back(self):
+        wirelessengine.scanBackend = "nl80211"
+        wirelessengine._nl80211Scanner = _scanner(FakeNetlinkSocket(family_errno=errno.ENOENT))
+
+        with patch.object(WirelessEngine, "scanForNetworksIW") as iw_scan:
+            ret_code, _, networks = WirelessEngine.scanForNetworks("wlan0")
+
+        iw_scan.assert_not_called()
+        self.assertEqual(ret_code, WirelessNetwork.ERR_OPNOTSUPPORTED)
+        self.assertEqual(networks, {})
+
+    def test_iw_backend_skips_netlink(self):
+        wirelessengine.scanBackend = "iw"
+        with patch.object(WirelessEngine, "scanForNetworksIW", return_value=(0, "", {})) as iw_scan:
+            WirelessEngine.scanForNetworks("wlan0")
+        iw_scan.assert_called_once()
+
+    def test_set_unknown_backend_rejected(self):
+        with self.assertRaises(ValueError):
+            WirelessEngine.setScanBackend("ioctl")
+
+
+if __name__ == "__main__":
+    unittest.main()
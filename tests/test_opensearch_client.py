@@ -167,26 +167,30 @@ class TestEnsureInitialIndex:
 # ---------------------------------------------------------------------------
 
 class TestBulk:
-    def test_bulk_returns_helpers_result(self):
+    def test_bulk_posts_gzipped_ndjson(self):
+        import gzip
         client, mock_os = _make_client()
+        mock_os.transport.perform_request.return_value = {
+            "errors": False, "items": [{"index": {"_id": "1", "status": 201}}],
+        }
         actions = [{"_index": "test", "_id": "1", "_source": {"f": "v"}}]
 
-        with patch("opensearchpy.helpers.bulk", return_value=(1, [])):
-            success, errors = client.bulk(actions)
+        success, errors = client.bulk(actions)
 
         assert success == 1
         assert errors == []
+        args, kwargs = mock_os.transport.perform_request.call_args
+        assert args == ("POST", "/_bulk")
+        assert kwargs["headers"]["content-encoding"] == "gzip"
+        assert gzip.decompress(kwargs["body"]) == (
+            b'{"index":{"_index":"test","_id":"1"}}\n{"f":"v"}\n'
+        )
 
-    def test_bulk_passes_chunk_size_and_flags(self):
+    def test_bulk_empty_actions_sends_nothing(self):
         client, mock_os = _make_client()
 
-        with patch("opensearchpy.helpers.bulk", return_value=(0, [])) as mock_bulk:
-            client.bulk([])
-
-        _, kwargs = mock_bulk.call_args
-        assert kwargs.get("chunk_size") == 500
-        assert kwargs.get("raise_on_error") is False
-        assert kwargs.get("raise_on_exception") is False
+        assert client.bulk([]) == (0, [])
+        mock_os.transport.perform_request.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,216 @@
+"""Tests for sparrow_elastic.pipeline and the bridge's pipeline stages.
+
+Covers:
+- StageMetrics counters and error accounting
+- DropOldestQueue eviction when the build stage falls behind
+- StageWorkers draining on stop and surviving handler errors
+- FlushWorker: wake(), metrics only for real flushes
+- A slow flush does not hold up fetch/build, and flush_buffer's return value
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+_REPO_ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, _REPO_ROOT)
+
+from sparrow_elastic.bulk_buffer import BulkBuffer
+from sparrow_elastic.pipeline import DropOldestQueue, FlushWorker, StageMetrics, StageWorkers
+
+
+def _load_bridge():
+    bridge_path = os.path.join(_REPO_ROOT, "sparrow-elastic.py")
+    spec = importlib.util.spec_from_file_location("_sparrow_elastic_bridge_pipeline", bridge_path)
+    assert spec is not None and spec.loader is not None, \
+        f"Failed to load spec for {bridge_path}"
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+bridge = _load_bridge()
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestStageMetrics(unittest.TestCase):
+
+    def test_record_and_snapshot(self):
+        m = StageMetrics("build")
+        m.record(0.2, items=10)
+        m.record(0.4, ok=False)
+        snap = m.snapshot()
+        self.assertEqual(snap["runs"], 2)
+        self.assertEqual(snap["items"], 10)
+        self.assertEqual(snap["errors"], 1)
+        self.assertAlmostEqual(snap["avg_s"], 0.3)
+        self.assertAlmostEqual(snap["max_s"], 0.4)
+        self.assertAlmostEqual(snap["last_s"], 0.4)
+
+    def test_time_counts_exceptions(self):
+        m = StageMetrics("fetch")
+        with self.assertRaises(ValueError):
+            with m.time():
+                raise ValueError("boom")
+        with m.time():
+            pass
+        self.assertEqual(m.snapshot()["runs"], 2)
+        self.assertEqual(m.snapshot()["errors"], 1)
+
+
+class TestDropOldestQueue(unittest.TestCase):
+
+    def test_full_queue_drops_oldest(self):
+        q = DropOldestQueue(2)
+        self.assertFalse(q.offer(1))
+        self.assertFalse(q.offer(2))
+        self.assertTrue(q.offer(3))
+        self.assertEqual(q.dropped, 1)
+        self.assertEqual([q.get_nowait(), q.get_nowait()], [2, 3])
+
+
+class TestStageWorkers(unittest.TestCase):
+
+    def test_stop_drains_queue(self):
+        seen = []
+        q = DropOldestQueue(100)
+        m = StageMetrics("build")
+        workers = StageWorkers("build", q, seen.append, 2, m)
+        workers.start()
+        for i in range(50):
+            q.offer(i)
+        workers.stop(drain=True)
+        self.assertEqual(sorted(seen), list(range(50)))
+        self.assertEqual(m.snapshot()["runs"], 50)
+
+    def test_handler_error_keeps_worker_alive(self):
+        seen = []
+
+        def handler(item):
+            if item == 0:
+                raise RuntimeError("bad batch")
+            seen.append(item)
+
+        q = DropOldestQueue(10)
+        m = StageMetrics("build")
+        workers = StageWorkers("build", q, handler, 1, m)
+        workers.start()
+        q.offer(0)
+        q.offer(1)
+        workers.stop()
+        self.assertEqual(seen, [1])
+        self.assertEqual(m.snapshot()["errors"], 1)
+
+
+class TestFlushWorker(unittest.TestCase):
+
+    def test_wake_and_metrics(self):
+        calls = []
+
+        def flush_once():
+            calls.append(1)
+            return len(calls) == 1  # only the first call "sends" anything
+
+        m = StageMetrics("flush")
+        worker = FlushWorker("flush", flush_once, 60.0, m)
+        worker.start()
+        worker.wake()
+        self.assertTrue(_wait_for(lambda: len(calls) >= 1))
+        worker.wake()
+        self.assertTrue(_wait_for(lambda: len(calls) >= 2))
+        worker.stop()
+        self.assertEqual(m.snapshot()["runs"], 1)
+
+    def test_slow_flush_does_not_block_build(self):
+        release = threading.Event()
+        client = MagicMock()
+
+        def slow_bulk(actions):
+            release.wait(5.0)
+            return len(actions), []
+
+        client.bulk.side_effect = slow_bulk
+        buf = BulkBuffer()
+        state = bridge.FlushState(flush_interval=0.0, batch_size=1)
+        flusher = FlushWorker(
+            "flush-wifi",
+            lambda: bridge.flush_buffer(client, buf, state, "sparrow-wifi", [False]),
+            0.01, StageMetrics("flush-wifi"),
+        )
+        flusher.start()
+        buf.append({"_id": "first"})
+        self.assertTrue(_wait_for(lambda: client.bulk.call_count == 1))
+
+        # The flusher is stuck in bulk(); the build stage must keep going.
+        q = DropOldestQueue(4)
+        workers = StageWorkers("build", q, lambda n: buf.append({"_id": n}), 1, StageMetrics("build"))
+        workers.start()
+        for i in range(3):
+            q.offer(i)
+        self.assertTrue(_wait_for(lambda: buf.depth() == 3, timeout=1.0))
+        workers.stop()
+
+        release.set()
+        self.assertTrue(_wait_for(lambda: buf.depth() == 0))
+        flusher.stop()
+
+
+class TestBridgeStages(unittest.TestCase):
+
+    def test_flush_buffer_reports_whether_bulk_was_sent(self):
+        client = MagicMock()
+        client.bulk.return_value = (1, [])
+        buf = BulkBuffer()
+        state = bridge.FlushState(flush_interval=60.0, batch_size=1)
+        self.assertFalse(bridge.flush_buffer(client, buf, state, "a", [False]))
+        buf.append({"_id": "x"})
+        self.assertTrue(bridge.flush_buffer(client, buf, state, "a", [False]))
+        client.bulk.side_effect = ConnectionError("down")
+        buf.append({"_id": "y"})
+        self.assertTrue(bridge.flush_buffer(client, buf, state, "a", [False]))
+        self.assertEqual(buf.depth(), 1)
+
+    def test_index_batch_builds_actions(self):
+        net = {
+            "macAddr": "02:11:22:33:44:55", "ssid": "lab", "mode": "Master",
+            "security": "WPA2", "cipher": "CCMP", "privacy": "CCMP",
+            "frequency": 2412, "channel": 1, "secondaryChannel": 0, "bandwidth": 20,
+            "signal": -50, "stationcount": 0, "utilization": 0.0,
+            "firstseen": "2026-05-01 10:00:00", "lastseen": "2026-05-01 10:00:00",
+            "strongestsignal": -45, "strongestlat": "0", "strongestlon": "0", "strongestalt": "0",
+        }
+        obs = {"id": "s1", "hostname": "s1", "geo": None, "gps_status": "unlocked"}
+        batch = bridge.ScanBatch("wifi", [net, {"bogus": True}], obs,
+                                 datetime(2026, 5, 1, 10, 0, 5, tzinfo=timezone.utc))
+        buf = BulkBuffer()
+        added = bridge.index_batch(batch, buf, "sparrow-wifi", {"fingerbank_api_key": ""})
+        actions = buf.swap()
+        self.assertEqual(added, len(actions))
+        self.assertGreaterEqual(added, 1)
+        self.assertEqual(actions[0]["_index"], "sparrow-wifi")
+        self.assertEqual(actions[0]["_id"], bridge.compute_doc_id(actions[0]["_source"]))
+
+    def test_pipeline_flag_defaults(self):
+        args = bridge._build_parser().parse_args([])
+        self.assertEqual(args.build_workers, 1)
+        self.assertEqual(args.queue_size, 8)
+        self.assertEqual(args.stats_interval, 300.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,242 @@
+"""Tests for the agent's controller push client (sparrowpush).
+
+A small HTTP server stands in for the controller.
+
+Covers:
+- Queued payloads are coalesced into one gzip'd NDJSON batch request.
+- Controllers without /api/ingest/batch get one request per payload.
+- Undelivered batches go to the journal, survive a restart and are resent
+  in order once the controller is back.
+- The journal size bound drops the oldest batches.
+- Rejected batches are dropped rather than retried.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, List, Optional, Tuple, cast
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sparrowpush import ControllerPushClient, PushJournal  # noqa: E402
+
+
+class _Cfg:
+    def __init__(self, url):
+        self.controllerURL = url
+        self.controllerAPIKey = "secret"
+        self.controllerAgentName = "pi1"
+        self.pushEnabled = True
+
+
+class _ControllerServer(HTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _ControllerHandler)
+        self.requests: List[Tuple[str, Optional[str], List[Any]]] = []
+        self.status = 202
+        self.hasBatch = True
+
+
+class _ControllerHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = cast(_ControllerServer, self.server)
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+
+        if server.status != 202 or (self.path == "/api/ingest/batch" and not server.hasBatch):
+            status = server.status if server.status != 202 else 404
+            self.send_response(status)
+            self.end_headers()
+            return
+
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        lines = [json.loads(line) for line in body.decode().splitlines() if line]
+        server.requests.append((self.path, self.headers.get("X-API-Key"), lines))
+
+        self.send_response(202)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+
+class TestControllerPushClient(unittest.TestCase):
+    def setUp(self):
+        self.server = _ControllerServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d/" % self.server.server_address[1]
+        self.journalDir = tempfile.mkdtemp()
+        self.clients = []
+        self.batchDelay = ControllerPushClient.MAX_BATCH_DELAY
+        ControllerPushClient.MAX_BATCH_DELAY = 0.01
+
+    def tearDown(self):
+        ControllerPushClient.MAX_BATCH_DELAY = self.batchDelay
+        for client in self.clients:
+            client.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.journalDir)
+
+    def _client(self):
+        client = ControllerPushClient(_Cfg(self.url), self.journalDir)
+        self.clients.append(client)
+        return client
+
+    def _payloads(self):
+        return [line["payload"]["n"] for _, _, lines in self.server.requests for line in lines]
+
+    def test_payloads_batched(self):
+        client = self._client()
+        for i in range(5):
+            client.enqueue("wifi", "wlan0", {"n": i})
+
+        client.sendItems(client.collectBatch(timeout=0))
+
+        self.assertEqual(len(self.server.requests), 1)
+        path, apiKey, lines = self.server.requests[0]
+        self.assertEqual(path, "/api/ingest/batch")
+        self.assertEqual(apiKey, "secret")
+        self.assertEqual([line["payload"]["n"] for line in lines], [0, 1, 2, 3, 4])
+        self.assertEqual(lines[0]["agent_name"], "pi1")
+
+        stats = client.getStats()
+        self.assertEqual(stats["payloadssent"], 5)
+        self.assertEqual(stats["batchessent"], 1)
+        self.assertTrue(stats["batchendpoint"])
+
+    def test_batch_size_limit(self):
+        client = self._client()
+        for i in range(ControllerPushClient.MAX_BATCH_PAYLOADS + 3):
+            client.enqueue("wifi", "wlan0", {"n": i})
+
+        self.assertEqual(len(client.collectBatch(timeout=0)), ControllerPushClient.MAX_BATCH_PAYLOADS)
+        self.assertEqual(len(client.collectBatch(timeout=0)), 3)
+
+    def test_fallback_to_single_requests(self):
+        self.server.hasBatch = False
+        client = self._client()
+        for i in range(3):
+            client.enqueue("wifi", "wlan0", {"n": i})
+
+        client.sendItems(client.collectBatch(timeout=0))
+
+        self.assertEqual([path for path, _, _ in self.server.requests], ["/api/ingest"] * 3)
+        self.assertEqual(self._payloads(), [0, 1, 2])
+        self.assertFalse(client.batchSupported)
+
+    def test_outage_journals_and_recovers(self):
+        self.server.status = 503
+        client = self._client()
+        client.enqueue("wifi", "wlan0", {"n": 0})
+        client.sendItems(client.collectBatch(timeout=0))
+
+        # In backoff: later payloads go straight to the journal
+        client.enqueue("wifi", "wlan0", {"n": 1})
+        client.sendItems(client.collectBatch(timeout=0))
+        stats = client.getStats()
+        self.assertEqual(stats["journalbatches"], 2)
+        self.assertEqual(stats["payloadsjournaled"], 2)
+        self.assertEqual(stats["sendfailures"], 1)
+        self.assertGreater(stats["backoff"], 0)
+
+        # Agent restart picks the journal back up
+        restarted = self._client()
+        self.assertEqual(len(restarted.journal), 2)
+
+        self.server.status = 202
+        restarted.sendJournal()
+        self.assertEqual(self._payloads(), [0, 1])
+        self.assertEqual(len(restarted.journal), 0)
+        self.assertEqual(os.listdir(self.journalDir), [])
+
+    def test_backoff_grows(self):
+        self.server.status = 500
+        client = self._client()
+        client.enqueue("wifi", "wlan0", {"n": 0})
+        client.sendItems(client.collectBatch(timeout=0))
+        first = client.backoff
+
+        client.nextAttempt = 0
+        client.sendJournal()
+        self.assertEqual(client.backoff, first * 2)
+        self.assertEqual(len(client.journal), 1)
+
+    def test_rejected_batch_dropped(self):
+        self.server.status = 401
+        client = self._client()
+        client.enqueue("wifi", "wlan0", {"n": 0})
+        client.sendItems(client.collectBatch(timeout=0))
+
+        stats = client.getStats()
+        self.assertEqual(stats["payloadsdropped"], 1)
+        self.assertEqual(stats["journalbatches"], 0)
+        self.assertEqual(client.backoff, 0)
+
+    def test_run_and_stop(self):
+        client = self._client()
+        client.start()
+        client.enqueue("wifi", "wlan0", {"n": 0})
+        deadline = time.monotonic() + 5
+        while not self.server.requests and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        client.stop()
+        client.join(5)
+        self.assertFalse(client.is_alive())
+        self.assertEqual(self._payloads(), [0])
+
+
+def _peek(journal):
+    entry = journal.peek()
+    assert entry is not None
+    return entry
+
+
+class TestPushJournal(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_bounded(self):
+        journal = PushJournal(self.dir, maxBytes=25)
+        self.assertEqual(journal.append(b"a" * 10, 1, 1.0), 0)
+        self.assertEqual(journal.append(b"b" * 10, 2, 2.0), 0)
+        self.assertEqual(journal.append(b"c" * 10, 3, 3.0), 1)
+
+        self.assertEqual(journal.payloadCount, 5)
+        self.assertEqual(_peek(journal)[1], b"b" * 10)
+        self.assertEqual(journal.oldestTime(), 2.0)
+
+    def test_order_kept_across_reload(self):
+        journal = PushJournal(self.dir)
+        for i in range(12):
+            journal.append(str(i).encode(), 1, float(i))
+
+        reloaded = PushJournal(self.dir)
+        bodies = []
+        while len(reloaded) > 0:
+            sequence, body, _, _ = _peek(reloaded)
+            bodies.append(int(body))
+            reloaded.remove(sequence)
+
+        self.assertEqual(bodies, list(range(12)))
+        reloaded.append(b"x", 1, 0.0)
+        self.assertEqual(reloaded.batches[0][0], 13)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""Tests for incremental agent recordings (sparrowrecording).
+
+Covers:
+- Only changed rows are appended to the observation log.
+- Compaction folds the log into the snapshot and refreshes the CSV.
+- writeCSV/close produce the same CSV a full rewrite would.
+- rebuildRecording recovers a CSV from an interrupted recording, including
+  a torn last log line.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sparrowrecording import (  # noqa: E402
+    LOG_SUFFIX,
+    SNAPSHOT_SUFFIX,
+    IncrementalRecording,
+    hasRecordingSidecar,
+    isRecordingSidecar,
+    rebuildRecording,
+)
+
+HEADER = "macAddr,SSID,Signal"
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+class TestIncrementalRecording(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.csv = os.path.join(self.dir, "host_wifi.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_header_only_csv_on_start(self):
+        IncrementalRecording(self.csv, HEADER)
+        self.assertEqual(_read(self.csv), [HEADER])
+
+    def test_unchanged_rows_not_logged(self):
+        rec = IncrementalRecording(self.csv, HEADER)
+        self.assertTrue(rec.update("aa", "aa,lab,-60"))
+        rec.flush()
+        size = os.path.getsize(self.csv + LOG_SUFFIX)
+
+        self.assertFalse(rec.update("aa", "aa,lab,-60"))
+        rec.flush()
+        self.assertEqual(os.path.getsize(self.csv + LOG_SUFFIX), size)
+
+        rec.update("aa", "aa,lab,-55")
+        rec.flush()
+        self.assertGreater(os.path.getsize(self.csv + LOG_SUFFIX), size)
+
+    def test_log_growth_follows_changes(self):
+        rec = IncrementalRecording(self.csv, HEADER)
+        for i in range(500):
+            rec.update("net%d" % i, "net%d,lab,-60" % i)
+        rec.flush()
+        before = os.path.getsize(self.csv + LOG_SUFFIX)
+
+        rec.update("net7", "net7,lab,-40")
+        rec.flush()
+        self.assertLess(os.path.getsize(self.csv + LOG_SUFFIX) - before, 100)
+
+    def test_compaction(self):
+        rec = IncrementalRecording(self.csv, HEADER)
+        rec.update("aa", "aa,lab,-60")
+        rec.flush()
+
+        # Log passes the snapshot size and the minimum
+        with patch.object(IncrementalRecording, "MIN_COMPACT_BYTES", 0):
+            rec.update("bb", "bb,lab,-70")
+            rec.flush()
+
+        self.assertEqual(os.path.getsize(self.csv + LOG_SUFFIX), 0)
+        self.assertEqual(_read(self.csv), [HEADER, "aa,lab,-60", "bb,lab,-70"])
+
+    def test_write_csv_on_demand(self):
+        rec = IncrementalRecording(self.csv, HEADER)
+        rec.update("aa", "aa,lab,-60")
+        rec.update("bb", "bb,lab,-70")
+        rec.update("aa", "aa,lab,-50")
+        rec.flush()
+        self.assertEqual(_read(self.csv), [HEADER])
+
+        rec.writeCSV()
+        self.assertEqual(_read(self.csv), [HEADER, "aa,lab,-50", "bb,lab,-70"])
+
+    def test_close_removes_sidecars(self):
+        rec = IncrementalRecording(self.csv, HEADER)
+        rec.update("aa", "aa,lab,-60")
+        rec.close()
+
+        self.assertFalse(hasRecordingSidecar(self.csv))
+        self.assertEqual(_read(self.csv), [HEADER, "aa,lab,-60"])
+        self.assertEqual(os.listdir(self.dir), ["host_wifi.csv"])
+
+    def test_rebuild_after_crash(self):
+        rec = IncrementalRecording(self.csv, HEADER)
+        rec.update("aa", "aa,lab,-60")
+        rec.flush()
+        rec.compact()
+        rec.update("bb", "bb,lab,-70")
+        rec.update("aa", "aa,lab,-40")
+        rec.flush()
+        # Simulate the crash: drop the log handle without compacting
+        assert rec.logFile is not None
+        rec.logFile.close()
+
+        with open(self.csv + LOG_SUFFIX, "a") as f:
+            f.write('["cc", "cc,la')
+        os.remove(self.csv)
+
+        self.assertTrue(rebuildRecording(self.csv))
+        self.assertEqual(_read(self.csv), [HEADER, "aa,lab,-40", "bb,lab,-70"])
+
+    def test_rebuild_without_sidecars(self):
+        self.assertFalse(rebuildRecording(self.csv))
+        self.assertFalse(os.path.exists(self.csv))
+
+    def test_sidecar_names(self):
+        self.assertTrue(isRecordingSidecar("x.csv" + LOG_SUFFIX))
+        self.assertTrue(isRecordingSidecar("x.csv" + SNAPSHOT_SUFFIX))
+        self.assertFalse(isRecordingSidecar("x.csv"))
+
+
+if __name__ == "__main__":
+    unittest.main()
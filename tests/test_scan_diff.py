@@ -0,0 +1,203 @@
+"""Tests for incremental scan results (sparrowscandiff).
+
+Covers:
+- NetworkDiffTracker generations: added, changed (signal threshold and other
+  fields), removed, and the full-list fallback for stale or foreign clients.
+- NetworkDiffMirror rebuilding the agent's list from diff responses, including
+  lastseen/GPS refresh of unchanged networks.
+- WirelessNetworkMirror returning WirelessNetwork objects.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import unittest
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sparrowscandiff import NetworkDiffMirror, NetworkDiffTracker, networkDictKey  # noqa: E402
+
+
+def _net(mac, signal=-60, ssid="lab", channel=6, lastseen="2026-01-01 00:00:00", lat="0.0", **extra):
+    d = {
+        "type": "wifi-ap", "macAddr": mac, "ssid": ssid, "mode": "AP",
+        "security": "PSK", "privacy": "CCMP", "cipher": "CCMP",
+        "frequency": 2437, "channel": channel, "secondaryChannel": 0,
+        "secondaryChannelLocation": "", "thirdChannel": 0, "signal": signal,
+        "stationcount": -1, "utilization": -1.0, "strongestsignal": signal,
+        "bandwidth": 20, "firstseen": lastseen, "lastseen": lastseen,
+        "lat": lat, "lon": "0.0", "alt": "0.0", "speed": "0.0", "gpsvalid": "False",
+        "strongestlat": lat, "strongestlon": "0.0", "strongestalt": "0.0",
+        "strongestspeed": "0.0", "strongestgpsvalid": "False",
+    }
+    d.update(extra)
+    return d
+
+
+def _scan(tracker, nets, errCode=0):
+    result = {"errCode": errCode, "errString": "", "gps": {"latitude": 0.0}, "networks": nets}
+    tracker.update(result)
+    # Round-trip like the HTTP response would
+    return json.loads(json.dumps(result))
+
+
+def _diff(tracker, since, epoch=None):
+    return json.loads(json.dumps(tracker.changesSince(since, epoch)))
+
+
+class TestNetworkDiffTracker(unittest.TestCase):
+    def test_full_response_is_stamped(self):
+        tracker = NetworkDiffTracker()
+        result = _scan(tracker, [_net("aa")])
+        self.assertEqual(result["generation"], 1)
+        self.assertEqual(result["epoch"], tracker.epoch)
+
+    def test_added_changed_removed(self):
+        tracker = NetworkDiffTracker()
+        _scan(tracker, [_net("aa"), _net("bb"), _net("cc")])
+        _scan(tracker, [_net("aa", signal=-61), _net("bb", signal=-70), _net("dd")])
+
+        diff = _diff(tracker, 1, tracker.epoch)
+        self.assertFalse(diff["full"])
+        self.assertEqual(diff["generation"], 2)
+        self.assertEqual([n["macAddr"] for n in diff["added"]], ["dd"])
+        self.assertEqual([n["macAddr"] for n in diff["changed"]], ["bb"])
+        self.assertEqual(diff["removed"], [networkDictKey(_net("cc"))])
+
+    def test_small_signal_drift_is_not_a_change(self):
+        tracker = NetworkDiffTracker()
+        _scan(tracker, [_net("aa", signal=-60)])
+        _scan(tracker, [_net("aa", signal=-62)])
+        _scan(tracker, [_net("aa", signal=-61)])
+
+        diff = _diff(tracker, 1)
+        self.assertEqual(diff["changed"], [])
+
+        # Drift is measured against what was last reported, not the previous scan
+        _scan(tracker, [_net("aa", signal=-63)])
+        self.assertEqual(len(_diff(tracker, 1)["changed"]), 1)
+
+    def test_volatile_fields_ignored(self):
+        tracker = NetworkDiffTracker()
+        _scan(tracker, [_net("aa")])
+        _scan(tracker, [_net("aa", lastseen="2026-01-01 00:00:05", lat="38.1")])
+        self.assertEqual(_diff(tracker, 1)["changed"], [])
+
+    def test_other_field_change_reported(self):
+        tracker = NetworkDiffTracker()
+        _scan(tracker, [_net("aa")])
+        _scan(tracker, [_net("aa", stationcount=3)])
+        self.assertEqual(len(_diff(tracker, 1)["changed"]), 1)
+
+    def test_readded_network_is_added_not_removed(self):
+        tracker = NetworkDiffTracker()
+        _scan(tracker, [_net("aa")])
+        _scan(tracker, [])
+        _scan(tracker, [_net("aa")])
+
+        diff = _diff(tracker, 1)
+        self.assertEqual(diff["removed"], [])
+        self.assertEqual(len(diff["added"]), 1)
+
+    def test_full_fallback(self):
+        tracker = NetworkDiffTracker()
+        _scan(tracker, [_net("aa")])
+
+        self.assertTrue(_diff(tracker, 1, tracker.epoch + "0")["full"])
+        self.assertTrue(_diff(tracker, 5)["full"])
+
+        for _ in range(NetworkDiffTracker.MAX_HISTORY + 1):
+            _scan(tracker, [_net("aa")])
+        diff = _diff(tracker, 1)
+        self.assertTrue(diff["full"])
+        self.assertEqual(len(diff["networks"]), 1)
+
+    def test_failed_scan_keeps_state(self):
+        tracker = NetworkDiffTracker()
+        _scan(tracker, [_net("aa")])
+        result = _scan(tracker, [], errCode=240)
+        self.assertEqual(result["generation"], 1)
+
+        diff = _diff(tracker, 1)
+        self.assertEqual(diff["errCode"], 240)
+        self.assertEqual(diff["removed"], [])
+
+
+class TestNetworkDiffMirror(unittest.TestCase):
+    def _run(self, scans):
+        tracker = NetworkDiffTracker()
+        mirror = NetworkDiffMirror()
+        networks = {}
+        for nets in scans:
+            full = _scan(tracker, nets)
+            query = mirror.getQueryString()
+            if query:
+                since = int(query.split("since=")[1].split("&")[0])
+                response = _diff(tracker, since, mirror.epoch)
+            else:
+                response = full
+            errCode, _, networks, _ = mirror.apply(response)
+            self.assertEqual(errCode, 0)
+        return networks
+
+    def test_first_request_has_no_query(self):
+        self.assertEqual(NetworkDiffMirror().getQueryString(), "")
+
+    def test_mirror_tracks_agent(self):
+        networks = self._run([
+            [_net("aa"), _net("bb"), _net("cc")],
+            [_net("aa", signal=-75), _net("bb"), _net("dd")],
+            [_net("aa", signal=-75, lat="38.1"), _net("dd", lat="38.1")],
+        ])
+        self.assertEqual(sorted(n["macAddr"] for n in networks.values()), ["aa", "dd"])
+        self.assertEqual(networks[networkDictKey(_net("aa"))]["signal"], -75)
+        # Unchanged networks pick up the latest position
+        self.assertEqual(networks[networkDictKey(_net("aa"))]["lat"], "38.1")
+        self.assertEqual(networks[networkDictKey(_net("dd"))]["lat"], "38.1")
+
+    def test_error_response(self):
+        mirror = NetworkDiffMirror()
+        errCode, _, networks, _ = mirror.apply({"errCode": 156, "errString": "down", "networks": []})
+        self.assertEqual(errCode, 156)
+        self.assertEqual(networks, {})
+        self.assertEqual(mirror.getQueryString(), "")
+
+    def test_agent_without_diff_support(self):
+        mirror = NetworkDiffMirror()
+        mirror.apply({"errCode": 0, "errString": "", "networks": [_net("aa")]})
+        self.assertEqual(mirror.getQueryString(), "")
+
+
+class TestWirelessNetworkMirror(unittest.TestCase):
+    def setUp(self):
+        pytest.importorskip("dateutil")
+        pytest.importorskip("gps3")
+        from wirelessengine import WirelessNetworkMirror
+        self.mirror = WirelessNetworkMirror()
+        self.tracker = NetworkDiffTracker()
+
+    def test_objects_follow_diffs(self):
+        full = _scan(self.tracker, [_net("aa"), _net("bb")])
+        _, _, first = self.mirror.applyResponse(full)
+        self.assertEqual(len(first), 2)
+
+        _scan(self.tracker, [_net("aa", signal=-80, lat="38.1"), _net("bb", lat="38.1")])
+        errCode, _, second = self.mirror.applyResponse(_diff(self.tracker, 1))
+        self.assertEqual(errCode, 0)
+
+        aa = second[networkDictKey(_net("aa"))]
+        bb = second[networkDictKey(_net("bb"))]
+        self.assertEqual(aa.signal, -80)
+        self.assertEqual(bb.gps.latitude, 38.1)
+        self.assertFalse(bb.foundInList)
+        # Refreshed copies, not the objects handed out last time
+        self.assertIsNot(bb, first[networkDictKey(_net("bb"))])
+        self.assertEqual(first[networkDictKey(_net("bb"))].gps.latitude, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,6 +18,7 @@ import json
 import os
 import socket
 import sys
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -517,6 +518,55 @@ class TestFlushState(unittest.TestCase):
         self.assertFalse(fs.is_due(0))
 
 
+# ---------------------------------------------------------------------------
+# Tests: flush_buffer spill replay
+# ---------------------------------------------------------------------------
+
+class TestFlushBufferReplay(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        from sparrow_elastic.spill_log import SpillLog
+        self._tmp = tempfile.TemporaryDirectory()
+        self.buf = bridge.BulkBuffer(max_size=10, spill=SpillLog(self._tmp.name))
+        self.state = bridge.FlushState(flush_interval=0.0, batch_size=1000)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_spilled_actions_replayed_before_live_buffer(self):
+        self.buf.spill([{"_id": "old"}])
+        self.buf.append({"_id": "new"})
+        client = MagicMock()
+        client.bulk.return_value = (1, [])
+
+        self.assertTrue(bridge.flush_buffer(client, self.buf, self.state, "a", [False]))
+        batches = [[a["_id"] for a in c.args[0]] for c in client.bulk.call_args_list]
+        self.assertEqual(batches, [["old"], ["new"]])
+        self.assertEqual(self.buf.spill_pending(), 0)
+
+    def test_failed_replay_keeps_segment_and_live_buffer(self):
+        self.buf.spill([{"_id": "old"}])
+        self.buf.append({"_id": "new"})
+        client = MagicMock()
+        client.bulk.side_effect = ConnectionError("cluster down")
+
+        self.assertTrue(bridge.flush_buffer(client, self.buf, self.state, "a", [False]))
+        self.assertEqual(client.bulk.call_count, 1)
+        self.assertEqual(self.buf.spill_pending(), 1)
+        self.assertEqual(self.buf.depth(), 1)
+
+    def test_failed_replay_waits_a_flush_interval(self):
+        self.buf.spill([{"_id": "old"}])
+        state = bridge.FlushState(flush_interval=60.0, batch_size=1000)
+        state._last_flush = time.monotonic() - 120.0
+        client = MagicMock()
+        client.bulk.side_effect = ConnectionError("cluster down")
+
+        self.assertTrue(bridge.flush_buffer(client, self.buf, state, "a", [False]))
+        self.assertFalse(state.is_due(self.buf.depth()))
+
+
 if __name__ == "__main__":
     unittest.main()
 
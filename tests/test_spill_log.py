@@ -0,0 +1,136 @@
+"""Tests for sparrow_elastic.spill_log.SpillLog.
+
+Covers:
+- write / peek / commit round trip, oldest segment first
+- Segments left by a previous run are replayed after restart
+- Checksum mismatch and leftover temp files are discarded
+- Byte and age limits drop the oldest segments and count them
+- peek() reads the segment without holding the lock
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from typing import List, Tuple
+
+from sparrow_elastic.spill_log import SpillLog
+
+
+def _actions(start: int, count: int) -> list:
+    return [{"_op_type": "index", "_index": "test", "_id": str(i), "_source": {"n": i}}
+            for i in range(start, start + count)]
+
+
+def _peek(log: SpillLog) -> Tuple[int, List[dict]]:
+    segment = log.peek()
+    assert segment is not None
+    return segment
+
+
+class TestSpillLog(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_round_trip_in_order(self):
+        log = SpillLog(self.dir)
+        self.assertEqual(log.write(_actions(0, 3)), 3)
+        self.assertEqual(log.write(_actions(3, 2)), 2)
+        self.assertEqual(log.pending_docs(), 5)
+
+        seq, batch = _peek(log)
+        self.assertEqual([a["_id"] for a in batch], ["0", "1", "2"])
+        # Not removed until committed.
+        self.assertEqual(_peek(log)[0], seq)
+        log.commit(seq)
+
+        seq, batch = _peek(log)
+        self.assertEqual([a["_id"] for a in batch], ["3", "4"])
+        log.commit(seq)
+        self.assertIsNone(log.peek())
+        self.assertEqual(log.stats()["spilled"], 5)
+        self.assertEqual(log.stats()["replayed"], 5)
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_recovers_segments_after_restart(self):
+        log = SpillLog(self.dir)
+        log.write(_actions(0, 2))
+        log.write(_actions(2, 2))
+        with open(os.path.join(self.dir, ".segment.tmp-abc"), "w") as fh:
+            fh.write("partial")
+
+        reopened = SpillLog(self.dir)
+        self.assertEqual(reopened.pending_docs(), 4)
+        self.assertEqual(_peek(reopened)[1][0]["_id"], "0")
+        reopened.write(_actions(4, 1))
+        self.assertEqual(sorted(os.listdir(self.dir)), [
+            "segment-0000000001.ndjson", "segment-0000000002.ndjson", "segment-0000000003.ndjson",
+        ])
+
+    def test_checksum_mismatch_is_discarded(self):
+        log = SpillLog(self.dir)
+        log.write(_actions(0, 2))
+        log.write(_actions(2, 1))
+        path = os.path.join(self.dir, "segment-0000000001.ndjson")
+        with open(path, "rb") as fh:
+            data = fh.read()
+        with open(path, "wb") as fh:
+            fh.write(data[:-5])  # truncated by a crash
+
+        seq, batch = _peek(log)
+        self.assertEqual([a["_id"] for a in batch], ["2"])
+        self.assertEqual(log.stats()["dropped"], 2)
+        self.assertFalse(os.path.exists(path))
+
+    def test_byte_limit_drops_oldest(self):
+        probe = SpillLog(os.path.join(self.dir, "probe"))
+        probe.write(_actions(30, 10))
+        segment_bytes = probe.stats()["pending_bytes"]
+
+        log = SpillLog(os.path.join(self.dir, "log"), max_bytes=segment_bytes * 5 // 2)
+        for n in range(4):
+            log.write(_actions(n * 10, 10))
+        stats = log.stats()
+        self.assertEqual(stats["segments"], 2)
+        self.assertEqual(stats["dropped"], 20)
+        self.assertEqual(_peek(log)[1][0]["_id"], "20")
+
+    def test_age_limit_expires_segments(self):
+        now = [1000.0]
+        log = SpillLog(self.dir, max_age_seconds=60.0, clock=lambda: now[0])
+        log.write(_actions(0, 3))
+        now[0] += 30.0
+        log.write(_actions(3, 1))
+        now[0] += 45.0  # first segment is now 75 s old
+
+        seq, batch = _peek(log)
+        self.assertEqual([a["_id"] for a in batch], ["3"])
+        self.assertEqual(log.stats()["dropped"], 3)
+
+    def test_peek_reads_without_lock(self):
+        log = SpillLog(self.dir)
+        log.write(_actions(0, 2))
+        read = log._read
+        locked = []
+
+        def recording_read(segment):
+            locked.append(log._lock.locked())
+            return read(segment)
+
+        log._read = recording_read
+        self.assertEqual(len(_peek(log)[1]), 2)
+        self.assertEqual(locked, [False])
+
+
+if __name__ == "__main__":
+    unittest.main()
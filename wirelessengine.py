@@ -26,9 +26,18 @@ import datetime
 from dateutil import parser
 import json
 import copy
+import time
 from time import sleep
+from threading import Thread
 from sparrowgps import SparrowGPS
 from sparrowcommon import stringtobool
+from sparrowscandiff import NetworkDiffMirror
+
+try:
+    from sparrownl80211 import NL80211Scanner, NL80211Error
+    hasNL80211 = True
+except:
+    hasNL80211 = False
 
 # ------------------  Global channel to frequency definitions ------------------------------
 channelToFreq = {}
@@ -131,6 +140,19 @@ def _findInterfaceApp():
 # where iwconfig has been removed (Ubuntu 25.04+, etc).
 _iwTool = None
 
+# ------------------  Scan backend selection ------------------------------
+# 'auto' scans over nl80211 netlink and falls back to the iw subprocess if
+# netlink/nl80211 isn't usable, 'iw' always runs iw, 'nl80211' never runs iw.
+SCAN_BACKENDS = ['auto', 'iw', 'nl80211']
+scanBackend = 'auto'
+_nl80211Scanner = None
+
+def _getNL80211Scanner():
+    global _nl80211Scanner
+    if _nl80211Scanner is None and hasNL80211:
+        _nl80211Scanner = NL80211Scanner(networkFactory=WirelessNetwork, convertSSID=WirelessEngine.convertUnknownToString)
+    return _nl80211Scanner
+
 def findIwTool():
     """Return 'iwconfig' if available, else 'iw' if available, else None."""
     global _iwTool
@@ -471,6 +493,54 @@ class WirelessNetwork(object):
     def getKey(self):
         return self.macAddr + self.ssid+str(self.channel)
         
+class WirelessNetworkMirror(NetworkDiffMirror):
+    # NetworkDiffMirror that also hands back WirelessNetwork objects.  Only added or
+    # changed networks go through createFromJsonDict (and its date parsing); the rest
+    # are copies of the previous object with lastSeen and GPS refreshed.
+    def __init__(self):
+        super().__init__()
+        self.wirelessNetworks = {}
+        
+    def reset(self):
+        super().reset()
+        self.wirelessNetworks = {}
+        
+    def applyResponse(self, responseDict):
+        errCode, errString, networks, updatedKeys = self.apply(responseDict)
+        
+        if errCode != 0:
+            return errCode, errString, {}
+            
+        # Unchanged networks only exist in diff responses, which always carry 'seen'
+        seen = responseDict.get('seen')
+        if seen:
+            lastSeen = parser.parse(seen['lastseen'])
+            
+        wirelessNetworks = {}
+        
+        for curKey, curDict in networks.items():
+            prevNet = self.wirelessNetworks.get(curKey)
+            
+            if (prevNet is None) or (curKey in updatedKeys):
+                curNet = WirelessNetwork.createFromJsonDict(curDict)
+            else:
+                curNet = copy.copy(prevNet)
+                curNet.gps = SparrowGPS()
+                curNet.gps.latitude = float(curDict['lat'])
+                curNet.gps.longitude = float(curDict['lon'])
+                curNet.gps.altitude = float(curDict['alt'])
+                curNet.gps.speed = float(curDict['speed'])
+                curNet.gps.isValid = stringtobool(curDict['gpsvalid'])
+                curNet.lastSeen = lastSeen
+                # populateTable marks the objects it has already placed
+                curNet.foundInList = False
+                
+            wirelessNetworks[curKey] = curNet
+            
+        self.wirelessNetworks = wirelessNetworks
+        
+        return errCode, errString, dict(wirelessNetworks)
+        
 # Module-level compiled regex patterns for parseIWoutput() — compiled once, not per-call
 _P_BSS = re.compile(r'^BSS (.*?)\(')
 _P_SSID = re.compile('^.+?SSID: +(.*)')
@@ -491,6 +561,190 @@ _P_THIRDFREQ = re.compile('^.*?center freq segment 1: *([^ \\t]+).*')
 _P_STATIONCOUNT = re.compile('.*station count: ([0-9]+)')
 _P_UTILIZATION = re.compile('.*channel utilisation: ([0-9]+)/255')
 
+# ------------------  Single-pass iw line handlers ------------------------------
+# Each handler applies one of the field patterns above to a line that is already
+# known to contain that field's keyword.  Handlers return True when the line has
+# been consumed (the old parser's 'continue'), False to let later handlers try.
+
+def _iwSSID(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_SSID, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.ssid = WirelessEngine.convertUnknownToString(fieldValue)
+        
+    # SSID lines never stopped the remaining checks
+    return False
+    
+def _iwCapability(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_ESS, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.mode = "AP"
+        # Had issue with WEP not showing up.
+        # If capability has "ESS Privacy" there's something there.
+        # If it's PSK, etc. there will be other RSN fields, etc.
+        # So for now start by assuming WEP
+        
+        # See: https://wiki.archlinux.org/index.php/Wireless_network_configuration
+        fieldValue = WirelessEngine.getFieldValue(_P_ESS_PRIVACY, curLine)
+        
+        if (len(fieldValue) > 0):
+            curNetwork.security = "WEP"
+            curNetwork.privacy = "WEP"
+            
+        return True
+        
+    fieldValue = WirelessEngine.getFieldValue(_P_IBSS, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.mode = "Ad Hoc"
+        curNetwork.security = "[Ad-Hoc] Open"
+
+        fieldValue = WirelessEngine.getFieldValue(_P_IBSS_PRIVACY, curLine)
+        
+        if (len(fieldValue) > 0):
+            curNetwork.security = "[Ad-Hoc] WEP"
+            curNetwork.privacy = "WEP"
+            
+        return True
+        
+    return False
+    
+def _iwStationCount(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_STATIONCOUNT, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.stationcount = int(fieldValue)
+        return True
+        
+    return False
+    
+def _iwUtilization(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_UTILIZATION, curLine)
+    
+    if (len(fieldValue) > 0):
+        utilization = round(float(fieldValue)  / 255.0 * 100.0 * 100.0) / 100.0
+        curNetwork.utilization = utilization
+        return True
+        
+    return False
+    
+def _iwAuthSuites(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_AUTH_SUITES, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.security = fieldValue
+        return True
+        
+    return False
+    
+def _iwPairwiseCiphers(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_PW_CIPHERS, curLine)
+    fieldValue = fieldValue.replace(' ', '/')
+    
+    if (len(fieldValue) > 0):
+        curNetwork.privacy = fieldValue
+        curNetwork.cipher = fieldValue
+        return True
+        
+    return False
+    
+def _iwParamChannel(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_PARAM_CHANNEL, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.channel = int(fieldValue)
+        return True
+        
+    return False
+    
+def _iwPrimaryChannel(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_PRIMARY_CHANNEL, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.channel = int(fieldValue)
+        return True
+        
+    return False
+    
+def _iwFrequency(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_FREQ, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.frequency = int(fieldValue)
+        return True
+        
+    return False
+    
+def _iwSignal(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_SIGNAL, curLine)
+    
+    # This test is different.  dBm is negative so can't test > 0.  10dBm is really high so lets use that
+    if (len(fieldValue) > 0):
+        curNetwork.signal = int(fieldValue)
+        curNetwork.strongestsignal = curNetwork.signal
+        return True
+        
+    return False
+    
+def _iwChannelWidth(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_BW, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.bandwidth = int(fieldValue)
+        return True
+        
+    return False
+    
+def _iwSecondaryChannel(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_SECONDARY, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.secondaryChannelLocation = fieldValue
+        if (fieldValue == 'above'):
+            curNetwork.secondaryChannel = curNetwork.channel + 4
+        elif (fieldValue == 'below'):
+            curNetwork.secondaryChannel = curNetwork.channel - 4
+        # else it'll say 'no secondary'
+        
+        return True
+        
+    return False
+    
+def _iwThirdChannel(curNetwork, curLine):
+    fieldValue = WirelessEngine.getFieldValue(_P_THIRDFREQ, curLine)
+    
+    if (len(fieldValue) > 0):
+        curNetwork.thirdChannel = int(fieldValue)
+        return True
+        
+    return False
+    
+# (keyword, handler) in the precedence order the fields were historically checked.
+# Every field pattern requires its keyword literally, so a line without any of
+# these keywords can't set anything.  Note: _P_HT has no capture group and so
+# never produced a value; it's intentionally not in the table.
+_IW_FIELDS = [
+    ('SSID: ', _iwSSID),
+    ('capability:', _iwCapability),
+    ('station count: ', _iwStationCount),
+    ('channel utilisation: ', _iwUtilization),
+    ('Authentication suites:', _iwAuthSuites),
+    ('Pairwise ciphers:', _iwPairwiseCiphers),
+    ('DS Parameter set: channel ', _iwParamChannel),
+    ('primary channel: ', _iwPrimaryChannel),
+    ('freq:', _iwFrequency),
+    ('signal:', _iwSignal),
+    ('* channel width:', _iwChannelWidth),
+    ('secondary channel offset:', _iwSecondaryChannel),
+    ('center freq segment 1:', _iwThirdChannel),
+]
+
+_IW_KEYWORD_ORDER = {curKeyword: i for i, (curKeyword, _) in enumerate(_IW_FIELDS)}
+_IW_FIELD_HANDLERS = [curHandler for _, curHandler in _IW_FIELDS]
+# Zero-width lookahead so overlapping keywords on the same line are all reported
+_P_IW_KEYWORDS = re.compile('(?=(' + '|'.join(re.escape(curKeyword) for curKeyword, _ in _IW_FIELDS) + '))')
+
 class WirelessEngine(object):
     def __init__(self):
         super().__init__()
@@ -538,6 +792,7 @@ class WirelessEngine(object):
         
         return quality
 
+    @staticmethod
     def convertUnknownToString(ssid):
         if '\\x00' not in ssid:
             return ssid
@@ -647,6 +902,131 @@ class WirelessEngine(object):
 
     def getNetworksAsJson(interfaceName, gpsData, huntChannelList=None):
         # This is only used by the remote agent to get and return networks
+        retCode, errString, retVal = WirelessEngine.getNetworksAsDict(interfaceName, gpsData, huntChannelList)
+        
+        jsonstr = json.dumps(retVal)
+        
+        return retCode, errString, jsonstr
+        
+    def mergeNetworks(wirelessNetworks, newNetworks):
+        # Merge by key.  A network heard by more than one scan keeps the strongest reading.
+        for curNet in newNetworks.values():
+            curKey = curNet.getKey()
+            pastNet = wirelessNetworks.get(curKey)
+            
+            if (pastNet is None) or (curNet.signal >= pastNet.signal):
+                if pastNet is not None:
+                    curNet.strongestsignal = max(curNet.strongestsignal, pastNet.strongestsignal)
+                wirelessNetworks[curKey] = curNet
+            elif curNet.strongestsignal > pastNet.strongestsignal:
+                pastNet.strongestsignal = curNet.strongestsignal
+                
+    def huntFrequencies(interfaceName, frequencyList, interfaceLock=None):
+        # Scans each frequency in turn on one interface.  retCode/errString are from the last frequency.
+        wirelessNetworks = {}
+        retCode = 0
+        errString = ""
+        
+        for curFrequency in frequencyList:
+            # Handle if the device reports busy with some retries
+            retries = 0
+            retCode = WirelessNetwork.ERR_DEVICEBUSY
+            while (retCode == WirelessNetwork.ERR_DEVICEBUSY) and (retries < 3):
+                # Handle retries in case we get a busy response
+                if interfaceLock is not None:
+                    with interfaceLock:
+                        retCode, errString, tmpWirelessNetworks = WirelessEngine.scanForNetworks(interfaceName,curFrequency )
+                else:
+                    retCode, errString, tmpWirelessNetworks = WirelessEngine.scanForNetworks(interfaceName,curFrequency )
+                retries += 1
+                if retCode == WirelessNetwork.ERR_DEVICEBUSY:
+                    sleep(0.2)
+            
+            WirelessEngine.mergeNetworks(wirelessNetworks, tmpWirelessNetworks)
+            
+        return retCode, errString, wirelessNetworks
+        
+    @staticmethod
+    def huntScan(interfaceList, huntChannelList, interfaceLocks=None):
+        # Splits the hunt frequencies round-robin across interfaces and scans them
+        # concurrently, one thread per interface.  interfaceLocks is {interface: Lock}
+        # (the agent's lockList) so other users of a radio are kept out while it scans.
+        #
+        # Returns (retCode, errString, wirelessNetworks, timing) where timing is
+        # {interface: {'frequencies': [...], 'seconds': float, 'errCode': int, 'errString': str}}.
+        # retCode is 0 if any interface scanned successfully.
+        assignments = {}
+        for curInterface in interfaceList:
+            assignments[curInterface] = []
+            
+        for i, curFrequency in enumerate(huntChannelList):
+            assignments[interfaceList[i % len(interfaceList)]].append(curFrequency)
+            
+        results = {}
+        
+        def huntWorker(curInterface, frequencyList):
+            startTime = time.monotonic()
+            curLock = None
+            if interfaceLocks is not None:
+                curLock = interfaceLocks.get(curInterface)
+                
+            try:
+                retCode, errString, wirelessNetworks = WirelessEngine.huntFrequencies(curInterface, frequencyList, curLock)
+            except Exception as e:
+                retCode, errString, wirelessNetworks = -1, str(e), {}
+                
+            results[curInterface] = (retCode, errString, wirelessNetworks, time.monotonic() - startTime)
+            
+        threads = []
+        for curInterface in interfaceList:
+            if len(assignments[curInterface]) == 0:
+                continue
+                
+            curThread = Thread(target=huntWorker, args=(curInterface, assignments[curInterface]))
+            curThread.start()
+            threads.append(curThread)
+            
+        for curThread in threads:
+            curThread.join()
+            
+        wirelessNetworks = {}
+        timing = {}
+        retCode = None
+        errString = ""
+        
+        # Merge in interface order so results are deterministic
+        for curInterface in interfaceList:
+            if curInterface not in results:
+                continue
+                
+            curRetCode, curErrString, curNetworks, elapsed = results[curInterface]
+            WirelessEngine.mergeNetworks(wirelessNetworks, curNetworks)
+            
+            timing[curInterface] = {'frequencies': assignments[curInterface], 'seconds': round(elapsed, 3),
+                                    'errCode': curRetCode, 'errString': curErrString}
+            
+            if curRetCode == 0:
+                retCode = 0
+                errString = ""
+            elif retCode is None:
+                retCode = curRetCode
+                errString = curErrString
+                
+        if retCode is None:
+            retCode = 0
+            
+        return retCode, errString, wirelessNetworks, timing
+        
+    @staticmethod
+    def getNetworksAsDict(interfaceName, gpsData, huntChannelList=None, huntInterfaces=None, interfaceLocks=None):
+        # Same response as getNetworksAsJson before serialization, so the agent can
+        # diff and push it without a json round-trip.
+        #
+        # huntInterfaces: extra radios to share a hunt with.  The hunt frequencies are
+        # split across interfaceName + huntInterfaces and scanned in parallel, and the
+        # response gets an 'interfacetiming' entry.
+        huntTiming = None
+        
         if (huntChannelList is None) or (len(huntChannelList) == 0):
             # This code handles the thought that "what if we query for networks and the interface
             # reports busy (it does happen if we query too fast.)
@@ -659,27 +1039,23 @@ class WirelessEngine(object):
                 retries += 1
                 if retCode == WirelessNetwork.ERR_DEVICEBUSY:
                     sleep(0.4)
+        elif huntInterfaces:
+            interfaceList = [interfaceName]
+            for curInterface in huntInterfaces:
+                if curInterface not in interfaceList:
+                    interfaceList.append(curInterface)
+                    
+            retCode, errString, wirelessNetworks, huntTiming = WirelessEngine.huntScan(interfaceList, huntChannelList, interfaceLocks)
         else:
-            wirelessNetworks = {}
-            for curFrequency in huntChannelList:
-                # Handle if the device reports busy with some retries
-                retries = 0
-                retCode = WirelessNetwork.ERR_DEVICEBUSY
-                while (retCode == WirelessNetwork.ERR_DEVICEBUSY) and (retries < 3):
-                    # Handle retries in case we get a busy response
-                    retCode, errString, tmpWirelessNetworks = WirelessEngine.scanForNetworks(interfaceName,curFrequency )
-                    retries += 1
-                    if retCode == WirelessNetwork.ERR_DEVICEBUSY:
-                        sleep(0.2)
-                
-                for curKey in tmpWirelessNetworks.keys():
-                    curNet = tmpWirelessNetworks[curKey]
-                    wirelessNetworks[curNet.getKey()] = tmpWirelessNetworks[curNet.getKey()]
+            retCode, errString, wirelessNetworks = WirelessEngine.huntFrequencies(interfaceName, huntChannelList)
             
         retVal = {}
         retVal['errCode'] = retCode
         retVal['errString'] = errString
         
+        if huntTiming is not None:
+            retVal['interfacetiming'] = huntTiming
+        
         netList = []
         
         for curKey in wirelessNetworks.keys():
@@ -702,11 +1078,56 @@ class WirelessEngine(object):
         
         retVal['networks'] = netList
         
-        jsonstr = json.dumps(retVal)
+        return retCode, errString, retVal
         
-        return retCode, errString, jsonstr
+    @staticmethod
+    def setScanBackend(backendName):
+        global scanBackend
+        if backendName not in SCAN_BACKENDS:
+            raise ValueError('Unknown scan backend ' + str(backendName) + '.  Use one of: ' + ', '.join(SCAN_BACKENDS))
+            
+        if backendName == 'nl80211' and not hasNL80211:
+            raise ValueError('The nl80211 scan backend is not available on this platform')
+            
+        scanBackend = backendName
+        
+    @staticmethod
+    def getScanBackend():
+        return scanBackend
         
+    @staticmethod
     def scanForNetworks(interfaceName, frequency=0, printResults=False):
+        global scanBackend
+        
+        if scanBackend != 'iw':
+            scanner = _getNL80211Scanner()
+            
+            if scanner is not None:
+                try:
+                    retCode, errString, wirelessNetworks = scanner.scan(interfaceName, frequency)
+                    
+                    if (printResults):
+                        print('Return Code ' + str(retCode) + ' (nl80211)')
+                        for curNet in wirelessNetworks.values():
+                            print(curNet)
+                            
+                    return retCode, errString, wirelessNetworks
+                except NL80211Error as e:
+                    if scanBackend == 'nl80211':
+                        return WirelessNetwork.ERR_OPNOTSUPPORTED, str(e), {}
+                        
+                    print('nl80211 scan failed, falling back to iw: ' + str(e))
+                    
+                    if scanner.familyId is None:
+                        # Never got nl80211 going (no netlink, no driver support).  Don't keep trying.
+                        scanBackend = 'iw'
+            elif scanBackend == 'nl80211':
+                return WirelessNetwork.ERR_OPNOTSUPPORTED, 'The nl80211 scan backend is not available', {}
+                
+        return WirelessEngine.scanForNetworksIW(interfaceName, frequency, printResults)
+        
+    @staticmethod
+    def scanForNetworksIW(interfaceName, frequency=0, printResults=False):
         
         if frequency == 0:
             result = subprocess.run(['iw', 'dev', interfaceName, 'scan'], stdout=subprocess.PIPE,stderr=subprocess.STDOUT)
@@ -740,6 +1161,7 @@ class WirelessEngine(object):
             
         return retCode, errString, wirelessNetworks
         
+    @staticmethod
     def getFieldValue(p, curLine):
         matchobj = p.search(curLine)
         
@@ -753,27 +1175,12 @@ class WirelessEngine(object):
             
         return retVal
         
+    @staticmethod
     def parseIWoutput(iwOutput):
-        
-        # start (regex patterns are module-level constants _P_BSS, _P_SSID, etc.)
-        p_bss = _P_BSS
-        p_ssid = _P_SSID
-        p_ess = _P_ESS
-        p_ess_privacy = _P_ESS_PRIVACY
-        p_ibss = _P_IBSS
-        p_ibss_privacy = _P_IBSS_PRIVACY
-        p_auth_suites = _P_AUTH_SUITES
-        p_pw_ciphers = _P_PW_CIPHERS
-        p_param_channel = _P_PARAM_CHANNEL
-        p_primary_channel = _P_PRIMARY_CHANNEL
-        p_freq = _P_FREQ
-        p_signal = _P_SIGNAL
-        p_ht = _P_HT
-        p_bw = _P_BW
-        p_secondary = _P_SECONDARY
-        p_thirdfreq = _P_THIRDFREQ
-        p_stationcount = _P_STATIONCOUNT
-        p_utilization = _P_UTILIZATION
+        # Single pass over the iw output.  Each line is classified once with the
+        # combined keyword pattern and only the field handlers whose keyword is
+        # actually present on the line are run (in the original precedence order),
+        # so the field regexes above never run against lines that can't match.
         retVal = {}
         curNetwork = None
         now=datetime.datetime.now()
@@ -785,152 +1192,50 @@ class WirelessEngine(object):
         else:
             inputLines = iwOutput
             
+        keywordOrder = _IW_KEYWORD_ORDER
+        handlers = _IW_FIELD_HANDLERS
+        findKeywords = _P_IW_KEYWORDS.findall
+        
         for curLine in inputLines:
-            fieldValue = WirelessEngine.getFieldValue(p_bss, curLine)
+            if curLine.startswith('BSS '):
+                matchobj = _P_BSS.match(curLine)
                 
-            if (len(fieldValue) > 0):
-                # New object
-                if curNetwork is not None:
-                    # Store first
-                    if curNetwork.channel > 0:
-                        # I did see incomplete output from iw where not all the data was there
-                        retVal[curNetwork.getKey()] = curNetwork
-
-                # Create a new network.  BSSID will be the header for each network
-                curNetwork = WirelessNetwork()
-                curNetwork.lastSeen = now
-                curNetwork.firstSeen = now
-                curNetwork.macAddr = fieldValue
-                continue
+                if matchobj and len(matchobj.group(1)) > 0:
+                    # New object
+                    if curNetwork is not None:
+                        # Store first
+                        if curNetwork.channel > 0:
+                            # I did see incomplete output from iw where not all the data was there
+                            retVal[curNetwork.getKey()] = curNetwork
+
+                    # Create a new network.  BSSID will be the header for each network
+                    curNetwork = WirelessNetwork()
+                    curNetwork.lastSeen = now
+                    curNetwork.firstSeen = now
+                    curNetwork.macAddr = matchobj.group(1)
+                    continue
             
             if curNetwork is None:
                 # If we don't have a network object yet, then we haven't
                 # seen a BSSID so just keep going through the lines.
                 continue
 
-            fieldValue = WirelessEngine.getFieldValue(p_ssid, curLine)
-                
-            if (len(fieldValue) > 0):
-                curNetwork.ssid = WirelessEngine.convertUnknownToString(fieldValue)
-                
-            fieldValue = WirelessEngine.getFieldValue(p_ess, curLine)
-                
-            if (len(fieldValue) > 0):
-                curNetwork.mode = "AP"
-                # Had issue with WEP not showing up.
-                # If capability has "ESS Privacy" there's something there.
-                # If it's PSK, etc. there will be other RSN fields, etc.
-                # So for now start by assuming WEP
-                
-                # See: https://wiki.archlinux.org/index.php/Wireless_network_configuration
-                fieldValue = WirelessEngine.getFieldValue(p_ess_privacy, curLine)
-                    
-                if (len(fieldValue) > 0):
-                    curNetwork.security = "WEP"
-                    curNetwork.privacy = "WEP"
-                    
-                continue #Found the item
-                
-            fieldValue = WirelessEngine.getFieldValue(p_ibss, curLine)
-                
-            if (len(fieldValue) > 0):
-                curNetwork.mode = "Ad Hoc"
-                curNetwork.security = "[Ad-Hoc] Open"
-
-                fieldValue = WirelessEngine.getFieldValue(p_ibss_privacy, curLine)
-                    
-                if (len(fieldValue) > 0):
-                    curNetwork.security = "[Ad-Hoc] WEP"
-                    curNetwork.privacy = "WEP"
-                    
-                continue #Found the item
-
-            # Station count
-            fieldValue = WirelessEngine.getFieldValue(p_stationcount, curLine)
-            if (len(fieldValue) > 0):
-                curNetwork.stationcount = int(fieldValue)
-                continue #Found the item
-                
-            # Utilization
-            fieldValue = WirelessEngine.getFieldValue(p_utilization, curLine)
-            if (len(fieldValue) > 0):
-                utilization = round(float(fieldValue)  / 255.0 * 100.0 * 100.0) / 100.0
-                curNetwork.utilization = utilization
-                continue #Found the item
-                
-            # Auth suites
-            fieldValue = WirelessEngine.getFieldValue(p_auth_suites, curLine)
-                
-            if (len(fieldValue) > 0):
-                curNetwork.security = fieldValue
-                continue #Found the item
-                
-            # p = re.compile('.*?Group cipher: *(.*)')
-            fieldValue = WirelessEngine.getFieldValue(p_pw_ciphers, curLine)
-            fieldValue = fieldValue.replace(' ', '/')
-                
-            if (len(fieldValue) > 0):
-                curNetwork.privacy = fieldValue
-                curNetwork.cipher = fieldValue
-                continue #Found the item
-                
-            fieldValue = WirelessEngine.getFieldValue(p_param_channel, curLine)
-                
-            if (len(fieldValue) > 0):
-                curNetwork.channel = int(fieldValue)
-                continue #Found the item
-                
-            fieldValue = WirelessEngine.getFieldValue(p_primary_channel, curLine)
-                
-            if (len(fieldValue) > 0):
-                curNetwork.channel = int(fieldValue)
-                continue #Found the item
-                
-            fieldValue = WirelessEngine.getFieldValue(p_freq, curLine)
-                
-            if (len(fieldValue) > 0):
-                curNetwork.frequency = int(fieldValue)
-                continue #Found the item
-                
-            fieldValue = WirelessEngine.getFieldValue(p_signal, curLine)
-                
-            # This test is different.  dBm is negative so can't test > 0.  10dBm is really high so lets use that
-            if (len(fieldValue) > 0):
-                curNetwork.signal = int(fieldValue)
-                curNetwork.strongestsignal = curNetwork.signal
-                continue #Found the item
-                
-            fieldValue = WirelessEngine.getFieldValue(p_ht, curLine)
-                
-            if (len(fieldValue) > 0):
-                if (curNetwork.bandwidth == 20):
-                    curNetwork.bandwidth = 40
-                continue #Found the item
-                
-            fieldValue = WirelessEngine.getFieldValue(p_bw, curLine)
-                
-            if (len(fieldValue) > 0):
-                curNetwork.bandwidth = int(fieldValue)
-                continue #Found the item
-                
-            fieldValue = WirelessEngine.getFieldValue(p_secondary, curLine)
-                
-            if (len(fieldValue) > 0):
-                curNetwork.secondaryChannelLocation = fieldValue
-                if (fieldValue == 'above'):
-                    curNetwork.secondaryChannel = curNetwork.channel + 4
-                elif (fieldValue == 'below'):
-                    curNetwork.secondaryChannel = curNetwork.channel - 4
-                # else it'll say 'no secondary'
-                    
-                continue #Found the item
+            keywords = findKeywords(curLine)
+            
+            if not keywords:
+                # The vast majority of lines (IE dumps, rates, WPS, etc.)
+                continue
                 
-            fieldValue = WirelessEngine.getFieldValue(p_thirdfreq, curLine)
+            if len(keywords) == 1:
+                handlerIndexes = (keywordOrder[keywords[0]], )
+            else:
+                # Only really happens with free-form text like an SSID that contains
+                # another keyword.  Keep the original precedence order.
+                handlerIndexes = sorted(set(keywordOrder[curKeyword] for curKeyword in keywords))
                 
-            if (len(fieldValue) > 0):
-                curNetwork.thirdChannel = int(fieldValue)
-                    
-                continue #Found the item
+            for curIndex in handlerIndexes:
+                if handlers[curIndex](curNetwork, curLine):
+                    break #Found the item
                 
         # #### End loop ######
         